@@ -1,6 +1,20 @@
 """Calculator module with basic arithmetic operations and enhanced error handling."""
 
-import math
+from . import limits as _limits
+from .limits import DEFAULT_MAX_VALUE, get_max_value, set_max_value
+from .policy import (
+    DEFERRED,
+    STRICT,
+    TRUSTED,
+    DeferredRangeError,
+    _check_name as _check_policy,
+    active_policy as _active_policy,
+    check_deferred,
+    get_policy,
+    record_violation as _record_violation,
+    set_policy,
+    validation,
+)
 
 
 def _validate_number(value: object) -> None:
@@ -17,118 +31,184 @@ def _validate_number(value: object) -> None:
         raise TypeError(f"Expected int or float, got {type(value).__name__}")
 
 
-def _check_result_range(result: float | int) -> None:
+def _check_result_range(result: float | int, max_value: int | None = None) -> None:
     """
     Check if the result is within acceptable range.
     Raises OverflowError for results that are too large.
     
     Args:
         result: The result to check
+        max_value: Maximum absolute value for this check (default: the
+            process-wide limit, see set_max_value)
         
     Raises:
         OverflowError: If result is too large
     """
-    # Define a reasonable maximum value to prevent extremely large results
-    MAX_VALUE = 10**100
-    
-    # For floats, check if it's infinity or exceeds max value
-    if isinstance(result, float):
-        if math.isinf(result) or abs(result) > MAX_VALUE:
-            raise OverflowError(f"Result {result} is too large (max: {MAX_VALUE})")
-    
-    # For integers, check if absolute value exceeds max value
-    elif isinstance(result, int):
-        if abs(result) > MAX_VALUE:
-            raise OverflowError(f"Result {result} is too large (max: {MAX_VALUE})")
+    if max_value is None:
+        _limits.active.check(result)
+    else:
+        _limits.limit_for(max_value).check(result)
+
+
+def _defer_range_check(result: float | int, max_value: int | None = None) -> None:
+    """Range-check a result, recording a violation instead of raising it."""
+    try:
+        _check_result_range(result, max_value)
+    except OverflowError as e:
+        _record_violation(e)
 
 
-def add(a: float | int, b: float | int) -> float | int:
+def add(
+    a: float | int,
+    b: float | int,
+    *,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> float | int:
     """
     Add two numbers together.
     
     Args:
         a: First number (int or float)
         b: Second number (int or float)
+        policy: Validation policy for this call (default: the active policy)
+        max_value: Maximum absolute result for this call (default: the
+            process-wide limit)
         
     Returns:
         The sum of a and b
         
     Raises:
         TypeError: If either argument is not a number
-        OverflowError: If the result is too large
+        ValueError: If the policy is unknown
+        OverflowError: If the result is too large (recorded instead
+            under the deferred policy)
     """
-    _validate_number(a)
-    _validate_number(b)
+    mode = _active_policy.get().name if policy is None else _check_policy(policy)
+    if mode != TRUSTED:
+        _validate_number(a)
+        _validate_number(b)
     result = a + b
-    _check_result_range(result)
+    if mode == DEFERRED:
+        _defer_range_check(result, max_value)
+    else:
+        _check_result_range(result, max_value)
     return result
 
 
-def subtract(a: float | int, b: float | int) -> float | int:
+def subtract(
+    a: float | int,
+    b: float | int,
+    *,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> float | int:
     """
     Subtract the second number from the first number.
     
     Args:
         a: First number (minuend)
         b: Second number (subtrahend)
+        policy: Validation policy for this call (default: the active policy)
+        max_value: Maximum absolute result for this call (default: the
+            process-wide limit)
         
     Returns:
         The difference of a and b (a - b)
         
     Raises:
         TypeError: If either argument is not a number
-        OverflowError: If the result is too large
+        ValueError: If the policy is unknown
+        OverflowError: If the result is too large (recorded instead
+            under the deferred policy)
     """
-    _validate_number(a)
-    _validate_number(b)
+    mode = _active_policy.get().name if policy is None else _check_policy(policy)
+    if mode != TRUSTED:
+        _validate_number(a)
+        _validate_number(b)
     result = a - b
-    _check_result_range(result)
+    if mode == DEFERRED:
+        _defer_range_check(result, max_value)
+    else:
+        _check_result_range(result, max_value)
     return result
 
 
-def multiply(a: float | int, b: float | int) -> float | int:
+def multiply(
+    a: float | int,
+    b: float | int,
+    *,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> float | int:
     """
     Multiply two numbers together.
     
     Args:
         a: First number (int or float)
         b: Second number (int or float)
+        policy: Validation policy for this call (default: the active policy)
+        max_value: Maximum absolute result for this call (default: the
+            process-wide limit)
         
     Returns:
         The product of a and b
         
     Raises:
         TypeError: If either argument is not a number
-        OverflowError: If the result is too large
+        ValueError: If the policy is unknown
+        OverflowError: If the result is too large (recorded instead
+            under the deferred policy)
     """
-    _validate_number(a)
-    _validate_number(b)
+    mode = _active_policy.get().name if policy is None else _check_policy(policy)
+    if mode != TRUSTED:
+        _validate_number(a)
+        _validate_number(b)
     result = a * b
-    _check_result_range(result)
+    if mode == DEFERRED:
+        _defer_range_check(result, max_value)
+    else:
+        _check_result_range(result, max_value)
     return result
 
 
-def divide(a: float | int, b: float | int) -> float:
+def divide(
+    a: float | int,
+    b: float | int,
+    *,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> float:
     """
     Divide the first number by the second number.
     
     Args:
         a: First number (dividend)
         b: Second number (divisor)
+        policy: Validation policy for this call (default: the active policy)
+        max_value: Maximum absolute result for this call (default: the
+            process-wide limit)
         
     Returns:
         The quotient of a divided by b
         
     Raises:
         TypeError: If either argument is not a number
+        ValueError: If the policy is unknown
         ZeroDivisionError: If b is zero
-        OverflowError: If the result is too large
+        OverflowError: If the result is too large (recorded instead
+            under the deferred policy)
     """
-    _validate_number(a)
-    _validate_number(b)
+    mode = _active_policy.get().name if policy is None else _check_policy(policy)
+    if mode != TRUSTED:
+        _validate_number(a)
+        _validate_number(b)
     if b == 0:
         raise ZeroDivisionError("Cannot divide by zero")
     
     result = a / b
-    _check_result_range(result)
+    if mode == DEFERRED:
+        _defer_range_check(result, max_value)
+    else:
+        _check_result_range(result, max_value)
     return result
\ No newline at end of file
@@ -1,16 +1,24 @@
 """Calculator CLI module for performing arithmetic operations from command line."""
 
+import argparse
 import sys
-from typing import Union
-from . import add, subtract, multiply, divide
+from contextlib import nullcontext
+from functools import partial
+from itertools import chain, starmap
+from typing import IO, TYPE_CHECKING, Union
+from . import registry
 
+if TYPE_CHECKING:
+    from .checkpoint import Checkpointer
+    from .output import OutputFormat
 
-def parse_arguments() -> tuple[str, float, float]:
+
+def parse_arguments() -> tuple[str, float, float, "OutputFormat"]:
     """
     Parse command line arguments.
     
     Returns:
-        A tuple containing (operation, num1, num2)
+        A tuple containing (operation, num1, num2, output format)
         
     Raises:
         SystemExit: If arguments are invalid
@@ -19,39 +27,79 @@ def parse_arguments() -> tuple[str, float, float]:
         show_help()
         sys.exit(0)
     
-    if len(sys.argv) != 4:
-        print("Usage: python -m calculator <operation> <num1> <num2>", file=sys.stderr)
+    parser = argparse.ArgumentParser(prog="python -m calculator", add_help=False)
+    _add_output_arguments(parser)
+    options, arguments = parser.parse_known_args(sys.argv[1:])
+    fmt = _output_format(parser, options)
+    if len(arguments) != 3:
+        print("Usage: python -m calculator <operation> <num1> <num2> [OUTPUT OPTIONS]", file=sys.stderr)
         print("Example: python -m calculator add 5 3", file=sys.stderr)
         sys.exit(1)
     
-    operation = sys.argv[1].lower()
+    operation = arguments[0].lower()
     try:
-        num1 = float(sys.argv[2])
-        num2 = float(sys.argv[3])
+        num1 = float(arguments[1])
+        num2 = float(arguments[2])
     except ValueError:
         print("Error: Invalid number format", file=sys.stderr)
         sys.exit(1)
     
-    return operation, num1, num2
+    return operation, num1, num2, fmt
+
+
+def _operations_help() -> str:
+    """Describe the registered operations, one per line."""
+    lines = []
+    for op in registry.operations():
+        line = f"  {op.name:<9} - {op.description}"
+        if op.aliases:
+            line += f" (aliases: {', '.join(op.aliases)})"
+        lines.append(line)
+    return "\n".join(lines)
 
 
 def show_help() -> None:
     """Display help information for the calculator CLI."""
-    help_text = """
+    help_text = f"""
 Calculator CLI - Perform arithmetic operations from command line
 
-Usage: python -m calculator <operation> <num1> <num2>
+Usage: python -m calculator <operation> <num1> <num2> [OUTPUT OPTIONS]
+       python -m calculator --stream [FILE] [--workers N] [--status] [--echo] [--out RESULTS] [--audit DIR] [OUTPUT OPTIONS] [CHECKPOINT OPTIONS]
+       python -m calculator --fixed SCALE <operation> <num1> <num2> [--rounding half-even|half-up|down] [OUTPUT OPTIONS]
+       python -m calculator eval "<expression>" [--var NAME=VALUE ...] [OUTPUT OPTIONS]
+       python -m calculator serve --socket PATH [--metrics FILE] [--metrics-interval SECONDS] [--audit DIR]
+       python -m calculator batch --op OPERATION --in PAIRS --out RESULTS [--status CODES] [--workers N] [CHECKPOINT OPTIONS]
+       python -m calculator coordinator --op OPERATION --in PAIRS --out RESULTS [--listen HOST:PORT] [--local-workers N]
+       python -m calculator worker --connect HOST:PORT [--name NAME]
+       python -m calculator sum|product [FILE] [--dtype text|f64|i64] [--workers N] [OUTPUT OPTIONS] [CHECKPOINT OPTIONS]
+       python -m calculator cumsum|cumprod [FILE] [--dtype text|f64|i64] [--out RESULTS] [--workers N] [OUTPUT OPTIONS] [CHECKPOINT OPTIONS]
+       python -m calculator rolling --op sum|mean|product|min|max --window N|--duration SECONDS [FILE] [--flush] [--out RESULTS] [OUTPUT OPTIONS]
+       python -m calculator audit dump DIR [--op OPERATION ...] [--since TIME] [--until TIME] [--format text|jsonl]
+       python -m calculator profile [--stats FILE] [--report FILE] [--sort KEY] [--top N] [--allocations N] COMMAND...
+
+Output options:
+  --format text|jsonl|csv|f64   result format (default: text)
+  --precision DIGITS            digits after the point for float results (default: shortest repr;
+                                --fixed results default to SCALE digits)
+
+Checkpoint options (single worker; --stream needs FILE and --out, reductions a binary FILE):
+  --checkpoint FILE             save progress here, atomically, so an interrupted run can be resumed
+  --checkpoint-interval SECONDS minimum time between checkpoints (default: 30)
+  --resume                      continue from the checkpoint if it exists; the output is identical
 
 Operations:
-  add       - Addition (num1 + num2)
-  subtract  - Subtraction (num1 - num2)
-  multiply  - Multiplication (num1 * num2)
-  divide    - Division (num1 / num2)
+{_operations_help()}
 
 Examples:
   python -m calculator add 5 3
   python -m calculator multiply 4.5 2
   python -m calculator divide 10 3
+  python -m calculator --fixed 2 multiply 19.99 3
+  printf 'add 1 2\\nmul 3 4\\n' | python -m calculator --stream
+  python -m calculator eval "(a + b) * c" --var a=1 --var b=2 --var c=3
+  python -m calculator rolling --op mean --window 60 latencies.txt
+  python -m calculator coordinator --op add --in pairs.f64 --out sums.f64 --local-workers 4
+  python -m calculator audit dump /var/log/calculator --op divide --since 2026-10-18T09:00
 """
     print(help_text)
 
@@ -69,30 +117,738 @@ def perform_operation(operation: str, num1: float, num2: float) -> Union[float,
         The result of the operation
         
     Raises:
-        SystemExit: If operation is not supported
-    """
-    if operation == 'add':
-        return add(num1, num2)
-    elif operation == 'subtract':
-        return subtract(num1, num2)
-    elif operation == 'multiply':
-        return multiply(num1, num2)
-    elif operation == 'divide':
-        if num2 == 0:
-            print("Error: Cannot divide by zero", file=sys.stderr)
-            sys.exit(1)
-        return divide(num1, num2)
-    else:
-        print(f"Error: Unknown operation '{operation}'. Supported operations: add, subtract, multiply, divide", file=sys.stderr)
+        SystemExit: If operation is not supported or dividing by zero
+    """
+    op = registry.get(operation)
+    if op is None:
+        print(f"Error: Unknown operation '{operation}'. Supported operations: {registry.supported()}", file=sys.stderr)
         sys.exit(1)
+    if op.arity != 2:
+        print(f"Error: Operation '{op.name}' takes {op.arity} operands, not 2", file=sys.stderr)
+        sys.exit(1)
+    try:
+        return op.scalar(num1, num2)
+    except ZeroDivisionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --format and --precision options of calculator.output."""
+    from .output import FORMATS
+
+    parser.add_argument("--format", choices=FORMATS, default="text",
+                        help="result format; f64 writes packed float64 values")
+    parser.add_argument("--precision", type=int, metavar="DIGITS",
+                        help="digits after the point for float results (default: shortest repr)")
+
+
+def _output_format(parser: argparse.ArgumentParser, args: argparse.Namespace, *, echo: bool = False,
+                   status: bool = False) -> "OutputFormat":
+    """Build the output format from parsed options, reporting invalid combinations."""
+    from .output import OutputFormat
+
+    try:
+        return OutputFormat(args.format, args.precision, echo, status)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def _add_checkpoint_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --checkpoint, --checkpoint-interval and --resume options of calculator.checkpoint."""
+    from .checkpoint import DEFAULT_INTERVAL
+
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="save progress here so an interrupted run can be resumed")
+    parser.add_argument("--checkpoint-interval", type=float, default=DEFAULT_INTERVAL, metavar="SECONDS",
+                        help="minimum seconds between checkpoints (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the --checkpoint file if it exists")
+
+
+def _checkpointer(parser: argparse.ArgumentParser, args: argparse.Namespace) -> "Checkpointer | None":
+    """Build the checkpointer from parsed options, reporting invalid combinations."""
+    from .checkpoint import Checkpointer
+
+    if args.checkpoint is None:
+        if args.resume:
+            parser.error("--resume requires --checkpoint")
+        return None
+    if args.workers > 1:
+        parser.error("--checkpoint requires --workers 1")
+    try:
+        return Checkpointer(args.checkpoint, args.checkpoint_interval, args.resume)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def _open_output(path: str | None, fmt: "OutputFormat") -> IO:
+    """Open a result file for a format, or return stdout (as a context manager)."""
+    from .output import BUFFER_SIZE
+
+    if path is not None:
+        if fmt.binary:
+            return open(path, "wb", buffering=BUFFER_SIZE)
+        return open(path, "w", encoding="utf-8", newline="", buffering=BUFFER_SIZE)
+    if fmt.binary:
+        sys.stdout.flush()
+        return nullcontext(sys.stdout.buffer)
+    return nullcontext(sys.stdout)
+
+
+def stream_command(argv: list[str]) -> int:
+    """
+    Run the streaming mode: evaluate one record per input line.
+
+    Args:
+        argv: Arguments following '--stream'
+
+    Returns:
+        The process exit status
+    """
+    from .stream import DEFAULT_CHUNK_SIZE
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator --stream",
+        description="Evaluate '<operation> <num1> <num2>' records, one per line.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="number of result rows buffered per write")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (requires an input file)")
+    parser.add_argument("--status", action="store_true",
+                        help="append a status code column to every row")
+    parser.add_argument("--echo", action="store_true", help="start every row with its input record")
+    parser.add_argument("--out", metavar="RESULTS", help="result file (default: stdout)")
+    parser.add_argument("--audit", metavar="DIR",
+                        help="record every calculation in a binary audit log in DIR (requires --workers 1)")
+    _add_output_arguments(parser)
+    _add_checkpoint_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    fmt = _output_format(parser, args, echo=args.echo, status=args.status)
+    checkpointer = _checkpointer(parser, args)
+    if args.audit is not None:
+        if args.workers > 1:
+            parser.error("--audit requires --workers 1")
+        from . import audit
+        try:
+            audit.enable(args.audit)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        try:
+            return _run_stream(parser, args, fmt, checkpointer)
+        finally:
+            audit.disable()
+    return _run_stream(parser, args, fmt, checkpointer)
+
+
+def _run_stream(parser: argparse.ArgumentParser, args: argparse.Namespace, fmt: "OutputFormat",
+                checkpointer: "Checkpointer | None") -> int:
+    """Evaluate the records of a parsed --stream command line."""
+    from .stream import process_stream
+
+    if checkpointer is not None:
+        if args.input == "-" or args.out is None:
+            parser.error("--checkpoint requires an input file and --out")
+        from .checkpoint import process_stream_checkpointed
+        try:
+            process_stream_checkpointed(args.input, args.out, checkpointer, args.chunk_size, fmt)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+    if args.workers > 1:
+        if args.input == "-":
+            parser.error("--workers requires an input file")
+        from .parallel import ShardError, process_stream_parallel
+        try:
+            with _open_output(args.out, fmt) as output:
+                process_stream_parallel(args.input, output, args.workers, args.chunk_size, output_format=fmt)
+        except (OSError, ShardError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+    try:
+        if args.input != "-":
+            infile = open(args.input, encoding="utf-8", buffering=1 << 20)
+        else:
+            infile = nullcontext(sys.stdin)
+        with infile as lines, _open_output(args.out, fmt) as output:
+            process_stream(lines, output, args.chunk_size, output_format=fmt)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _parse_variable(text: str) -> tuple[str, float]:
+    """Parse a NAME=VALUE option into a variable binding."""
+    name, sep, value = text.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got '{text}'")
+    try:
+        return name.strip(), float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number format for '{name}'") from None
+
+
+def eval_command(argv: list[str]) -> int:
+    """
+    Evaluate an infix expression with optional variables.
+
+    Args:
+        argv: Arguments following 'eval'
+
+    Returns:
+        The process exit status
+    """
+    from .expr import evaluate
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator eval",
+        description="Evaluate an infix expression such as '(a + b) * c / d'.",
+    )
+    parser.add_argument("expression", help="expression to evaluate")
+    parser.add_argument("--var", action="append", default=[], type=_parse_variable,
+                        metavar="NAME=VALUE", help="bind a variable (repeatable)")
+    _add_output_arguments(parser)
+    args = parser.parse_args(argv)
+    fmt = _output_format(parser, args)
+
+    from .output import ResultWriter
+    try:
+        result = evaluate(args.expression, dict(args.var))
+        with _open_output(None, fmt) as output:
+            ResultWriter(output, fmt).write_rows([result])
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def fixed_command(argv: list[str]) -> int:
+    """
+    Perform one operation in scaled-integer fixed point.
+
+    The operands are parsed as exact decimals and the result is written
+    with exactly SCALE digits after the point, or with --precision digits
+    rounded in the --rounding mode.
+
+    Args:
+        argv: Arguments following '--fixed'
+
+    Returns:
+        The process exit status
+    """
+    from . import fixed
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator --fixed",
+        description="Perform an operation on decimal numbers with a fixed number of digits after the point.",
+    )
+    parser.add_argument("scale", type=int, help=f"digits after the point (0-{fixed.MAX_SCALE})")
+    parser.add_argument("operation", help="add, subtract, multiply or divide (or an alias)")
+    parser.add_argument("num1", help="first operand")
+    parser.add_argument("num2", help="second operand")
+    parser.add_argument("--rounding", choices=fixed.ROUNDING_MODES, default=fixed.HALF_EVEN,
+                        help="rounding of multiply and divide results and of extra input digits "
+                             "(default: half-even)")
+    _add_output_arguments(parser)
+    args = parser.parse_args(argv)
+    fmt = _output_format(parser, args)
+
+    from .output import ResultWriter
+    functions = {'add': fixed.add, 'subtract': fixed.subtract, 'multiply': fixed.multiply, 'divide': fixed.divide}
+    op = registry.get(args.operation.lower())
+    if op is None or op.name not in functions:
+        print(f"Error: Operation '{args.operation}' has no fixed-point form. "
+              f"Supported operations: {', '.join(functions)}", file=sys.stderr)
+        return 1
+    options = {'scale': args.scale}
+    if op.name in ('multiply', 'divide'):
+        options['rounding'] = args.rounding
+    try:
+        a = fixed.to_fixed(args.num1, args.scale, args.rounding)
+        b = fixed.to_fixed(args.num2, args.scale, args.rounding)
+        units = functions[op.name](a, b, **options)
+        text = fixed.to_string(units, args.scale, args.precision, args.rounding)
+        with _open_output(None, fmt) as output:
+            ResultWriter(output, fmt).write_rows([units / 10**args.scale], texts=[text])
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def serve_command(argv: list[str]) -> int:
+    """
+    Run the calculation server on a Unix domain socket until interrupted.
+
+    Args:
+        argv: Arguments following 'serve'
+
+    Returns:
+        The process exit status
+    """
+    import asyncio
+    from .server import DEFAULT_MAX_CONNECTIONS, DEFAULT_METRICS_INTERVAL, serve
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator serve",
+        description="Answer JSON-lines and binary-framed requests on a Unix domain socket.",
+    )
+    parser.add_argument("--socket", required=True, metavar="PATH", help="socket path to listen on")
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS,
+                        help="maximum number of simultaneous connections")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="collect metrics and write them to FILE in Prometheus text format")
+    parser.add_argument("--metrics-interval", type=float, default=DEFAULT_METRICS_INTERVAL, metavar="SECONDS",
+                        help="seconds between metrics file writes")
+    parser.add_argument("--audit", metavar="DIR", help="record every calculation in a binary audit log in DIR")
+    args = parser.parse_args(argv)
+    if args.metrics_interval <= 0:
+        parser.error("--metrics-interval must be positive")
+
+    try:
+        asyncio.run(serve(args.socket, args.max_connections, args.metrics, args.metrics_interval, args.audit))
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def batch_command(argv: list[str]) -> int:
+    """
+    Apply an operation to a packed binary file of operand pairs.
+
+    Args:
+        argv: Arguments following 'batch'
+
+    Returns:
+        The process exit status
+    """
+    from .packed import DEFAULT_CHUNK_SIZE, DTYPES, process_file
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator batch",
+        description="Compute results for packed little-endian operand pairs "
+                    "(raw float64/int64 or .npy) through memory-mapped files.",
+    )
+    parser.add_argument("--op", required=True, help="operation to apply")
+    parser.add_argument("--in", dest="input", required=True, metavar="PAIRS", help="operand pair file")
+    parser.add_argument("--out", dest="output", required=True, metavar="RESULTS", help="result file")
+    parser.add_argument("--dtype", choices=list(DTYPES), default="f64", help="element type of raw input files")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="operand pairs per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--status", metavar="CODES",
+                        help="write a uint8 status code per pair here instead of stopping at the first error")
+    _add_checkpoint_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    checkpointer = _checkpointer(parser, args)
+
+    try:
+        if checkpointer is not None:
+            from .checkpoint import process_file_checkpointed
+            process_file_checkpointed(args.op.lower(), args.input, args.output, checkpointer, args.dtype,
+                                      args.chunk_size, status_path=args.status)
+        elif args.workers > 1:
+            from .parallel import process_file_parallel
+            process_file_parallel(args.op.lower(), args.input, args.output, args.workers,
+                                  args.dtype, args.chunk_size, status_path=args.status)
+        else:
+            process_file(args.op.lower(), args.input, args.output, args.dtype, args.chunk_size,
+                         status_path=args.status)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def coordinator_command(argv: list[str]) -> int:
+    """
+    Lease the chunks of a packed batch job to workers over TCP.
+
+    Args:
+        argv: Arguments following 'coordinator'
+
+    Returns:
+        The process exit status
+    """
+    from .cluster import DEFAULT_LEASE_TIMEOUT, DEFAULT_MAX_ATTEMPTS, coordinate, parse_address
+    from .packed import DEFAULT_CHUNK_SIZE, DTYPES
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator coordinator",
+        description="Split a packed operand pair file into chunks, lease them to workers that "
+                    "connect over TCP and assemble the ordered result file.",
+    )
+    parser.add_argument("--op", required=True, help="operation to apply")
+    parser.add_argument("--in", dest="input", required=True, metavar="PAIRS", help="operand pair file")
+    parser.add_argument("--out", dest="output", required=True, metavar="RESULTS", help="result file")
+    parser.add_argument("--dtype", choices=list(DTYPES), default="f64", help="element type of raw input files")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="operand pairs per lease")
+    parser.add_argument("--listen", default="127.0.0.1:0", metavar="HOST:PORT",
+                        help="address to accept workers on; port 0 picks a free port (default: %(default)s)")
+    parser.add_argument("--local-workers", type=int, default=0, metavar="N",
+                        help="worker processes to start on this machine")
+    parser.add_argument("--lease-timeout", type=float, default=DEFAULT_LEASE_TIMEOUT, metavar="SECONDS",
+                        help="seconds before an unanswered chunk is leased to another worker")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="leases per chunk before the job fails")
+    parser.add_argument("--report", metavar="FILE", help="write the worker report here (default: stderr)")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    try:
+        host, port = parse_address(args.listen)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def announce(bound_host: str, bound_port: int) -> None:
+        print(f"Listening on {bound_host}:{bound_port}", file=sys.stderr, flush=True)
+
+    try:
+        report = coordinate(args.op.lower(), args.input, args.output, host, port, dtype=args.dtype,
+                            chunk_size=args.chunk_size, lease_timeout=args.lease_timeout,
+                            max_attempts=args.max_attempts, local_workers=args.local_workers,
+                            on_listen=announce)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                f.write(report.format())
+        else:
+            sys.stderr.write(report.format())
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def worker_command(argv: list[str]) -> int:
+    """
+    Compute chunks leased by a coordinator until its job is done.
+
+    Args:
+        argv: Arguments following 'worker'
+
+    Returns:
+        The process exit status
+    """
+    from .cluster import DEFAULT_CONNECT_TIMEOUT, parse_address, run_worker
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator worker",
+        description="Connect to a coordinator and compute the chunks it leases.",
+    )
+    parser.add_argument("--connect", required=True, metavar="HOST:PORT", help="coordinator address")
+    parser.add_argument("--name", help="name shown in the coordinator's report (default: host-pid)")
+    parser.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT, metavar="SECONDS",
+                        help="seconds to keep retrying while the coordinator is not listening yet")
+    args = parser.parse_args(argv)
+    try:
+        host, port = parse_address(args.connect)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        run_worker(host, port, args.name, args.connect_timeout)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def reduce_command(argv: list[str], operation: str) -> int:
+    """
+    Sum, multiply or scan a column of numbers.
+
+    Text input holds one number per line and is parsed in bulk
+    (calculator.parsing), so integer columns stay exact; binary input is
+    a packed float64/int64 column (raw or .npy).
+
+    Args:
+        argv: Arguments following the subcommand
+        operation: 'sum', 'product', 'cumsum' or 'cumprod'
+
+    Returns:
+        The process exit status
+    """
+    from . import parsing, reduce
+
+    scan = operation in reduce.SCANS
+    parser = argparse.ArgumentParser(
+        prog=f"python -m calculator {operation}",
+        description=f"Compute the {operation} of a column of numbers.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("--dtype", choices=["text", *reduce.DTYPES], default="text",
+                        help="input format: one number per line, or raw packed values (.npy is detected)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (binary input only)")
+    if scan:
+        parser.add_argument("--out", metavar="RESULTS",
+                            help="result file (required for binary input; default for text: stdout)")
+    _add_output_arguments(parser)
+    _add_checkpoint_arguments(parser)
+    args = parser.parse_args(argv)
+    fmt = _output_format(parser, args)
+    checkpointer = _checkpointer(parser, args)
+
+    binary = args.dtype != "text" or args.input.lower().endswith(".npy")
+    if args.workers > 1 and not binary:
+        parser.error("--workers requires a binary input file")
+    if checkpointer is not None and not binary:
+        parser.error("--checkpoint requires a binary input file")
+    if scan and binary and not args.out:
+        parser.error("--out is required for binary input")
+    if scan and binary and (args.format != "text" or args.precision is not None):
+        parser.error("binary input scans are written in the input's packed format")
+    from .output import ResultWriter
+    try:
+        if binary:
+            dtype = "f64" if args.dtype == "text" else args.dtype
+            if checkpointer is not None:
+                from .checkpoint import reduce_file_checkpointed, scan_file_checkpointed
+                if scan:
+                    scan_file_checkpointed(operation, args.input, args.out, checkpointer, dtype)
+                    return 0
+                result = reduce_file_checkpointed(operation, args.input, checkpointer, dtype)
+            elif scan:
+                reduce.scan_file(operation, args.input, args.out, dtype, args.workers)
+                return 0
+            else:
+                result = reduce.reduce_file(operation, args.input, dtype, args.workers)
+            with _open_output(None, fmt) as output:
+                ResultWriter(output, fmt).write_rows([result])
+            return 0
+        if args.input != "-":
+            infile = open(args.input, "rb")
+        else:
+            infile = nullcontext(getattr(sys.stdin, "buffer", sys.stdin))
+        with infile as f:
+            if isinstance(f.read(0), bytes):
+                values = chain.from_iterable(parsing.read_column(f))
+            else:
+                values = reduce.text_values(f)
+            results = [reduce.REDUCTIONS[operation](values)] if not scan else reduce.SCANS[operation](values)
+            with _open_output(args.out if scan else None, fmt) as output:
+                writer = ResultWriter(output, fmt)
+                writer.write_all(results)
+                writer.flush()
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def rolling_command(argv: list[str]) -> int:
+    """
+    Compute a rolling aggregate of a column of numbers, one result per value.
+
+    Count-based windows read one number per line, in bulk unless --flush
+    is given; time-based windows read '<timestamp> <value>' lines.
+
+    Args:
+        argv: Arguments following 'rolling'
+
+    Returns:
+        The process exit status
+    """
+    from . import parsing, reduce, window
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator rolling",
+        description="Compute a rolling sum, mean, product, min or max over a window of a stream.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("--op", required=True, choices=list(window.WINDOWS), help="aggregate to compute")
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument("--window", type=int, metavar="N", help="aggregate the last N values")
+    size.add_argument("--duration", type=float, metavar="SECONDS",
+                      help="aggregate the values of the last SECONDS; input lines are '<timestamp> <value>'")
+    parser.add_argument("--flush", action="store_true",
+                        help="read line by line and write every result at once (for live input)")
+    parser.add_argument("--out", metavar="RESULTS", help="result file (default: stdout)")
+    _add_output_arguments(parser)
+    args = parser.parse_args(argv)
+    fmt = _output_format(parser, args)
+
+    from .output import ResultWriter
+    line_by_line = args.flush or args.duration is not None
+    try:
+        aggregate = window.WINDOWS[args.op](args.window, duration=args.duration)
+        if args.input == "-":
+            infile = nullcontext(sys.stdin if line_by_line else getattr(sys.stdin, "buffer", sys.stdin))
+        elif line_by_line:
+            infile = open(args.input, encoding="utf-8")
+        else:
+            infile = open(args.input, "rb")
+        with infile as f, _open_output(args.out, fmt) as output:
+            if args.duration is not None:
+                results = starmap(aggregate.push, window.timed_values(f))
+            elif line_by_line or not isinstance(f.read(0), bytes):
+                results = map(aggregate.push, reduce.text_values(f))
+            else:
+                results = map(aggregate.push, chain.from_iterable(parsing.read_column(f)))
+            writer = ResultWriter(output, fmt)
+            if args.flush:
+                for result in results:
+                    writer.write_rows([result])
+                    writer.flush()
+            else:
+                writer.write_all(results)
+            writer.flush()
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _parse_time(text: str) -> int:
+    """Parse a --since/--until option into nanoseconds since the epoch."""
+    from .audit import parse_time
+
+    try:
+        return parse_time(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def audit_command(argv: list[str]) -> int:
+    """
+    Inspect a binary audit log written with --audit or calculator.audit.
+
+    Args:
+        argv: Arguments following 'audit'
+
+    Returns:
+        The process exit status
+    """
+    import json
+    import math
+    from . import audit
+
+    def number(value: float | int) -> float | int | None:
+        # Like the jsonl result format, non-finite values are written as null
+        return value if isinstance(value, int) or math.isfinite(value) else None
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator audit",
+        description="Inspect the binary audit log of recorded calculations.",
+    )
+    subcommands = parser.add_subparsers(dest="subcommand", required=True)
+    dump = subcommands.add_parser("dump", help="print recorded calculations, oldest first")
+    dump.add_argument("directory", help="audit log directory")
+    dump.add_argument("--op", action="append", metavar="OPERATION",
+                      help="only this operation, e.g. divide or fixed.add (repeatable; default: all)")
+    dump.add_argument("--since", type=_parse_time, metavar="TIME",
+                      help="only calculations at or after TIME (epoch seconds or ISO 8601, UTC by default)")
+    dump.add_argument("--until", type=_parse_time, metavar="TIME",
+                      help="only calculations before TIME")
+    dump.add_argument("--format", choices=["text", "jsonl"], default="text", help="output format")
+    args = parser.parse_args(argv)
+
+    try:
+        write = sys.stdout.write
+        for record in audit.read(args.directory, args.op, args.since, args.until):
+            if args.format == "jsonl":
+                write(json.dumps({
+                    "time_ns": record.time_ns, "sequence": record.sequence, "op": record.operation,
+                    "a": number(record.a), "b": number(record.b),
+                    "result": number(record.result) if record.error is None else None, "error": record.error,
+                }) + "\n")
+            else:
+                outcome = record.result if record.error is None else f"error={record.error}"
+                write(f"{audit.format_time(record.time_ns)} {record.sequence} {record.operation} "
+                      f"{record.a} {record.b} {outcome}\n")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def profile_command(argv: list[str]) -> int:
+    """
+    Run another calculator command under cProfile and tracemalloc.
+
+    Args:
+        argv: Arguments following 'profile'
+
+    Returns:
+        The exit status of the profiled command
+    """
+    from . import profiling
+
+    parser = argparse.ArgumentParser(
+        prog="python -m calculator profile",
+        description="Run any calculator command in-process under cProfile and tracemalloc and "
+                    "report time per pipeline phase, hotspots and allocations.",
+    )
+    parser.add_argument("--stats", metavar="FILE", help="write the raw pstats data here")
+    parser.add_argument("--report", metavar="FILE", help="write the report here (default: stderr)")
+    parser.add_argument("--sort", choices=profiling.SORT_KEYS, default="cumulative",
+                        help="order of the hotspot list")
+    parser.add_argument("--top", type=int, default=profiling.DEFAULT_TOP,
+                        help="number of hotspot functions to list")
+    parser.add_argument("--allocations", type=int, default=profiling.DEFAULT_ALLOCATIONS,
+                        help="number of allocation sites to list (0 disables memory tracing)")
+    parser.add_argument("command", nargs=argparse.REMAINDER,
+                        help="the command to profile, e.g. --stream FILE or add 1 2")
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("a command to profile is required")
+    if command[0] == "profile":
+        parser.error("cannot profile the profile command")
+
+    report = profiling.run(main, command, stats_path=args.stats, sort=args.sort,
+                           top=args.top, allocations=args.allocations)
+    try:
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                f.write(report.format())
+        else:
+            sys.stdout.flush()
+            sys.stderr.write(report.format())
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return report.exit_code
+
+
+COMMANDS = {
+    '--stream': stream_command,
+    '--fixed': fixed_command,
+    'eval': eval_command,
+    'serve': serve_command,
+    'batch': batch_command,
+    'coordinator': coordinator_command,
+    'worker': worker_command,
+    'sum': partial(reduce_command, operation='sum'),
+    'product': partial(reduce_command, operation='product'),
+    'cumsum': partial(reduce_command, operation='cumsum'),
+    'cumprod': partial(reduce_command, operation='cumprod'),
+    'rolling': rolling_command,
+    'audit': audit_command,
+    'profile': profile_command,
+}
 
 
 def main() -> None:
     """Main function to run the calculator CLI."""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
     try:
-        operation, num1, num2 = parse_arguments()
+        operation, num1, num2, fmt = parse_arguments()
         result = perform_operation(operation, num1, num2)
-        print(result)
+        from .output import ResultWriter
+        with _open_output(None, fmt) as output:
+            ResultWriter(output, fmt).write_rows([result])
     except SystemExit:
         # Re-raise SystemExit to properly exit the program
         raise
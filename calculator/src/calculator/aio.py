@@ -0,0 +1,348 @@
+"""Awaitable calculator operations for asyncio applications.
+
+    result = await aio.add(2, 3)
+    results = await aio.batch_multiply(xs, ys, executor=pool)
+
+    async with aio.Batcher(max_size=1024, max_delay=0.0005) as batcher:
+        result = await batcher.submit('add', 1.5, 2.5)
+
+The scalar operations take microseconds, so their awaitable versions run
+inline. Batches of at least inline_size pairs run in an executor: the
+loop's default thread pool, or any concurrent.futures executor. Threads
+keep the event loop responsive. A ProcessPoolExecutor also runs batches
+in parallel; its workers get the caller's policy and range limit, but
+cannot report violations of the deferred policy back, so that policy is
+rejected there.
+
+A Batcher merges concurrent single requests into batches. Requests are
+queued per operation and per validation policy (each with-block of
+policy.validation() has its own queue), and a queue is evaluated in the
+context of its first request, so every caller gets the policy and
+deferred violation log it submitted under. The first request starts a
+max_delay timer; the queues are evaluated when the timer fires, or one
+is evaluated as soon as max_size requests are waiting, and each caller
+gets its own result or exception. A queue is one calculator.masked
+batch, and a failed request is re-run with the scalar operation so it
+raises exactly what a direct call would. When the operation's scalar
+function is replaced or wrapped, as by calculator.metrics or
+calculator.audit, each request is a call of that function instead, so
+batched requests are counted and recorded like direct calls.
+
+Cancelling a waiting caller withdraws its request; one that is already
+being computed in an executor finishes there and its result is dropped.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Any
+
+from . import limits
+from . import masked
+from . import registry
+from .batch import BatchInput, BatchResult
+from .masked import STATUS_OK
+from .policy import DEFERRED, PolicyState, _check_name, active_policy
+
+
+# Batches shorter than this run inline on the event loop
+INLINE_BATCH_SIZE = 4096
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_MAX_DELAY = 0.0005
+
+
+async def add(a: float | int, b: float | int, **kwargs: Any) -> float | int:
+    """Awaitable calculator.add (same arguments and errors)."""
+    return registry.lookup('add').scalar(a, b, **kwargs)
+
+
+async def subtract(a: float | int, b: float | int, **kwargs: Any) -> float | int:
+    """Awaitable calculator.subtract (same arguments and errors)."""
+    return registry.lookup('subtract').scalar(a, b, **kwargs)
+
+
+async def multiply(a: float | int, b: float | int, **kwargs: Any) -> float | int:
+    """Awaitable calculator.multiply (same arguments and errors)."""
+    return registry.lookup('multiply').scalar(a, b, **kwargs)
+
+
+async def divide(a: float | int, b: float | int, **kwargs: Any) -> float:
+    """Awaitable calculator.divide (same arguments and errors)."""
+    return registry.lookup('divide').scalar(a, b, **kwargs)
+
+
+def _process_batch(operation: str, xs: Any, ys: Any, policy: str, max_value: int) -> BatchResult:
+    """Run a batch in a worker process under the caller's policy and limit."""
+    if limits.get_max_value() != max_value:
+        limits.set_max_value(max_value)
+    return registry.lookup(operation).batch(xs, ys, policy=policy)
+
+
+def _picklable(values: BatchInput) -> Any:
+    """Copy memoryviews, which cannot be sent to another process."""
+    return values.tolist() if isinstance(values, memoryview) else values
+
+
+async def run_batch(
+    operation: str,
+    xs: BatchInput,
+    ys: BatchInput,
+    *,
+    policy: str | None = None,
+    executor: Executor | None = None,
+    inline_size: int = INLINE_BATCH_SIZE,
+) -> BatchResult:
+    """
+    Apply an operation's batch kernel without blocking the event loop.
+
+    Args:
+        operation: Name or alias of a registered operation
+        xs: First operands (list, array.array, memoryview or NumPy array)
+        ys: Second operands, same length as xs
+        policy: Validation policy for this batch (default: the active policy)
+        executor: Executor for large batches (default: the loop's thread pool)
+        inline_size: Batches with fewer pairs run inline
+
+    Returns:
+        The results, as from calculator.batch
+
+    Raises:
+        ValueError: If the operation is unknown or has no batch form, or the
+            deferred policy is used with a process pool
+        TypeError, ZeroDivisionError, OverflowError: As for calculator.batch
+    """
+    op = registry.lookup(operation)
+    if op.batch is None:
+        raise ValueError(f"Operation '{op.name}' has no batch form")
+    if len(xs) < inline_size:
+        return op.batch(xs, ys, policy=policy)
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessPoolExecutor):
+        mode = active_policy.get().name if policy is None else _check_name(policy)
+        if mode == DEFERRED:
+            raise ValueError("The deferred policy cannot record violations from another process")
+        call = partial(_process_batch, op.name, _picklable(xs), _picklable(ys), mode, limits.get_max_value())
+    else:
+        # Threads see the caller's policy and deferred violation log
+        call = partial(contextvars.copy_context().run, op.batch, xs, ys, policy=policy)
+    return await loop.run_in_executor(executor, call)
+
+
+async def batch_add(xs: BatchInput, ys: BatchInput, **kwargs: Any) -> BatchResult:
+    """Awaitable calculator.batch.add (see run_batch for the options)."""
+    return await run_batch('add', xs, ys, **kwargs)
+
+
+async def batch_subtract(xs: BatchInput, ys: BatchInput, **kwargs: Any) -> BatchResult:
+    """Awaitable calculator.batch.subtract (see run_batch for the options)."""
+    return await run_batch('subtract', xs, ys, **kwargs)
+
+
+async def batch_multiply(xs: BatchInput, ys: BatchInput, **kwargs: Any) -> BatchResult:
+    """Awaitable calculator.batch.multiply (see run_batch for the options)."""
+    return await run_batch('multiply', xs, ys, **kwargs)
+
+
+async def batch_divide(xs: BatchInput, ys: BatchInput, **kwargs: Any) -> BatchResult:
+    """Awaitable calculator.batch.divide (see run_batch for the options)."""
+    return await run_batch('divide', xs, ys, **kwargs)
+
+
+class _Queue:
+    """Requests for one operation and policy waiting to be evaluated together."""
+
+    __slots__ = ('xs', 'ys', 'futures', 'context')
+
+    def __init__(self) -> None:
+        self.xs: list[Any] = []
+        self.ys: list[Any] = []
+        self.futures: list[asyncio.Future[Any]] = []
+        # The submitters' policy and violation log
+        self.context = contextvars.copy_context()
+
+
+def _call(scalar: Any, a: Any, b: Any) -> tuple[Any, Exception | None]:
+    try:
+        return scalar(a, b), None
+    except Exception as e:
+        return None, e
+
+
+def _outcomes(
+    op: registry.Operation, xs: list[Any], ys: list[Any], evaluated: masked.MaskedResult | None = None
+) -> list[tuple[Any, Exception | None]]:
+    """Compute each request's result, or the error a direct call raises, in the current context."""
+    if evaluated is None:
+        if masked.direct_kernel(op) is None:
+            return [_call(op.scalar, a, b) for a, b in zip(xs, ys)]
+        evaluated = masked.evaluate(op.name, xs, ys)
+    return [
+        (value, None) if status == STATUS_OK else _call(op.scalar, a, b)
+        for value, status, a, b in zip(evaluated.values, evaluated.status, xs, ys)
+    ]
+
+
+class Batcher:
+    """Merges concurrent single requests into batches (micro-batching)."""
+
+    def __init__(
+        self,
+        *,
+        max_size: int = DEFAULT_MAX_SIZE,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        executor: Executor | None = None,
+        inline_size: int = INLINE_BATCH_SIZE,
+    ) -> None:
+        """
+        Create a batcher for the running event loop.
+
+        Args:
+            max_size: Evaluate a queue as soon as this many requests wait
+            max_delay: Seconds the first request of a queue may wait
+            executor: Executor for merged batches of at least inline_size
+                requests (default: the loop's thread pool)
+            inline_size: Merged batches with fewer requests run inline
+
+        Raises:
+            ValueError: If max_size or max_delay is not positive
+        """
+        if max_size < 1:
+            raise ValueError(f"max_size must be positive, got {max_size}")
+        if max_delay <= 0:
+            raise ValueError(f"max_delay must be positive, got {max_delay}")
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.executor = executor
+        self.inline_size = inline_size
+        self.batches = 0
+        self._loop = asyncio.get_running_loop()
+        self._queues: dict[tuple[str, PolicyState], _Queue] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task[None]] = set()
+        self._closed = False
+
+    async def __aenter__(self) -> "Batcher":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def submit(self, operation: str, a: float | int, b: float | int) -> float | int:
+        """
+        Compute one result as part of the next batch of its operation.
+
+        Args:
+            operation: Name or alias of a registered binary operation
+            a: First operand
+            b: Second operand
+
+        Returns:
+            The result, as from the operation's scalar function
+
+        Raises:
+            RuntimeError: If the batcher is closed
+            ValueError: If the operation is unknown or not binary
+            TypeError, ZeroDivisionError, OverflowError: As for the scalar
+                operation
+        """
+        if self._closed:
+            raise RuntimeError("Batcher is closed")
+        op = registry.lookup(operation)
+        if op.arity != 2:
+            raise ValueError(f"Operation '{op.name}' takes {op.arity} operands, not 2")
+        key = (op.name, active_policy.get())
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _Queue()
+        future = self._loop.create_future()
+        queue.xs.append(a)
+        queue.ys.append(b)
+        queue.futures.append(future)
+        if len(queue.futures) >= self.max_size:
+            self._flush(key)
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Start evaluating every waiting request now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for key in list(self._queues):
+            self._flush(key)
+
+    async def close(self) -> None:
+        """Refuse new requests, then evaluate the waiting ones and wait for every batch."""
+        self._closed = True
+        self.flush()
+        while self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def _flush(self, key: tuple[str, PolicyState]) -> None:
+        queue = self._queues.pop(key, None)
+        if queue is None:
+            return
+        live = [i for i, future in enumerate(queue.futures) if not future.done()]
+        if not live:
+            return
+        if len(live) < len(queue.futures):
+            queue.xs = [queue.xs[i] for i in live]
+            queue.ys = [queue.ys[i] for i in live]
+            queue.futures = [queue.futures[i] for i in live]
+        self.batches += 1
+        try:
+            op = registry.lookup(key[0])
+        except ValueError as e:
+            self._fail(queue, e)
+            return
+        if len(queue.futures) >= self.inline_size:
+            task = self._loop.create_task(self._evaluate(op, queue))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            return
+        try:
+            outcomes = queue.context.run(_outcomes, op, queue.xs, queue.ys)
+        except Exception as e:
+            self._fail(queue, e)
+            return
+        self._resolve(queue, outcomes)
+
+    async def _evaluate(self, op: registry.Operation, queue: _Queue) -> None:
+        executor = self.executor
+        try:
+            if isinstance(executor, ProcessPoolExecutor):
+                if masked.direct_kernel(op) is not None:
+                    # Worker processes only compute; failures are re-run here
+                    evaluated = await self._loop.run_in_executor(executor, masked.evaluate, op.name, queue.xs, queue.ys)
+                    outcomes = queue.context.run(_outcomes, op, queue.xs, queue.ys, evaluated)
+                    self._resolve(queue, outcomes)
+                    return
+                # Replaced or wrapped scalar functions only exist in this process
+                executor = None
+            outcomes = await self._loop.run_in_executor(
+                executor, queue.context.run, _outcomes, op, queue.xs, queue.ys
+            )
+        except Exception as e:
+            self._fail(queue, e)
+            return
+        self._resolve(queue, outcomes)
+
+    @staticmethod
+    def _fail(queue: _Queue, error: Exception) -> None:
+        for future in queue.futures:
+            if not future.done():
+                future.set_exception(error)
+
+    @staticmethod
+    def _resolve(queue: _Queue, outcomes: list[tuple[Any, Exception | None]]) -> None:
+        """Hand each caller its result or error."""
+        for future, (value, error) in zip(queue.futures, outcomes):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(error)
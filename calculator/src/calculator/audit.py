@@ -0,0 +1,653 @@
+"""Opt-in binary audit log of every calculation.
+
+    audit.enable("/var/log/calculator")    # start recording
+    ...                                     # serve, stream, process files
+    audit.disable()                         # flush and close
+    for record in audit.read("/var/log/calculator", operations=["divide"]):
+        ...
+
+enable() swaps recording wrappers into the registry for the scalar and
+batch kernels of every registered binary operation, the same way
+calculator.metrics does. The registry rebinds the functions it exports
+along with its kernels, so every binary calculation is recorded: the
+functions of calculator and calculator.batch, single operations on the
+command line, streams, the server, packed files, masked batches, the
+asyncio helpers, compiled expressions, sheets and graphs. The
+fixed-point functions of calculator.fixed are wrapped as well and are
+recorded as fixed.add, fixed.subtract and so on, with operands and
+results in units. Reductions are not binary operations and are not
+recorded. While auditing is disabled nothing is wrapped.
+
+A recorded call costs one record write: a fixed-size 48-byte record
+(time, sequence number, operation, status, operands and result) is
+packed into a preallocated in-memory ring buffer. A background thread
+copies finished records to the current segment file. It wakes every
+flush_interval seconds, or earlier once the ring is half full. If the
+ring fills up anyway, the caller waits for a flush, so records are
+never dropped. Batch kernels write one record per pair. When a batch
+raises, it is recomputed once through calculator.masked so each record
+carries its own status; fixed-point batches, which have no masked
+form, are recomputed pair by pair.
+
+Segments are append-only files named segment-NNNNNN.audit in the log
+directory. When a segment would grow past segment_bytes the log rotates
+to the next number, and a new log continues after the highest existing
+segment. A segment starts with a small header naming its operations
+and is followed by records, little-endian:
+
+    q  time in nanoseconds since the epoch
+    q  sequence number (consecutive within one enable())
+    B  operation (index into the header's operation list)
+    B  status (calculator.masked codes; 0 is ok)
+    B  flags: 1, 2, 4 = operand a, operand b, result is an int64;
+       8 = an int operand or result did not fit and was stored as a float
+    5x padding
+    8  operand a, operand b, result (float64, or int64 per the flags)
+
+A closed segment gets a segment-NNNNNN.index file. For each block of
+INDEX_BLOCK records it lists the time range and the set of operations,
+so read() skips blocks that cannot match. A segment without an index
+(the active one, or one left by a crash) is indexed by scanning it.
+"""
+
+import atexit
+import functools
+import json
+import math
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from itertools import count
+from time import time_ns
+from typing import Any, Callable, Iterable, Iterator
+
+from . import fixed, registry
+from .masked import STATUS_NAMES, STATUS_OK, MaskedResult, _evaluate, status_of
+
+
+DEFAULT_RING_RECORDS = 65536
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_FLUSH_INTERVAL = 0.1
+
+INDEX_BLOCK = 4096
+
+MAGIC = b"CALCAUDT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHI")
+RECORD_SIZE = 48
+
+A_INT, B_INT, RESULT_INT, INEXACT = 1, 2, 4, 8
+
+# Flags -> record layout, so a record is packed with a single call
+_RECORDS = [
+    struct.Struct("<qqBBB5x" + "".join("q" if flags & bit else "d" for bit in (A_INT, B_INT, RESULT_INT)))
+    for flags in range(8)
+]
+_RAW_RECORD = struct.Struct("<qqBBB5xqqq")
+_INT64 = struct.Struct("<q")
+_FLOAT64 = struct.Struct("<d")
+
+# Record fields as (8-byte word, byte) positions
+_TIME_WORD = 0
+_SEQUENCE_WORD = 1
+_OPCODE_BYTE = 16
+_WORDS = RECORD_SIZE // 8
+
+# Records checked per step when looking for the end of the written run
+_SCAN_STEP = 1024
+
+_SEGMENT_NAME = re.compile(r"segment-(\d{6,})\.audit$")
+
+_FAILED = float('nan')
+
+
+@dataclass(frozen=True, slots=True)
+class AuditRecord:
+    """One recorded calculation."""
+
+    time_ns: int
+    sequence: int
+    operation: str
+    a: float | int
+    b: float | int
+    result: float | int
+    status: int
+
+    @property
+    def error(self) -> str | None:
+        """The status name of a failed calculation, or None."""
+        return None if self.status == STATUS_OK else STATUS_NAMES.get(self.status, str(self.status))
+
+
+def _approximate(value: Any) -> float:
+    """Store a value that does not fit its slot as a float."""
+    try:
+        return float(value)
+    except OverflowError:
+        return math.copysign(math.inf, value)
+    except (TypeError, ValueError):
+        return _FAILED
+
+
+def _summary(records: memoryview) -> tuple[int, int, int]:
+    """Return (earliest time, latest time, operation bitmask) of packed records."""
+    times = records.cast("q")[_TIME_WORD::_WORDS]
+    opcodes = records[_OPCODE_BYTE::RECORD_SIZE].tobytes()
+    mask = 0
+    for opcode in set(opcodes):
+        mask |= 1 << opcode
+    return min(times), max(times), mask
+
+
+class AuditLog:
+    """Ring buffer of audit records and the segment files they are flushed to."""
+
+    def __init__(
+        self,
+        directory: str,
+        operations: list[str],
+        ring_records: int = DEFAULT_RING_RECORDS,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        if ring_records < 1:
+            raise ValueError("The ring must hold at least 1 record")
+        if flush_interval <= 0:
+            raise ValueError("Flush interval must be positive")
+        if len(operations) > 256:
+            raise ValueError("At most 256 operations can be audited")
+        self.directory = directory
+        self.operations = list(operations)
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+        self._header = self._segment_header()
+        if segment_bytes < len(self._header) + RECORD_SIZE:
+            raise ValueError(f"Segments must be at least {len(self._header) + RECORD_SIZE} bytes")
+        self._capacity = ring_records
+        self._ring = bytearray(ring_records * RECORD_SIZE)
+        self._view = memoryview(self._ring)
+        self._sequences = self._view.cast("q")[_SEQUENCE_WORD::_WORDS]
+        # Mark every slot as written one lap ago, so none looks finished yet
+        self._sequences[:] = array("q", range(-ring_records, 0))
+        self._slots = count()
+        self._flushed = 0
+        self._wake_at = max(ring_records // 2, 1)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        numbers = [int(match.group(1)) for match in map(_SEGMENT_NAME.match, os.listdir(directory)) if match]
+        self._number = max(numbers, default=0)
+        self._file = None
+        self._segment_records = 0
+        self._blocks: list[list[int]] = []
+        self._thread = threading.Thread(target=self._run, name="calculator-audit", daemon=True)
+        self._thread.start()
+
+    def _segment_header(self) -> bytes:
+        meta = json.dumps({"operations": self.operations, "record_size": RECORD_SIZE}).encode()
+        meta += b" " * (-(HEADER.size + len(meta)) % 8)
+        return HEADER.pack(MAGIC, FORMAT_VERSION, RECORD_SIZE, len(meta)) + meta
+
+    def append(self, opcode: int, a: Any, b: Any, result: Any, status: int) -> None:
+        """
+        Write one record into the ring buffer.
+
+        Args:
+            opcode: Index of the operation in self.operations
+            a: First operand
+            b: Second operand
+            result: The result (NaN for a failed calculation)
+            status: calculator.masked status code
+        """
+        slot = next(self._slots)
+        if slot - self._flushed >= self._capacity:
+            self._make_room(slot)
+        flags = (a.__class__ is int) | (b.__class__ is int) << 1 | (result.__class__ is int) << 2
+        offset = (slot % self._capacity) * RECORD_SIZE
+        try:
+            _RECORDS[flags].pack_into(self._ring, offset, time_ns(), slot, opcode, status, flags, a, b, result)
+        except (struct.error, TypeError):
+            _RECORDS[0].pack_into(self._ring, offset, time_ns(), slot, opcode, status, INEXACT,
+                                  _approximate(a), _approximate(b), _approximate(result))
+        if slot - self._flushed >= self._wake_at:
+            self._wake.set()
+
+    def _make_room(self, slot: int) -> None:
+        """Flush until the ring has room for slot."""
+        while slot - self._flushed >= self._capacity:
+            if not self.flush():
+                # Another thread has claimed an earlier slot and not written it yet
+                time.sleep(0)
+
+    def _written(self, start: int) -> int:
+        """Count the consecutive finished records from slot start on."""
+        done = 0
+        while done < self._capacity:
+            slot = start + done
+            i = slot % self._capacity
+            n = min(self._capacity - i, self._capacity - done, _SCAN_STEP)
+            actual = self._sequences[i:i + n].tolist()
+            if actual != list(range(slot, slot + n)):
+                return done + next(k for k, sequence in enumerate(actual) if sequence != slot + k)
+            done += n
+        return done
+
+    def flush(self) -> int:
+        """
+        Write every finished record to the segment files.
+
+        Returns:
+            The number of records written
+        """
+        with self._lock:
+            start = self._flushed
+            written = self._written(start)
+            first = start % self._capacity
+            head = min(written, self._capacity - first)
+            self._write(self._view[first * RECORD_SIZE:(first + head) * RECORD_SIZE])
+            self._write(self._view[:(written - head) * RECORD_SIZE])
+            self._flushed = start + written
+            return written
+
+    def _write(self, records: memoryview) -> None:
+        """Append records to the current segment, rotating when it is full."""
+        while records:
+            if self._file is None:
+                self._open_segment()
+            room = (self.segment_bytes - len(self._header)) // RECORD_SIZE - self._segment_records
+            if room <= 0:
+                self._close_segment()
+                continue
+            piece = records[:room * RECORD_SIZE]
+            self._file.write(piece)
+            self._index(piece)
+            records = records[len(piece):]
+
+    def _index(self, records: memoryview) -> None:
+        """Add records just written to the current segment to its block index."""
+        while records:
+            position = self._segment_records % INDEX_BLOCK
+            piece = records[:(INDEX_BLOCK - position) * RECORD_SIZE]
+            earliest, latest, mask = _summary(piece)
+            if position:
+                block = self._blocks[-1]
+                block[1] += len(piece) // RECORD_SIZE
+                block[2] = min(block[2], earliest)
+                block[3] = max(block[3], latest)
+                block[4] |= mask
+            else:
+                self._blocks.append([self._segment_records, len(piece) // RECORD_SIZE, earliest, latest, mask])
+            self._segment_records += len(piece) // RECORD_SIZE
+            records = records[len(piece):]
+
+    def _open_segment(self) -> None:
+        self._number += 1
+        self._file = open(segment_path(self.directory, self._number), "xb", buffering=0)
+        self._file.write(self._header)
+        self._segment_records = 0
+        self._blocks = []
+
+    def _close_segment(self) -> None:
+        """Make the current segment durable and write its index."""
+        if self._file is None:
+            return
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        _write_index(segment_path(self.directory, self._number), self._segment_records, self._blocks)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the background writer, flush every record and close the segment."""
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        with self._lock:
+            self._close_segment()
+
+
+def segment_path(directory: str, number: int) -> str:
+    """Return the path of segment number in a log directory."""
+    return os.path.join(directory, f"segment-{number:06d}.audit")
+
+
+def _index_path(path: str) -> str:
+    return path[:-len(".audit")] + ".index"
+
+
+def _write_index(path: str, records: int, blocks: list[list[int]]) -> None:
+    """Write a segment's index atomically."""
+    index_path = _index_path(path)
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(index_path), prefix=".index-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"records": records, "block_size": INDEX_BLOCK, "blocks": blocks}, f)
+        os.replace(temporary, index_path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+# Operation name -> (operation before auditing, audited operation)
+_AUDITED: dict[str, tuple[registry.Operation, registry.Operation]] = {}
+
+# Fixed-point function name -> (function before auditing, audited function)
+_AUDITED_FIXED: dict[str, tuple[Callable[..., Any], Callable[..., Any]]] = {}
+
+# Fixed-point operations, recorded as "fixed.<name>"
+_FIXED_OPERATIONS = ("add", "subtract", "multiply", "divide")
+
+_LOG: AuditLog | None = None
+
+
+def _audited_scalar(func: Callable[..., Any], opcode: int, log: AuditLog) -> Callable[..., Any]:
+    """Wrap a scalar kernel so every call writes one record."""
+    append = log.append
+
+    @functools.wraps(func)
+    def audited(a: Any, b: Any, *args: Any, **kwargs: Any) -> Any:
+        try:
+            result = func(a, b, *args, **kwargs)
+        except Exception as e:
+            append(opcode, a, b, _FAILED, status_of(e))
+            raise
+        append(opcode, a, b, result, STATUS_OK)
+        return result
+    return audited
+
+
+def _masked_statuses(op: registry.Operation) -> Callable[..., MaskedResult]:
+    """Recompute a failed batch in one masked pass over the original kernels."""
+    def recompute(xs: Any, ys: Any, *args: Any, **kwargs: Any) -> MaskedResult:
+        return _evaluate(op, xs, ys)
+    return recompute
+
+
+def _scalar_statuses(scalar: Callable[..., Any]) -> Callable[..., MaskedResult]:
+    """Recompute a failed batch pair by pair, for kernels with no masked form."""
+    def recompute(xs: Any, ys: Any, *args: Any, **kwargs: Any) -> MaskedResult:
+        values = []
+        status = array('B')
+        for x, y in zip(xs, ys):
+            try:
+                values.append(scalar(x, y, *args, **kwargs))
+                status.append(STATUS_OK)
+            except Exception as e:
+                values.append(_FAILED)
+                status.append(status_of(e))
+        return MaskedResult(values, status)
+    return recompute
+
+
+def _audited_batch(
+    func: Callable[..., Any],
+    recompute: Callable[..., MaskedResult],
+    opcode: int,
+    log: AuditLog,
+) -> Callable[..., Any]:
+    """Wrap a batch kernel so every pair writes one record."""
+    append = log.append
+
+    @functools.wraps(func)
+    def audited(xs: Any, ys: Any, *args: Any, **kwargs: Any) -> Any:
+        try:
+            results = func(xs, ys, *args, **kwargs)
+        except Exception:
+            # Recompute once with per-pair statuses so each record carries its own
+            failed = recompute(xs, ys, *args, **kwargs)
+            for x, y, result, status in zip(xs, ys, failed.values, failed.status):
+                append(opcode, x, y, result, status)
+            raise
+        for x, y, result in zip(xs, ys, results):
+            append(opcode, x, y, result, STATUS_OK)
+        return results
+    return audited
+
+
+def enable(
+    directory: str,
+    *,
+    ring_records: int = DEFAULT_RING_RECORDS,
+    segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+) -> AuditLog:
+    """
+    Record every binary and fixed-point operation.
+
+    Operations registered later are not recorded until enable() is called
+    again. Enabling again with a log already open keeps that log.
+
+    Args:
+        directory: Log directory; created if needed
+        ring_records: Records the in-memory ring buffer holds
+        segment_bytes: Size at which a segment file is rotated
+        flush_interval: Seconds between background flushes
+
+    Returns:
+        The open log
+    """
+    global _LOG
+    if _LOG is None:
+        names = [op.name for op in registry.operations() if op.arity == 2]
+        names += [f"fixed.{name}" for name in _FIXED_OPERATIONS]
+        _LOG = AuditLog(directory, names, ring_records, segment_bytes, flush_interval)
+        atexit.register(disable)
+    for opcode, name in enumerate(_LOG.operations):
+        op = registry.get(name)
+        current = _AUDITED.get(name)
+        if op is None or current is not None and current[1] is op:
+            continue
+        scalar = _audited_scalar(op.scalar, opcode, _LOG)
+        batch = _audited_batch(op.batch, _masked_statuses(op), opcode, _LOG) if op.batch is not None else None
+        _AUDITED[name] = (op, registry.replace_kernels(name, scalar, batch))
+    for name in _FIXED_OPERATIONS:
+        if f"fixed.{name}" not in _LOG.operations:
+            continue
+        opcode = _LOG.operations.index(f"fixed.{name}")
+        scalar = getattr(fixed, name)
+        current = _AUDITED_FIXED.get(name)
+        if current is not None and current[1] is scalar:
+            scalar = current[0]
+        batch_name = f"batch_{name}"
+        wrappers = {
+            name: _audited_scalar(scalar, opcode, _LOG),
+            batch_name: _audited_batch(getattr(fixed, batch_name), _scalar_statuses(scalar), opcode, _LOG),
+        }
+        for key, wrapped in wrappers.items():
+            current = _AUDITED_FIXED.get(key)
+            if current is None or getattr(fixed, key) is not current[1]:
+                _AUDITED_FIXED[key] = (getattr(fixed, key), wrapped)
+                setattr(fixed, key, wrapped)
+    return _LOG
+
+
+def disable() -> None:
+    """
+    Restore the original kernels, then flush and close the log.
+
+    Operations replaced in the registry (or fixed-point functions replaced
+    in calculator.fixed) while auditing was enabled keep their replacement.
+    """
+    global _LOG
+    for name, (original, audited) in _AUDITED.items():
+        if registry.get(name) is audited:
+            registry.replace_kernels(name, original.scalar, original.batch)
+    _AUDITED.clear()
+    for key, (original, audited) in _AUDITED_FIXED.items():
+        if getattr(fixed, key) is audited:
+            setattr(fixed, key, original)
+    _AUDITED_FIXED.clear()
+    if _LOG is not None:
+        log, _LOG = _LOG, None
+        atexit.unregister(disable)
+        log.close()
+
+
+def is_enabled() -> bool:
+    """Return True while calculations are being recorded."""
+    return _LOG is not None
+
+
+def flush() -> int:
+    """
+    Write the records buffered so far to the open log, if any.
+
+    Returns:
+        The number of records written
+    """
+    return _LOG.flush() if _LOG is not None else 0
+
+
+def segments(directory: str) -> list[str]:
+    """
+    List the segment files of a log directory, oldest first.
+
+    Args:
+        directory: The log directory
+
+    Returns:
+        The segment paths
+    """
+    numbered = [(int(match.group(1)), match.group(0))
+                for match in map(_SEGMENT_NAME.match, os.listdir(directory)) if match]
+    return [os.path.join(directory, name) for _, name in sorted(numbered)]
+
+
+def parse_time(text: str) -> int:
+    """
+    Parse a time given as seconds since the epoch or as ISO 8601.
+
+    ISO times without an offset are taken as UTC.
+
+    Args:
+        text: e.g. '1760000000.5' or '2026-10-18T09:30:00'
+
+    Returns:
+        Nanoseconds since the epoch
+
+    Raises:
+        ValueError: If the text is neither
+    """
+    try:
+        seconds = Decimal(text)
+    except InvalidOperation:
+        pass
+    else:
+        if seconds.is_finite():
+            return int(seconds * 1_000_000_000)
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid time '{text}': expected epoch seconds or ISO 8601") from None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    whole = moment.replace(microsecond=0)
+    return int(whole.timestamp()) * 1_000_000_000 + moment.microsecond * 1000
+
+
+def format_time(stamp: int) -> str:
+    """Format nanoseconds since the epoch as ISO 8601 UTC with nanoseconds."""
+    seconds, nanoseconds = divmod(stamp, 1_000_000_000)
+    return f"{datetime.fromtimestamp(seconds, timezone.utc):%Y-%m-%dT%H:%M:%S}.{nanoseconds:09d}Z"
+
+
+def _read_header(f: Any, path: str) -> tuple[list[str], int]:
+    """Return a segment's operation names and the size of its header."""
+    head = f.read(HEADER.size)
+    if len(head) < HEADER.size:
+        raise ValueError(f"'{path}' is not an audit segment")
+    magic, version, record_size, length = HEADER.unpack(head)
+    if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD_SIZE:
+        raise ValueError(f"'{path}' is not an audit segment of format version {FORMAT_VERSION}")
+    meta = json.loads(f.read(length))
+    return meta["operations"], HEADER.size + length
+
+
+def _segment_blocks(f: Any, path: str, start: int, records: int) -> list[list[int]]:
+    """Load a segment's index, or build one by scanning it if the index is missing or stale."""
+    try:
+        with open(_index_path(path)) as index_file:
+            index = json.load(index_file)
+        if index["records"] == records and index["block_size"] == INDEX_BLOCK:
+            return index["blocks"]
+    except (OSError, ValueError, KeyError):
+        pass
+    blocks = []
+    f.seek(start)
+    for first in range(0, records, INDEX_BLOCK):
+        n = min(INDEX_BLOCK, records - first)
+        with memoryview(f.read(n * RECORD_SIZE)) as view:
+            blocks.append([first, n, *_summary(view)])
+    return blocks
+
+
+def _value(raw: int, is_int: int) -> float | int:
+    return raw if is_int else _FLOAT64.unpack(_INT64.pack(raw))[0]
+
+
+def _operation_name(name: str) -> str:
+    """Resolve an operation name, alias or fixed.<name> to its recorded name."""
+    prefix, _, rest = name.lower().partition(".")
+    if prefix == "fixed" and rest:
+        if rest not in _FIXED_OPERATIONS:
+            raise ValueError(f"Unknown fixed-point operation '{rest}'. "
+                             f"Supported operations: {', '.join(_FIXED_OPERATIONS)}")
+        return f"fixed.{rest}"
+    return registry.lookup(name).name
+
+
+def read(
+    directory: str,
+    operations: Iterable[str] | None = None,
+    since_ns: int | None = None,
+    until_ns: int | None = None,
+) -> Iterator[AuditRecord]:
+    """
+    Read recorded calculations, oldest segment first.
+
+    Args:
+        directory: The log directory
+        operations: Only these operations (names, aliases or fixed.<name>);
+            default all
+        since_ns: Only records at or after this time (ns since the epoch)
+        until_ns: Only records before this time (ns since the epoch)
+
+    Yields:
+        The matching records, in the order they were written
+
+    Raises:
+        ValueError: If an operation is unknown or a file is not an audit segment
+    """
+    wanted = None if operations is None else {_operation_name(name) for name in operations}
+    since = -(2**63) if since_ns is None else since_ns
+    until = 2**63 if until_ns is None else until_ns
+    for path in segments(directory):
+        with open(path, "rb") as f:
+            names, start = _read_header(f, path)
+            records = (os.fstat(f.fileno()).st_size - start) // RECORD_SIZE
+            mask = sum(1 << i for i, name in enumerate(names) if wanted is None or name in wanted)
+            if not mask:
+                continue
+            for first, n, earliest, latest, block_mask in _segment_blocks(f, path, start, records):
+                if not block_mask & mask or latest < since or earliest >= until:
+                    continue
+                f.seek(start + first * RECORD_SIZE)
+                for stamp, sequence, opcode, status, flags, a, b, result in _RAW_RECORD.iter_unpack(
+                        f.read(n * RECORD_SIZE)):
+                    if since <= stamp < until and mask >> opcode & 1:
+                        yield AuditRecord(stamp, sequence, names[opcode], _value(a, flags & A_INT),
+                                          _value(b, flags & B_INT), _value(result, flags & RESULT_INT), status)
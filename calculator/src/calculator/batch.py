@@ -0,0 +1,408 @@
+"""Batch variants of the calculator operations for sequences and buffers.
+
+The pure-Python path detects the type profile of both operands once per
+batch (typed buffers by their format code, sequences with one C-level
+pass over the element types) and picks a specialized kernel:
+
+* float: every element a float. Results are range-checked with one
+  max() and one min() against the float bound of the limit, and packed
+  without looking at their types again.
+* int: every element an int. Results are screened by bit length, and
+  typed integer buffers skip the check entirely when their item size
+  proves that no result can reach the limit.
+* mixed: anything else, including bools and empty batches, takes the
+  generic kernel.
+
+Every kernel falls back to the generic range check as soon as a result
+may be out of range (or is NaN), so results, errors and deferred
+violations are identical to the generic path.
+"""
+
+import operator
+from array import array
+from itertools import repeat
+from typing import Any, Callable, Sequence, Union
+
+from . import _check_result_range, _validate_number
+from . import limits
+from .policy import DEFERRED, TRUSTED, _check_name, active_policy, record_violation
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+
+# Struct format codes accepted from array.array and memoryview inputs
+_NUMERIC_FORMATS = frozenset("bBhHiIlLqQfd")
+
+_FLOAT_FORMATS = frozenset("fd")
+
+# Operand type profiles
+FLOAT = 'float'
+INT = 'int'
+MIXED = 'mixed'
+
+BatchInput = Union[Sequence[float | int], array, memoryview, Any]
+BatchResult = Union[array, list, Any]
+
+
+def _as_operands(values: BatchInput) -> Sequence[float | int]:
+    """
+    Validate the element type of a batch operand once.
+
+    Typed buffers (array.array, memoryview) are checked by their format code;
+    plain sequences are checked element by element at C speed.
+
+    Args:
+        values: The batch operand
+
+    Returns:
+        A sequence of numbers that can be iterated by the kernels
+
+    Raises:
+        TypeError: If the buffer format or any element is not a number
+        ValueError: If a memoryview is not one-dimensional
+    """
+    if isinstance(values, array):
+        if values.typecode not in _NUMERIC_FORMATS:
+            raise TypeError(f"Expected a numeric array, got typecode '{values.typecode}'")
+        return values
+    if isinstance(values, memoryview):
+        if values.ndim != 1:
+            raise ValueError(f"Expected a one-dimensional buffer, got {values.ndim} dimensions")
+        if values.format.lstrip("@=<>!") not in _NUMERIC_FORMATS:
+            raise TypeError(f"Expected a numeric buffer, got format '{values.format}'")
+        return values
+    if isinstance(values, (str, bytes)):
+        raise TypeError(f"Expected a sequence of numbers, got {type(values).__name__}")
+    if not all(map(isinstance, values, repeat((int, float)))):
+        for value in values:
+            _validate_number(value)
+    return values
+
+
+def _check_lengths(xs: Sequence[Any], ys: Sequence[Any]) -> None:
+    """Raise ValueError if the two operands have different lengths."""
+    if len(xs) != len(ys):
+        raise ValueError(f"Operand lengths differ: {len(xs)} != {len(ys)}")
+
+
+def _profile(values: Sequence[Any]) -> tuple[str, int | None]:
+    """
+    Return the type profile of a batch operand.
+
+    Returns:
+        (FLOAT, INT or MIXED, bit length bound of the elements for typed
+        integer buffers, else None). MIXED also covers operands that
+        still need validating.
+    """
+    if isinstance(values, array):
+        code = values.typecode
+    elif isinstance(values, memoryview):
+        code = values.format.lstrip("@=<>!")
+    else:
+        kinds = set(map(type, values))
+        if len(kinds) == 1:
+            kind = kinds.pop()
+            if kind is float:
+                return FLOAT, None
+            if kind is int:
+                return INT, None
+        return MIXED, None
+    if code in _FLOAT_FORMATS:
+        return FLOAT, None
+    if code in _NUMERIC_FORMATS:
+        return INT, 8 * values.itemsize
+    return MIXED, None
+
+
+def _check_results_range(results: Sequence[float | int], mode: str) -> None:
+    """
+    Range-check a whole batch of results in one pass.
+
+    The scan runs entirely in C; only when a violation is found are the
+    elements re-checked with the scalar helper, so the error message is
+    identical to the one the scalar functions raise. The process-wide
+    limit from calculator.set_max_value() applies. Under the deferred
+    policy every violation is recorded instead of raising the first.
+
+    Args:
+        results: The computed results
+        mode: The validation policy in effect
+
+    Raises:
+        OverflowError: If any result is too large
+    """
+    if any(map(operator.lt, repeat(limits.active.max_value), map(abs, results))):
+        for result in results:
+            try:
+                _check_result_range(result)
+            except OverflowError as e:
+                if mode != DEFERRED:
+                    raise
+                record_violation(e)
+
+
+def _pack(results: list[float | int]) -> BatchResult:
+    """
+    Pack results into a contiguous buffer.
+
+    Float results become array('d') and integer results array('q'). Integer
+    results that do not fit in 64 bits, and batches mixing ints and floats,
+    are returned as a list so they stay exact.
+    """
+    kinds = set(map(type, results))
+    if kinds <= {float}:
+        return array("d", results)
+    if kinds <= {int}:
+        try:
+            return array("q", results)
+        except OverflowError:
+            return results
+    return results
+
+
+def _is_ndarray(value: object) -> bool:
+    """Return True if value is a NumPy array (and NumPy is installed)."""
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def _numpy_float_kernel(kernel: Callable[[Any, Any], Any], xs: Any, ys: Any, mode: str) -> Any:
+    """
+    Run a float64 NumPy kernel with the calculator's range semantics.
+
+    Args:
+        kernel: The NumPy ufunc to apply
+        xs: First operand array
+        ys: Second operand array
+        mode: The validation policy in effect
+
+    Returns:
+        A contiguous float64 array of results
+
+    Raises:
+        OverflowError: If any result is too large
+    """
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        results = np.ascontiguousarray(kernel(xs.astype(np.float64, copy=False), ys))
+    bad = np.flatnonzero(np.abs(results) >= limits.active.float_limit)
+    if bad.size:
+        _check_results_range(results[bad].tolist(), mode)
+    return results
+
+
+def _numpy_operands(xs: Any, ys: Any) -> tuple[Any, Any] | None:
+    """
+    Return float64 views for the NumPy fast path, or None to fall back.
+
+    Integer NumPy arrays take the exact pure-Python path, because NumPy
+    integer arithmetic wraps around silently instead of overflowing.
+    """
+    if not (_is_ndarray(xs) or _is_ndarray(ys)):
+        return None
+    xs_arr = np.asarray(xs)
+    ys_arr = np.asarray(ys)
+    if xs_arr.ndim != 1 or ys_arr.ndim != 1:
+        raise ValueError("Expected one-dimensional arrays")
+    _check_lengths(xs_arr, ys_arr)
+    for arr in (xs_arr, ys_arr):
+        if arr.dtype.kind not in "biuf":
+            raise TypeError(f"Expected a numeric array, got dtype '{arr.dtype}'")
+    if xs_arr.dtype.kind != "f" and ys_arr.dtype.kind != "f":
+        return None
+    return xs_arr.astype(np.float64, copy=False), ys_arr.astype(np.float64, copy=False)
+
+
+def _prepare(
+    xs: BatchInput,
+    ys: BatchInput,
+    mode: str,
+) -> tuple[Sequence[Any], Sequence[Any], tuple[str, int | None]]:
+    """
+    Validate both operands of a pure-Python batch and detect their type profile.
+
+    Type checks are skipped when trusted, and for operands whose profile
+    already proves they hold only ints or floats.
+
+    Returns:
+        (xs, ys, (profile, bit length bound of the results' operands))
+    """
+    if _is_ndarray(xs):
+        xs = xs.tolist()
+    if _is_ndarray(ys):
+        ys = ys.tolist()
+    xs_profile, xs_bits = _profile(xs)
+    ys_profile, ys_bits = _profile(ys)
+    if mode != TRUSTED:
+        if xs_profile == MIXED:
+            xs = _as_operands(xs)
+        if ys_profile == MIXED:
+            ys = _as_operands(ys)
+    _check_lengths(xs, ys)
+    if xs_profile != ys_profile or not xs:
+        return xs, ys, (MIXED, None)
+    if xs_bits is None or ys_bits is None:
+        return xs, ys, (xs_profile, None)
+    return xs, ys, (xs_profile, max(xs_bits, ys_bits))
+
+
+def _generic_kernel(op: Callable[[Any, Any], Any], xs: Sequence[Any], ys: Sequence[Any], mode: str) -> BatchResult:
+    results = list(map(op, xs, ys))
+    _check_results_range(results, mode)
+    return _pack(results)
+
+
+def _float_kernel(op: Callable[[Any, Any], Any], xs: Sequence[Any], ys: Sequence[Any], mode: str) -> array:
+    """Apply op to batches whose results are all floats."""
+    results = list(map(op, xs, ys))
+    limit = limits.active.float_limit
+    # False for NaN, which then takes the generic check
+    if not (max(results) < limit and -limit < min(results)):
+        _check_results_range(results, mode)
+    return array("d", results)
+
+
+def _int_kernel(
+    op: Callable[[Any, Any], Any],
+    xs: Sequence[Any],
+    ys: Sequence[Any],
+    mode: str,
+    bits: int | None,
+) -> BatchResult:
+    """Apply add, subtract or multiply to batches of ints."""
+    results = list(map(op, xs, ys))
+    limit_bits = limits.active.bits
+    # A result shorter than the limit in bits is below it
+    if bits is not None:
+        bound = 2 * bits if op is operator.mul else bits + 1
+    else:
+        bound = max(map(int.bit_length, results))
+    if bound >= limit_bits:
+        _check_results_range(results, mode)
+    try:
+        return array("q", results)
+    except OverflowError:
+        return results
+
+
+def _compute(op: Callable[[Any, Any], Any], xs: BatchInput, ys: BatchInput, mode: str) -> BatchResult:
+    """Run op over prepared operands with the kernel for their type profile."""
+    xs, ys, (profile, bits) = _prepare(xs, ys, mode)
+    if op is operator.truediv:
+        if 0 in ys:
+            raise ZeroDivisionError("Cannot divide by zero")
+        if profile != MIXED:
+            return _float_kernel(op, xs, ys, mode)
+    elif profile == FLOAT:
+        return _float_kernel(op, xs, ys, mode)
+    elif profile == INT:
+        return _int_kernel(op, xs, ys, mode, bits)
+    return _generic_kernel(op, xs, ys, mode)
+
+
+def add(xs: BatchInput, ys: BatchInput, *, policy: str | None = None) -> BatchResult:
+    """
+    Add two batches of numbers element-wise.
+
+    Args:
+        xs: First operands (list, array.array, memoryview or NumPy array)
+        ys: Second operands, same length as xs
+        policy: Validation policy for this batch (default: the active policy)
+
+    Returns:
+        A contiguous buffer with xs[i] + ys[i]
+
+    Raises:
+        TypeError: If either operand holds non-numbers
+        ValueError: If the operands have different lengths or the policy is
+            unknown
+        OverflowError: If any result is too large (recorded instead
+            under the deferred policy)
+    """
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    fast = _numpy_operands(xs, ys)
+    if fast is not None:
+        return _numpy_float_kernel(np.add, *fast, mode)
+    return _compute(operator.add, xs, ys, mode)
+
+
+def subtract(xs: BatchInput, ys: BatchInput, *, policy: str | None = None) -> BatchResult:
+    """
+    Subtract the second batch from the first element-wise.
+
+    Args:
+        xs: Minuends (list, array.array, memoryview or NumPy array)
+        ys: Subtrahends, same length as xs
+        policy: Validation policy for this batch (default: the active policy)
+
+    Returns:
+        A contiguous buffer with xs[i] - ys[i]
+
+    Raises:
+        TypeError: If either operand holds non-numbers
+        ValueError: If the operands have different lengths or the policy is
+            unknown
+        OverflowError: If any result is too large (recorded instead
+            under the deferred policy)
+    """
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    fast = _numpy_operands(xs, ys)
+    if fast is not None:
+        return _numpy_float_kernel(np.subtract, *fast, mode)
+    return _compute(operator.sub, xs, ys, mode)
+
+
+def multiply(xs: BatchInput, ys: BatchInput, *, policy: str | None = None) -> BatchResult:
+    """
+    Multiply two batches of numbers element-wise.
+
+    Args:
+        xs: First operands (list, array.array, memoryview or NumPy array)
+        ys: Second operands, same length as xs
+        policy: Validation policy for this batch (default: the active policy)
+
+    Returns:
+        A contiguous buffer with xs[i] * ys[i]
+
+    Raises:
+        TypeError: If either operand holds non-numbers
+        ValueError: If the operands have different lengths or the policy is
+            unknown
+        OverflowError: If any result is too large (recorded instead
+            under the deferred policy)
+    """
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    fast = _numpy_operands(xs, ys)
+    if fast is not None:
+        return _numpy_float_kernel(np.multiply, *fast, mode)
+    return _compute(operator.mul, xs, ys, mode)
+
+
+def divide(xs: BatchInput, ys: BatchInput, *, policy: str | None = None) -> BatchResult:
+    """
+    Divide the first batch by the second element-wise.
+
+    Args:
+        xs: Dividends (list, array.array, memoryview or NumPy array)
+        ys: Divisors, same length as xs
+        policy: Validation policy for this batch (default: the active policy)
+
+    Returns:
+        A contiguous float buffer with xs[i] / ys[i]
+
+    Raises:
+        TypeError: If either operand holds non-numbers
+        ValueError: If the operands have different lengths or the policy is
+            unknown
+        ZeroDivisionError: If any divisor is zero
+        OverflowError: If any result is too large (recorded instead
+            under the deferred policy)
+    """
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    fast = _numpy_operands(xs, ys)
+    if fast is not None:
+        if not fast[1].all():
+            raise ZeroDivisionError("Cannot divide by zero")
+        return _numpy_float_kernel(np.true_divide, *fast, mode)
+    return _compute(operator.truediv, xs, ys, mode)
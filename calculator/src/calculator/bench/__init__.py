@@ -0,0 +1,186 @@
+"""Benchmark registry, runner and regression comparison for the calculator."""
+
+import json
+import platform
+import re
+import sys
+import time
+import timeit
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+
+
+@dataclass
+class Benchmark:
+    """A registered benchmark case."""
+
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    ops: int = 1
+    repeat: int | None = None
+    number: int | None = None
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(
+    name: str,
+    *,
+    ops: int = 1,
+    repeat: int | None = None,
+    number: int | None = None,
+) -> Callable[[Callable[[], Callable[[], object]]], Callable[[], Callable[[], object]]]:
+    """
+    Register a benchmark case.
+
+    The decorated function performs any setup and returns the zero-argument
+    callable to time. One call of that callable counts as `ops` operations,
+    which lets throughput cases report per-element figures.
+
+    Args:
+        name: Dotted benchmark name, e.g. 'scalar.add.int'
+        ops: Number of operations performed by one call
+        repeat: Fixed number of timing rounds (default: runner setting)
+        number: Fixed number of calls per round (default: autorange)
+
+    Returns:
+        The decorator
+    """
+    def register(setup: Callable[[], Callable[[], object]]) -> Callable[[], Callable[[], object]]:
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark '{name}' is already registered")
+        BENCHMARKS[name] = Benchmark(name, setup, ops, repeat, number)
+        return setup
+    return register
+
+
+def run_benchmark(case: Benchmark, repeat: int = DEFAULT_REPEAT) -> dict[str, float]:
+    """
+    Time one benchmark case.
+
+    The best of several rounds is reported, which is the figure least
+    disturbed by other load on the machine.
+
+    Args:
+        case: The benchmark to run
+        repeat: Number of timing rounds
+
+    Returns:
+        A dict with 'ns_per_op' and 'ops_per_sec'
+    """
+    timer = timeit.Timer(case.setup())
+    number = case.number
+    if number is None:
+        number, _ = timer.autorange()
+    rounds = timer.repeat(repeat=case.repeat or repeat, number=number)
+    seconds_per_op = min(rounds) / (number * case.ops)
+    return {
+        "ns_per_op": seconds_per_op * 1e9,
+        "ops_per_sec": 1.0 / seconds_per_op if seconds_per_op else float("inf"),
+    }
+
+
+def run(pattern: str | None = None, repeat: int = DEFAULT_REPEAT) -> dict[str, Any]:
+    """
+    Run all registered benchmarks whose name contains pattern.
+
+    Args:
+        pattern: Substring filter on benchmark names (None runs everything)
+        repeat: Number of timing rounds per benchmark
+
+    Returns:
+        The results document, ready to be written as JSON
+    """
+    from . import cases  # noqa: F401  (registers the built-in cases)
+
+    results = {}
+    for name, case in BENCHMARKS.items():
+        if pattern is None or pattern in name:
+            results[name] = run_benchmark(case, repeat)
+    _add_scaling_efficiency(results)
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+_WORKERS_RE = re.compile(r"^(?P<base>.+)\.workers(?P<workers>\d+)$")
+
+
+def _add_scaling_efficiency(results: dict[str, dict[str, float]]) -> None:
+    """
+    Annotate '<name>.workersN' results with their parallel scaling efficiency.
+
+    Efficiency is the speedup over '<name>.workers1' divided by N, so 1.0
+    means perfect linear scaling.
+    """
+    for name, result in results.items():
+        match = _WORKERS_RE.match(name)
+        if match is None:
+            continue
+        single = results.get(f"{match['base']}.workers1")
+        if single is not None:
+            speedup = single["ns_per_op"] / result["ns_per_op"]
+            result["scaling_efficiency"] = speedup / int(match["workers"])
+
+
+def compare(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[tuple[str, float, float, float]]:
+    """
+    Find benchmarks that got slower than the baseline by more than threshold.
+
+    Args:
+        baseline: Results document of the reference run
+        current: Results document of the run to check
+        threshold: Allowed relative slowdown (0.10 means 10%)
+
+    Returns:
+        (name, baseline ns/op, current ns/op, relative change) for each
+        regression, worst first
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None or not reference["ns_per_op"]:
+            continue
+        change = result["ns_per_op"] / reference["ns_per_op"] - 1.0
+        if change > threshold:
+            regressions.append((name, reference["ns_per_op"], result["ns_per_op"], change))
+    return sorted(regressions, key=lambda regression: regression[3], reverse=True)
+
+
+def load_results(path: str) -> dict[str, Any]:
+    """Read a results document written by save_results()."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: dict[str, Any], path: str) -> None:
+    """Write a results document as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def format_results(results: dict[str, Any]) -> str:
+    """Render a results document as an aligned text table."""
+    rows = results["results"]
+    width = max((len(name) for name in rows), default=10)
+    lines = [f"{'benchmark':<{width}}  {'ns/op':>12}  {'ops/s':>14}  {'scaling':>8}"]
+    for name, result in rows.items():
+        scaling = f"{result['scaling_efficiency']:>8.0%}" if "scaling_efficiency" in result else ""
+        lines.append(f"{name:<{width}}  {result['ns_per_op']:>12.1f}  {result['ops_per_sec']:>14,.0f}  {scaling}".rstrip())
+    return "\n".join(lines)
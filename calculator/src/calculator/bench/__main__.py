@@ -0,0 +1,61 @@
+"""Command line entry point: python -m calculator.bench run|compare."""
+
+import argparse
+import sys
+
+from . import (
+    DEFAULT_REPEAT,
+    DEFAULT_THRESHOLD,
+    compare,
+    format_results,
+    load_results,
+    run,
+    save_results,
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run benchmarks or compare two result files.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+
+    Returns:
+        The process exit status; 1 when compare finds regressions
+    """
+    parser = argparse.ArgumentParser(prog="python -m calculator.bench",
+                                     description="Calculator benchmark suite.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks and write JSON results")
+    run_parser.add_argument("-o", "--output", help="write results to this JSON file")
+    run_parser.add_argument("-k", "--filter", help="only run benchmarks whose name contains this text")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timing rounds per benchmark")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions against a baseline")
+    compare_parser.add_argument("baseline", help="baseline results JSON")
+    compare_parser.add_argument("current", help="current results JSON")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="allowed relative slowdown (default: 0.10)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(args.filter, args.repeat)
+        print(format_results(results))
+        if args.output:
+            save_results(results, args.output)
+        return 0
+
+    regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    for name, before, after, change in regressions:
+        print(f"REGRESSION {name}: {before:.1f} -> {after:.1f} ns/op ({change:+.1%})")
+    if regressions:
+        return 1
+    print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
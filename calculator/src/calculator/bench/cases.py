@@ -0,0 +1,425 @@
+"""Built-in benchmark cases for the calculator."""
+
+import asyncio
+import atexit
+import collections
+import decimal
+import functools
+import io
+import operator
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from array import array
+from itertools import repeat
+from pathlib import Path
+from typing import Callable
+
+from . import benchmark
+from .. import _check_result_range, _validate_number
+from .. import aio
+from .. import fixed
+from .. import masked
+from .. import metrics
+from .. import output
+from .. import parsing
+from .. import reduce
+from .. import registry
+from .. import window
+from ..sheet import Sheet
+from ..__main__ import perform_operation
+from ..parallel import process_file_parallel
+from ..stream import process_stream
+
+
+BATCH_SIZE = 100_000
+STREAM_LINES = 50_000
+SHEET_INPUTS = 1_000
+AIO_CALLERS = 10_000
+PARALLEL_PAIRS = 400_000
+PARALLEL_WORKERS = (1, 2, 4)
+
+_OPERATIONS = {op.name: op.scalar for op in registry.operations()}
+
+_BATCH_OPERATIONS = {op.name: op.batch for op in registry.operations()}
+
+# Operands per input kind; the big ints keep every result just under 10**100
+_OPERANDS = {
+    'int': (123456, 789),
+    'float': (1234.5678, 9.875),
+    'bigint': (10**99 // 3, 10**98 + 7),
+}
+_BIGINT_PRODUCT_OPERANDS = (10**50 // 3, 10**49 + 7)
+
+# 300-digit operands, checked against a per-call limit of 10**300
+BIGINT300_LIMIT = 10**300
+_BIGINT300_OPERANDS = (10**299 // 3, 10**298 + 7)
+_BIGINT300_PRODUCT_OPERANDS = (10**150 // 3, 10**149 + 7)
+
+
+def _module_command() -> tuple[list[str], dict[str, str]]:
+    """
+    Build the command line that runs this package with '-m'.
+
+    The package may be imported as 'calculator' or, from the source tree,
+    as 'src.calculator'; PYTHONPATH is set so the child finds it either way.
+    """
+    package = __name__.rsplit(".", 2)[0]
+    root = Path(__file__).resolve().parents[1 + package.count(".") + 1]
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(root), env.get("PYTHONPATH")]))
+    return [sys.executable, "-m", package], env
+
+
+def _register_scalar(name: str, kind: str) -> None:
+    func = _OPERATIONS[name]
+    a, b = _OPERANDS[kind]
+    if (name, kind) == ('multiply', 'bigint'):
+        a, b = _BIGINT_PRODUCT_OPERANDS
+
+    @benchmark(f"scalar.{name}.{kind}")
+    def case() -> Callable[[], object]:
+        return lambda: func(a, b)
+
+
+def _register_scalar_bigint300(name: str) -> None:
+    func = _OPERATIONS[name]
+    a, b = _BIGINT300_PRODUCT_OPERANDS if name == 'multiply' else _BIGINT300_OPERANDS
+
+    @benchmark(f"scalar.{name}.bigint300")
+    def case() -> Callable[[], object]:
+        return lambda: func(a, b, max_value=BIGINT300_LIMIT)
+
+
+for _name in _OPERATIONS:
+    for _kind in _OPERANDS:
+        _register_scalar(_name, _kind)
+    _register_scalar_bigint300(_name)
+
+
+@benchmark("validate.number")
+def _validate() -> Callable[[], object]:
+    return lambda: _validate_number(1.5)
+
+
+@benchmark("range_check.float")
+def _range_float() -> Callable[[], object]:
+    return lambda: _check_result_range(1.5e50)
+
+
+@benchmark("range_check.int")
+def _range_int() -> Callable[[], object]:
+    return lambda: _check_result_range(123456789)
+
+
+@benchmark("range_check.bigint")
+def _range_bigint() -> Callable[[], object]:
+    value = 10**99 + 1
+    return lambda: _check_result_range(value)
+
+
+@benchmark("range_check.bigint300")
+def _range_bigint300() -> Callable[[], object]:
+    value = 10**299 + 7
+    return lambda: _check_result_range(value, BIGINT300_LIMIT)
+
+
+@benchmark("range_check.boundary")
+def _range_boundary() -> Callable[[], object]:
+    # Same bit length as the limit, so the exact comparison is needed
+    value = -(10**100)
+    return lambda: _check_result_range(value)
+
+
+@benchmark("dispatch.perform_operation")
+def _dispatch() -> Callable[[], object]:
+    return lambda: perform_operation('divide', 10.0, 4.0)
+
+
+@benchmark("dispatch.registry_lookup")
+def _registry_lookup() -> Callable[[], object]:
+    return lambda: registry.lookup('mul')
+
+
+@benchmark("dispatch.metrics_call")
+def _metrics_call() -> Callable[[], object]:
+    # An instrumented kernel as installed by metrics.enable(), without
+    # enabling metrics globally; compare with scalar.add.float
+    timed = metrics._timed(_OPERATIONS['add'], metrics._Series())
+    return lambda: timed(1.5, 2.5)
+
+
+def _register_batch(name: str) -> None:
+    func = _BATCH_OPERATIONS[name]
+    xs = array('d', (i * 0.5 + 1.0 for i in range(BATCH_SIZE)))
+    ys = array('d', (i * 0.25 + 2.0 for i in range(BATCH_SIZE)))
+
+    @benchmark(f"batch.{name}.float", ops=BATCH_SIZE)
+    def case() -> Callable[[], object]:
+        return lambda: func(xs, ys)
+
+    @benchmark(f"batch.{name}.int", ops=BATCH_SIZE)
+    def int_case() -> Callable[[], object]:
+        int_xs = array('q', range(1, BATCH_SIZE + 1))
+        int_ys = array('q', range(BATCH_SIZE, 0, -1))
+        return lambda: func(int_xs, int_ys)
+
+    @benchmark(f"batch.{name}.list", ops=BATCH_SIZE)
+    def list_case() -> Callable[[], object]:
+        list_xs, list_ys = list(xs), list(ys)
+        return lambda: func(list_xs, list_ys)
+
+
+for _name in _BATCH_OPERATIONS:
+    _register_batch(_name)
+
+
+@benchmark("masked.divide.float", ops=BATCH_SIZE)
+def _masked_divide() -> Callable[[], object]:
+    xs = array('d', (i * 0.5 + 1.0 for i in range(BATCH_SIZE)))
+    ys = array('d', (i * 0.25 + 2.0 for i in range(BATCH_SIZE)))
+    return lambda: masked.divide(xs, ys)
+
+
+@benchmark("masked.divide.errors", ops=BATCH_SIZE)
+def _masked_divide_errors() -> Callable[[], object]:
+    # One zero divisor in every hundred pairs
+    xs = array('d', (i * 0.5 + 1.0 for i in range(BATCH_SIZE)))
+    ys = array('d', (0.0 if i % 100 == 0 else i * 0.25 + 2.0 for i in range(BATCH_SIZE)))
+    return lambda: masked.divide(xs, ys)
+
+
+@benchmark("reduce.sum.float", ops=BATCH_SIZE)
+def _reduce_sum() -> Callable[[], object]:
+    values = array('d', (i * 0.37 - 1000.0 for i in range(BATCH_SIZE)))
+    return lambda: reduce.sum(values)
+
+
+@benchmark("reduce.fold_add.float", ops=BATCH_SIZE)
+def _fold_add() -> Callable[[], object]:
+    # Baseline: the Python-level fold that reduce.sum replaces
+    values = array('d', (i * 0.37 - 1000.0 for i in range(BATCH_SIZE)))
+    add = registry.lookup('add').scalar
+    return lambda: functools.reduce(add, values, 0)
+
+
+@benchmark("reduce.cumsum.float", ops=BATCH_SIZE)
+def _reduce_cumsum() -> Callable[[], object]:
+    values = array('d', (i * 0.37 - 1000.0 for i in range(BATCH_SIZE)))
+    return lambda: collections.deque(reduce.cumsum(values), maxlen=0)
+
+
+def _register_output(kind: str) -> None:
+    @benchmark(f"output.{kind}.float", ops=BATCH_SIZE)
+    def case() -> Callable[[], object]:
+        values = array('d', (i * 0.37 - 1000.0 for i in range(BATCH_SIZE)))
+        fmt = output.OutputFormat(kind)
+        sink = open(os.devnull, "wb" if fmt.binary else "w", buffering=output.BUFFER_SIZE)
+        atexit.register(sink.close)
+        return lambda: output.ResultWriter(sink, fmt).write_all(values)
+
+
+for _kind in output.FORMATS:
+    _register_output(_kind)
+
+
+@benchmark("output.print.float", ops=BATCH_SIZE)
+def _print_results() -> Callable[[], object]:
+    # Baseline: one print() per result, as the CLI used to write them
+    values = array('d', (i * 0.37 - 1000.0 for i in range(BATCH_SIZE)))
+    sink = open(os.devnull, "w")
+    atexit.register(sink.close)
+
+    def run() -> object:
+        for value in values:
+            print(value, file=sink)
+    return run
+
+
+@benchmark("parse.column.float", ops=BATCH_SIZE)
+def _parse_column_float() -> Callable[[], object]:
+    text = "".join(f"{i * 0.37 - 1000.0!r}\n" for i in range(BATCH_SIZE)).encode()
+    return lambda: parsing.parse_column(text)
+
+
+@benchmark("parse.column.int", ops=BATCH_SIZE)
+def _parse_column_int() -> Callable[[], object]:
+    text = "".join(f"{i * 37 - 1000}\n" for i in range(BATCH_SIZE)).encode()
+    return lambda: parsing.parse_column(text)
+
+
+@benchmark("parse.text_values.float", ops=BATCH_SIZE)
+def _text_values() -> Callable[[], object]:
+    # Baseline: the line-by-line parser that bulk column parsing replaces
+    text = "".join(f"{i * 0.37 - 1000.0!r}\n" for i in range(BATCH_SIZE))
+    return lambda: collections.deque(reduce.text_values(io.StringIO(text)), maxlen=0)
+
+
+@benchmark("aio.direct.callers10k", ops=AIO_CALLERS, repeat=5, number=1)
+def _aio_direct() -> Callable[[], object]:
+    # Baseline: every caller awaits its own scalar call
+    async def run() -> object:
+        return await asyncio.gather(*(aio.add(i, 0.5) for i in range(AIO_CALLERS)))
+    return lambda: asyncio.run(run())
+
+
+@benchmark("aio.batcher.callers10k", ops=AIO_CALLERS, repeat=5, number=1)
+def _aio_batcher() -> Callable[[], object]:
+    async def run() -> object:
+        async with aio.Batcher() as batcher:
+            return await asyncio.gather(*(batcher.submit('add', i, 0.5) for i in range(AIO_CALLERS)))
+    return lambda: asyncio.run(run())
+
+
+_FIXED_OPERATIONS = {
+    'add': (fixed.add, fixed.batch_add, operator.add),
+    'subtract': (fixed.subtract, fixed.batch_subtract, operator.sub),
+    'multiply': (fixed.multiply, fixed.batch_multiply, operator.mul),
+    'divide': (fixed.divide, fixed.batch_divide, operator.truediv),
+}
+
+
+def _register_fixed(name: str) -> None:
+    scalar, batch_func, op = _FIXED_OPERATIONS[name]
+    texts = [(f"{i * 0.37 + 1.0:.4f}", f"{(i % 997) * 0.13 + 0.5:.4f}") for i in range(BATCH_SIZE)]
+    # Decimal results are quantized to the scale unless the operation is exact
+    quantum = decimal.Decimal(1).scaleb(-fixed.DEFAULT_SCALE) if name in ('multiply', 'divide') else None
+
+    @benchmark(f"fixed.{name}.scalar")
+    def case() -> Callable[[], object]:
+        a, b = fixed.to_fixed(texts[1][0]), fixed.to_fixed(texts[1][1])
+        return lambda: scalar(a, b)
+
+    @benchmark(f"decimal.{name}.scalar")
+    def decimal_case() -> Callable[[], object]:
+        # Baseline: the same operation on Decimal values
+        a, b = decimal.Decimal(texts[1][0]), decimal.Decimal(texts[1][1])
+        if quantum is None:
+            return lambda: op(a, b)
+        return lambda: op(a, b).quantize(quantum)
+
+    @benchmark(f"fixed.{name}.batch", ops=BATCH_SIZE)
+    def batch_case() -> Callable[[], object]:
+        xs = fixed.to_array(a for a, _ in texts)
+        ys = fixed.to_array(b for _, b in texts)
+        return lambda: batch_func(xs, ys)
+
+    @benchmark(f"decimal.{name}.batch", ops=BATCH_SIZE)
+    def decimal_batch_case() -> Callable[[], object]:
+        xs = [decimal.Decimal(a) for a, _ in texts]
+        ys = [decimal.Decimal(b) for _, b in texts]
+        if quantum is None:
+            return lambda: list(map(op, xs, ys))
+        return lambda: list(map(decimal.Decimal.quantize, map(op, xs, ys), repeat(quantum)))
+
+
+for _name in _FIXED_OPERATIONS:
+    _register_fixed(_name)
+
+
+ROLLING_WINDOW = 100
+
+
+def _register_rolling(name: str) -> None:
+    @benchmark(f"rolling.{name}.window100", ops=BATCH_SIZE)
+    def case() -> Callable[[], object]:
+        # Close to 1, so that products stay in range
+        values = [1.0 + (i % 13 - 6) * 0.01 for i in range(BATCH_SIZE)]
+        return lambda: collections.deque(window.rolling(name, values, ROLLING_WINDOW), maxlen=0)
+
+
+for _name in window.WINDOWS:
+    _register_rolling(_name)
+
+
+@benchmark("rolling.recompute_sum.window100", ops=BATCH_SIZE)
+def _rolling_recompute() -> Callable[[], object]:
+    # Baseline: re-adding the whole window with the scalar add on every value
+    values = [1.0 + (i % 13 - 6) * 0.01 for i in range(BATCH_SIZE)]
+    add = registry.lookup('add').scalar
+
+    def run() -> object:
+        recent: collections.deque[float] = collections.deque(maxlen=ROLLING_WINDOW)
+        for value in values:
+            recent.append(value)
+            functools.reduce(add, recent, 0)
+    return run
+
+
+def _chained_sheet() -> Sheet:
+    cells: dict[str, object] = {}
+    for i in range(SHEET_INPUTS):
+        cells[f"x{i}"] = i + 0.5
+        cells[f"a{i}"] = f"x{i} * 2"
+        cells[f"b{i}"] = f"a{i} + x{i}"
+        cells[f"c{i}"] = f"b{i} / 3"
+    return Sheet(cells)
+
+
+@benchmark("sheet.update_input")
+def _sheet_update() -> Callable[[], object]:
+    # One input of SHEET_INPUTS changes; only its three formulas are recomputed
+    sheet = _chained_sheet()
+    return lambda: sheet.set("x7", 1.5)
+
+
+@benchmark("sheet.recompute_all")
+def _sheet_recompute_all() -> Callable[[], object]:
+    # Baseline: recomputing every formula with chained calls on each update
+    inputs = [i + 0.5 for i in range(SHEET_INPUTS)]
+    add, multiply, divide = _OPERATIONS['add'], _OPERATIONS['multiply'], _OPERATIONS['divide']
+
+    def run() -> object:
+        return [divide(add(multiply(x, 2), x), 3) for x in inputs]
+    return run
+
+
+@benchmark("sheet.read_many", ops=SHEET_INPUTS)
+def _sheet_read_many() -> Callable[[], object]:
+    sheet = _chained_sheet()
+    names = [f"c{i}" for i in range(SHEET_INPUTS)]
+    return lambda: sheet.values(names)
+
+
+@benchmark("stream.throughput", ops=STREAM_LINES)
+def _stream() -> Callable[[], object]:
+    names = list(_OPERATIONS)
+    lines = [f"{names[i % 4]} {i + 1} {i % 97 + 1}.5\n" for i in range(STREAM_LINES)]
+
+    def run() -> object:
+        return process_stream(lines, io.StringIO())
+    return run
+
+
+@benchmark("cli.cold_start", repeat=5, number=3)
+def _cold_start() -> Callable[[], object]:
+    command, env = _module_command()
+    command = command + ['add', '1', '2']
+
+    def run() -> object:
+        return subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+    return run
+
+
+def _scratch_dir() -> str:
+    """Create a temporary directory removed when the process exits."""
+    path = tempfile.mkdtemp(prefix="calculator-bench-")
+    atexit.register(shutil.rmtree, path, True)
+    return path
+
+
+def _register_parallel(workers: int) -> None:
+    @benchmark(f"parallel.batch.workers{workers}", ops=PARALLEL_PAIRS, repeat=3, number=1)
+    def case() -> Callable[[], object]:
+        scratch = _scratch_dir()
+        source = os.path.join(scratch, "pairs.f64")
+        target = os.path.join(scratch, "results.f64")
+        with open(source, "wb") as f:
+            array('d', (i * 0.5 + 1.0 for i in range(2 * PARALLEL_PAIRS))).tofile(f)
+        return lambda: process_file_parallel('multiply', source, target, workers)
+
+
+for _workers in PARALLEL_WORKERS:
+    _register_parallel(_workers)
@@ -0,0 +1,428 @@
+"""Checkpointed, resumable batch, stream and reduction jobs.
+
+    checkpointer = Checkpointer("job.ckpt", interval=30.0, resume=True)
+    process_file_checkpointed('add', 'pairs.f64', 'sums.f64', checkpointer)
+
+A job checks Checkpointer.due() at every chunk boundary, which costs one
+clock read. When a checkpoint is due the job flushes and fsyncs its
+output, then saves its input offset, output offset and partial state
+(the exact running sum, the running product, or line and error
+counters). The checkpoint is a small JSON file. It is written to a
+temporary file, fsynced and renamed over the previous one, so a crash
+leaves either the old or the new checkpoint, never a torn one. At most
+one checkpoint is written per interval, so the cost is bounded however
+small the chunks are.
+
+With resume=True a job restarts from its checkpoint, if there is one.
+It truncates the output at the checkpoint's output offset and continues
+from the input offset. Chunks start at the same positions as in an
+uninterrupted run, so the output is byte-identical, block-wise float
+rounding included. A checkpoint records the job's identity (command,
+paths, input size and modification time, options) and is refused for
+any other job. The checkpoint file is removed when the job completes.
+"""
+
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from typing import IO, Any, Iterator
+
+from .output import BUFFER_SIZE, OutputFormat
+from .packed import DEFAULT_CHUNK_SIZE, _is_npy, compute_range, npy_header, plan_file
+from .reduce import (
+    BLOCK_SIZE,
+    REDUCTIONS,
+    SCANS,
+    _ExactSum,
+    _RunningProduct,
+    _file_blocks,
+    _product_record,
+    _sum_record,
+    _write_values,
+    column_layout,
+)
+from .stream import DEFAULT_CHUNK_SIZE as STREAM_CHUNK_SIZE, StreamStats, process_stream, read_lines
+
+
+DEFAULT_INTERVAL = 30.0
+
+# 2: products are saved as mantissa and exponent
+FORMAT_VERSION = 2
+
+
+@dataclass
+class Checkpoint:
+    """Progress of a job: byte offsets into its input and output, and partial state."""
+
+    job: dict[str, Any]
+    input_offset: int
+    output_offset: int
+    state: dict[str, Any] = field(default_factory=dict)
+
+
+def save(path: str, checkpoint: Checkpoint) -> None:
+    """
+    Write a checkpoint atomically.
+
+    Args:
+        path: The checkpoint file
+        checkpoint: The progress to record
+    """
+    data = json.dumps({"version": FORMAT_VERSION, **asdict(checkpoint)}).encode()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    # Make the rename itself durable
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def load(path: str) -> Checkpoint:
+    """
+    Read a checkpoint file.
+
+    Args:
+        path: The checkpoint file
+
+    Returns:
+        The recorded progress
+
+    Raises:
+        ValueError: If the file is not a checkpoint of this format version
+    """
+    with open(path, "rb") as f:
+        try:
+            data = json.loads(f.read())
+            if data.pop("version") != FORMAT_VERSION:
+                raise ValueError
+            return Checkpoint(**data)
+        except (ValueError, TypeError, KeyError):
+            raise ValueError(f"'{path}' is not a valid checkpoint file") from None
+
+
+def _file_identity(path: str) -> dict[str, Any]:
+    """Identify an input file by path, size and modification time."""
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class Checkpointer:
+    """Decide when a job saves its progress to path, and restore it on resume.
+
+    interval is the minimum number of seconds between checkpoints; 0 saves
+    at every chunk. With resume, a job restarts from the checkpoint file
+    if it exists.
+    """
+
+    def __init__(self, path: str, interval: float = DEFAULT_INTERVAL, resume: bool = False) -> None:
+        if interval < 0:
+            raise ValueError("Checkpoint interval must not be negative")
+        self.path = path
+        self.interval = interval
+        self.resume = resume
+        self.saved = 0
+        self._job: dict[str, Any] = {}
+        self._next = 0.0
+
+    def start(self, job: dict[str, Any]) -> Checkpoint | None:
+        """
+        Begin a job, returning the checkpoint to resume from, if any.
+
+        Args:
+            job: JSON-serializable identity of the job
+
+        Returns:
+            The checkpoint, or None to start from the beginning
+
+        Raises:
+            ValueError: If the checkpoint belongs to a different job
+        """
+        # Compare identities the way they come back from the file
+        self._job = json.loads(json.dumps(job))
+        self._next = time.monotonic() + self.interval
+        if not self.resume or not os.path.exists(self.path):
+            return None
+        checkpoint = load(self.path)
+        if checkpoint.job != self._job:
+            raise ValueError(f"Checkpoint '{self.path}' belongs to a different job")
+        return checkpoint
+
+    def due(self) -> bool:
+        """True when the interval since the last checkpoint has passed."""
+        return time.monotonic() >= self._next
+
+    def save(self, input_offset: int, output_offset: int, state: dict[str, Any] | None = None) -> None:
+        """
+        Record progress; the job's output up to output_offset must already be durable.
+
+        Args:
+            input_offset: Byte offset in the input where the job continues
+            output_offset: Byte offset in the output where the job continues
+            state: Partial state needed to continue (JSON-serializable)
+        """
+        save(self.path, Checkpoint(self._job, input_offset, output_offset, state or {}))
+        self.saved += 1
+        self._next = time.monotonic() + self.interval
+
+    def finish(self) -> None:
+        """Remove the checkpoint of a completed job."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _sync(f: IO) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _sync_path(path: str) -> None:
+    """Make everything written to a file (through any descriptor or mapping) durable."""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _restored_index(checkpoint: Checkpoint | None, offset: int, item_size: int, count: int) -> int:
+    """Turn a checkpoint's input offset back into an item index."""
+    if checkpoint is None:
+        return 0
+    index, remainder = divmod(checkpoint.input_offset - offset, item_size)
+    if remainder or not 0 <= index <= count:
+        raise ValueError(f"Checkpoint input offset {checkpoint.input_offset} does not match the input")
+    return index
+
+
+def process_file_checkpointed(
+    operation: str,
+    in_path: str,
+    out_path: str,
+    checkpointer: Checkpointer,
+    dtype: str = 'f64',
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    policy: str | None = None,
+    status_path: str | None = None,
+) -> int:
+    """
+    Run calculator.packed.process_file() with checkpoints.
+
+    Args:
+        operation: Name or alias of a registered operation
+        in_path: Packed operand file (raw or .npy)
+        out_path: Result file (written as .npy if the name ends in .npy)
+        checkpointer: Where and how often to save progress
+        dtype: 'f64' or 'i64' for raw input files (ignored for .npy)
+        chunk_size: Number of pairs computed per chunk
+        policy: Validation policy for the batch operations
+        status_path: Optional uint8 status file (see process_file())
+
+    Returns:
+        The number of results written
+
+    Raises:
+        ValueError: If the job is invalid or the checkpoint does not match it
+        ZeroDivisionError: If a divisor is zero (without a status file)
+        OverflowError: If a result is too large (without a status file)
+    """
+    checkpoint = checkpointer.start({
+        "command": "batch", "operation": operation, "input": _file_identity(in_path),
+        "output": os.path.abspath(out_path), "dtype": dtype, "policy": policy,
+        "status": os.path.abspath(status_path) if status_path is not None else None,
+    })
+    plan = plan_file(operation, in_path, out_path, dtype, status_path, resume=checkpoint is not None)
+    start = _restored_index(checkpoint, plan.in_offset, 16, plan.pairs)
+    for first in range(start, plan.pairs, chunk_size):
+        last = min(first + chunk_size, plan.pairs)
+        compute_range(plan, first, last, chunk_size, policy)
+        if last < plan.pairs and checkpointer.due():
+            _sync_path(plan.out_path)
+            if plan.status_path is not None:
+                _sync_path(plan.status_path)
+            checkpointer.save(plan.in_offset + last * 16, plan.out_offset + last * 8)
+    checkpointer.finish()
+    return plan.pairs
+
+
+def _read_lines(lines: Iterator[bytes], count: int) -> tuple[list[str], int]:
+    """Take up to count lines from read_lines(); return them decoded and their size in bytes."""
+    raw = list(islice(lines, count))
+    return [line.decode("utf-8") for line in raw], sum(map(len, raw))
+
+
+def process_stream_checkpointed(
+    in_path: str,
+    out_path: str,
+    checkpointer: Checkpointer,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    output_format: OutputFormat | None = None,
+) -> StreamStats:
+    """
+    Run calculator.stream.process_stream() over a file with checkpoints.
+
+    Args:
+        in_path: Input file of '<operation> <num1> <num2>' records
+        out_path: Result file
+        checkpointer: Where and how often to save progress
+        chunk_size: Number of records between checkpoint opportunities
+        output_format: How to write rows
+
+    Returns:
+        Counters for the processed records and errors (over the whole
+        file, resumed runs included)
+
+    Raises:
+        ValueError: If the checkpoint does not match the job or the input is not UTF-8
+    """
+    fmt = output_format if output_format is not None else OutputFormat()
+    checkpoint = checkpointer.start({
+        "command": "stream", "input": _file_identity(in_path), "output": os.path.abspath(out_path),
+        "format": asdict(fmt),
+    })
+    stats = StreamStats()
+    line_number = 1
+    in_offset = out_offset = 0
+    if checkpoint is not None:
+        in_offset, out_offset = checkpoint.input_offset, checkpoint.output_offset
+        line_number = checkpoint.state["line"]
+        stats = StreamStats(checkpoint.state["records"], checkpoint.state["errors"])
+        if not 0 <= in_offset <= os.path.getsize(in_path) or out_offset > os.path.getsize(out_path):
+            raise ValueError("Checkpoint offsets do not match the input and output files")
+        os.truncate(out_path, out_offset)
+    if fmt.binary:
+        output = open(out_path, "ab" if checkpoint is not None else "wb", buffering=BUFFER_SIZE)
+    else:
+        output = open(out_path, "a" if checkpoint is not None else "w", encoding="utf-8", newline="",
+                      buffering=BUFFER_SIZE)
+    with open(in_path, "rb", buffering=BUFFER_SIZE) as infile, output:
+        infile.seek(in_offset)
+        if checkpoint is None and fmt.header():
+            output.write(fmt.header())
+        raw_lines = read_lines(infile)
+        while True:
+            lines, size = _read_lines(raw_lines, chunk_size)
+            if not lines:
+                break
+            segment = process_stream(lines, output, chunk_size, line_number, output_format=fmt, header=False)
+            stats.records += segment.records
+            stats.errors += segment.errors
+            line_number += len(lines)
+            in_offset += size
+            if checkpointer.due():
+                _sync(output)
+                checkpointer.save(in_offset, output.tell(), {
+                    "line": line_number, "records": stats.records, "errors": stats.errors,
+                })
+        output.flush()
+    checkpointer.finish()
+    return stats
+
+
+def reduce_file_checkpointed(operation: str, path: str, checkpointer: Checkpointer,
+                             dtype: str = 'f64') -> float | int:
+    """
+    Run calculator.reduce.reduce_file() on one process with checkpoints.
+
+    The running total (the exact sum as an integer over a power of two,
+    or the product) is saved with each checkpoint.
+
+    Args:
+        operation: 'sum' or 'product'
+        path: Packed little-endian values (raw float64/int64 or .npy)
+        checkpointer: Where and how often to save progress
+        dtype: 'f64' or 'i64' for raw files (ignored for .npy)
+
+    Returns:
+        The reduction of all values
+
+    Raises:
+        ValueError: If the job is invalid or the checkpoint does not match it
+        OverflowError: As for calculator.reduce.sum() and product()
+    """
+    if operation not in REDUCTIONS:
+        raise ValueError(f"Unknown reduction '{operation}'. Supported reductions: {', '.join(REDUCTIONS)}")
+    typecode, offset, count = column_layout(path, dtype)
+    checkpoint = checkpointer.start({
+        "command": operation, "input": _file_identity(path), "dtype": dtype, "block_size": BLOCK_SIZE,
+    })
+    position = _restored_index(checkpoint, offset, 8, count)
+    kind = _ExactSum if operation == 'sum' else _RunningProduct
+    state = kind(**checkpoint.state) if checkpoint is not None else kind()
+    record = _sum_record if operation == 'sum' else _product_record
+    for block in _file_blocks(path, typecode, offset, position, count):
+        position += len(block)
+        if operation == 'sum' and state.nan:
+            break
+        state.apply(record(block))
+        if position < count and checkpointer.due():
+            checkpointer.save(offset + position * 8, 0, asdict(state))
+    checkpointer.finish()
+    return state.value()
+
+
+def scan_file_checkpointed(operation: str, in_path: str, out_path: str, checkpointer: Checkpointer,
+                           dtype: str = 'f64') -> int:
+    """
+    Run calculator.reduce.scan_file() on one process with checkpoints.
+
+    Args:
+        operation: 'cumsum' or 'cumprod'
+        in_path: Packed little-endian values (raw float64/int64 or .npy)
+        out_path: Result file, same element type (written as .npy if the
+            name ends in .npy)
+        checkpointer: Where and how often to save progress
+        dtype: 'f64' or 'i64' for raw input files (ignored for .npy)
+
+    Returns:
+        The number of values written
+
+    Raises:
+        ValueError: If the job is invalid or the checkpoint does not match it
+        OverflowError: If a running value is too large
+    """
+    if operation not in SCANS:
+        raise ValueError(f"Unknown scan '{operation}'. Supported scans: {', '.join(SCANS)}")
+    typecode, offset, count = column_layout(in_path, dtype)
+    checkpoint = checkpointer.start({
+        "command": operation, "input": _file_identity(in_path), "output": os.path.abspath(out_path),
+        "dtype": dtype, "block_size": BLOCK_SIZE,
+    })
+    header = npy_header(typecode, (count,)) if _is_npy(out_path) else b""
+    if checkpoint is None:
+        with open(out_path, "wb") as outfile:
+            outfile.write(header)
+            outfile.truncate(len(header) + count * 8)
+    elif os.path.getsize(out_path) != len(header) + count * 8:
+        raise ValueError(f"Output file '{out_path}' does not match the checkpoint")
+    position = _restored_index(checkpoint, offset, 8, count)
+    kind = _ExactSum if operation == 'cumsum' else _RunningProduct
+    carry = kind(**checkpoint.state) if checkpoint is not None else kind()
+    with open(out_path, "r+b") as out:
+        out.seek(len(header) + position * 8)
+        for block in _file_blocks(in_path, typecode, offset, position, count):
+            _write_values(out, carry.scan(block), typecode)
+            position += len(block)
+            if position < count and checkpointer.due():
+                _sync(out)
+                checkpointer.save(offset + position * 8, out.tell(), asdict(carry))
+    checkpointer.finish()
+    return count
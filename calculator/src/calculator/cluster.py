@@ -0,0 +1,514 @@
+"""Coordinator/worker execution of packed batch jobs over TCP.
+
+A coordinator plans a job exactly like calculator.packed.process_file(),
+splits its operand pairs into chunks and leases the chunks to workers
+that connect to it. A worker computes a chunk with the operation's batch
+kernel and sends the results back; the coordinator writes them at the
+chunk's offset in the output file, so the output is byte-identical to a
+local run whatever order the chunks finish in.
+
+Each worker holds one lease at a time. A lease that is not answered
+within lease_timeout seconds, or whose worker disconnects, goes back to
+the front of the queue and is leased again, up to max_attempts leases
+per chunk. A late answer is still used if the chunk is not done yet;
+answers for a chunk that is already done are dropped.
+
+Every message is a 13-byte header ``>BqI`` (kind, chunk index, payload
+length) followed by its payload:
+
+* HELLO (worker): the worker name, UTF-8.
+* JOB (coordinator): JSON ``{"op", "typecode", "out_typecode", "policy"}``.
+* LEASE (coordinator): the chunk's operand pairs as stored in the input file.
+* RESULT (worker): the chunk's results as little-endian out_typecode values.
+* FAILED (worker): the error, UTF-8; the chunk is not retried.
+* DONE (coordinator): no payload; the worker exits.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+from . import registry
+from .packed import DEFAULT_CHUNK_SIZE, FilePlan, _store, _values, plan_file
+from .parallel import ShardError, ShardResult
+
+
+DEFAULT_LEASE_TIMEOUT = 30.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+MESSAGE = struct.Struct(">BqI")
+HELLO, JOB, LEASE, RESULT, FAILED, DONE = range(1, 7)
+
+# Largest payload a worker accepts: a lease of 16 Mi operand pairs
+MAX_PAYLOAD = 16 * 16 * 1024 * 1024
+
+# Seconds a finished coordinator waits for its local worker processes to exit
+_JOIN_TIMEOUT = 5.0
+
+
+def parse_address(text: str) -> tuple[str, int]:
+    """
+    Split a 'HOST:PORT' address.
+
+    Args:
+        text: The address; IPv6 hosts may be written in brackets
+
+    Returns:
+        (host, port)
+
+    Raises:
+        ValueError: If the address is malformed
+    """
+    host, sep, port = text.rpartition(":")
+    if not sep or not port.isdigit() or int(port) > 65535:
+        raise ValueError(f"Expected HOST:PORT, got '{text}'")
+    return host.strip("[]"), int(port)
+
+
+def _message(kind: int, index: int = -1, payload: bytes = b"") -> bytes:
+    return MESSAGE.pack(kind, index, len(payload)) + payload
+
+
+def _receive(sock: socket.socket) -> tuple[int, int, bytearray]:
+    """Read one message from a blocking socket."""
+    kind, index, length = MESSAGE.unpack(_receive_exactly(sock, MESSAGE.size))
+    if length > MAX_PAYLOAD:
+        raise ConnectionError(f"Message of {length} bytes exceeds the {MAX_PAYLOAD}-byte limit")
+    return kind, index, _receive_exactly(sock, length)
+
+
+def _receive_exactly(sock: socket.socket, size: int) -> bytearray:
+    data = bytearray(size)
+    with memoryview(data) as view:
+        received = 0
+        while received < size:
+            count = sock.recv_into(view[received:])
+            if not count:
+                raise ConnectionError("Coordinator closed the connection")
+            received += count
+    return data
+
+
+def compute_chunk(operation: str, typecode: str, out_typecode: str, payload: bytes,
+                  policy: str | None = None) -> bytearray:
+    """
+    Compute the results of one leased chunk.
+
+    Args:
+        operation: Name or alias of a registered operation
+        typecode: 'd' or 'q', the element type of the operand pairs
+        out_typecode: 'd' or 'q', the element type of the results
+        payload: Little-endian operand pairs (a0, b0, a1, b1, ...)
+        policy: Validation policy for the batch operation
+
+    Returns:
+        The results as little-endian out_typecode values
+
+    Raises:
+        ValueError: If the payload is not a whole number of operand pairs
+        ZeroDivisionError: If a divisor is zero
+        OverflowError: If a result is too large
+    """
+    if len(payload) % 16:
+        raise ValueError(f"Chunk of {len(payload)} bytes is not a whole number of 16-byte operand pairs")
+    func = registry.lookup(operation).batch
+    with (
+        memoryview(payload) as raw,
+        _values(raw, typecode) as chunk,
+        chunk[0::2] as xs,
+        chunk[1::2] as ys,
+    ):
+        values = func(xs, ys, policy=policy)
+    results = bytearray(len(payload) // 2)
+    with memoryview(results) as dest:
+        _store(dest, values, out_typecode)
+    return results
+
+
+def run_worker(host: str, port: int, name: str | None = None,
+               connect_timeout: float = DEFAULT_CONNECT_TIMEOUT) -> int:
+    """
+    Compute leased chunks for a coordinator until it sends DONE.
+
+    Args:
+        host: Coordinator host
+        port: Coordinator port
+        name: Name shown in the coordinator's report (default: host-pid)
+        connect_timeout: Seconds to keep retrying while the coordinator is not listening yet
+
+    Returns:
+        The number of chunks computed
+
+    Raises:
+        ConnectionError: If the coordinator cannot be reached or the connection breaks
+    """
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port), timeout=connect_timeout)
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+    chunks = 0
+    with sock:
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(_message(HELLO, payload=name.encode()))
+        job = None
+        while True:
+            kind, index, payload = _receive(sock)
+            if kind == DONE:
+                return chunks
+            if kind == JOB:
+                job = json.loads(payload)
+                continue
+            if kind != LEASE or job is None:
+                raise ConnectionError(f"Unexpected message kind {kind} from the coordinator")
+            try:
+                results = compute_chunk(job["op"], job["typecode"], job["out_typecode"], payload,
+                                        job["policy"])
+            except Exception as e:
+                sock.sendall(_message(FAILED, index, f"{type(e).__name__}: {e}".encode()))
+            else:
+                sock.sendall(_message(RESULT, index, results))
+            chunks += 1
+
+
+@dataclass
+class WorkerStats:
+    """What one worker connection did during a job."""
+
+    name: str
+    chunks: int = 0
+    pairs: int = 0
+    busy_seconds: float = 0.0
+    timeouts: int = 0
+    lost: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Pairs per second of lease-to-answer time."""
+        return self.pairs / self.busy_seconds if self.busy_seconds else 0.0
+
+
+@dataclass
+class ClusterReport:
+    """Summary of a coordinated job.
+
+    retries maps a chunk index to the number of times it was leased
+    again after a timeout or a lost worker.
+    """
+
+    pairs: int
+    chunks: list[tuple[int, int]]
+    wall_seconds: float
+    workers: list[WorkerStats] = field(default_factory=list)
+    retries: dict[int, int] = field(default_factory=dict)
+
+    def format(self) -> str:
+        """Render the report as text."""
+        lines = [
+            f"Job: {self.pairs} pairs in {len(self.chunks)} chunks    Wall time: {self.wall_seconds:.3f} s",
+            "",
+            f"  {'worker':<24} {'chunks':>7} {'pairs':>12} {'pairs/s':>12} {'timeouts':>8} {'lost':>5}",
+        ]
+        for worker in self.workers:
+            lines.append(f"  {worker.name:<24} {worker.chunks:>7} {worker.pairs:>12} "
+                         f"{worker.throughput:>12.0f} {worker.timeouts:>8} {worker.lost:>5}")
+        lines += ["", f"Retries: {sum(self.retries.values())} over {len(self.retries)} chunk(s)"]
+        for index, count in sorted(self.retries.items()):
+            start, stop = self.chunks[index]
+            lines.append(f"  chunk {index} [{start}, {stop}): {count}")
+        return "\n".join(lines) + "\n"
+
+
+class _Connection:
+    """A connected worker and its current lease."""
+
+    def __init__(self, writer: asyncio.StreamWriter, stats: WorkerStats) -> None:
+        self.writer = writer
+        self.stats = stats
+        self.lease: int | None = None
+        self.leased_at = 0.0
+        self.deadline = 0.0
+        self.expired = False
+
+
+class Coordinator:
+    """Lease the chunks of a planned job to workers and assemble the output."""
+
+    def __init__(
+        self,
+        plan: FilePlan,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        policy: str | None = None,
+    ) -> None:
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        if lease_timeout <= 0:
+            raise ValueError("Lease timeout must be positive")
+        if max_attempts < 1:
+            raise ValueError("Max attempts must be at least 1")
+        self.plan = plan
+        self.chunks = [(start, min(start + chunk_size, plan.pairs))
+                       for start in range(0, plan.pairs, chunk_size)]
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.workers: list[WorkerStats] = []
+        self._job = _message(JOB, payload=json.dumps({
+            "op": plan.operation, "typecode": plan.typecode,
+            "out_typecode": plan.out_typecode, "policy": policy,
+        }).encode())
+        self._pending = deque(range(len(self.chunks)))
+        self._leases = [0] * len(self.chunks)
+        self._done = [False] * len(self.chunks)
+        self._remaining = len(self.chunks)
+        self._failures: list[ShardResult] = []
+        self._connections: set[_Connection] = set()
+        self._idle: deque[_Connection] = deque()
+        self._finished: asyncio.Event | None = None
+        self._abandoned = False
+        self._in_fd = -1
+        self._out_fd = -1
+
+    async def run(self, sock: socket.socket,
+                  processes: list[multiprocessing.Process] = ()) -> ClusterReport:
+        """
+        Serve workers on a listening socket until every chunk is done.
+
+        Args:
+            sock: A bound, listening TCP socket
+            processes: Local worker processes; the job fails if all of them
+                exit while no worker is connected and work remains
+
+        Returns:
+            The job report
+
+        Raises:
+            ShardError: If any chunk failed or ran out of attempts
+            RuntimeError: If every local worker process exited early
+        """
+        started = time.monotonic()
+        self._finished = asyncio.Event()
+        if not self._remaining:
+            self._finished.set()
+        with open(self.plan.in_path, "rb") as infile, open(self.plan.out_path, "r+b") as outfile:
+            self._in_fd, self._out_fd = infile.fileno(), outfile.fileno()
+            server = await asyncio.start_server(self._serve, sock=sock)
+            watchdog = asyncio.create_task(self._watch(processes))
+            try:
+                await self._finished.wait()
+            finally:
+                watchdog.cancel()
+                server.close()
+                for connection in self._connections:
+                    connection.writer.write(_message(DONE))
+                    connection.writer.close()
+                await server.wait_closed()
+        if self._abandoned:
+            raise RuntimeError("Every local worker exited before the job was done")
+        if self._failures:
+            raise ShardError(sorted(self._failures, key=lambda failure: failure.index))
+        retries = {index: leases - 1 for index, leases in enumerate(self._leases) if leases > 1}
+        return ClusterReport(self.plan.pairs, self.chunks, time.monotonic() - started,
+                             self.workers, retries)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = None
+        try:
+            kind, _, payload = await _read_message(reader)
+            if kind != HELLO or self._finished.is_set():
+                return
+            writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = _Connection(writer, WorkerStats(payload.decode(errors="replace")))
+            self.workers.append(connection.stats)
+            self._connections.add(connection)
+            writer.write(self._job)
+            self._idle.append(connection)
+            self._dispatch()
+            while True:
+                kind, index, payload = await _read_message(reader)
+                if index != connection.lease or kind not in (RESULT, FAILED):
+                    raise ConnectionError(f"Unexpected message kind {kind} for chunk {index}")
+                self._answer(connection, kind, payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if connection is not None:
+                self._lose(connection)
+            writer.close()
+
+    def _dispatch(self) -> None:
+        """Lease pending chunks to idle workers."""
+        while self._pending and self._idle:
+            index = self._pending.popleft()
+            if self._done[index]:
+                continue
+            connection = self._idle.popleft()
+            start, stop = self.chunks[index]
+            payload = os.pread(self._in_fd, (stop - start) * 16, self.plan.in_offset + start * 16)
+            self._leases[index] += 1
+            connection.lease = index
+            connection.leased_at = time.monotonic()
+            connection.deadline = connection.leased_at + self.lease_timeout
+            connection.expired = False
+            connection.writer.write(_message(LEASE, index, payload))
+
+    def _answer(self, connection: _Connection, kind: int, payload: bytes) -> None:
+        """Use a worker's answer for its lease and give it more work."""
+        index = connection.lease
+        start, stop = self.chunks[index]
+        if kind == RESULT and len(payload) != (stop - start) * 8:
+            raise ConnectionError(f"Result for chunk {index} has {len(payload)} bytes, "
+                                  f"expected {(stop - start) * 8}")
+        stats = connection.stats
+        stats.chunks += 1
+        stats.pairs += stop - start
+        stats.busy_seconds += time.monotonic() - connection.leased_at
+        connection.lease = None
+        if not self._done[index]:
+            if kind == FAILED:
+                self._fail(index, payload.decode(errors="replace"))
+            else:
+                self._complete(index, payload)
+        self._idle.append(connection)
+        self._dispatch()
+
+    def _complete(self, index: int, payload: bytes) -> None:
+        start, _ = self.chunks[index]
+        os.pwrite(self._out_fd, payload, self.plan.out_offset + start * 8)
+        self._finish_chunk(index)
+
+    def _fail(self, index: int, error: str) -> None:
+        start, stop = self.chunks[index]
+        self._failures.append(ShardResult(index, start, stop, records=stop - start, error=error))
+        self._finish_chunk(index)
+
+    def _finish_chunk(self, index: int) -> None:
+        self._done[index] = True
+        self._remaining -= 1
+        if not self._remaining:
+            self._finished.set()
+
+    def _requeue(self, index: int) -> None:
+        """Put a chunk whose lease expired or was lost back at the front of the queue."""
+        if self._done[index]:
+            return
+        if self._leases[index] >= self.max_attempts:
+            self._fail(index, f"no answer after {self._leases[index]} lease(s)")
+        else:
+            self._pending.appendleft(index)
+
+    def _lose(self, connection: _Connection) -> None:
+        """Forget a disconnected worker, requeueing its lease."""
+        self._connections.discard(connection)
+        if connection in self._idle:
+            self._idle.remove(connection)
+        if connection.lease is not None and not connection.expired:
+            connection.stats.lost += 1
+            self._requeue(connection.lease)
+        connection.lease = None
+        if not self._finished.is_set():
+            self._dispatch()
+
+    async def _watch(self, processes: list[multiprocessing.Process]) -> None:
+        """Expire overdue leases, and give up if every local worker has exited."""
+        tick = min(self.lease_timeout / 4, 1.0)
+        while True:
+            await asyncio.sleep(tick)
+            now = time.monotonic()
+            for connection in self._connections:
+                if connection.lease is not None and not connection.expired and now >= connection.deadline:
+                    connection.expired = True
+                    connection.stats.timeouts += 1
+                    self._requeue(connection.lease)
+            self._dispatch()
+            if processes and not self._connections and not any(p.is_alive() for p in processes):
+                self._abandoned = True
+                self._finished.set()
+
+
+async def _read_message(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+    kind, index, length = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+    if length > MAX_PAYLOAD:
+        raise ConnectionError(f"Message of {length} bytes exceeds the {MAX_PAYLOAD}-byte limit")
+    return kind, index, await reader.readexactly(length)
+
+
+def coordinate(
+    operation: str,
+    in_path: str,
+    out_path: str,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    *,
+    dtype: str = 'f64',
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    local_workers: int = 0,
+    policy: str | None = None,
+    on_listen: Callable[[str, int], None] | None = None,
+) -> ClusterReport:
+    """
+    Run a packed batch job on workers that connect over TCP.
+
+    The output is identical to calculator.packed.process_file().
+
+    Args:
+        operation: Name or alias of a registered operation
+        in_path: Packed operand file (raw or .npy)
+        out_path: Result file (written as .npy if the name ends in .npy)
+        host: Address to listen on
+        port: Port to listen on; 0 picks a free port
+        dtype: 'f64' or 'i64' for raw input files (ignored for .npy)
+        chunk_size: Number of pairs per lease
+        lease_timeout: Seconds before an unanswered lease is given to another worker
+        max_attempts: Leases per chunk before the job fails
+        local_workers: Number of worker processes to start on this machine
+        policy: Validation policy for the batch operations
+        on_listen: Called with the bound (host, port) before any worker starts
+
+    Returns:
+        The job report, with per-worker throughput and chunk retries
+
+    Raises:
+        ValueError: If the operation, dtype, file layout or settings are invalid
+        ShardError: If any chunk failed or ran out of attempts
+    """
+    plan = plan_file(operation, in_path, out_path, dtype)
+    coordinator = Coordinator(plan, chunk_size, lease_timeout, max_attempts, policy)
+    with socket.create_server((host, port)) as sock:
+        bound_host, bound_port = sock.getsockname()[:2]
+        if on_listen is not None:
+            on_listen(bound_host, bound_port)
+        connect_host = "127.0.0.1" if bound_host in ("", "0.0.0.0") else bound_host
+        processes = [
+            multiprocessing.Process(target=run_worker, args=(connect_host, bound_port),
+                                    kwargs={"name": f"local-{i}"}, daemon=True)
+            for i in range(local_workers if coordinator.chunks else 0)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            return asyncio.run(coordinator.run(sock, processes))
+        finally:
+            for process in processes:
+                process.join(_JOIN_TIMEOUT)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
@@ -0,0 +1,283 @@
+"""Infix expression language compiled onto the calculator operations."""
+
+import re
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Mapping
+
+from . import _validate_number
+from . import limits
+from . import registry
+
+
+CACHE_SIZE = 1024
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[A-Za-z_]\w*)"
+    r"|(?P<op>[-+*/()])"
+    r")"
+)
+
+_BINARY_FUNCS = {'+': '_add', '-': '_sub', '*': '_mul', '/': '_div'}
+
+
+class ExpressionError(ValueError):
+    """Raised for malformed expressions and missing variables."""
+
+
+def _negate(value: float | int) -> float | int:
+    """Negate a number with the same type validation as the operations."""
+    _validate_number(value)
+    return -value
+
+
+# Globals of every compiled expression; the operations are exported by the
+# registry, so kernels swapped in by calculator.metrics or calculator.audit
+# apply to compiled expressions too
+_NAMESPACE: dict[str, Any] = {'_neg': _negate}
+for _name, _key in (('add', '_add'), ('subtract', '_sub'), ('multiply', '_mul'), ('divide', '_div')):
+    registry.export(_name, _NAMESPACE, _key)
+
+
+def tokenize(source: str) -> list[str]:
+    """
+    Split an expression into tokens.
+
+    Args:
+        source: The expression text
+
+    Returns:
+        The list of number, name and operator tokens
+
+    Raises:
+        ExpressionError: If the text contains an invalid character, or an
+            integer literal is out of range or too long to convert
+    """
+    tokens = []
+    position = 0
+    end = len(source.rstrip())
+    while position < end:
+        match = _TOKEN_RE.match(source, position)
+        if match is None:
+            column = len(source) - len(source[position:].lstrip())
+            raise ExpressionError(f"Unexpected character {source[column]!r} at position {column}")
+        token = match.group(match.lastgroup)
+        if match.lastgroup == 'number' and token.isdigit():
+            _check_integer(token, match.start('number'))
+        tokens.append(token)
+        position = match.end()
+    return tokens
+
+
+def _check_integer(token: str, position: int) -> None:
+    """Check that an integer literal converts and is within the active limit."""
+    try:
+        value = int(token)
+    except ValueError:
+        raise ExpressionError(f"Integer literal at position {position} has {len(token)} digits "
+                              f"(max: {sys.get_int_max_str_digits()})") from None
+    if limits.active.exceeds(value):
+        raise ExpressionError(f"Number {token} at position {position} is too large "
+                              f"(max: {limits.get_max_value()})")
+
+
+def normalize(source: str) -> str:
+    """Return the canonical text of an expression (tokens separated by single spaces)."""
+    return " ".join(tokenize(source))
+
+
+class _Parser:
+    """
+    Recursive-descent parser producing Python source for the compiled callable.
+
+    Every operation is one assignment to a temporary, so the generated code
+    is a flat list of statements however long the expression is.
+    """
+
+    def __init__(self, tokens: list[str]) -> None:
+        self.tokens = tokens
+        self.index = 0
+        self.variables: dict[str, str] = {}
+        self.statements: list[str] = []
+
+    def _emit(self, code: str) -> str:
+        """Assign code to a new temporary and return its name."""
+        name = f"_t{len(self.statements)}"
+        self.statements.append(f"{name} = {code}")
+        return name
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise ExpressionError("Unexpected end of expression")
+        self.index += 1
+        return token
+
+    def parse(self) -> str:
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        code = self._expression()
+        if self._peek() is not None:
+            raise ExpressionError(f"Unexpected token {self._peek()!r}")
+        return code
+
+    def _expression(self) -> str:
+        code = self._term()
+        while self._peek() in ('+', '-'):
+            op = self._next()
+            code = self._emit(f"{_BINARY_FUNCS[op]}({code}, {self._term()})")
+        return code
+
+    def _term(self) -> str:
+        code = self._unary()
+        while self._peek() in ('*', '/'):
+            op = self._next()
+            code = self._emit(f"{_BINARY_FUNCS[op]}({code}, {self._unary()})")
+        return code
+
+    def _unary(self) -> str:
+        if self._peek() == '-':
+            self._next()
+            operand = self._unary()
+            if operand.startswith('(') or operand[0].isdigit():
+                return f"(-{operand})"
+            return self._emit(f"_neg({operand})")
+        if self._peek() == '+':
+            self._next()
+            return self._unary()
+        return self._primary()
+
+    def _primary(self) -> str:
+        token = self._next()
+        if token == '(':
+            code = self._expression()
+            if self._next() != ')':
+                raise ExpressionError("Expected ')'")
+            return code
+        if token[0].isdigit() or token[0] == '.':
+            return repr(_parse_number(token))
+        if token[0].isalpha() or token[0] == '_':
+            if token not in self.variables:
+                self.variables[token] = f"_v{len(self.variables)}"
+            return self.variables[token]
+        raise ExpressionError(f"Unexpected token {token!r}")
+
+
+def _parse_number(token: str) -> float | int:
+    """Parse a numeric literal, keeping integer literals exact."""
+    if token.isdigit():
+        return int(token)
+    value = float(token)
+    if value == float('inf'):
+        raise ExpressionError(f"Number {token} is too large")
+    return value
+
+
+class CompiledExpression:
+    """An expression compiled into a callable over the calculator operations."""
+
+    __slots__ = ('source', 'variables', '_func')
+
+    def __init__(self, source: str, variables: tuple[str, ...], func: Callable[..., float | int]) -> None:
+        self.source = source
+        self.variables = variables
+        self._func = func
+
+    def __call__(self, values: Mapping[str, float | int] | None = None, /, **kwargs: float | int) -> float | int:
+        """
+        Evaluate the expression.
+
+        Args:
+            values: Mapping of variable names to numbers
+            **kwargs: Variable values given as keyword arguments
+
+        Returns:
+            The result of the expression
+
+        Raises:
+            ExpressionError: If a variable has no value
+            TypeError: If a variable is not a number
+            ZeroDivisionError: If dividing by zero
+            OverflowError: If an intermediate result is too large
+        """
+        if kwargs:
+            values = {**values, **kwargs} if values else kwargs
+        elif values is None:
+            values = {}
+        try:
+            args = [values[name] for name in self.variables]
+        except KeyError as e:
+            raise ExpressionError(f"Undefined variable '{e.args[0]}'") from None
+        return self._func(*args)
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.source!r})"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile_normalized(normalized: str) -> CompiledExpression:
+    """Compile canonical expression text; cached so equivalent spellings share one entry."""
+    parser = _Parser(normalized.split(" ") if normalized else [])
+    try:
+        result = parser.parse()
+    except RecursionError:
+        raise ExpressionError("Expression is nested too deeply") from None
+    params = ", ".join(parser.variables.values())
+    body = "".join(f"    {statement}\n" for statement in parser.statements)
+    definitions: dict[str, Any] = {}
+    exec(compile(f"def _compiled({params}):\n{body}    return {result}\n", "<expression>", "exec"),
+         _NAMESPACE, definitions)
+    return CompiledExpression(normalized, tuple(parser.variables), definitions['_compiled'])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile_source(source: str, max_value: int) -> CompiledExpression:
+    """Compile raw expression text; cached per limit, since integer literals are checked against it."""
+    return _compile_normalized(normalize(source))
+
+
+def compile_expression(source: str) -> CompiledExpression:
+    """
+    Compile an expression such as '(a + b) * c / d' into a callable.
+
+    Both the raw text and its normalized form are cached, so repeated
+    formulas skip tokenizing and parsing entirely. Integer literals are
+    checked against the active limit; the raw text is cached per limit.
+
+    Args:
+        source: The expression text
+
+    Returns:
+        The compiled expression
+
+    Raises:
+        ExpressionError: If the expression is malformed or an integer
+            literal is out of range
+    """
+    return _compile_source(source, limits.get_max_value())
+
+
+def evaluate(source: str, values: Mapping[str, float | int] | None = None, /, **kwargs: float | int) -> float | int:
+    """
+    Compile (or fetch from the cache) and evaluate an expression.
+
+    Args:
+        source: The expression text
+        values: Mapping of variable names to numbers
+        **kwargs: Variable values given as keyword arguments
+
+    Returns:
+        The result of the expression
+    """
+    return compile_expression(source)(values, **kwargs)
+
+
+def clear_cache() -> None:
+    """Drop all cached compiled expressions."""
+    _compile_source.cache_clear()
+    _compile_normalized.cache_clear()
@@ -0,0 +1,571 @@
+"""Scaled-integer fixed-point arithmetic for money-like values.
+
+    price = fixed.to_fixed("19.99")              # 199900 at the default scale 4
+    total = fixed.multiply(price, fixed.to_fixed("3"))
+    fixed.to_string(total)                       # '59.9700'
+
+A value with scale s is stored as the integer number of units of
+10**-s, so decimal amounts such as 0.10 are exact and adding them never
+drifts the way float does. add and subtract are exact. multiply and
+divide round their exact result to the scale with one of ROUNDING_MODES:
+
+* half-even: to the nearest unit, ties to the even one (the default;
+  what Decimal's ROUND_HALF_EVEN and round() do)
+* half-up: to the nearest unit, ties away from zero
+* down: towards zero (truncate)
+
+Results are range-checked as values, not units: max_value (default: the
+process-wide limit) bounds the absolute value of the result, and a
+rejected result raises the usual OverflowError, or is recorded under the
+deferred policy.
+
+The batch functions take sequences of units, typically array('q')
+buffers, and return array('q'). The default rounding mode runs as a
+handful of C-level map() passes over the batch; the other modes round
+element by element. A result that does not fit in 64 bits raises
+OverflowError.
+"""
+
+import math
+import operator
+import re
+from array import array
+from functools import lru_cache
+from itertools import repeat
+from typing import Iterable, Sequence
+
+from . import limits
+from .policy import DEFERRED, TRUSTED, _check_name, active_policy, record_violation
+
+
+DEFAULT_SCALE = 4
+
+# Largest scale whose unit (10**scale) fits in an int64 buffer
+MAX_SCALE = 18
+
+HALF_EVEN = 'half-even'
+HALF_UP = 'half-up'
+DOWN = 'down'
+ROUNDING_MODES = (HALF_EVEN, HALF_UP, DOWN)
+
+_UNITS = tuple(10**scale for scale in range(MAX_SCALE + 1))
+
+_INT64_BITS = 63
+
+_LOG2_10 = math.log2(10)
+
+_INT_FORMATS = frozenset('bBhHiIlLqQ')
+
+_DECIMAL = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?")
+
+
+def _unit(scale: int) -> int:
+    """Return 10**scale, or raise ValueError for an unsupported scale."""
+    if not isinstance(scale, int) or not 0 <= scale <= MAX_SCALE:
+        raise ValueError(f"Scale must be an integer between 0 and {MAX_SCALE}, got {scale!r}")
+    return _UNITS[scale]
+
+
+def _check_rounding(rounding: str) -> None:
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"Unknown rounding mode '{rounding}'. Supported modes: {', '.join(ROUNDING_MODES)}")
+
+
+def _round_div(n: int, d: int, rounding: str) -> int:
+    """
+    Divide two integers, rounding the exact quotient to an integer.
+
+    Args:
+        n: Dividend
+        d: Divisor (non-zero)
+        rounding: One of ROUNDING_MODES
+
+    Returns:
+        n / d rounded as requested
+
+    Raises:
+        ValueError: If the rounding mode is unknown
+    """
+    if d < 0:
+        n, d = -n, -d
+    q, r = divmod(n, d)
+    if rounding == HALF_EVEN:
+        twice = r + r
+        if twice > d or (twice == d and q & 1):
+            q += 1
+        return q
+    if rounding == HALF_UP:
+        twice = r + r
+        if twice > d or (twice == d and q >= 0):
+            q += 1
+        return q
+    if rounding == DOWN:
+        if r and q < 0:
+            q += 1
+        return q
+    _check_rounding(rounding)
+    return q
+
+
+def to_fixed(value: str | float | int, scale: int = DEFAULT_SCALE, rounding: str = HALF_EVEN) -> int:
+    """
+    Convert a decimal number to units of a scale.
+
+    Strings are converted exactly ('19.99', '-0.5', '42'), floats by their
+    shortest repr, so 0.1 is 1000 units at scale 4.
+
+    Args:
+        value: The number
+        scale: Digits after the point
+        rounding: How digits beyond the scale are rounded
+
+    Returns:
+        The value in units of 10**-scale
+
+    Raises:
+        ValueError: If the string is not a decimal number, the float is not
+            finite, or the scale or rounding mode is invalid
+        TypeError: If value is not a str, float or int
+        OverflowError: If a string's exponent makes it far larger than
+            both the range limit and an int64 buffer
+    """
+    unit = _unit(scale)
+    _check_rounding(rounding)
+    if isinstance(value, bool) or not isinstance(value, (str, float, int)):
+        raise TypeError(f"Expected str, float or int, got {type(value).__name__}")
+    if isinstance(value, int):
+        return value * unit
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"Cannot convert {value} to fixed point")
+    mantissa, marker, exponent = str(value).strip().lower().partition('e')
+    try:
+        shift = int(exponent) if marker else 0
+    except ValueError:
+        raise ValueError(f"Invalid decimal number '{value}'") from None
+    return _scaled(mantissa, shift, scale, rounding, value)
+
+
+def _scaled(text: str, shift: int, scale: int, rounding: str, original: object) -> int:
+    """Convert '[-]digits[.digits]' times 10**shift to units of a scale."""
+    match = _DECIMAL.fullmatch(text)
+    if match is None or not (match.group(2) or match.group(3)):
+        raise ValueError(f"Invalid decimal number '{original}'")
+    sign, whole, fraction = match.group(1), match.group(2), match.group(3) or ''
+    significant = len((whole + fraction).lstrip('0'))
+    exponent = scale + shift - len(fraction)
+    if not significant or exponent < -significant:
+        # Below a tenth of a unit, which rounds to zero in every mode
+        return 0
+    # The units are at least 10**(significant - 1 + exponent); refuse to
+    # build numbers far beyond both the range limit and an int64 buffer
+    bound = max(limits.active.max_value * _UNITS[scale], 1 << _INT64_BITS)
+    if (significant - 1 + exponent) * _LOG2_10 > bound.bit_length() + 1:
+        raise OverflowError(f"Number '{original}' is too large")
+    digits = int(whole + fraction)
+    if sign == '-':
+        digits = -digits
+    if exponent >= 0:
+        return digits * 10**exponent
+    return _round_div(digits, 10**-exponent, rounding)
+
+
+def to_string(units: int, scale: int = DEFAULT_SCALE, digits: int | None = None, rounding: str = HALF_EVEN) -> str:
+    """
+    Format units of a scale as a decimal number with exactly scale digits after the point.
+
+    Args:
+        units: The number, in units of the scale
+        scale: Digits after the point of the number
+        digits: Digits after the point to write instead of scale; extra
+            digits are zeros, fewer are rounded
+        rounding: One of ROUNDING_MODES, for fewer digits than the scale
+
+    Raises:
+        ValueError: If the scale, digits or rounding mode is invalid
+    """
+    unit = _unit(scale)
+    if digits is not None and digits != scale:
+        if not isinstance(digits, int) or digits < 0:
+            raise ValueError(f"Digits must be a non-negative integer, got {digits!r}")
+        if digits > scale:
+            units *= 10**(digits - scale)
+        else:
+            units = _round_div(units, 10**(scale - digits), rounding)
+        scale, unit = digits, 10**digits
+    if not scale:
+        return str(units)
+    whole, fraction = divmod(abs(units), unit)
+    sign = '-' if units < 0 else ''
+    return f"{sign}{whole}.{fraction:0{scale}d}"
+
+
+def to_array(values: Iterable[str | float | int], scale: int = DEFAULT_SCALE, rounding: str = HALF_EVEN) -> array:
+    """
+    Convert decimal numbers to an int64 buffer of units, as the batch functions take.
+
+    Raises:
+        ValueError, TypeError: As for to_fixed
+        OverflowError: If a value does not fit in 64 bits at this scale
+    """
+    return _pack([to_fixed(value, scale, rounding) for value in values], scale)
+
+
+@lru_cache(maxsize=64)
+def _scaled_limit(max_value: int, scale: int) -> limits.RangeLimit:
+    """Return the range limit of results in units of a scale."""
+    return limits.limit_for(max_value * _UNITS[scale])
+
+
+def _range_error(units: int, scale: int, limit: limits.RangeLimit) -> OverflowError:
+    if limits.on_reject is not None:
+        limits.on_reject(units)
+    max_value = limit.max_value // _UNITS[scale]
+    return OverflowError(f"Result {to_string(units, scale)} is too large (max: {max_value})")
+
+
+def _check_units(units: int, scale: int, max_value: int | None, mode: str) -> int:
+    """Range-check a result in units, raising or recording the violation."""
+    limit = _scaled_limit(limits.active.max_value if max_value is None else max_value, scale)
+    if units.bit_length() < limit.bits or not limit.exceeds(units):
+        return units
+    error = _range_error(units, scale, limit)
+    if mode != DEFERRED:
+        raise error
+    record_violation(error)
+    return units
+
+
+def _validate_units(value: object) -> None:
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError(f"Expected fixed-point units (int), got {type(value).__name__}")
+
+
+def add(
+    a: int,
+    b: int,
+    *,
+    scale: int = DEFAULT_SCALE,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> int:
+    """
+    Add two fixed-point numbers exactly.
+
+    Args:
+        a: First number, in units of the scale
+        b: Second number, in units of the scale
+        scale: Digits after the point of both numbers and the result
+        policy: Validation policy for this call (default: the active policy)
+        max_value: Maximum absolute result value for this call (default:
+            the process-wide limit)
+
+    Returns:
+        The sum, in units of the scale
+
+    Raises:
+        TypeError: If either argument is not an int
+        ValueError: If the scale or policy is invalid
+        OverflowError: If the result is too large (recorded instead
+            under the deferred policy)
+    """
+    _unit(scale)
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    if mode != TRUSTED and (a.__class__ is not int or b.__class__ is not int):
+        _validate_units(a)
+        _validate_units(b)
+    return _check_units(a + b, scale, max_value, mode)
+
+
+def subtract(
+    a: int,
+    b: int,
+    *,
+    scale: int = DEFAULT_SCALE,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> int:
+    """
+    Subtract the second fixed-point number from the first exactly.
+
+    Args:
+        a: First number (minuend), in units of the scale
+        b: Second number (subtrahend), in units of the scale
+        scale: Digits after the point of both numbers and the result
+        policy: Validation policy for this call (default: the active policy)
+        max_value: Maximum absolute result value for this call (default:
+            the process-wide limit)
+
+    Returns:
+        The difference (a - b), in units of the scale
+
+    Raises:
+        TypeError: If either argument is not an int
+        ValueError: If the scale or policy is invalid
+        OverflowError: If the result is too large (recorded instead
+            under the deferred policy)
+    """
+    _unit(scale)
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    if mode != TRUSTED and (a.__class__ is not int or b.__class__ is not int):
+        _validate_units(a)
+        _validate_units(b)
+    return _check_units(a - b, scale, max_value, mode)
+
+
+def multiply(
+    a: int,
+    b: int,
+    *,
+    scale: int = DEFAULT_SCALE,
+    rounding: str = HALF_EVEN,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> int:
+    """
+    Multiply two fixed-point numbers, rounding the product to the scale.
+
+    Args:
+        a: First number, in units of the scale
+        b: Second number, in units of the scale
+        scale: Digits after the point of both numbers and the result
+        rounding: One of ROUNDING_MODES
+        policy: Validation policy for this call (default: the active policy)
+        max_value: Maximum absolute result value for this call (default:
+            the process-wide limit)
+
+    Returns:
+        The rounded product, in units of the scale
+
+    Raises:
+        TypeError: If either argument is not an int
+        ValueError: If the scale, rounding mode or policy is invalid
+        OverflowError: If the result is too large (recorded instead
+            under the deferred policy)
+    """
+    unit = _unit(scale)
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    if mode != TRUSTED and (a.__class__ is not int or b.__class__ is not int):
+        _validate_units(a)
+        _validate_units(b)
+    return _check_units(_round_div(a * b, unit, rounding), scale, max_value, mode)
+
+
+def divide(
+    a: int,
+    b: int,
+    *,
+    scale: int = DEFAULT_SCALE,
+    rounding: str = HALF_EVEN,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> int:
+    """
+    Divide the first fixed-point number by the second, rounding the quotient to the scale.
+
+    Args:
+        a: First number (dividend), in units of the scale
+        b: Second number (divisor), in units of the scale
+        scale: Digits after the point of both numbers and the result
+        rounding: One of ROUNDING_MODES
+        policy: Validation policy for this call (default: the active policy)
+        max_value: Maximum absolute result value for this call (default:
+            the process-wide limit)
+
+    Returns:
+        The rounded quotient, in units of the scale
+
+    Raises:
+        TypeError: If either argument is not an int
+        ValueError: If the scale, rounding mode or policy is invalid
+        ZeroDivisionError: If b is zero
+        OverflowError: If the result is too large (recorded instead
+            under the deferred policy)
+    """
+    unit = _unit(scale)
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    if mode != TRUSTED and (a.__class__ is not int or b.__class__ is not int):
+        _validate_units(a)
+        _validate_units(b)
+    if b == 0:
+        raise ZeroDivisionError("Cannot divide by zero")
+    return _check_units(_round_div(a * unit, b, rounding), scale, max_value, mode)
+
+
+def _pack(results: Iterable[int], scale: int) -> array:
+    """Pack results into an int64 buffer."""
+    try:
+        return array('q', results)
+    except OverflowError:
+        raise OverflowError(f"Result does not fit in a 64-bit fixed-point buffer at scale {scale}") from None
+
+
+def _prepare_batch(xs: Sequence[int], ys: Sequence[int], scale: int, mode: str) -> int:
+    """Validate batch operands and return the unit of the scale."""
+    unit = _unit(scale)
+    if len(xs) != len(ys):
+        raise ValueError(f"Operand lengths differ: {len(xs)} != {len(ys)}")
+    if mode != TRUSTED:
+        for values in (xs, ys):
+            if isinstance(values, array):
+                if values.typecode not in _INT_FORMATS:
+                    raise TypeError(f"Expected an integer array, got typecode '{values.typecode}'")
+            elif set(map(type, values)) - {int}:
+                for value in values:
+                    _validate_units(value)
+    return unit
+
+
+def _finish_batch(results: array, scale: int, max_value: int | None, mode: str) -> array:
+    """Range-check packed results; one max() and min() unless the limit is beyond 64 bits."""
+    limit = _scaled_limit(limits.active.max_value if max_value is None else max_value, scale)
+    if limit.bits > _INT64_BITS or not results:
+        return results
+    if limit.exceeds(max(results)) or limit.exceeds(min(results)):
+        for units in results:
+            if limit.exceeds(units):
+                error = _range_error(units, scale, limit)
+                if mode != DEFERRED:
+                    raise error
+                record_violation(error)
+    return results
+
+
+def _round_half_even(shifted: list[int], divisors: list[int], scale: int) -> array:
+    """
+    Pack floor(shifted[i] / divisors[i]) with ties moved to the even neighbour.
+
+    shifted holds n + divisor / 2 for each exact quotient n / divisor, so
+    the floor division rounds ties upwards; a tie is a shifted value that
+    divides exactly, located with C-level list.index() searches.
+    """
+    results = _pack(map(operator.floordiv, shifted, divisors), scale)
+    remainders = list(map(operator.mod, shifted, divisors))
+    tie = -1
+    try:
+        while True:
+            tie = remainders.index(0, tie + 1)
+            if results[tie] & 1:
+                results[tie] -= 1
+    except ValueError:  # no more ties
+        pass
+    return results
+
+
+def batch_add(
+    xs: Sequence[int],
+    ys: Sequence[int],
+    *,
+    scale: int = DEFAULT_SCALE,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> array:
+    """
+    Add two batches of fixed-point numbers element-wise.
+
+    Args:
+        xs: First operands in units (array('q') or a sequence of ints)
+        ys: Second operands, same length as xs
+        scale: Digits after the point of all operands and results
+        policy: Validation policy for this batch (default: the active policy)
+        max_value: Maximum absolute result value (default: the process-wide
+            limit)
+
+    Returns:
+        An array('q') with xs[i] + ys[i]
+
+    Raises:
+        TypeError: If either operand holds non-integers
+        ValueError: If the operands have different lengths or the scale or
+            policy is invalid
+        OverflowError: If any result is too large (recorded instead under
+            the deferred policy) or does not fit in 64 bits
+    """
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    _prepare_batch(xs, ys, scale, mode)
+    return _finish_batch(_pack(map(operator.add, xs, ys), scale), scale, max_value, mode)
+
+
+def batch_subtract(
+    xs: Sequence[int],
+    ys: Sequence[int],
+    *,
+    scale: int = DEFAULT_SCALE,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> array:
+    """
+    Subtract two batches of fixed-point numbers element-wise.
+
+    Args and Raises as for batch_add.
+
+    Returns:
+        An array('q') with xs[i] - ys[i]
+    """
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    _prepare_batch(xs, ys, scale, mode)
+    return _finish_batch(_pack(map(operator.sub, xs, ys), scale), scale, max_value, mode)
+
+
+def batch_multiply(
+    xs: Sequence[int],
+    ys: Sequence[int],
+    *,
+    scale: int = DEFAULT_SCALE,
+    rounding: str = HALF_EVEN,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> array:
+    """
+    Multiply two batches of fixed-point numbers element-wise, rounding each product to the scale.
+
+    Args and Raises as for batch_add, plus rounding (one of ROUNDING_MODES).
+
+    Returns:
+        An array('q') with the rounded xs[i] * ys[i]
+    """
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    unit = _prepare_batch(xs, ys, scale, mode)
+    _check_rounding(rounding)
+    if unit == 1:
+        results = _pack(map(operator.mul, xs, ys), scale)
+    elif rounding == HALF_EVEN:
+        shifted = list(map(operator.add, map(operator.mul, xs, ys), repeat(unit >> 1)))
+        results = _round_half_even(shifted, [unit] * len(shifted), scale)
+    else:
+        results = _pack([_round_div(x * y, unit, rounding) for x, y in zip(xs, ys)], scale)
+    return _finish_batch(results, scale, max_value, mode)
+
+
+def batch_divide(
+    xs: Sequence[int],
+    ys: Sequence[int],
+    *,
+    scale: int = DEFAULT_SCALE,
+    rounding: str = HALF_EVEN,
+    policy: str | None = None,
+    max_value: int | None = None,
+) -> array:
+    """
+    Divide two batches of fixed-point numbers element-wise, rounding each quotient to the scale.
+
+    Args and Raises as for batch_add, plus rounding (one of ROUNDING_MODES).
+
+    Returns:
+        An array('q') with the rounded xs[i] / ys[i]
+
+    Raises:
+        ZeroDivisionError: If any ys[i] is zero
+    """
+    mode = active_policy.get().name if policy is None else _check_name(policy)
+    unit = _prepare_batch(xs, ys, scale, mode)
+    _check_rounding(rounding)
+    if 0 in ys:
+        raise ZeroDivisionError("Cannot divide by zero")
+    if rounding == HALF_EVEN:
+        # x * unit / y + 1/2 == (2 * x * unit + y) / (2 * y), for either sign of y
+        shifted = list(map(operator.add, map(operator.mul, xs, repeat(2 * unit)), ys))
+        results = _round_half_even(shifted, list(map(operator.add, ys, ys)), scale)
+    else:
+        results = _pack([_round_div(x * unit, y, rounding) for x, y in zip(xs, ys)], scale)
+    return _finish_batch(results, scale, max_value, mode)
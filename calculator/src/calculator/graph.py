@@ -0,0 +1,289 @@
+"""Lazy expression graphs with constant folding and common-subexpression elimination.
+
+Arithmetic on Expr objects records a DAG instead of computing anything:
+
+    x, y = var("x"), var("y")
+    e = (x + y) * (x + y) / 2
+    e.evaluate(x=1, y=2)                     # one scalar result
+    e.evaluate_batch({"x": xs, "y": ys})     # one result per binding
+
+Evaluation uses the same functions as the eager API (add, subtract,
+multiply, divide, or their calculator.batch counterparts), so results and
+exceptions are identical, but every distinct subexpression is computed
+only once. The functions are looked up in the registry at each
+evaluation, so graphs are measured and recorded by calculator.metrics and
+calculator.audit like any other caller.
+"""
+
+from typing import Any, Callable, Mapping, Sequence
+
+from . import batch
+from . import limits
+from . import registry
+from .policy import STRICT
+
+
+# Operations the operators of Expr build
+_GRAPH_OPERATIONS = ('add', 'subtract', 'multiply', 'divide')
+
+_SYMBOLS = {name: registry.lookup(name).symbol for name in _GRAPH_OPERATIONS}
+
+
+class Expr:
+    """A node of a lazy expression graph."""
+
+    __slots__ = ('op', 'args', 'value', '_plan')
+
+    def __init__(self, op: str, args: tuple['Expr', ...] = (), value: Any = None) -> None:
+        self.op = op
+        self.args = args
+        self.value = value
+        # (range limit the constants were folded under, evaluation order)
+        self._plan: tuple[int, list[Expr]] | None = None
+
+    @staticmethod
+    def _wrap(other: object) -> 'Expr | None':
+        if isinstance(other, Expr):
+            return other
+        if isinstance(other, (int, float)):
+            return Expr('const', value=other)
+        return None
+
+    def _binary(self, op: str, other: object, reflected: bool = False) -> 'Expr':
+        wrapped = self._wrap(other)
+        if wrapped is None:
+            return NotImplemented
+        args = (wrapped, self) if reflected else (self, wrapped)
+        return Expr(op, args)
+
+    def __add__(self, other: object) -> 'Expr':
+        return self._binary('add', other)
+
+    def __radd__(self, other: object) -> 'Expr':
+        return self._binary('add', other, reflected=True)
+
+    def __sub__(self, other: object) -> 'Expr':
+        return self._binary('subtract', other)
+
+    def __rsub__(self, other: object) -> 'Expr':
+        return self._binary('subtract', other, reflected=True)
+
+    def __mul__(self, other: object) -> 'Expr':
+        return self._binary('multiply', other)
+
+    def __rmul__(self, other: object) -> 'Expr':
+        return self._binary('multiply', other, reflected=True)
+
+    def __truediv__(self, other: object) -> 'Expr':
+        return self._binary('divide', other)
+
+    def __rtruediv__(self, other: object) -> 'Expr':
+        return self._binary('divide', other, reflected=True)
+
+    def __repr__(self) -> str:
+        if self.op == 'const':
+            return repr(self.value)
+        if self.op == 'var':
+            return self.value
+        left, right = self.args
+        return f"({left!r} {_SYMBOLS[self.op]} {right!r})"
+
+    @property
+    def variables(self) -> tuple[str, ...]:
+        """Names of the variables in the graph, in first-use order."""
+        return tuple(dict.fromkeys(node.value for node in _topological(self) if node.op == 'var'))
+
+    def node_count(self) -> int:
+        """Number of distinct nodes reachable from this one."""
+        return len(_topological(self))
+
+    def simplify(self) -> 'Expr':
+        """
+        Return an equivalent graph with constants folded and duplicates merged.
+
+        Structurally identical subexpressions become one shared node.
+        Constant subexpressions are computed with the eager functions under
+        the strict policy and the current range limit; a constant
+        subexpression that raises is left in place so that the error
+        surfaces (or is recorded) at evaluation time under the caller's
+        policy, exactly as it would eagerly.
+        """
+        canonical: dict[tuple[Any, ...], Expr] = {}
+        rebuilt: dict[int, Expr] = {}
+        for node in _topological(self):
+            if node.op == 'const':
+                key: tuple[Any, ...] = _const_key(node.value)
+                new = node
+            elif node.op == 'var':
+                key = ('var', node.value)
+                new = node
+            else:
+                args = tuple(rebuilt[id(arg)] for arg in node.args)
+                new = _fold(node.op, args)
+                if new.op == 'const':
+                    key = _const_key(new.value)
+                else:
+                    key = (node.op, *(id(arg) for arg in args))
+            rebuilt[id(node)] = canonical.setdefault(key, new)
+        return rebuilt[id(self)]
+
+    def plan(self) -> list['Expr']:
+        """
+        Return the simplified graph in evaluation order (the root is last).
+
+        The plan is cached until the process-wide range limit changes, since
+        a folded constant is only valid under the limit it was checked against.
+        """
+        max_value = limits.get_max_value()
+        if self._plan is None or self._plan[0] != max_value:
+            self._plan = (max_value, _topological(self.simplify()))
+        return self._plan[1]
+
+    def evaluate(self, values: Mapping[str, Any] | None = None, /, **kwargs: Any) -> float | int:
+        """
+        Evaluate the graph for one set of variable values.
+
+        The graph is simplified on first evaluation and the plan is reused.
+
+        Args:
+            values: Mapping of variable names to numbers
+            **kwargs: Variable values given as keyword arguments
+
+        Returns:
+            The result
+
+        Raises:
+            KeyError: If a variable has no value
+            TypeError: If a variable is not a number
+            ZeroDivisionError: If dividing by zero
+            OverflowError: If an intermediate result is too large
+        """
+        bindings = {**(values or {}), **kwargs}
+        results: dict[int, Any] = {}
+        order = self.plan()
+        scalars = _kernels('scalar')
+        for node in order:
+            if node.op == 'const':
+                result = node.value
+            elif node.op == 'var':
+                result = bindings[node.value]
+            else:
+                left, right = node.args
+                result = scalars[node.op](results[id(left)], results[id(right)])
+            results[id(node)] = result
+        return results[id(order[-1])]
+
+    __call__ = evaluate
+
+    def evaluate_batch(self, columns: Mapping[str, Sequence[Any]]) -> Any:
+        """
+        Evaluate the graph for many bindings at once.
+
+        Each node is computed with one call to the calculator.batch
+        function for its operation.
+
+        Args:
+            columns: Mapping of variable names to equal-length sequences
+
+        Returns:
+            A buffer with one result per binding
+
+        Raises:
+            KeyError: If a variable has no column
+            ValueError: If the columns have different lengths
+            TypeError, ZeroDivisionError, OverflowError: As for the batch functions
+        """
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        size = lengths.pop() if lengths else 0
+        results: dict[int, Any] = {}
+        scalars: set[int] = set()
+        order = self.plan()
+        scalar_kernels, batch_kernels = _kernels('scalar'), _kernels('batch')
+        for node in order:
+            if node.op == 'const':
+                results[id(node)] = node.value
+                scalars.add(id(node))
+                continue
+            if node.op == 'var':
+                results[id(node)] = columns[node.value]
+                continue
+            left, right = node.args
+            if id(left) in scalars and id(right) in scalars:
+                # Only reached for constant subexpressions that could not be folded
+                results[id(node)] = scalar_kernels[node.op](results[id(left)], results[id(right)])
+                scalars.add(id(node))
+                continue
+            operands = [
+                [results[id(arg)]] * size if id(arg) in scalars else results[id(arg)]
+                for arg in node.args
+            ]
+            results[id(node)] = batch_kernels[node.op](*operands)
+        root = id(order[-1])
+        if root in scalars:
+            return batch._pack([results[root]] * size)
+        return results[root]
+
+
+def _kernels(kind: str) -> dict[str, Callable[[Any, Any], Any]]:
+    """Return the current 'scalar' or 'batch' kernel of each graph operation."""
+    return {name: getattr(registry.lookup(name), kind) for name in _GRAPH_OPERATIONS}
+
+
+def _const_key(value: float | int) -> tuple[Any, ...]:
+    """Key constants for merging: floats by repr, so 0.0 and -0.0 stay apart and NaNs merge."""
+    if isinstance(value, float):
+        return ('const', float, repr(value))
+    return ('const', type(value), value)
+
+
+def _fold(op: str, args: tuple[Expr, ...]) -> Expr:
+    """Build an operation node, folding it to a constant when that is safe."""
+    left, right = args
+    if left.op == 'const' and right.op == 'const':
+        try:
+            # Strict, so a constant that any policy would reject stays a node
+            # and is evaluated (raised or recorded) under the caller's policy
+            value = registry.lookup(op).scalar(left.value, right.value, policy=STRICT)
+            return Expr('const', value=value)
+        except (TypeError, ZeroDivisionError, OverflowError):
+            pass
+    return Expr(op, args)
+
+
+def _topological(root: Expr) -> list[Expr]:
+    """Return the distinct nodes under root, children before parents."""
+    order: list[Expr] = []
+    seen: set[int] = set()
+    stack: list[tuple[Expr, bool]] = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        stack.append((node, True))
+        for arg in reversed(node.args):
+            if id(arg) not in seen:
+                stack.append((arg, False))
+    return order
+
+
+def var(name: str) -> Expr:
+    """Create a variable node."""
+    return Expr('var', value=name)
+
+
+def const(value: float | int) -> Expr:
+    """
+    Create a constant node.
+
+    Raises:
+        TypeError: If value is not a number
+    """
+    if not isinstance(value, (int, float)):
+        raise TypeError(f"Expected int or float, got {type(value).__name__}")
+    return Expr('const', value=value)
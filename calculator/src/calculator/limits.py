@@ -0,0 +1,98 @@
+"""Range-check engine with precomputed, configurable result limits."""
+
+import math
+from functools import lru_cache
+from typing import Callable
+
+
+DEFAULT_MAX_VALUE = 10**100
+
+# Called with every rejected result before OverflowError is raised (set by
+# calculator.metrics); only the failing path looks at it
+on_reject: Callable[[float | int], None] | None = None
+
+
+class RangeLimit:
+    """
+    A precomputed maximum absolute result value.
+
+    Integers are screened by bit length, so only values with the same bit
+    length as the limit need an exact comparison. Floats are compared with
+    a single float bound: the smallest float strictly greater than the limit.
+    """
+
+    __slots__ = ('max_value', 'bits', 'float_limit')
+
+    def __init__(self, max_value: int) -> None:
+        if not isinstance(max_value, int) or isinstance(max_value, bool) or max_value <= 0:
+            raise ValueError(f"Maximum value must be a positive integer, got {max_value!r}")
+        self.max_value = max_value
+        self.bits = max_value.bit_length()
+        try:
+            nearest = float(max_value)
+        except OverflowError:
+            nearest = math.inf
+        self.float_limit = nearest if nearest > max_value else math.nextafter(nearest, math.inf)
+
+    def exceeds(self, result: float | int) -> bool:
+        """Return True if the result is out of range (NaN is never out of range)."""
+        if isinstance(result, float):
+            # Also true for infinities; false for NaN, as in the original check
+            return abs(result) >= self.float_limit
+        if isinstance(result, int):
+            bits = result.bit_length()
+            if bits != self.bits:
+                return bits > self.bits
+            return abs(result) > self.max_value
+        return False
+
+    def check(self, result: float | int) -> None:
+        """
+        Check a result against the limit.
+
+        Raises:
+            OverflowError: If the result is too large
+        """
+        if isinstance(result, float):
+            if abs(result) < self.float_limit or result != result:
+                return
+        elif isinstance(result, int):
+            bits = result.bit_length()
+            if bits < self.bits or (bits == self.bits and abs(result) <= self.max_value):
+                return
+        else:
+            return
+        if on_reject is not None:
+            on_reject(result)
+        raise OverflowError(f"Result {result} is too large (max: {self.max_value})")
+
+    def __repr__(self) -> str:
+        return f"RangeLimit({self.max_value})"
+
+
+active = RangeLimit(DEFAULT_MAX_VALUE)
+
+
+@lru_cache(maxsize=64)
+def limit_for(max_value: int) -> RangeLimit:
+    """Return a (cached) RangeLimit for a per-call maximum."""
+    return RangeLimit(max_value)
+
+
+def set_max_value(max_value: int) -> None:
+    """
+    Set the process-wide maximum absolute result value.
+
+    Args:
+        max_value: The new limit (default 10**100)
+
+    Raises:
+        ValueError: If max_value is not a positive integer
+    """
+    global active
+    active = RangeLimit(max_value)
+
+
+def get_max_value() -> int:
+    """Return the process-wide maximum absolute result value."""
+    return active.max_value
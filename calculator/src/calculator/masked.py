@@ -0,0 +1,305 @@
+"""Exception-free batch operations that report errors in a status array.
+
+Each function returns a MaskedResult: the results, with NaN in every slot
+whose element failed, and a parallel array('B') of status codes:
+
+    result = masked.divide([1.0, 2.0, 3.0], [2.0, 0.0, "x"])
+    list(result.values)   # [0.5, nan, nan]
+    list(result.status)   # [STATUS_OK, STATUS_ZERO_DIVISION, STATUS_TYPE]
+
+A bad element no longer aborts the batch, and in the common case where
+nothing fails no exception is raised at all. The scans for bad elements
+run in C; per-element Python work only happens for batches that actually
+contain errors. Pass errors='raise' to get the raise-on-first-error
+behavior of calculator.batch instead.
+
+While a built-in operation's scalar function is replaced or wrapped in
+the registry (by calculator.metrics or calculator.audit, say), it is
+called once per good element instead of the C-level kernel, so those
+calls are measured and recorded too.
+
+The status codes are shared with the server's binary protocol.
+"""
+
+import math
+import operator
+from array import array
+from dataclasses import dataclass
+from functools import partial
+from itertools import compress, repeat
+from typing import Any, Callable, Sequence
+
+from . import batch
+from . import limits
+from . import registry
+from .policy import STRICT
+
+
+STATUS_OK = 0
+STATUS_ZERO_DIVISION = 1
+STATUS_OVERFLOW = 2
+STATUS_TYPE = 3
+STATUS_INVALID = 4
+
+STATUS_NAMES = {
+    STATUS_OK: 'ok',
+    STATUS_ZERO_DIVISION: 'zero_division',
+    STATUS_OVERFLOW: 'overflow',
+    STATUS_TYPE: 'type',
+    STATUS_INVALID: 'invalid',
+}
+
+ERRORS = ('mask', 'raise')
+
+# C-level kernels of the built-in operations; other registered operations
+# fall back to their scalar function
+_KERNELS: dict[str, Callable[[Any, Any], Any]] = {
+    'add': operator.add,
+    'subtract': operator.sub,
+    'multiply': operator.mul,
+    'divide': operator.truediv,
+}
+
+_NUMBER = (int, float)
+
+
+@dataclass
+class MaskedResult:
+    """Results of a masked batch operation and their per-element status codes."""
+
+    values: Any
+    status: array
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    @property
+    def errors(self) -> int:
+        """Number of elements that failed."""
+        return len(self.status) - self.status.count(STATUS_OK)
+
+    @property
+    def ok(self) -> bool:
+        """True if no element failed."""
+        return self.status.count(STATUS_OK) == len(self.status)
+
+
+def status_of(error: BaseException) -> int:
+    """Map an exception raised by an operation to its status code."""
+    if isinstance(error, ZeroDivisionError):
+        return STATUS_ZERO_DIVISION
+    if isinstance(error, OverflowError):
+        return STATUS_OVERFLOW
+    if isinstance(error, TypeError):
+        return STATUS_TYPE
+    return STATUS_INVALID
+
+
+def _mark_types(values: Sequence[Any], status: array, bad: list[int]) -> None:
+    """Flag elements that are not numbers (typed buffers are checked by format)."""
+    if isinstance(values, (array, memoryview)):
+        batch._as_operands(values)
+        return
+    if isinstance(values, (str, bytes)):
+        raise TypeError(f"Expected a sequence of numbers, got {type(values).__name__}")
+    if all(map(isinstance, values, repeat(_NUMBER))):
+        return
+    for i, value in enumerate(values):
+        if not isinstance(value, _NUMBER) and not status[i]:
+            status[i] = STATUS_TYPE
+            bad.append(i)
+
+
+def _compute(
+    kernel: Callable[[Any, Any], Any],
+    xs: Sequence[Any],
+    ys: Sequence[Any],
+    status: array,
+    bad: list[int],
+) -> list[Any]:
+    """
+    Apply the kernel to every element pair, with NaN for the flagged ones.
+
+    Flagged pairs are replaced by harmless operands (0, 1) so the whole
+    batch still runs through one C-level map(); only the flagged slots are
+    touched in Python. If the map raises anyway, the batch is redone one
+    element at a time to find the failing pairs.
+    """
+    if bad:
+        xs, ys = list(xs), list(ys)
+        for i in bad:
+            xs[i], ys[i] = 0, 1
+    try:
+        results = list(map(kernel, xs, ys))
+    except (ZeroDivisionError, OverflowError, TypeError, ValueError):
+        results = []
+        append = results.append
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            try:
+                append(kernel(x, y))
+            except (ZeroDivisionError, OverflowError, TypeError, ValueError) as e:
+                if not status[i]:
+                    status[i] = status_of(e)
+                append(math.nan)
+    for i in bad:
+        results[i] = math.nan
+    return results
+
+
+def _apply_each(func: Callable[[Any, Any], Any], xs: Sequence[Any], ys: Sequence[Any], status: array) -> list[Any]:
+    """Call func on every pair not flagged yet, flagging the ones that raise."""
+    results = []
+    append = results.append
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        if status[i]:
+            append(math.nan)
+            continue
+        try:
+            append(func(x, y))
+        except (ZeroDivisionError, OverflowError, TypeError, ValueError) as e:
+            status[i] = status_of(e)
+            append(math.nan)
+    return results
+
+
+def direct_kernel(op: registry.Operation) -> Callable[[Any, Any], Any] | None:
+    """
+    Return the C-level kernel that evaluate() uses for an operation.
+
+    Returns:
+        The kernel of a built-in operation, or None for other operations
+        and for built-ins whose scalar function has been replaced or
+        wrapped (by calculator.metrics or calculator.audit, say); those
+        are evaluated through their scalar function pair by pair
+    """
+    builtin = registry.builtin(op.name)
+    if builtin is not None and op.scalar is builtin.scalar:
+        return _KERNELS[op.name]
+    return None
+
+
+def _mark_range(results: list[Any], status: array) -> None:
+    """Flag out-of-range results and replace them with NaN."""
+    limit = limits.active
+    if not any(map(operator.lt, repeat(limit.max_value), map(abs, results))):
+        return
+    for i, result in enumerate(results):
+        if limit.exceeds(result):
+            status[i] = STATUS_OVERFLOW
+            results[i] = math.nan
+
+
+def evaluate(operation: str, xs: Any, ys: Any, *, errors: str = 'mask') -> MaskedResult:
+    """
+    Apply any registered binary operation element-wise with status codes.
+
+    Args:
+        operation: Name or alias of a registered operation
+        xs: First operands (list, array.array, memoryview or NumPy array)
+        ys: Second operands, same length as xs
+        errors: 'mask' to record failures in the status array, or 'raise'
+            to raise the first failure like calculator.batch
+
+    Returns:
+        The results and their status codes
+
+    Raises:
+        ValueError: If the operation or errors mode is unknown, or the
+            operands have different lengths
+        TypeError: If a typed buffer does not hold numbers
+    """
+    op = registry.lookup(operation)
+    if errors not in ERRORS:
+        raise ValueError(f"Unknown errors mode '{errors}'. Supported modes: {', '.join(ERRORS)}")
+    if errors == 'raise':
+        values = op.batch(xs, ys)
+        return MaskedResult(values, array('B', bytes(len(values))))
+    return _evaluate(op, xs, ys)
+
+
+def _evaluate(op: registry.Operation, xs: Any, ys: Any) -> MaskedResult:
+    """Apply an operation element-wise, recording failures in the status array."""
+    if batch._is_ndarray(xs):
+        xs = xs.tolist()
+    if batch._is_ndarray(ys):
+        ys = ys.tolist()
+    batch._check_lengths(xs, ys)
+    status = array('B', bytes(len(xs)))
+    bad: list[int] = []
+    _mark_types(xs, status, bad)
+    _mark_types(ys, status, bad)
+    kernel = direct_kernel(op)
+    if kernel is None:
+        # Flagged pairs are skipped, so wrappers only see real calculations;
+        # built-ins run strict so that range errors land in the status array
+        func = partial(op.scalar, policy=STRICT) if registry.builtin(op.name) is not None else op.scalar
+        results = _apply_each(func, xs, ys, status)
+    else:
+        if op.name == 'divide' and 0 in ys:
+            for i in compress(range(len(ys)), map(operator.eq, ys, repeat(0))):
+                if not status[i]:
+                    status[i] = STATUS_ZERO_DIVISION
+                    bad.append(i)
+        results = _compute(kernel, xs, ys, status, bad)
+        _mark_range(results, status)
+    return MaskedResult(batch._pack(results), status)
+
+
+def add(xs: Any, ys: Any, *, errors: str = 'mask') -> MaskedResult:
+    """
+    Add two batches element-wise, reporting failures per element.
+
+    Args:
+        xs: First operands (list, array.array, memoryview or NumPy array)
+        ys: Second operands, same length as xs
+        errors: 'mask' (default) or 'raise'
+
+    Returns:
+        xs[i] + ys[i], NaN where status[i] is not STATUS_OK
+    """
+    return evaluate('add', xs, ys, errors=errors)
+
+
+def subtract(xs: Any, ys: Any, *, errors: str = 'mask') -> MaskedResult:
+    """
+    Subtract the second batch from the first element-wise, reporting failures per element.
+
+    Args:
+        xs: Minuends (list, array.array, memoryview or NumPy array)
+        ys: Subtrahends, same length as xs
+        errors: 'mask' (default) or 'raise'
+
+    Returns:
+        xs[i] - ys[i], NaN where status[i] is not STATUS_OK
+    """
+    return evaluate('subtract', xs, ys, errors=errors)
+
+
+def multiply(xs: Any, ys: Any, *, errors: str = 'mask') -> MaskedResult:
+    """
+    Multiply two batches element-wise, reporting failures per element.
+
+    Args:
+        xs: First operands (list, array.array, memoryview or NumPy array)
+        ys: Second operands, same length as xs
+        errors: 'mask' (default) or 'raise'
+
+    Returns:
+        xs[i] * ys[i], NaN where status[i] is not STATUS_OK
+    """
+    return evaluate('multiply', xs, ys, errors=errors)
+
+
+def divide(xs: Any, ys: Any, *, errors: str = 'mask') -> MaskedResult:
+    """
+    Divide the first batch by the second element-wise, reporting failures per element.
+
+    Args:
+        xs: Dividends (list, array.array, memoryview or NumPy array)
+        ys: Divisors, same length as xs
+        errors: 'mask' (default) or 'raise'
+
+    Returns:
+        xs[i] / ys[i], NaN where status[i] is not STATUS_OK
+    """
+    return evaluate('divide', xs, ys, errors=errors)
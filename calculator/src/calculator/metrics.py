@@ -0,0 +1,261 @@
+"""Opt-in per-operation metrics with Prometheus text exposition.
+
+    metrics.enable()
+    ...                                   # serve, stream, process files
+    metrics.snapshot()                    # the figures as plain dicts
+    print(metrics.render())               # Prometheus text format
+    metrics.write("/var/lib/node_exporter/textfile/calculator.prom")
+
+enable() swaps timing wrappers into the registry for the scalar and batch
+kernels of every registered operation. The registry rebinds the
+functions it exports along with its kernels, so the functions of
+calculator and calculator.batch called directly are measured as well as
+single operations on the command line, streams, the server, packed
+files, masked batches, the asyncio helpers, compiled expressions, sheets
+and graphs. Fixed-point arithmetic and reductions have their own kernels
+and are not measured. disable() swaps the original functions back. While metrics are disabled
+nothing is wrapped and the hot path is exactly what it was.
+
+Each wrapped call records its latency in a histogram of power-of-two
+nanosecond buckets (one bit_length() and one list increment) and, if it
+raises, one error count per exception type. Results rejected by the range
+check are counted separately, including those recorded instead of raised
+under the deferred policy.
+
+Counters are updated under a lock, so they stay exact when kernels run in
+executor threads (calculator.aio) or other threads.
+"""
+
+import functools
+import os
+import tempfile
+import threading
+from time import perf_counter_ns
+from typing import Any, Callable
+
+from . import limits
+from . import registry
+
+
+# Exposed histogram bounds: 2**7 ns (128 ns) up to 2**34 ns (about 17 s),
+# then +Inf
+_LOW_BIT = 7
+_HIGH_BIT = 34
+
+
+class _Series:
+    """Latency histogram and error counts of one kernel."""
+
+    __slots__ = ('buckets', 'errors', 'total_ns')
+
+    def __init__(self) -> None:
+        # Indexed by the bit length of the elapsed nanoseconds
+        self.buckets = [0] * 65
+        self.errors: dict[str, int] = {}
+        self.total_ns = 0
+
+    def clear(self) -> None:
+        self.buckets[:] = [0] * 65
+        self.errors.clear()
+        self.total_ns = 0
+
+    @property
+    def calls(self) -> int:
+        return sum(self.buckets)
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Return (upper bound in seconds, calls at or below it), ending with +Inf."""
+        total = sum(self.buckets[:_LOW_BIT + 1])
+        counts = [((1 << _LOW_BIT) / 1e9, total)]
+        for bit in range(_LOW_BIT + 1, _HIGH_BIT + 1):
+            total += self.buckets[bit]
+            counts.append(((1 << bit) / 1e9, total))
+        counts.append((float('inf'), self.calls))
+        return counts
+
+
+_SERIES: dict[tuple[str, str], _Series] = {}
+
+# Operation name -> (operation before instrumentation, instrumented operation)
+_INSTRUMENTED: dict[str, tuple[registry.Operation, registry.Operation]] = {}
+
+_range_rejections = 0
+
+# Guards every counter and histogram
+_lock = threading.Lock()
+
+
+def _count_rejection(result: float | int) -> None:
+    global _range_rejections
+    with _lock:
+        _range_rejections += 1
+
+
+def _timed(func: Callable[..., Any], series: _Series) -> Callable[..., Any]:
+    """Wrap a kernel so each call records its latency and errors in series."""
+    buckets = series.buckets
+    errors = series.errors
+
+    @functools.wraps(func)
+    def instrumented(*args: Any, **kwargs: Any) -> Any:
+        start = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            name = type(e).__name__
+            with _lock:
+                errors[name] = errors.get(name, 0) + 1
+            raise
+        finally:
+            elapsed = perf_counter_ns() - start
+            with _lock:
+                buckets[elapsed.bit_length()] += 1
+                series.total_ns += elapsed
+    return instrumented
+
+
+def _series(operation: str, kind: str) -> _Series:
+    with _lock:
+        return _SERIES.setdefault((operation, kind), _Series())
+
+
+def enable() -> None:
+    """
+    Instrument every registered operation and count range rejections.
+
+    Operations registered later are not instrumented until enable() is
+    called again. Calling it twice does not wrap anything twice.
+    """
+    for op in registry.operations():
+        current = _INSTRUMENTED.get(op.name)
+        if current is not None and current[1] is op:
+            continue
+        scalar = _timed(op.scalar, _series(op.name, 'scalar'))
+        batch = _timed(op.batch, _series(op.name, 'batch')) if op.batch is not None else None
+        _INSTRUMENTED[op.name] = (op, registry.replace_kernels(op.name, scalar, batch))
+    limits.on_reject = _count_rejection
+
+
+def disable() -> None:
+    """
+    Restore the original kernels; the figures collected so far are kept.
+
+    Operations replaced in the registry while metrics were enabled keep
+    their replacement.
+    """
+    for name, (original, instrumented) in _INSTRUMENTED.items():
+        if registry.get(name) is instrumented:
+            registry.replace_kernels(name, original.scalar, original.batch)
+    _INSTRUMENTED.clear()
+    limits.on_reject = None
+
+
+def is_enabled() -> bool:
+    """Return True while metrics are being collected."""
+    return limits.on_reject is _count_rejection
+
+
+def reset() -> None:
+    """Zero every counter and histogram."""
+    global _range_rejections
+    with _lock:
+        for series in _SERIES.values():
+            series.clear()
+        _range_rejections = 0
+
+
+def snapshot() -> dict[str, Any]:
+    """
+    Return the current figures.
+
+    Returns:
+        A dict with 'enabled', 'range_rejections' and 'operations', which
+        maps each operation name and kernel kind ('scalar' or 'batch') to
+        its 'calls', 'errors' (by exception type name), total 'seconds'
+        and cumulative 'buckets' as (upper bound in seconds, count) pairs
+    """
+    with _lock:
+        operations: dict[str, dict[str, Any]] = {}
+        for (name, kind), series in _SERIES.items():
+            operations.setdefault(name, {})[kind] = {
+                'calls': series.calls,
+                'errors': dict(series.errors),
+                'seconds': series.total_ns / 1e9,
+                'buckets': series.cumulative(),
+            }
+        return {
+            'enabled': is_enabled(),
+            'range_rejections': _range_rejections,
+            'operations': operations,
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _bound(seconds: float) -> str:
+    return "+Inf" if seconds == float('inf') else f"{seconds:.9g}"
+
+
+def render() -> str:
+    """
+    Return the figures in the Prometheus text exposition format (0.0.4).
+
+    Returns:
+        The exposition text, ending with a newline
+    """
+    with _lock:
+        series = sorted(_SERIES.items())
+        lines = [
+            "# HELP calculator_operation_calls_total Calls of each operation kernel.",
+            "# TYPE calculator_operation_calls_total counter",
+        ]
+        for (name, kind), data in series:
+            lines.append(f"calculator_operation_calls_total{_labels(operation=name, kind=kind)} {data.calls}")
+        lines += [
+            "# HELP calculator_operation_errors_total Exceptions raised by each operation kernel, by type.",
+            "# TYPE calculator_operation_errors_total counter",
+        ]
+        for (name, kind), data in series:
+            for error, count in sorted(data.errors.items()):
+                labels = _labels(operation=name, kind=kind, type=error)
+                lines.append(f"calculator_operation_errors_total{labels} {count}")
+        lines += [
+            "# HELP calculator_range_rejections_total Results rejected by the range check.",
+            "# TYPE calculator_range_rejections_total counter",
+            f"calculator_range_rejections_total {_range_rejections}",
+            "# HELP calculator_operation_duration_seconds Latency of each operation kernel.",
+            "# TYPE calculator_operation_duration_seconds histogram",
+        ]
+        for (name, kind), data in series:
+            for bound, count in data.cumulative():
+                labels = _labels(operation=name, kind=kind, le=_bound(bound))
+                lines.append(f"calculator_operation_duration_seconds_bucket{labels} {count}")
+            labels = _labels(operation=name, kind=kind)
+            lines.append(f"calculator_operation_duration_seconds_sum{labels} {data.total_ns / 1e9:.9g}")
+            lines.append(f"calculator_operation_duration_seconds_count{labels} {data.calls}")
+    return "\n".join(lines) + "\n"
+
+
+def write(path: str) -> None:
+    """
+    Write render() to a file atomically, e.g. for a textfile collector.
+
+    Args:
+        path: Destination file; replaced by a rename, so scrapers never
+            see a partial file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(render())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
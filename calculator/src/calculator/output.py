@@ -0,0 +1,254 @@
+"""Buffered result writers for text, JSON lines, CSV and packed float64.
+
+    fmt = OutputFormat('csv', precision=3, status=True)
+    with open("results.csv", "w", newline="", buffering=1 << 20) as f:
+        writer = ResultWriter(f, fmt)
+        writer.write_rows(results, errors={4: (STATUS_ZERO_DIVISION, "line 5: ...")})
+
+Single-operation mode, --fixed, --stream, eval, sum, product, cumsum,
+cumprod and rolling write their results through a ResultWriter and take
+its --format and --precision options. audit dump prints its own layout,
+and the packed-file commands write binary files. Rows are formatted a chunk at a time (one map() over the results
+and one join per chunk) and handed to the stream in a single write, so
+output never flushes line by line.
+
+Formats:
+
+* text: one result per line, as str(); the default, and identical to
+  print(result). With status, '<result>\\t<status>'; with echo, the input
+  record comes first, tab-separated.
+* jsonl: one object per line, {"input": ..., "result": ..., "status": ...},
+  with "input" and "status" only when requested. Non-finite results are
+  null.
+* csv: a header row, then '[input,]result[,status]' rows.
+* f64: packed little-endian float64 results written straight from the
+  array buffer; failed rows are NaN. Needs a binary stream and carries no
+  echo or status.
+
+A failed row (see write_rows) is 'nan' plus its status code when the
+status column is on; otherwise its result field is 'error: <message>'.
+In jsonl it is always "result": null with an "error" message.
+
+precision formats float results with that many digits after the point;
+the default is the shortest repr that round-trips. Integer results are
+always written exactly.
+"""
+
+import sys
+from array import array
+from dataclasses import dataclass
+from itertools import islice
+from json.encoder import encode_basestring
+from typing import IO, Iterable, Mapping, Sequence
+
+from .masked import STATUS_OK
+
+
+FORMATS = ('text', 'jsonl', 'csv', 'f64')
+
+# Formats written to binary streams
+BINARY_FORMATS = ('f64',)
+
+# Rows formatted and written per write() call by write_all()
+BLOCK_SIZE = 1 << 16
+
+# Buffer size for output files opened by the CLI
+BUFFER_SIZE = 1 << 20
+
+_NATIVE_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+_NON_FINITE = frozenset(('nan', 'inf', '-inf'))
+
+# Characters that make a CSV field need quoting
+_CSV_SPECIAL = (',', '"', '\n', '\r')
+
+Row = float | int
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    """How results are written."""
+
+    kind: str = 'text'
+    precision: int | None = None
+    echo: bool = False
+    status: bool = False
+
+    def __post_init__(self) -> None:
+        if self.kind not in FORMATS:
+            raise ValueError(f"Unknown output format '{self.kind}'. Supported formats: {', '.join(FORMATS)}")
+        if self.precision is not None and not 0 <= self.precision <= 100:
+            raise ValueError(f"Precision must be between 0 and 100, got {self.precision}")
+        if self.binary and (self.echo or self.status):
+            raise ValueError(f"The {self.kind} format carries results only (no echo or status)")
+
+    @property
+    def binary(self) -> bool:
+        """True if the format is written to binary streams."""
+        return self.kind in BINARY_FORMATS
+
+    def header(self) -> str:
+        """Return the header line of the format (csv only), or ''."""
+        if self.kind != 'csv':
+            return ''
+        columns = ['input'] * self.echo + ['result'] + ['status'] * self.status
+        return ','.join(columns) + '\n'
+
+
+def format_numbers(values: Sequence[Row], precision: int | None = None) -> list[str]:
+    """
+    Format results as text.
+
+    Args:
+        values: The results
+        precision: Digits after the point for floats (default: shortest repr)
+
+    Returns:
+        One string per value
+    """
+    if precision is None:
+        return list(map(str, values))
+    spec = f'.{precision}f'
+    return [format(value, spec) if value.__class__ is float else str(value) for value in values]
+
+
+class ResultWriter:
+    """Writes chunks of results to a stream in one of FORMATS."""
+
+    def __init__(self, output: IO, fmt: OutputFormat = OutputFormat(), *, header: bool = True) -> None:
+        """
+        Create a writer.
+
+        Args:
+            output: Text stream, or binary stream for the binary formats
+            fmt: The output format
+            header: Write the format's header (if any) before the first row;
+                off for output that is appended to another writer's
+        """
+        self.output = output
+        self.format = fmt
+        self.rows = 0
+        self._header = fmt.header() if header else ''
+
+    def write_rows(
+        self,
+        results: Sequence[Row],
+        inputs: Sequence[str] | None = None,
+        errors: Mapping[int, tuple[int, str]] | None = None,
+        texts: Sequence[str] | None = None,
+    ) -> None:
+        """
+        Write one chunk of rows with a single write to the stream.
+
+        Args:
+            results: One result per row; failed rows hold a placeholder
+                (e.g. nan) that is not written
+            inputs: The input record of each row (required for echo)
+            errors: Failed rows: row index -> (status code, message)
+            texts: The text of each result, written instead of formatting
+                results in the text formats (e.g. exact fixed-point
+                decimals); results are still written by f64
+
+        Raises:
+            ValueError: If echo is on and no inputs are given
+            OverflowError: If an integer result does not fit in a float64
+        """
+        fmt = self.format
+        if fmt.echo and inputs is None:
+            raise ValueError("Echo output needs the input records")
+        errors = errors or {}
+        if self._header:
+            self.output.write(self._header)
+            self._header = ''
+        self.rows += len(results)
+        if fmt.kind == 'f64':
+            self._write_f64(results, errors)
+            return
+        fields = format_numbers(results, fmt.precision) if texts is None else list(texts)
+        statuses = None
+        if fmt.status:
+            statuses = [str(STATUS_OK)] * len(fields)
+            for index, (status, _) in errors.items():
+                fields[index] = 'nan'
+                statuses[index] = str(status)
+        if fmt.kind == 'jsonl':
+            self._write_jsonl(fields, inputs, statuses, errors)
+            return
+        csv = fmt.kind == 'csv'
+        if statuses is None:
+            for index, (_, message) in errors.items():
+                fields[index] = _csv_field(f"error: {message}") if csv else f"error: {message}"
+        columns = [fields]
+        if fmt.echo:
+            columns.insert(0, _csv_column(inputs) if csv else inputs)
+        if statuses is not None:
+            columns.append(statuses)
+        if fields:
+            separator = ',' if csv else '\t'
+            rows = fields if len(columns) == 1 else map(separator.join, zip(*columns))
+            self.output.write('\n'.join(rows) + '\n')
+
+    def write_all(self, values: Iterable[Row]) -> int:
+        """
+        Write any number of results, a block at a time.
+
+        Returns:
+            The number of results written
+        """
+        written = 0
+        iterator = iter(values)
+        while block := list(islice(iterator, BLOCK_SIZE)):
+            self.write_rows(block)
+            written += len(block)
+        return written
+
+    def flush(self) -> None:
+        """Write a pending header and flush the stream."""
+        if self._header:
+            self.output.write(self._header)
+            self._header = ''
+        self.output.flush()
+
+    def _write_jsonl(
+        self,
+        fields: list[str],
+        inputs: Sequence[str] | None,
+        statuses: list[str] | None,
+        errors: Mapping[int, tuple[int, str]],
+    ) -> None:
+        if not fields:
+            return
+        rows = ['"result": null' if field in _NON_FINITE else '"result": ' + field for field in fields]
+        for index, (_, message) in errors.items():
+            rows[index] = f'"result": null, "error": {encode_basestring(message)}'
+        if statuses is not None:
+            rows = [f'{row}, "status": {status}' for row, status in zip(rows, statuses)]
+        if self.format.echo:
+            rows = [f'"input": {encode_basestring(text)}, {row}' for text, row in zip(inputs, rows)]
+        self.output.write('{' + '}\n{'.join(rows) + '}\n')
+
+    def _write_f64(self, results: Sequence[Row], errors: Mapping[int, tuple[int, str]]) -> None:
+        try:
+            packed = array('d', results)
+        except OverflowError:
+            raise OverflowError("Result does not fit in the f64 output format") from None
+        for index in errors:
+            packed[index] = float('nan')
+        if not _NATIVE_LITTLE_ENDIAN:
+            packed.byteswap()
+        self.output.write(packed)
+
+
+def _csv_field(text: str) -> str:
+    """Quote a CSV field if it holds a separator, quote or line break."""
+    if any(special in text for special in _CSV_SPECIAL):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def _csv_column(texts: Sequence[str]) -> Sequence[str]:
+    """Quote the fields of a CSV column that need it, checking the whole column at once."""
+    joined = ''.join(texts)
+    if any(special in joined for special in _CSV_SPECIAL):
+        return list(map(_csv_field, texts))
+    return texts
@@ -0,0 +1,328 @@
+"""Memory-mapped batch processing of packed binary operand files.
+
+Input files hold operand pairs as consecutive little-endian values
+(a0, b0, a1, b1, ...), either raw (float64 or int64) or as a ``.npy``
+file of shape (N, 2) or (2N,). Results are written through a memory-mapped
+output file, raw or ``.npy`` depending on the output file name. Work is
+done in fixed-size chunks so only one chunk of Python numbers exists at
+a time.
+"""
+
+import ast
+import mmap
+import os
+import struct
+import sys
+from array import array
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Any
+
+from . import masked
+from . import registry
+
+
+DEFAULT_CHUNK_SIZE = 65536
+
+NPY_MAGIC = b"\x93NUMPY"
+
+# Command line dtype names and .npy descriptors for the supported formats
+DTYPES = {'f64': 'd', 'i64': 'q'}
+_NPY_DESCR = {'<f8': 'd', '<i8': 'q'}
+_NPY_DESCR_OF = {'d': '<f8', 'q': '<i8', 'B': '|u1'}
+
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+_NATIVE_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def read_npy_header(buffer: Any) -> tuple[str, tuple[int, ...], int]:
+    """
+    Parse the header of a .npy file without NumPy.
+
+    Args:
+        buffer: The start of the file (bytes, mmap or memoryview)
+
+    Returns:
+        (array typecode, shape, offset of the data)
+
+    Raises:
+        ValueError: If the header is invalid or describes an unsupported array
+    """
+    if bytes(buffer[:6]) != NPY_MAGIC:
+        raise ValueError("Not a .npy file")
+    major = buffer[6]
+    if major == 1:
+        (length,) = struct.unpack_from("<H", buffer, 8)
+        start = 10
+    elif major in (2, 3):
+        (length,) = struct.unpack_from("<I", buffer, 8)
+        start = 12
+    else:
+        raise ValueError(f"Unsupported .npy version {major}")
+    header = ast.literal_eval(bytes(buffer[start:start + length]).decode("latin1"))
+    typecode = _NPY_DESCR.get(header.get("descr"))
+    if typecode is None:
+        raise ValueError(f"Unsupported .npy dtype {header.get('descr')!r}; expected '<f8' or '<i8'")
+    if header.get("fortran_order"):
+        raise ValueError("Fortran-ordered .npy files are not supported")
+    return typecode, tuple(header["shape"]), start + length
+
+
+def npy_header(typecode: str, shape: tuple[int, ...]) -> bytes:
+    """
+    Build a version 1.0 .npy header for a C-ordered array.
+
+    Args:
+        typecode: 'd' for float64, 'q' for int64 or 'B' for uint8
+        shape: The array shape
+
+    Returns:
+        The header bytes, padded so the data starts 64-byte aligned
+    """
+    text = f"{{'descr': '{_NPY_DESCR_OF[typecode]}', 'fortran_order': False, 'shape': {shape!r}, }}"
+    padding = 64 - (len(NPY_MAGIC) + 4 + len(text) + 1) % 64
+    text += " " * (padding % 64) + "\n"
+    return NPY_MAGIC + b"\x01\x00" + struct.pack("<H", len(text)) + text.encode("latin1")
+
+
+def _is_npy(path: str) -> bool:
+    return path.lower().endswith(".npy")
+
+
+def _operand_layout(mapped: Any, path: str, dtype: str) -> tuple[str, int, int]:
+    """Return (typecode, data offset, pair count) for an input file."""
+    if _is_npy(path):
+        typecode, shape, offset = read_npy_header(mapped)
+        if len(shape) == 2 and shape[1] == 2:
+            pairs = shape[0]
+        elif len(shape) == 1 and shape[0] % 2 == 0:
+            pairs = shape[0] // 2
+        else:
+            raise ValueError(f"Expected a .npy array of shape (N, 2) or (2N,), got {shape}")
+    else:
+        try:
+            typecode = DTYPES[dtype]
+        except KeyError:
+            raise ValueError(f"Unknown dtype '{dtype}'. Supported dtypes: {', '.join(DTYPES)}") from None
+        offset = 0
+        if len(mapped) % 16:
+            raise ValueError(f"Input size {len(mapped)} is not a whole number of 16-byte operand pairs")
+        pairs = len(mapped) // 16
+    if len(mapped) < offset + pairs * 16:
+        raise ValueError("Input file is truncated")
+    return typecode, offset, pairs
+
+
+def _values(view: memoryview, typecode: str) -> memoryview:
+    """Interpret little-endian bytes as numbers, copying only on big-endian hosts."""
+    if _NATIVE_LITTLE_ENDIAN:
+        return view.cast(typecode)
+    values = array(typecode, view)
+    values.byteswap()
+    return memoryview(values)
+
+
+def _store(out: memoryview, results: Any, typecode: str) -> None:
+    """Copy a chunk of results into the mapped output as little-endian values."""
+    try:
+        packed = results if isinstance(results, array) and results.typecode == typecode else array(typecode, results)
+    except OverflowError:
+        raise OverflowError("Result does not fit in the int64 output format") from None
+    if not _NATIVE_LITTLE_ENDIAN:
+        packed.byteswap()
+    out[:] = memoryview(packed).cast("B")
+
+
+def _masked_int64(results: Any, status: array) -> Any:
+    """Replace failed and out-of-int64 results with 0 so they can be stored as int64."""
+    if isinstance(results, array):
+        return results
+    fitted = []
+    for i, value in enumerate(results):
+        if not status[i] and not _INT64_MIN <= value <= _INT64_MAX:
+            status[i] = masked.STATUS_OVERFLOW
+        fitted.append(0 if status[i] else value)
+    return fitted
+
+
+def _create(path: str, header: bytes, size: int, resume: bool) -> None:
+    """Create a result file of its final size, or check the size of one being resumed."""
+    if resume:
+        if os.path.getsize(path) != size:
+            raise ValueError(f"Cannot resume '{path}': expected {size} bytes, found {os.path.getsize(path)}")
+        return
+    with open(path, "wb") as f:
+        f.write(header)
+        f.truncate(size)
+
+
+@dataclass(frozen=True)
+class FilePlan:
+    """Layout of a packed batch job, shared by sequential and sharded runs."""
+
+    operation: str
+    in_path: str
+    out_path: str
+    typecode: str
+    in_offset: int
+    out_typecode: str
+    out_offset: int
+    pairs: int
+    status_path: str | None = None
+    status_offset: int = 0
+
+
+def plan_file(
+    operation: str,
+    in_path: str,
+    out_path: str,
+    dtype: str = 'f64',
+    status_path: str | None = None,
+    resume: bool = False,
+) -> FilePlan:
+    """
+    Inspect the input file and create the output (and status) file at its final size.
+
+    Args:
+        operation: Name or alias of a registered operation
+        in_path: Packed operand file (raw or .npy)
+        out_path: Result file (written as .npy if the name ends in .npy)
+        dtype: 'f64' or 'i64' for raw input files (ignored for .npy)
+        status_path: Optional uint8 status file (raw or .npy); when given,
+            failing pairs are recorded there instead of aborting the job
+        resume: Keep the contents of existing output and status files,
+            which must already have their final size
+
+    Returns:
+        The job plan
+
+    Raises:
+        ValueError: If the operation, dtype or file layout is invalid, or
+            a file to resume does not have the planned size
+    """
+    op = registry.lookup(operation)
+    if op.batch is None:
+        raise ValueError(f"Operation '{op.name}' has no batch form")
+    with open(in_path, "rb") as infile:
+        size = os.fstat(infile.fileno()).st_size
+        mapped = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        try:
+            typecode, offset, pairs = _operand_layout(mapped, in_path, dtype)
+        finally:
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+    out_typecode = 'd' if op.float_result else typecode
+    header = npy_header(out_typecode, (pairs,)) if _is_npy(out_path) else b""
+    _create(out_path, header, len(header) + pairs * 8, resume)
+    status_header = b""
+    if status_path is not None:
+        status_header = npy_header('B', (pairs,)) if _is_npy(status_path) else b""
+        _create(status_path, status_header, len(status_header) + pairs, resume)
+    return FilePlan(op.name, in_path, out_path, typecode, offset, out_typecode, len(header), pairs,
+                    status_path, len(status_header))
+
+
+def compute_range(
+    plan: FilePlan,
+    start: int,
+    stop: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    policy: str | None = None,
+) -> None:
+    """
+    Compute the results for pairs [start, stop) of a planned job.
+
+    Both files are memory-mapped and results are stored straight into the
+    output mapping, so independent ranges can be computed by separate
+    processes without sending results between them. If the plan has a
+    status file, the calculator.masked codes are stored there and failed
+    results are written as NaN (float64) or 0 (int64).
+
+    Args:
+        plan: The job plan from plan_file()
+        start: Index of the first pair
+        stop: Index one past the last pair
+        chunk_size: Number of pairs computed per chunk
+        policy: Validation policy for the batch operations
+
+    Raises:
+        ZeroDivisionError: If a divisor is zero (without a status file)
+        OverflowError: If a result is too large (without a status file)
+    """
+    if start >= stop:
+        return
+    func = registry.lookup(plan.operation).batch
+    with (
+        open(plan.in_path, "rb") as infile,
+        open(plan.out_path, "r+b") as outfile,
+        mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as in_map,
+        mmap.mmap(outfile.fileno(), 0) as out_map,
+        # Every view is released on exit, even on errors, so both maps can close
+        memoryview(in_map) as source,
+        memoryview(out_map) as target,
+        ExitStack() as status_stack,
+    ):
+        status_target = None
+        if plan.status_path is not None:
+            statusfile = status_stack.enter_context(open(plan.status_path, "r+b"))
+            status_map = status_stack.enter_context(mmap.mmap(statusfile.fileno(), 0))
+            status_target = status_stack.enter_context(memoryview(status_map))
+        for first in range(start, stop, chunk_size):
+            last = min(first + chunk_size, stop)
+            with (
+                source[plan.in_offset + first * 16:plan.in_offset + last * 16] as raw,
+                _values(raw, plan.typecode) as chunk,
+                chunk[0::2] as xs,
+                chunk[1::2] as ys,
+            ):
+                if status_target is None:
+                    results = func(xs, ys, policy=policy)
+                else:
+                    outcome = masked.evaluate(plan.operation, xs, ys)
+                    results, status = outcome.values, outcome.status
+            if status_target is not None:
+                if plan.out_typecode == 'q':
+                    results = _masked_int64(results, status)
+                status_target[plan.status_offset + first:plan.status_offset + last] = status
+            with target[plan.out_offset + first * 8:plan.out_offset + last * 8] as dest:
+                _store(dest, results, plan.out_typecode)
+
+
+def process_file(
+    operation: str,
+    in_path: str,
+    out_path: str,
+    dtype: str = 'f64',
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    policy: str | None = None,
+    status_path: str | None = None,
+) -> int:
+    """
+    Apply an operation to every operand pair of a packed binary file.
+
+    Integer inputs keep exact integer semantics; their results are written
+    as int64 except for divide, which always produces float64.
+
+    Args:
+        operation: Name or alias of a registered operation
+        in_path: Packed operand file (raw or .npy)
+        out_path: Result file (written as .npy if the name ends in .npy)
+        dtype: 'f64' or 'i64' for raw input files (ignored for .npy)
+        chunk_size: Number of pairs computed per chunk
+        policy: Validation policy for the batch operations
+        status_path: Optional uint8 status file; failing pairs are
+            recorded there instead of aborting the job
+
+    Returns:
+        The number of results written
+
+    Raises:
+        ValueError: If the operation, dtype or file layout is invalid
+        ZeroDivisionError: If a divisor is zero (without a status file)
+        OverflowError: If a result is too large (without a status file)
+    """
+    plan = plan_file(operation, in_path, out_path, dtype, status_path)
+    compute_range(plan, 0, plan.pairs, chunk_size, policy)
+    return plan.pairs
@@ -0,0 +1,279 @@
+"""Multi-process sharded execution of batch and stream jobs.
+
+Inputs are split into contiguous shards: record ranges for packed binary
+files and byte ranges aligned to line boundaries for text streams. Each
+shard runs in a worker process. Batch workers write straight into the
+memory-mapped output file; stream workers write to a per-shard temporary
+file that the parent concatenates in order. Results are never pickled
+back to the parent, only small per-shard summaries.
+"""
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from typing import IO, Iterator
+
+from .output import BUFFER_SIZE, OutputFormat
+from .packed import DEFAULT_CHUNK_SIZE, FilePlan, compute_range, plan_file
+from .stream import DEFAULT_CHUNK_SIZE as STREAM_CHUNK_SIZE, StreamStats, process_stream, read_lines
+
+
+# Bytes read at a time while looking for line boundaries and counting lines
+_SCAN_BLOCK = 1 << 20
+
+
+@dataclass
+class ShardResult:
+    """Summary of one shard, returned by a worker process.
+
+    start and stop are record indexes for batch jobs and byte offsets for
+    stream jobs.
+    """
+
+    index: int
+    start: int
+    stop: int
+    records: int = 0
+    errors: int = 0
+    error: str | None = None
+
+
+class ShardError(Exception):
+    """Raised when one or more shards of a job failed."""
+
+    def __init__(self, failures: list[ShardResult]) -> None:
+        self.failures = failures
+        details = "; ".join(
+            f"shard {f.index} [{f.start}, {f.stop}): {f.error}" for f in failures
+        )
+        super().__init__(f"{len(failures)} shard(s) failed: {details}")
+
+
+def split_range(total: int, shards: int) -> list[tuple[int, int]]:
+    """
+    Split [0, total) into at most `shards` contiguous, nearly equal ranges.
+
+    Args:
+        total: Number of items
+        shards: Desired number of ranges
+
+    Returns:
+        The (start, stop) ranges, in order
+    """
+    shards = max(1, min(shards, total))
+    bounds = [total * i // shards for i in range(shards + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(shards) if bounds[i] < bounds[i + 1]]
+
+
+def _batch_shard(index: int, plan: FilePlan, start: int, stop: int, chunk_size: int,
+                 policy: str | None) -> ShardResult:
+    result = ShardResult(index, start, stop, records=stop - start)
+    try:
+        compute_range(plan, start, stop, chunk_size, policy)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+def process_file_parallel(
+    operation: str,
+    in_path: str,
+    out_path: str,
+    workers: int,
+    dtype: str = 'f64',
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    policy: str | None = None,
+    status_path: str | None = None,
+) -> list[ShardResult]:
+    """
+    Run a packed batch job on several processes.
+
+    The output is identical to calculator.packed.process_file(): each
+    worker maps the output file and fills its own record range.
+
+    Args:
+        operation: Name or alias of a registered operation
+        in_path: Packed operand file (raw or .npy)
+        out_path: Result file (written as .npy if the name ends in .npy)
+        workers: Number of worker processes
+        dtype: 'f64' or 'i64' for raw input files (ignored for .npy)
+        chunk_size: Number of pairs computed per chunk
+        policy: Validation policy for the batch operations
+        status_path: Optional uint8 status file (see process_file())
+
+    Returns:
+        One summary per shard, in order
+
+    Raises:
+        ValueError: If the operation, dtype or file layout is invalid
+        ShardError: If any shard failed
+    """
+    plan = plan_file(operation, in_path, out_path, dtype, status_path)
+    ranges = split_range(plan.pairs, workers)
+    if len(ranges) <= 1:
+        results = [_batch_shard(0, plan, 0, plan.pairs, chunk_size, policy)]
+    else:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [
+                pool.submit(_batch_shard, index, plan, start, stop, chunk_size, policy)
+                for index, (start, stop) in enumerate(ranges)
+            ]
+            results = [future.result() for future in futures]
+    failures = [result for result in results if result.error is not None]
+    if failures:
+        raise ShardError(failures)
+    return results
+
+
+def line_shards(path: str, shards: int) -> list[tuple[int, int]]:
+    """
+    Split a text file into byte ranges that start and end on line boundaries.
+
+    Args:
+        path: The file to split
+        shards: Desired number of ranges
+
+    Returns:
+        The (start, stop) byte ranges, in order
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for start, _ in split_range(size, shards)[1:]:
+            if start <= bounds[-1]:
+                continue
+            f.seek(start - 1)
+            # Advance to just past the next line ending (or to the end of file)
+            while True:
+                block = f.read(_SCAN_BLOCK)
+                ending = min((i for i in (block.find(b"\n"), block.find(b"\r")) if i >= 0), default=-1)
+                if ending >= 0:
+                    boundary = f.tell() - len(block) + ending + 1
+                    # Keep a CR LF together
+                    if block[ending:ending + 1] == b"\r":
+                        f.seek(boundary)
+                        if f.read(1) == b"\n":
+                            boundary += 1
+                    break
+                if not block:
+                    boundary = size
+                    break
+            if bounds[-1] < boundary < size:
+                bounds.append(boundary)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def _iter_lines(path: str, start: int, stop: int) -> Iterator[str]:
+    """Yield the decoded lines of the byte range [start, stop), split with universal newlines."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        for line in read_lines(f, stop - start):
+            yield line.decode("utf-8")
+
+
+def _count_lines(path: str, start: int, stop: int) -> int:
+    """Count the line endings ('\\n', '\\r\\n' or '\\r') in the byte range [start, stop)."""
+    count = 0
+    last = b""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            block = f.read(min(_SCAN_BLOCK, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            count += block.count(b"\n") + block.count(b"\r") - block.count(b"\r\n")
+            # A CR LF split across two blocks is one line ending
+            if last == b"\r" and block[:1] == b"\n":
+                count -= 1
+            last = block[-1:]
+    return count
+
+
+def _stream_shard(index: int, path: str, start: int, stop: int, first_line: int,
+                  out_path: str, chunk_size: int, fmt: OutputFormat) -> ShardResult:
+    result = ShardResult(index, start, stop)
+    try:
+        if fmt.binary:
+            output = open(out_path, "wb", buffering=BUFFER_SIZE)
+        else:
+            output = open(out_path, "w", encoding="utf-8", newline="", buffering=BUFFER_SIZE)
+        with output:
+            stats = process_stream(_iter_lines(path, start, stop), output, chunk_size, first_line,
+                                   output_format=fmt, header=False)
+        result.records, result.errors = stats.records, stats.errors
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+def process_stream_parallel(
+    path: str,
+    output: IO,
+    workers: int,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    status_column: bool = False,
+    output_format: OutputFormat | None = None,
+) -> StreamStats:
+    """
+    Evaluate a file of records on several processes, keeping output order.
+
+    The output is identical to running calculator.stream.process_stream()
+    over the whole file, including the line numbers in error records.
+
+    Args:
+        path: Input file of '<operation> <num1> <num2>' records
+        output: Stream to write results to (binary for binary formats)
+        workers: Number of worker processes
+        chunk_size: Number of rows each worker buffers per write
+        status_column: Append a status code column to every row
+        output_format: How to write rows; overrides status_column
+
+    Returns:
+        Counters for the processed records and errors
+
+    Raises:
+        ShardError: If a shard could not be processed (e.g. undecodable input)
+    """
+    fmt = output_format if output_format is not None else OutputFormat(status=status_column)
+    shards = line_shards(path, workers)
+    stats = StreamStats()
+    if fmt.header():
+        output.write(fmt.header())
+    if not shards:
+        output.flush()
+        return stats
+    with (
+        tempfile.TemporaryDirectory(prefix="calculator-") as tmp,
+        ProcessPoolExecutor(max_workers=len(shards)) as pool,
+    ):
+        # First pass: count lines per shard so error records keep global line numbers
+        starts, stops = zip(*shards)
+        counts = list(pool.map(_count_lines, repeat(path), starts, stops))
+        first_lines = [1 + sum(counts[:i]) for i in range(len(shards))]
+        out_paths = [os.path.join(tmp, f"shard-{i}.txt") for i in range(len(shards))]
+        futures = [
+            pool.submit(_stream_shard, i, path, start, stop, first_lines[i], out_paths[i],
+                        chunk_size, fmt)
+            for i, (start, stop) in enumerate(shards)
+        ]
+        results = [future.result() for future in futures]
+        failures = [result for result in results if result.error is not None]
+        if failures:
+            raise ShardError(failures)
+        for result, out_path in zip(results, out_paths):
+            stats.records += result.records
+            stats.errors += result.errors
+            if fmt.binary:
+                shard_output = open(out_path, "rb")
+            else:
+                shard_output = open(out_path, encoding="utf-8", newline="")
+            with shard_output:
+                shutil.copyfileobj(shard_output, output, _SCAN_BLOCK)
+    output.flush()
+    return stats
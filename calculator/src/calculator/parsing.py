@@ -0,0 +1,157 @@
+"""Bulk parsing of numeric text columns into typed buffers.
+
+    with open("values.txt", "rb") as f:
+        for values in read_column(f):     # array('q'), array('d') or list
+            ...
+
+Input is read in large binary blocks cut at line boundaries and split
+into tokens with one bytes.split() per block; no per-line str objects are
+made. Tokens are converted with a single map(int, ...) or map(float, ...)
+straight into an array.
+
+A block whose tokens are all integer literals becomes array('q'), or a
+list of ints if a value does not fit in 64 bits, so integers stay exact.
+Any other block is parsed as floats into array('d'). Malformed values
+raise ValueError naming their line, like the line-by-line parser.
+
+Blocks that hold anything but one value per line (spaces or tabs within
+a line) are parsed line by line instead, with the same results.
+"""
+
+from array import array
+from typing import BinaryIO, Iterator
+
+
+BLOCK_SIZE = 1 << 20
+
+# Whitespace that may separate tokens within a line
+_INLINE_SPACE = (b" ", b"\t", b"\x0b", b"\x0c")
+
+# Bytes that may appear in a block of integer literals
+_INTEGER_BYTES = b"0123456789+-\r\n"
+
+Column = array | list[int]
+
+
+def read_blocks(f: BinaryIO, block_size: int = BLOCK_SIZE) -> Iterator[tuple[int, bytes]]:
+    """
+    Read a binary file in blocks of whole lines.
+
+    Args:
+        f: File opened in binary mode
+        block_size: Approximate number of bytes per block
+
+    Yields:
+        (line number of the block's first line, block)
+    """
+    line = 1
+    rest = b""
+    while chunk := f.read(block_size):
+        if rest:
+            chunk = rest + chunk
+        end = chunk.rfind(b"\n") + 1
+        if not end:
+            rest = chunk
+            continue
+        block, rest = chunk[:end], chunk[end:]
+        yield line, block
+        line += block.count(b"\n")
+    if rest:
+        yield line, rest
+
+
+def _one_per_line(block: bytes) -> bool:
+    """Return True if no line of the block can hold more than one token."""
+    if any(space in block for space in _INLINE_SPACE):
+        return False
+    return b"\r" not in block or block.count(b"\r") == block.count(b"\r\n")
+
+
+def _convert(tokens: list[bytes], exact_ints: bool, integers: bool) -> Column:
+    """
+    Convert tokens to a typed buffer.
+
+    Raises:
+        ValueError: If a token is not a number
+    """
+    if exact_ints and integers:
+        try:
+            return array('q', map(int, tokens))
+        except OverflowError:
+            return list(map(int, tokens))
+        except ValueError:
+            pass
+    return array('d', map(float, tokens))
+
+
+def _parse_lines(block: bytes, first_line: int, exact_ints: bool) -> Column:
+    """
+    Parse a block line by line, naming the line of the first bad value.
+
+    Raises:
+        ValueError: If a non-blank line is not a single number
+    """
+    tokens = []
+    numbers = []
+    for offset, line in enumerate(block.split(b"\n")):
+        token = line.strip()
+        if token:
+            tokens.append(token)
+            numbers.append(first_line + offset)
+    integers = not b"".join(tokens).translate(None, _INTEGER_BYTES)
+    try:
+        return _convert(tokens, exact_ints, integers)
+    except ValueError:
+        for token, line_number in zip(tokens, numbers):
+            try:
+                float(token)
+            except ValueError:
+                raise ValueError(f"line {line_number}: Invalid number format") from None
+        raise
+
+
+def parse_column(block: bytes, first_line: int = 1, *, exact_ints: bool = True) -> Column:
+    """
+    Parse a block of text holding one number per line.
+
+    Blank lines are skipped. Numbers are parsed as by float(), or by int()
+    when every value of the block is an integer literal and exact_ints is
+    set.
+
+    Args:
+        block: The text, as bytes
+        first_line: Line number of the block's first line (for errors)
+        exact_ints: Keep all-integer blocks as exact ints
+
+    Returns:
+        array('q') or a list of ints for integer blocks, else array('d')
+
+    Raises:
+        ValueError: If a non-blank line is not a single number
+    """
+    if not _one_per_line(block):
+        return _parse_lines(block, first_line, exact_ints)
+    tokens = block.split()
+    try:
+        return _convert(tokens, exact_ints, not block.translate(None, _INTEGER_BYTES))
+    except ValueError:
+        return _parse_lines(block, first_line, exact_ints)
+
+
+def read_column(f: BinaryIO, *, exact_ints: bool = True, block_size: int = BLOCK_SIZE) -> Iterator[Column]:
+    """
+    Parse a file holding one number per line, a block at a time.
+
+    Args:
+        f: File opened in binary mode
+        exact_ints: Keep all-integer blocks as exact ints
+        block_size: Approximate number of bytes per block
+
+    Yields:
+        The parsed values of each block (see parse_column)
+
+    Raises:
+        ValueError: If a non-blank line is not a single number
+    """
+    for first_line, block in read_blocks(f, block_size):
+        yield parse_column(block, first_line, exact_ints=exact_ints)
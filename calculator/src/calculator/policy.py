@@ -0,0 +1,144 @@
+"""Validation policies controlling how strictly the operations check their inputs and results.
+
+* ``strict`` (default): type checks and range checks on every call.
+* ``trusted``: skip the type checks; results are still range-checked.
+* ``deferred``: type checks run, but out-of-range results are recorded
+  instead of raised, and reported together at the end of the batch.
+
+A policy can be chosen per call (``add(a, b, policy="trusted")``), per
+block of code (``with validation("trusted"): ...``) or for the whole
+process (``set_policy("trusted")``). Blocks are context-local, so threads
+and asyncio tasks can use different policies at the same time.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+
+STRICT = "strict"
+TRUSTED = "trusted"
+DEFERRED = "deferred"
+
+POLICIES = (STRICT, TRUSTED, DEFERRED)
+
+
+class DeferredRangeError(OverflowError):
+    """Raised once for all range violations collected under the deferred policy."""
+
+    def __init__(self, violations: list[OverflowError]) -> None:
+        self.violations = violations
+        super().__init__(f"{len(violations)} result(s) out of range; first: {violations[0]}")
+
+
+class ViolationLog:
+    """Thread-safe collection of deferred range violations."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._violations: list[OverflowError] = []
+
+    def record(self, error: OverflowError) -> None:
+        """Remember a range violation."""
+        with self._lock:
+            self._violations.append(error)
+
+    def take(self) -> list[OverflowError]:
+        """Return and clear the recorded violations."""
+        with self._lock:
+            violations, self._violations = self._violations, []
+        return violations
+
+    def __len__(self) -> int:
+        return len(self._violations)
+
+
+class PolicyState:
+    """The policy in effect for a context, with its deferred violation log."""
+
+    __slots__ = ('name', 'log')
+
+    def __init__(self, name: str, log: ViolationLog) -> None:
+        self.name = name
+        self.log = log
+
+
+def _check_name(name: str) -> str:
+    if name not in POLICIES:
+        raise ValueError(
+            f"Unknown validation policy '{name}'. Supported policies: {', '.join(POLICIES)}"
+        )
+    return name
+
+
+# The process-wide state is the context variable's default, so set_policy()
+# is seen by every thread and task that has not entered a validation() block.
+_PROCESS_STATE = PolicyState(STRICT, ViolationLog())
+
+active_policy: ContextVar[PolicyState] = ContextVar('calculator_policy', default=_PROCESS_STATE)
+
+
+def set_policy(name: str) -> None:
+    """
+    Set the process-wide default policy.
+
+    Args:
+        name: One of 'strict', 'trusted' or 'deferred'
+
+    Raises:
+        ValueError: If the policy name is unknown
+    """
+    _PROCESS_STATE.name = _check_name(name)
+
+
+def get_policy() -> str:
+    """Return the name of the policy in effect in the current context."""
+    return active_policy.get().name
+
+
+@contextmanager
+def validation(name: str) -> Iterator[ViolationLog]:
+    """
+    Use a policy for the duration of a with-block in the current context.
+
+    Under the deferred policy the block gets its own violation log; if any
+    violations were recorded, DeferredRangeError is raised when the block
+    exits normally.
+
+    Args:
+        name: One of 'strict', 'trusted' or 'deferred'
+
+    Yields:
+        The violation log of the block
+
+    Raises:
+        ValueError: If the policy name is unknown
+        DeferredRangeError: If deferred violations were recorded in the block
+    """
+    state = PolicyState(_check_name(name), ViolationLog())
+    token = active_policy.set(state)
+    try:
+        yield state.log
+    finally:
+        active_policy.reset(token)
+    violations = state.log.take()
+    if violations:
+        raise DeferredRangeError(violations)
+
+
+def record_violation(error: OverflowError) -> None:
+    """Record a range violation in the current context's log."""
+    active_policy.get().log.record(error)
+
+
+def check_deferred() -> None:
+    """
+    Report violations collected by the process-wide deferred policy.
+
+    Raises:
+        DeferredRangeError: If any violations were recorded since the last check
+    """
+    violations = _PROCESS_STATE.log.take()
+    if violations:
+        raise DeferredRangeError(violations)
@@ -0,0 +1,251 @@
+"""Run a calculator command under cProfile and tracemalloc.
+
+    python -m calculator profile --stats run.pstats -- --stream records.txt
+
+The command runs in-process exactly as it would on its own; its output
+is untouched and the report goes to stderr (or --report FILE). The report
+holds:
+
+* the time per pipeline phase: parse, validate, compute, range-check,
+  format and write (everything else, such as start-up and argument
+  handling, is 'other');
+* the hottest functions as sorted by pstats;
+* peak traced memory and the largest allocation sites.
+
+Phases are assigned from cProfile's self time by function, using the
+table below. Work a function does inline (say, float() parsing inside
+stream.evaluate_record) counts towards that function's phase. Worker
+processes started with --workers are not profiled.
+"""
+
+import cProfile
+import gc
+import io
+import os
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+PHASES = ('parse', 'validate', 'compute', 'range-check', 'format', 'write', 'other')
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+DEFAULT_TOP = 20
+DEFAULT_ALLOCATIONS = 10
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (module, function) in this package -> phase
+_FUNCTION_PHASES: dict[tuple[str, str], str] = {}
+
+for _phase, _functions in {
+    'parse': (
+        '__main__.parse_arguments', '__main__._parse_variable',
+        'stream.evaluate_record',
+        'expr.tokenize', 'expr._check_integer', 'expr.normalize', 'expr._parse_number',
+        'expr._compile_normalized', 'expr._compile_source', 'expr.compile_expression', 'expr.parse', 'expr._expression', 'expr._term', 'expr._unary',
+        'expr._primary', 'expr._peek', 'expr._next', 'expr._emit',
+        'packed.read_npy_header', 'packed._operand_layout', 'packed._values', 'packed.plan_file',
+        'parallel.line_shards', 'parallel._iter_lines', 'parallel._count_lines',
+        'reduce.text_values', 'reduce.column_layout', 'reduce._file_blocks',
+        'fixed.to_fixed', 'fixed._scaled', 'fixed.to_array', 'window.timed_values', 'checkpoint._read_lines',
+    ),
+    'validate': (
+        '__init__._validate_number',
+        'batch._as_operands', 'batch._check_lengths', 'batch._prepare', 'batch._numpy_operands',
+        'batch._profile',
+        'masked._mark_types', 'reduce._blocks',
+        'fixed._unit', 'fixed._check_rounding', 'fixed._validate_units', 'fixed._prepare_batch',
+    ),
+    'compute': (
+        '__init__.add', '__init__.subtract', '__init__.multiply', '__init__.divide',
+        'batch.add', 'batch.subtract', 'batch.multiply', 'batch.divide', 'batch._numpy_float_kernel',
+        'batch._compute', 'batch._generic_kernel', 'batch._float_kernel', 'batch._int_kernel',
+        'registry.get', 'registry.lookup', 'registry.kernel',
+        'expr.__call__', 'expr.<lambda>', 'expr._negate', 'expr.evaluate',
+        'masked.evaluate', 'masked._compute', 'masked._apply_each', 'masked.direct_kernel',
+        'packed.compute_range', 'packed._masked_int64',
+        'fixed.add', 'fixed.subtract', 'fixed.multiply', 'fixed.divide', 'fixed._round_div',
+        'fixed.batch_add', 'fixed.batch_subtract', 'fixed.batch_multiply', 'fixed.batch_divide',
+        'fixed._round_half_even',
+        'window.push', 'window._evict', 'window._insert', 'window._add', 'window._remove', 'window._resync',
+        'window._scaled', 'window._divided', 'window._multiply', 'window._divide', 'window._result',
+        'window._dominates', 'window.rolling', 'cluster.compute_chunk',
+    ),
+    'range-check': (
+        '__init__._check_result_range', '__init__._defer_range_check',
+        'limits.check', 'limits.exceeds', 'limits.limit_for',
+        'batch._check_results_range', 'masked._mark_range', 'reduce._check_values',
+        'fixed._check_units', 'fixed._scaled_limit', 'fixed._range_error', 'fixed._finish_batch',
+    ),
+    'format': (
+        'stream.process_stream', 'batch._pack',
+        'output.format_numbers', 'output.write_rows', 'output.write_all', 'output._write_jsonl',
+        'output._write_f64', 'fixed.to_string', 'fixed._pack',
+    ),
+    'write': (
+        'packed._store', 'reduce._write_values', 'cluster._complete',
+        'checkpoint.save', 'checkpoint._sync', 'checkpoint._sync_path',
+        'audit.audited', 'audit.append', 'audit.flush', 'audit._written', 'audit._write', 'audit._index',
+        'audit._summary',
+    ),
+}.items():
+    for _qualified in _functions:
+        _module, _, _name = _qualified.partition('.')
+        _FUNCTION_PHASES[(_module, _name)] = _phase
+
+# Standard-library modules and built-in functions, matched by name
+_MODULE_PHASES = {'argparse': 'parse', 'decoder': 'parse', 'encoder': 'format'}
+
+_BUILTIN_PHASES = (
+    (re.compile(r"method '(write|writelines|writerows|flush)' of|builtins\.print\b"), 'write'),
+    (re.compile(r"method '(split|read|readline|readlines|partition|strip|frombytes)' of"), 'parse'),
+    (re.compile(r"method '(join|format)' of|builtins\.(repr|format)\b"), 'format'),
+    (re.compile(r"builtins\.(isinstance|all)\b"), 'validate'),
+    (re.compile(r"math\.(fsum|prod)\b|builtins\.sum\b"), 'compute'),
+)
+
+
+def phase_of(filename: str, function: str) -> str:
+    """
+    Return the pipeline phase a profiled function belongs to.
+
+    Args:
+        filename: Source file from the pstats key ('~' for built-ins)
+        function: Function name from the pstats key
+
+    Returns:
+        One of PHASES
+    """
+    if filename == '~':
+        for pattern, phase in _BUILTIN_PHASES:
+            if pattern.search(function):
+                return phase
+        return 'other'
+    module = os.path.splitext(os.path.basename(filename))[0]
+    if os.path.dirname(os.path.abspath(filename)) == _PACKAGE_DIR:
+        return _FUNCTION_PHASES.get((module, function), 'other')
+    return _MODULE_PHASES.get(module, 'other')
+
+
+@dataclass
+class ProfileReport:
+    """What a profiled run measured."""
+
+    argv: list[str]
+    exit_code: int
+    wall_seconds: float
+    phases: dict[str, float]
+    hotspots: str
+    peak_bytes: int = 0
+    allocations: list[tuple[str, int, int]] = field(default_factory=list)
+
+    def format(self) -> str:
+        """Render the report as text."""
+        lines = [
+            f"Profile of: calculator {' '.join(self.argv)}",
+            f"Exit status: {self.exit_code}    Wall time: {self.wall_seconds:.3f} s",
+            "",
+            "Time by phase (self time)",
+        ]
+        total = sum(self.phases.values()) or 1.0
+        for phase in PHASES:
+            seconds = self.phases.get(phase, 0.0)
+            lines.append(f"  {phase:<12} {seconds:10.6f} s  {100 * seconds / total:5.1f}%")
+        lines += ["", self.hotspots.rstrip(), ""]
+        if self.allocations or self.peak_bytes:
+            lines.append(f"Peak traced memory: {_size(self.peak_bytes)}")
+            lines.append("Top allocation sites:")
+            for site, size, count in self.allocations:
+                lines.append(f"  {site}: {_size(size)} in {count} blocks")
+        return "\n".join(lines) + "\n"
+
+
+def _size(size: float) -> str:
+    if size < 1024:
+        return f"{int(size)} B"
+    for unit in ('KiB', 'MiB', 'GiB'):
+        size /= 1024
+        if size < 1024 or unit == 'GiB':
+            break
+    return f"{size:.1f} {unit}"
+
+
+def _phase_times(stats: pstats.Stats) -> dict[str, float]:
+    """Sum the self time of every profiled function by phase."""
+    phases = dict.fromkeys(PHASES, 0.0)
+    for (filename, _, function), (_, _, self_time, _, _) in stats.stats.items():
+        phases[phase_of(filename, function)] += self_time
+    return phases
+
+
+def run(
+    main: Callable[[], None],
+    argv: list[str],
+    *,
+    stats_path: str | None = None,
+    sort: str = 'cumulative',
+    top: int = DEFAULT_TOP,
+    allocations: int = DEFAULT_ALLOCATIONS,
+) -> ProfileReport:
+    """
+    Run a CLI entry point with the given arguments under the profilers.
+
+    Args:
+        main: The entry point; it reads sys.argv and may raise SystemExit
+        argv: Arguments for the entry point (without the program name)
+        stats_path: If set, dump the raw pstats data here
+        sort: pstats sort key for the hotspot list
+        top: Number of hotspot functions to list
+        allocations: Number of allocation sites to list; 0 disables
+            tracemalloc, which otherwise slows the run down
+
+    Returns:
+        The report
+
+    Raises:
+        ValueError: If the sort key is unknown
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort}'. Supported keys: {', '.join(SORT_KEYS)}")
+    saved_argv = sys.argv
+    sys.argv = [saved_argv[0] if saved_argv else "calculator", *argv]
+    profiler = cProfile.Profile()
+    exit_code = 0
+    # Collect earlier garbage now rather than charging it to the run
+    gc.collect()
+    if allocations:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            main()
+        finally:
+            profiler.disable()
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        wall = time.perf_counter() - start
+        sys.argv = saved_argv
+        peak = 0
+        sites: list[tuple[str, int, int]] = []
+        if allocations:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            for statistic in snapshot.statistics('lineno')[:allocations]:
+                frame = statistic.traceback[0]
+                sites.append((f"{frame.filename}:{frame.lineno}", statistic.size, statistic.count))
+    if stats_path is not None:
+        profiler.dump_stats(stats_path)
+    buffer = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buffer)
+    phases = _phase_times(stats)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return ProfileReport(list(argv), exit_code, wall, phases, buffer.getvalue(), peak, sites)
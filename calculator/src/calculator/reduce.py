@@ -0,0 +1,743 @@
+"""Exact and blocked reductions: sum, product, cumsum and cumprod.
+
+    reduce.sum(values)              # one correctly rounded total
+    reduce.cumsum(values)           # iterator of running totals
+    reduce.reduce_file('sum', path, 'f64', workers=4)
+
+Sums are accumulated exactly. The exact total of each block of floats is
+captured by a couple of math.fsum() passes (a rounded sum plus what it
+left over), and block totals are kept as an integer over a power-of-two
+denominator. Scans convert each block to such integers (exact for
+floats) and take running sums with integer arithmetic at C speed. Every
+result is the exact sum rounded once, like math.fsum(). That is at
+least as accurate as Kahan, Neumaier or pairwise summation, and because
+nothing is rounded on the way it cannot depend on how the input is
+split into blocks or shards.
+
+Products are kept as a mantissa and a power-of-two exponent, like
+window.RollingProduct, so a running product that leaves the float range
+on the way, or a block whose own product would underflow or overflow,
+does not turn a representable result into 0.0, inf or NaN. Each block of
+BLOCK_SIZE values is multiplied into such a record with math.prod() over
+its mantissas, and block records are multiplied in order. The blocks
+are fixed by position, so the result also does not depend on the number
+of workers. Products of ints stay exact ints.
+
+Values are read one block at a time, so memory use is constant. The
+overflow check runs once per block on the running total instead of once
+per element; scans check every value they emit.
+"""
+
+import builtins
+import math
+import operator
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from itertools import accumulate, chain, islice, repeat
+from typing import Any, Callable, Iterable, Iterator
+
+from . import _check_result_range, _validate_number
+from . import batch
+from . import limits
+from .packed import _NATIVE_LITTLE_ENDIAN, DTYPES, _is_npy, npy_header, read_npy_header
+from .parallel import split_range
+
+
+BLOCK_SIZE = 8192
+
+_NUMBER = (int, float)
+_FLOAT_FORMATS = ('d', 'f')
+# Largest shift for which every nonzero num / 2**shift is a normal float
+_LDEXP_MAX_SHIFT = 1022
+_as_ratio = operator.methodcaller('as_integer_ratio')
+_mantissa_of = operator.itemgetter(0)
+_exponent_of = operator.itemgetter(1)
+
+# (exact block total, power-of-two shift of its denominator, block has
+# floats, first non-finite value of the block or None)
+_SumRecord = tuple[int, int, bool, float | None]
+
+# (exact product of the ints before the first float, mantissa and exponent
+# of the product of the rest, block has floats)
+_ProductRecord = tuple[int, float, int, bool]
+
+# Binary orders of magnitude a run of factors may span between normalizations;
+# 0.5 * 2**-1000 is still a normal float
+_RUN_BITS = 1000
+# Running products between these bounds stay normal when scaled by a mantissa
+_SAFE_LOW = 2.0 ** -1000
+_SAFE_HIGH = 2.0 ** 1000
+
+
+def _blocks(values: Any) -> Iterator[Any]:
+    """
+    Split an iterable or buffer into validated blocks of BLOCK_SIZE values.
+
+    Raises:
+        TypeError: If a value is not a number
+    """
+    if batch._is_ndarray(values):
+        values = memoryview(values)
+    if isinstance(values, (array, memoryview)):
+        values = batch._as_operands(values)
+        for start in range(0, len(values), BLOCK_SIZE):
+            yield values[start:start + BLOCK_SIZE]
+        return
+    if isinstance(values, (str, bytes)):
+        raise TypeError(f"Expected a sequence of numbers, got {type(values).__name__}")
+    iterator = iter(values)
+    while block := list(islice(iterator, BLOCK_SIZE)):
+        if not all(map(isinstance, block, repeat(_NUMBER))):
+            for value in block:
+                _validate_number(value)
+        yield block
+
+
+def _first_nonfinite(block: Any) -> int:
+    """Return the index of the first infinity or NaN in a block."""
+    for i, value in enumerate(block):
+        if isinstance(value, float) and not math.isfinite(value):
+            return i
+    return len(block)
+
+
+def _has_float(block: Any) -> bool:
+    return any(map(isinstance, block, repeat(float)))
+
+
+def _all_floats(block: Any) -> bool:
+    if isinstance(block, array):
+        return block.typecode in _FLOAT_FORMATS
+    if isinstance(block, memoryview):
+        return block.format.lstrip("@=<>!") in _FLOAT_FORMATS
+    return all(map(isinstance, block, repeat(float)))
+
+
+def _scaled(block: Any) -> tuple[Iterable[int], int]:
+    """
+    Return the values of a block as integers over 2**shift, and shift.
+
+    A float block whose values span less than the float exponent range is
+    scaled with ldexp(), which is exact; anything else goes through
+    as_integer_ratio().
+
+    Raises:
+        OverflowError, ValueError: If the block holds an infinity or NaN
+    """
+    if _all_floats(block):
+        magnitudes = list(map(abs, block))
+        smallest = min(filter(None, magnitudes), default=0.0)
+        shift = min(max(53 - math.frexp(smallest)[1], 0), 1074)
+        if math.frexp(max(magnitudes, default=0.0))[1] + shift <= 1024:
+            return list(map(int, map(math.ldexp, block, repeat(shift)))), shift
+    nums, dens = zip(*map(_as_ratio, block))
+    shift = max(dens).bit_length() - 1
+    if not shift:
+        return nums, 0
+    return map(operator.mul, nums, map(operator.floordiv, repeat(1 << shift), dens)), shift
+
+
+def _expansion(block: Any) -> list[float] | None:
+    """
+    Return a few floats whose exact sum is the exact sum of a float block.
+
+    Each math.fsum() pass rounds what the previous parts left over, so the
+    parts shrink by at least 53 bits per pass and usually one or two passes
+    suffice. Returns None if the block holds an infinity or NaN or its sum
+    overflows.
+    """
+    parts: list[float] = []
+    try:
+        total = math.fsum(block)
+        while total:
+            if not math.isfinite(total):
+                return None
+            parts.append(total)
+            total = math.fsum(chain(block, map(operator.neg, parts)))
+    except (OverflowError, ValueError):
+        return None
+    return parts
+
+
+def _sum_record(block: Any) -> _SumRecord:
+    """Summarize one block for the exact sum; values after an inf or NaN are ignored."""
+    if not _has_float(block):
+        return builtins.sum(block), 0, False, None
+    if _all_floats(block) and (parts := _expansion(block)) is not None:
+        if not parts:
+            return 0, 0, True, None
+        nums, shift = _scaled(parts)
+        return builtins.sum(nums), shift, True, None
+    stop = None
+    try:
+        nums, shift = _scaled(block)
+    except (OverflowError, ValueError):
+        i = _first_nonfinite(block)
+        stop = block[i]
+        if not i:
+            return 0, 0, True, stop
+        block = block[:i]
+        nums, shift = _scaled(block)
+    return builtins.sum(nums), shift, stop is not None or _has_float(block), stop
+
+
+def _sum_records(blocks: Iterable[Any]) -> Iterator[_SumRecord]:
+    """Summarize blocks, stopping after the first one that holds an inf or NaN."""
+    for block in blocks:
+        record = _sum_record(block)
+        yield record
+        if record[3] is not None:
+            return
+
+
+def _to_floats(nums: list[int], shift: int) -> list[float]:
+    """Round exact values num / 2**shift to floats; values too large for a float become infinities."""
+    try:
+        if shift <= _LDEXP_MAX_SHIFT:
+            # float() rounds once and ldexp() is exact while the result stays normal
+            return list(map(math.ldexp, map(float, nums), repeat(-shift)))
+        return list(map(operator.truediv, nums, repeat(1 << shift)))
+    except OverflowError:
+        results = []
+        for num in nums:
+            try:
+                results.append(num / (1 << shift))
+            except OverflowError:
+                results.append(math.copysign(math.inf, num))
+        return results
+
+
+def _check_values(values: list[float | int]) -> None:
+    """Range-check a block of results in one C-level pass."""
+    if any(map(operator.lt, repeat(limits.active.max_value), map(abs, values))):
+        for value in values:
+            _check_result_range(value)
+
+
+@dataclass(slots=True)
+class _ExactSum:
+    """Exact running sum, num / 2**shift; results are ints until a float is seen."""
+
+    num: int = 0
+    shift: int = 0
+    floats: bool = False
+    nan: bool = False
+
+    def _align(self, shift: int) -> int:
+        """Bring the sum to a denominator of at least 2**shift; return the shift for new values."""
+        if shift > self.shift:
+            self.num <<= shift - self.shift
+            self.shift = shift
+            return 0
+        return self.shift - shift
+
+    def value(self) -> float | int:
+        if self.nan:
+            return math.nan
+        if not self.floats:
+            return self.num
+        return _to_floats([self.num], self.shift)[0]
+
+    def add(self, record: _SumRecord) -> None:
+        """Fold a block record in without range checks."""
+        if self.nan:
+            return
+        num, shift, floats, stop = record
+        extra = self._align(shift)
+        self.num += num << extra
+        self.floats = self.floats or floats
+        if stop is not None:
+            # After an infinity the total is meaningless; an overflow is raised
+            # where the infinity is emitted
+            self.nan = True
+
+    def apply(self, record: _SumRecord) -> None:
+        """
+        Fold a block record in and range-check the running total.
+
+        Raises:
+            OverflowError: If the total is too large or the block holds an infinity
+        """
+        if self.nan:
+            return
+        stop = record[3]
+        self.add(record)
+        if stop is not None:
+            if stop == stop:
+                _check_result_range(stop)
+            return
+        _check_result_range(self.value())
+
+    def scan(self, block: Any) -> list[float | int]:
+        """
+        Return the running totals after each value of a block.
+
+        Raises:
+            OverflowError: If a running total is too large
+        """
+        if self.nan:
+            return [math.nan] * len(block)
+        try:
+            nums, shift = _scaled(block)
+        except (OverflowError, ValueError):
+            i = _first_nonfinite(block)
+            head = self.scan(block[:i]) if i else []
+            stop = block[i]
+            if stop == stop:
+                _check_result_range(stop)
+            self.floats = self.nan = True
+            return head + [math.nan] * (len(block) - i)
+        extra = self._align(shift)
+        if extra:
+            nums = map(operator.lshift, nums, repeat(extra))
+        prefix = list(accumulate(nums, initial=self.num))
+        self.num = prefix[-1]
+        first_float = 1
+        if not self.floats and _has_float(block):
+            first_float += list(map(isinstance, block, repeat(float))).index(True)
+            self.floats = True
+        elif not self.floats:
+            first_float = len(prefix)
+        results = list(map(operator.rshift, islice(prefix, 1, first_float), repeat(self.shift)))
+        if first_float < len(prefix):
+            results += _to_floats(prefix[first_float:], self.shift)
+        _check_values(results)
+        return results
+
+
+def _int_parts(num: int) -> tuple[float, int]:
+    """Return an int as a mantissa and exponent, rounded once."""
+    shift = num.bit_length()
+    mantissa, extra = math.frexp(num / (1 << shift))
+    return mantissa, shift + extra
+
+
+def _ldexp(mantissa: float, exponent: int) -> float:
+    try:
+        return math.ldexp(mantissa, exponent)
+    except OverflowError:
+        return math.copysign(math.inf, mantissa)
+
+
+def _float_product(values: list[float]) -> tuple[float, int]:
+    """Multiply floats into a mantissa and exponent, folding them in order."""
+    lo, hi = min(values), max(values)
+    if lo < 0:
+        lo, hi = min(map(abs, values)), max(hi, -lo)
+    if 0 < lo and hi < math.inf:
+        # A run of this many factors, started from a mantissa, cannot leave
+        # the normal range, so plain math.prod() rounds like the mantissa fold
+        run = int(_RUN_BITS / max(math.log2(hi), -math.log2(lo), 1e-9))
+        factors = values
+    else:
+        # Zeros, infinities, NaN or extreme magnitudes: fold the mantissas
+        run = 0
+    if not run:
+        pairs = list(map(math.frexp, values))
+        exponent = builtins.sum(map(_exponent_of, pairs))
+        factors = list(map(_mantissa_of, pairs))
+        run = _RUN_BITS
+    else:
+        exponent = 0
+    mantissa = 1.0
+    for start in range(0, len(factors), run):
+        mantissa, shift = math.frexp(math.prod(factors[start:start + run], start=mantissa))
+        exponent += shift
+    return mantissa, exponent
+
+
+def _product_record(block: Any) -> _ProductRecord:
+    """Multiply a block into a record: ints exactly up to the first float, then mantissa and exponent."""
+    if not _has_float(block):
+        return math.prod(block), 1.0, 0, False
+    if isinstance(block, (array, memoryview)):
+        return 1, *_float_product(block.tolist()), True
+    first = list(map(isinstance, block, repeat(float))).index(True)
+    return math.prod(block[:first]), *_float_product(list(map(float, block[first:]))), True
+
+
+@dataclass(slots=True)
+class _RunningProduct:
+    """Running product; an exact int until a float is seen, then mantissa * 2**exponent."""
+
+    ints: int = 1
+    mantissa: float = 1.0
+    exponent: int = 0
+    floats: bool = False
+
+    def _multiply(self, mantissa: float, exponent: int) -> None:
+        self.mantissa, shift = math.frexp(self.mantissa * mantissa)
+        self.exponent += exponent + shift
+
+    def _to_floats(self) -> None:
+        if not self.floats:
+            self.mantissa, self.exponent = _int_parts(self.ints)
+            self.ints = 1
+            self.floats = True
+
+    def value(self) -> float | int:
+        if not self.floats:
+            return self.ints
+        return _ldexp(self.mantissa, self.exponent)
+
+    def add(self, record: _ProductRecord) -> None:
+        """Fold a block record in without range checks."""
+        ints, mantissa, exponent, floats = record
+        if not self.floats:
+            self.ints *= ints
+        elif ints != 1:
+            self._multiply(*_int_parts(ints))
+        if floats:
+            self._to_floats()
+            self._multiply(mantissa, exponent)
+
+    def apply(self, record: _ProductRecord) -> None:
+        """
+        Fold a block record in and range-check the running product.
+
+        Raises:
+            OverflowError: If the product is too large
+        """
+        self.add(record)
+        _check_result_range(self.value())
+
+    def scan(self, block: Any) -> list[float | int]:
+        """
+        Return the running products after each value of a block.
+
+        Raises:
+            OverflowError: If a running product is too large
+        """
+        if not self.floats and not _has_float(block):
+            results = list(accumulate(block, operator.mul, initial=self.ints))[1:]
+            self.ints = results[-1]
+            _check_values(results)
+            return results
+        if _all_floats(block):
+            self._to_floats()
+            # The plain running products of the block equal the mantissa fold as
+            # long as none of them leaves the normal range
+            prefixes = list(accumulate(block, operator.mul))
+            if (math.isfinite(prefixes[-1]) and _SAFE_LOW < min(map(abs, prefixes))
+                    and max(map(abs, prefixes)) < _SAFE_HIGH):
+                try:
+                    results = list(map(math.ldexp, map(operator.mul, repeat(self.mantissa), prefixes),
+                                       repeat(self.exponent)))
+                except OverflowError:
+                    pass
+                else:
+                    self._multiply(*math.frexp(prefixes[-1]))
+                    _check_values(results)
+                    return results
+        # Each result is this product times the record of the block so far,
+        # as in the fast path, so that the carry is the same as from add()
+        prefix = _RunningProduct()
+        results = []
+        for value in block:
+            if not prefix.floats and not isinstance(value, float):
+                prefix.ints *= value
+            else:
+                prefix.floats = True
+                prefix._multiply(*math.frexp(float(value)))
+            running = replace(self)
+            running.add((prefix.ints, prefix.mantissa, prefix.exponent, prefix.floats))
+            results.append(running.value())
+        self.add((prefix.ints, prefix.mantissa, prefix.exponent, prefix.floats))
+        _check_values(results)
+        return results
+
+
+def sum(values: Any) -> float | int:
+    """
+    Sum numbers exactly and round once.
+
+    Args:
+        values: Iterable of numbers, array.array, memoryview or NumPy array
+
+    Returns:
+        The correctly rounded sum (an exact int if all values are ints)
+
+    Raises:
+        TypeError: If a value is not a number
+        OverflowError: If the running total is too large at the end of a
+            block, or a value is infinite
+    """
+    state = _ExactSum()
+    for record in _sum_records(_blocks(values)):
+        state.apply(record)
+    return state.value()
+
+
+def product(values: Any) -> float | int:
+    """
+    Multiply numbers block by block.
+
+    Args:
+        values: Iterable of numbers, array.array, memoryview or NumPy array
+
+    Returns:
+        The product (an exact int if all values are ints)
+
+    Raises:
+        TypeError: If a value is not a number
+        OverflowError: If the running product is too large at the end of a block
+    """
+    state = _RunningProduct()
+    for block in _blocks(values):
+        state.apply(_product_record(block))
+    return state.value()
+
+
+def cumsum(values: Any) -> Iterator[float | int]:
+    """
+    Yield the running sums, each exact and rounded once.
+
+    Args:
+        values: Iterable of numbers, array.array, memoryview or NumPy array
+
+    Yields:
+        The sum of the values so far
+
+    Raises:
+        TypeError: If a value is not a number
+        OverflowError: If a running sum is too large
+    """
+    state = _ExactSum()
+    for block in _blocks(values):
+        yield from state.scan(block)
+
+
+def cumprod(values: Any) -> Iterator[float | int]:
+    """
+    Yield the running products.
+
+    Args:
+        values: Iterable of numbers, array.array, memoryview or NumPy array
+
+    Yields:
+        The product of the values so far
+
+    Raises:
+        TypeError: If a value is not a number
+        OverflowError: If a running product is too large
+    """
+    state = _RunningProduct()
+    for block in _blocks(values):
+        yield from state.scan(block)
+
+
+REDUCTIONS: dict[str, Callable[[Any], float | int]] = {'sum': sum, 'product': product}
+SCANS: dict[str, Callable[[Any], Iterator[float | int]]] = {'cumsum': cumsum, 'cumprod': cumprod}
+
+
+def text_values(lines: Iterable[str]) -> Iterator[float]:
+    """
+    Parse one number per line with float(), skipping blank lines.
+
+    Raises:
+        ValueError: If a line is not a number
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line or line.isspace():
+            continue
+        try:
+            yield float(line)
+        except ValueError:
+            raise ValueError(f"line {line_number}: Invalid number format") from None
+
+
+def column_layout(path: str, dtype: str = 'f64') -> tuple[str, int, int]:
+    """
+    Describe a packed column of little-endian values (raw or .npy).
+
+    Args:
+        path: The file
+        dtype: 'f64' or 'i64' for raw files (ignored for .npy)
+
+    Returns:
+        (array typecode, data offset, number of values)
+
+    Raises:
+        ValueError: If the dtype or file layout is invalid
+    """
+    size = os.path.getsize(path)
+    if _is_npy(path):
+        with open(path, "rb") as f:
+            head = f.read(min(size, 1 << 16))
+        typecode, shape, offset = read_npy_header(head)
+        count = math.prod(shape)
+    else:
+        try:
+            typecode = DTYPES[dtype]
+        except KeyError:
+            raise ValueError(f"Unknown dtype '{dtype}'. Supported dtypes: {', '.join(DTYPES)}") from None
+        if size % 8:
+            raise ValueError(f"Input size {size} is not a whole number of 8-byte values")
+        offset, count = 0, size // 8
+    if size < offset + count * 8:
+        raise ValueError("Input file is truncated")
+    return typecode, offset, count
+
+
+def _file_blocks(path: str, typecode: str, offset: int, start: int, stop: int) -> Iterator[array]:
+    """Read values [start, stop) of a packed column one block at a time."""
+    with open(path, "rb") as f:
+        f.seek(offset + start * 8)
+        for first in range(start, stop, BLOCK_SIZE):
+            block = array(typecode)
+            block.frombytes(f.read(min(BLOCK_SIZE, stop - first) * 8))
+            if not _NATIVE_LITTLE_ENDIAN:
+                block.byteswap()
+            yield block
+
+
+def _block_ranges(count: int, workers: int) -> list[tuple[int, int]]:
+    """Split [0, count) into at most workers ranges that start on block boundaries."""
+    blocks = -(-count // BLOCK_SIZE)
+    return [(start * BLOCK_SIZE, min(stop * BLOCK_SIZE, count))
+            for start, stop in split_range(blocks, max(workers, 1))]
+
+
+def _sum_shard(path: str, typecode: str, offset: int, start: int, stop: int) -> list[_SumRecord]:
+    return list(_sum_records(_file_blocks(path, typecode, offset, start, stop)))
+
+
+def _product_shard(path: str, typecode: str, offset: int, start: int, stop: int) -> list[_ProductRecord]:
+    return list(map(_product_record, _file_blocks(path, typecode, offset, start, stop)))
+
+
+def _run_shards(func: Callable[..., Any], ranges: list[tuple[int, int]], *args: Any) -> list[Any]:
+    """Run func(*args, start, stop) for every range, on worker processes if there are several."""
+    if len(ranges) <= 1:
+        return [func(*args, start, stop) for start, stop in ranges]
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(func, *args, start, stop) for start, stop in ranges]
+        return [future.result() for future in futures]
+
+
+def reduce_file(operation: str, path: str, dtype: str = 'f64', workers: int = 1) -> float | int:
+    """
+    Sum or multiply a packed column file, optionally on several processes.
+
+    The result does not depend on the number of workers.
+
+    Args:
+        operation: 'sum' or 'product'
+        path: Packed little-endian values (raw float64/int64 or .npy)
+        dtype: 'f64' or 'i64' for raw files (ignored for .npy)
+        workers: Number of worker processes
+
+    Returns:
+        The reduction of all values
+
+    Raises:
+        ValueError: If the operation, dtype or file layout is invalid
+        OverflowError: As for sum() and product()
+    """
+    if operation not in REDUCTIONS:
+        raise ValueError(f"Unknown reduction '{operation}'. Supported reductions: {', '.join(REDUCTIONS)}")
+    typecode, offset, count = column_layout(path, dtype)
+    ranges = _block_ranges(count, workers)
+    if operation == 'product':
+        product_state = _RunningProduct()
+        if len(ranges) <= 1:
+            products: Iterable[_ProductRecord] = map(_product_record, _file_blocks(path, typecode, offset, 0, count))
+        else:
+            products = chain.from_iterable(_run_shards(_product_shard, ranges, path, typecode, offset))
+        for product_record in products:
+            product_state.apply(product_record)
+        return product_state.value()
+    state = _ExactSum()
+    if len(ranges) <= 1:
+        records: Iterable[_SumRecord] = _sum_records(_file_blocks(path, typecode, offset, 0, count))
+    else:
+        records = chain.from_iterable(_run_shards(_sum_shard, ranges, path, typecode, offset))
+    for record in records:
+        state.apply(record)
+    return state.value()
+
+
+def _write_values(f: Any, values: list[float | int], typecode: str) -> None:
+    try:
+        packed = array(typecode, values)
+    except OverflowError:
+        raise OverflowError("Result does not fit in the int64 output format") from None
+    if not _NATIVE_LITTLE_ENDIAN:
+        packed.byteswap()
+    f.write(packed)
+
+
+def _scan_shard(
+    path: str,
+    typecode: str,
+    offset: int,
+    out_path: str,
+    out_offset: int,
+    carry: Any,
+    start: int,
+    stop: int,
+) -> int:
+    """Write the running sums or products of values [start, stop), continuing from carry."""
+    with open(out_path, "r+b") as out:
+        out.seek(out_offset + start * 8)
+        for block in _file_blocks(path, typecode, offset, start, stop):
+            _write_values(out, carry.scan(block), typecode)
+    return stop - start
+
+
+def scan_file(operation: str, in_path: str, out_path: str, dtype: str = 'f64', workers: int = 1) -> int:
+    """
+    Write the running sums or products of a packed column file.
+
+    With several workers, a first pass computes the carry into each shard
+    from per-block summaries, and a second pass writes every shard from
+    its carry. The output is identical for any number of workers.
+
+    Args:
+        operation: 'cumsum' or 'cumprod'
+        in_path: Packed little-endian values (raw float64/int64 or .npy)
+        out_path: Result file, same element type (written as .npy if the
+            name ends in .npy)
+        dtype: 'f64' or 'i64' for raw input files (ignored for .npy)
+        workers: Number of worker processes
+
+    Returns:
+        The number of values written
+
+    Raises:
+        ValueError: If the operation, dtype or file layout is invalid
+        OverflowError: If a running value is too large
+    """
+    if operation not in SCANS:
+        raise ValueError(f"Unknown scan '{operation}'. Supported scans: {', '.join(SCANS)}")
+    typecode, offset, count = column_layout(in_path, dtype)
+    header = npy_header(typecode, (count,)) if _is_npy(out_path) else b""
+    with open(out_path, "wb") as outfile:
+        outfile.write(header)
+        outfile.truncate(len(header) + count * 8)
+    ranges = _block_ranges(count, workers)
+    state: _ExactSum | _RunningProduct = _ExactSum() if operation == 'cumsum' else _RunningProduct()
+    shard = _sum_shard if operation == 'cumsum' else _product_shard
+    carries: list[Any] = []
+    summaries = _run_shards(shard, ranges[:-1], in_path, typecode, offset) if len(ranges) > 1 else []
+    for records in summaries:
+        carries.append(replace(state))
+        for record in records:
+            # An overflow is raised by the shard holding the block when it is written
+            state.add(record)
+    carries.append(state)
+    if len(ranges) <= 1:
+        for start, stop in ranges:
+            _scan_shard(in_path, typecode, offset, out_path, len(header), carries[0], start, stop)
+        return count
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [
+            pool.submit(_scan_shard, in_path, typecode, offset, out_path, len(header), carry, start, stop)
+            for carry, (start, stop) in zip(carries, ranges)
+        ]
+        for future in futures:
+            future.result()
+    return count
+
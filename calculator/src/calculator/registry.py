@@ -0,0 +1,227 @@
+"""Table-driven registry of calculator operations.
+
+Every entry point (the CLI, streaming, batch files, the server, expression
+graphs) resolves operation names here instead of hard-coding them:
+
+    op = lookup("mul")
+    op.scalar(3, 4)                # 12
+    op.batch([1, 2], [3, 4])       # array('q', [3, 8])
+
+Names and aliases share one dict, so a lookup is a single hash probe no
+matter how many operations are registered. Extra operations can be added
+at runtime with register().
+
+Modules that call a built-in operation by a plain name export that name
+with export(): calculator.add and friends, the calculator.batch
+functions, compiled expressions and the awaitable functions of
+calculator.aio. replace_kernels() rebinds every exported name, so kernels
+swapped in by calculator.metrics or calculator.audit apply to direct
+calls as well as to calls through the registry.
+"""
+
+import sys
+from dataclasses import dataclass, replace as _replace
+from functools import partial
+from typing import Any, Callable
+
+from . import add, subtract, multiply, divide
+from . import batch as _batch
+
+
+@dataclass(frozen=True, slots=True)
+class Operation:
+    """A registered operation and its kernels."""
+
+    name: str
+    scalar: Callable[..., Any]
+    batch: Callable[..., Any] | None
+    arity: int = 2
+    symbol: str | None = None
+    aliases: tuple[str, ...] = ()
+    description: str = ""
+    float_result: bool = False
+
+
+# Name or alias -> operation; the canonical names come first, in registration order
+_LOOKUP: dict[str, Operation] = {}
+_OPERATIONS: dict[str, Operation] = {}
+
+# Operation name -> (namespace, key, 'scalar' or 'batch') bindings kept equal
+# to its current kernels; see export()
+_EXPORTS: dict[str, list[tuple[dict[str, Any], str, str]]] = {}
+
+# The built-in operations with the kernels they were defined with
+_BUILTINS: dict[str, Operation] = {}
+
+
+def _map_batch(scalar: Callable[..., Any]) -> Callable[..., Any]:
+    """Build a batch kernel for a binary operation registered without one."""
+    def kernel(xs: Any, ys: Any, *, policy: str | None = None) -> Any:
+        if len(xs) != len(ys):
+            raise ValueError(f"Operand lengths differ: {len(xs)} != {len(ys)}")
+        func = scalar if policy is None else partial(scalar, policy=policy)
+        return _batch._pack(list(map(func, xs, ys)))
+    return kernel
+
+
+def register(
+    name: str,
+    scalar: Callable[..., Any],
+    batch: Callable[..., Any] | None = None,
+    *,
+    arity: int = 2,
+    symbol: str | None = None,
+    aliases: tuple[str, ...] = (),
+    description: str = "",
+    float_result: bool = False,
+    replace: bool = False,
+) -> Operation:
+    """
+    Register an operation under a name and optional aliases.
+
+    Binary operations registered without a batch kernel get one that maps
+    the scalar function over the operand pairs, passing a policy given to
+    the batch on to every call.
+
+    Args:
+        name: Canonical operation name (matched case-insensitively)
+        scalar: Function computing one result
+        batch: Function computing results for two operand sequences
+        arity: Number of operands
+        symbol: Infix symbol, e.g. '+'
+        aliases: Alternative names
+        description: One-line description for the help output
+        float_result: True if results are always floats (e.g. divide)
+        replace: Allow replacing an existing operation of the same name
+
+    Returns:
+        The registered operation
+
+    Raises:
+        ValueError: If the name or an alias is already taken
+    """
+    if batch is None and arity == 2:
+        batch = _map_batch(scalar)
+    op = Operation(name.lower(), scalar, batch, arity, symbol,
+                   tuple(alias.lower() for alias in aliases), description, float_result)
+    keys = (op.name, *op.aliases)
+    previous = _OPERATIONS.get(op.name)
+    for key in keys:
+        taken = _LOOKUP.get(key)
+        if taken is not None and not (replace and taken is previous):
+            raise ValueError(f"Operation name '{key}' is already registered")
+    if previous is not None:
+        unregister(previous.name)
+    _OPERATIONS[op.name] = op
+    for key in keys:
+        _LOOKUP[key] = op
+    return op
+
+
+def unregister(name: str) -> None:
+    """
+    Remove an operation and its aliases.
+
+    Raises:
+        ValueError: If the operation is unknown
+    """
+    op = lookup(name)
+    del _OPERATIONS[op.name]
+    for key in (op.name, *op.aliases):
+        del _LOOKUP[key]
+
+
+def replace_kernels(
+    name: str,
+    scalar: Callable[..., Any],
+    batch: Callable[..., Any] | None,
+) -> Operation:
+    """
+    Swap the kernels of a registered operation in place.
+
+    Unlike register(replace=True), the operation keeps its position, aliases
+    and metadata.
+
+    Returns:
+        The updated operation
+
+    Raises:
+        ValueError: If the operation is unknown
+    """
+    op = _replace(lookup(name), scalar=scalar, batch=batch)
+    _OPERATIONS[op.name] = op
+    for key in (op.name, *op.aliases):
+        _LOOKUP[key] = op
+    for namespace, key, kind in _EXPORTS.get(op.name, ()):
+        namespace[key] = getattr(op, kind)
+    return op
+
+
+def export(name: str, namespace: dict[str, Any], key: str, kind: str = 'scalar') -> None:
+    """
+    Bind namespace[key] to an operation's kernel and keep it in step with replace_kernels().
+
+    Args:
+        name: Name or alias of a registered operation
+        namespace: Module globals (or any dict) the kernel is called from
+        key: Name the kernel is bound to there
+        kind: 'scalar' or 'batch'
+
+    Raises:
+        ValueError: If the operation is unknown
+    """
+    op = lookup(name)
+    _EXPORTS.setdefault(op.name, []).append((namespace, key, kind))
+    namespace[key] = getattr(op, kind)
+
+
+def builtin(name: str) -> Operation | None:
+    """Return a built-in operation with the kernels it was defined with, or None."""
+    return _BUILTINS.get(name)
+
+
+def get(name: str) -> Operation | None:
+    """Return the operation registered under a name or alias, or None."""
+    op = _LOOKUP.get(name)
+    return op if op is not None else _LOOKUP.get(name.lower())
+
+
+def lookup(name: str) -> Operation:
+    """
+    Return the operation registered under a name or alias.
+
+    Raises:
+        ValueError: If the operation is unknown
+    """
+    op = _LOOKUP.get(name)
+    if op is None:
+        op = _LOOKUP.get(name.lower())
+    if op is None:
+        raise ValueError(f"Unknown operation '{name.lower()}'. Supported operations: {supported()}")
+    return op
+
+
+def operations() -> tuple[Operation, ...]:
+    """Return the registered operations in registration order."""
+    return tuple(_OPERATIONS.values())
+
+
+def supported() -> str:
+    """Return the comma-separated canonical operation names."""
+    return ", ".join(_OPERATIONS)
+
+
+register('add', add, _batch.add, symbol='+', aliases=('+', 'plus'),
+         description="Addition (num1 + num2)")
+register('subtract', subtract, _batch.subtract, symbol='-', aliases=('-', 'sub', 'minus'),
+         description="Subtraction (num1 - num2)")
+register('multiply', multiply, _batch.multiply, symbol='*', aliases=('*', 'mul', 'times'),
+         description="Multiplication (num1 * num2)")
+register('divide', divide, _batch.divide, symbol='/', aliases=('/', 'div'),
+         description="Division (num1 / num2)", float_result=True)
+
+_package = vars(sys.modules[__package__])
+for _op in operations():
+    _BUILTINS[_op.name] = _op
+    export(_op.name, _package, _op.name)
+    export(_op.name, vars(_batch), _op.name, 'batch')
@@ -0,0 +1,357 @@
+"""asyncio calculation server over a Unix domain socket.
+
+Two wire protocols are accepted, chosen by the first byte a client sends:
+
+* JSON lines: each line is an object such as
+  ``{"id": 1, "op": "add", "a": 2, "b": 3}`` and is answered with
+  ``{"id": 1, "result": 5}`` or ``{"id": 1, "error": {"type": ..., "message": ...}}``.
+  When ``a`` and ``b`` are lists the request is evaluated as one batch and
+  answered with ``"results"``. ``{"id": 1, "command": "metrics"}`` is
+  answered with ``{"id": 1, "metrics": ...}`` holding the Prometheus text
+  of calculator.metrics. NaN and Infinity are not JSON: they are refused
+  as operands, and a non-finite result is answered with an error. A line
+  longer than MAX_LINE_SIZE bytes is answered with an error and the
+  connection is closed.
+* Binary frames: a 4-byte big-endian payload length followed by any number
+  of 17-byte records ``<B d d`` (opcode, num1, num2). Each frame is answered
+  with a frame of 9-byte records ``<B d`` (status, result), one per request
+  record, in order.
+
+Requests may be pipelined; each connection is answered in request order.
+"""
+
+import asyncio
+import json
+import signal
+import struct
+from typing import Any, Callable
+
+from . import audit
+from . import metrics
+from . import registry
+from .masked import (
+    STATUS_INVALID,
+    STATUS_OK,
+    STATUS_OVERFLOW,
+    STATUS_TYPE,
+    STATUS_ZERO_DIVISION,
+    status_of,
+)
+
+
+DEFAULT_MAX_CONNECTIONS = 128
+DEFAULT_SHUTDOWN_TIMEOUT = 5.0
+DEFAULT_METRICS_INTERVAL = 15.0
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+MAX_LINE_SIZE = 16 * 1024 * 1024
+
+FRAME_HEADER = struct.Struct(">I")
+REQUEST_RECORD = struct.Struct("<Bdd")
+RESPONSE_RECORD = struct.Struct("<Bd")
+
+# Binary opcode -> registered operation name; kernels are resolved once per frame
+OPCODES: dict[int, str] = {
+    1: 'add',
+    2: 'subtract',
+    3: 'multiply',
+    4: 'divide',
+}
+
+
+def encode_request(records: list[tuple[int, float, float]]) -> bytes:
+    """
+    Encode (opcode, num1, num2) records as one binary request frame.
+
+    Args:
+        records: The records to send
+
+    Returns:
+        The framed request bytes
+    """
+    payload = b"".join(REQUEST_RECORD.pack(*record) for record in records)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def decode_response(payload: bytes) -> list[tuple[int, float]]:
+    """
+    Decode the payload of a binary response frame.
+
+    Args:
+        payload: Frame payload without the length header
+
+    Returns:
+        A list of (status, result) tuples
+    """
+    return list(RESPONSE_RECORD.iter_unpack(payload))
+
+
+def _error_object(error: Exception) -> dict[str, str]:
+    """Describe an exception for a JSON response."""
+    return {"type": type(error).__name__, "message": str(error)}
+
+
+def _reject_constant(name: str) -> None:
+    raise ValueError(f"{name} is not a valid JSON number")
+
+
+def _encode(response: dict[str, Any]) -> bytes:
+    """Encode a response line, answering non-finite results with an error."""
+    try:
+        return json.dumps(response, allow_nan=False).encode() + b"\n"
+    except ValueError:
+        error = ValueError("Result is not a finite number, which JSON cannot represent")
+        return json.dumps({"id": response["id"], "error": _error_object(error)}).encode() + b"\n"
+
+
+def handle_binary_payload(payload: bytes) -> bytes:
+    """
+    Evaluate every record of a binary request payload.
+
+    Args:
+        payload: Concatenated request records
+
+    Returns:
+        The framed response
+    """
+    if len(payload) % REQUEST_RECORD.size:
+        response = RESPONSE_RECORD.pack(STATUS_INVALID, 0.0)
+        return FRAME_HEADER.pack(len(response)) + response
+    out = bytearray()
+    pack = RESPONSE_RECORD.pack
+    kernels: dict[int, Callable[[float, float], float | int]] = {
+        opcode: registry.lookup(name).scalar for opcode, name in OPCODES.items()
+    }
+    for opcode, num1, num2 in REQUEST_RECORD.iter_unpack(payload):
+        func = kernels.get(opcode)
+        if func is None:
+            out += pack(STATUS_INVALID, 0.0)
+            continue
+        try:
+            out += pack(STATUS_OK, func(num1, num2))
+        except (ZeroDivisionError, OverflowError, TypeError) as e:
+            out += pack(status_of(e), 0.0)
+    return FRAME_HEADER.pack(len(out)) + bytes(out)
+
+
+def handle_json_request(line: bytes) -> bytes:
+    """
+    Evaluate one JSON-lines request.
+
+    Args:
+        line: The request line
+
+    Returns:
+        The encoded response line
+    """
+    request_id = None
+    try:
+        request = json.loads(line, parse_constant=_reject_constant)
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object")
+        request_id = request.get("id")
+        if request.get("command") == "metrics":
+            return _encode({"id": request_id, "metrics": metrics.render()})
+        op = registry.lookup(str(request.get("op", "")))
+        num1, num2 = request.get("a"), request.get("b")
+        if isinstance(num1, list) and isinstance(num2, list):
+            if op.batch is None:
+                raise ValueError(f"Operation '{op.name}' has no batch form")
+            response = {"id": request_id, "results": list(op.batch(num1, num2))}
+        else:
+            response = {"id": request_id, "result": op.scalar(num1, num2)}
+    except Exception as e:
+        response = {"id": request_id, "error": _error_object(e)}
+    return _encode(response)
+
+
+class CalculatorServer:
+    """Serve calculator requests on a Unix domain socket."""
+
+    def __init__(
+        self,
+        path: str,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        shutdown_timeout: float = DEFAULT_SHUTDOWN_TIMEOUT,
+    ) -> None:
+        self.path = path
+        self.max_connections = max_connections
+        self.shutdown_timeout = shutdown_timeout
+        self._server: asyncio.Server | None = None
+        # Connection handler task -> True while it waits for more input
+        self._handlers: dict[asyncio.Task[None], bool] = {}
+        self._closing = False
+
+    @property
+    def connection_count(self) -> int:
+        """Number of connections currently being served."""
+        return len(self._handlers)
+
+    async def start(self) -> None:
+        """Start listening on the socket path."""
+        self._server = await asyncio.start_unix_server(self._accept, path=self.path)
+
+    async def close(self) -> None:
+        """
+        Shut down gracefully.
+
+        New connections are refused at once. Idle connections are closed;
+        connections with requests in flight get shutdown_timeout seconds to
+        send their responses before they are cancelled.
+        """
+        if self._closing:
+            return
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+        for task, idle in list(self._handlers.items()):
+            if idle:
+                task.cancel()
+        if self._handlers:
+            tasks = set(self._handlers)
+            _, pending = await asyncio.wait(tasks, timeout=self.shutdown_timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self._closing or len(self._handlers) >= self.max_connections:
+            writer.close()
+            return
+        task = asyncio.current_task()
+        assert task is not None
+        self._handlers[task] = True
+        try:
+            await self._serve_connection(task, reader, writer)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            del self._handlers[task]
+            writer.close()
+
+    async def _serve_connection(
+        self,
+        task: asyncio.Task[None],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """
+        Answer pipelined requests until the client disconnects.
+
+        Everything that has arrived is answered with a single write, so
+        pipelined requests are batched; waiting on drain() before reading
+        again applies backpressure to clients that stop reading.
+        """
+        buffer = bytearray()
+        handle = None
+        while not self._closing:
+            self._handlers[task] = True
+            data = await reader.read(65536)
+            if not data:
+                break
+            self._handlers[task] = False
+            buffer += data
+            if handle is None:
+                handle = self._handle_json if buffer[:1] == b"{" else self._handle_binary
+            response, close = handle(buffer)
+            if response:
+                writer.write(response)
+                await writer.drain()
+            if close:
+                break
+
+    @staticmethod
+    def _handle_json(buffer: bytearray) -> tuple[bytes, bool]:
+        """Answer and consume every complete line in the buffer; close after an overlong line."""
+        end = buffer.rfind(b"\n") + 1
+        lines = bytes(buffer[:end]).splitlines()
+        del buffer[:end]
+        response = b"".join(handle_json_request(line) for line in lines if line.strip())
+        if len(buffer) <= MAX_LINE_SIZE:
+            return response, False
+        error = ValueError(f"Request line is longer than {MAX_LINE_SIZE} bytes")
+        buffer.clear()
+        return response + _encode({"id": None, "error": _error_object(error)}), True
+
+    @staticmethod
+    def _handle_binary(buffer: bytearray) -> tuple[bytes, bool]:
+        """Answer and consume every complete frame in the buffer; close at a bad frame."""
+        responses = []
+        offset = 0
+        while len(buffer) - offset >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(buffer, offset)
+            if length > MAX_FRAME_SIZE:
+                return b"".join(responses), True
+            end = offset + FRAME_HEADER.size + length
+            if end > len(buffer):
+                break
+            responses.append(handle_binary_payload(bytes(buffer[offset + FRAME_HEADER.size:end])))
+            offset = end
+        del buffer[:offset]
+        return b"".join(responses), False
+
+
+async def _write_metrics(path: str, interval: float) -> None:
+    """Rewrite the metrics file every interval seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        metrics.write(path)
+
+
+async def serve(
+    path: str,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    metrics_path: str | None = None,
+    metrics_interval: float = DEFAULT_METRICS_INTERVAL,
+    audit_directory: str | None = None,
+) -> None:
+    """
+    Run a server until SIGINT or SIGTERM, then shut down gracefully.
+
+    Args:
+        path: Filesystem path of the Unix domain socket
+        max_connections: Maximum number of simultaneous connections
+        metrics_path: If set, enable calculator.metrics and write the
+            Prometheus text to this file periodically and on shutdown
+        metrics_interval: Seconds between metrics file writes
+        audit_directory: If set, record every calculation with
+            calculator.audit in this directory until shutdown
+    """
+    server = CalculatorServer(path, max_connections=max_connections)
+    writer = None
+    metering = auditing = False
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    handled: list[int] = []
+    try:
+        # Everything is recording before the first connection is accepted
+        if metrics_path is not None:
+            metrics.enable()
+            metering = True
+            metrics.write(metrics_path)
+            writer = asyncio.create_task(_write_metrics(metrics_path, metrics_interval))
+        if audit_directory is not None:
+            audit.enable(audit_directory)
+            auditing = True
+        await server.start()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+            handled.append(signum)
+        await stop.wait()
+    finally:
+        for signum in handled:
+            loop.remove_signal_handler(signum)
+        await server.close()
+        if writer is not None:
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+        # Unwrap in the reverse order of wrapping
+        if auditing:
+            audit.disable()
+        if metering:
+            try:
+                if writer is not None:
+                    metrics.write(metrics_path)
+            finally:
+                metrics.disable()
@@ -0,0 +1,294 @@
+"""Spreadsheet-style cells with incremental recalculation.
+
+Cells hold numbers or formulas over other cells, written in the
+calculator.expr language:
+
+    s = Sheet({"price": 9.5, "qty": 3, "total": "price * qty"})
+    s["qty"] = 4                  # recomputes 'total' only
+    s["total"]                    # 38.0
+    s.update({"price": 10, "qty": 5})
+    s.values(["price", "total"])  # [10, 50]
+
+The sheet keeps a graph of which cells each formula reads. Changing a
+cell recomputes just the formulas that depend on it, each once, in
+dependency order; everything else keeps its value. Results are always up
+to date, so reading is a dictionary lookup.
+
+Formulas are evaluated with the calculator operations, so overflow and
+division by zero behave as they do eagerly. A formula that fails stores
+its exception; reading the cell, or any cell that depends on it, raises
+that exception.
+"""
+
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+
+from . import _validate_number
+from .expr import CompiledExpression, ExpressionError, compile_expression
+
+
+_EVALUATION_ERRORS = (ExpressionError, TypeError, ZeroDivisionError, OverflowError)
+
+_MISSING = object()
+
+
+class CycleError(ValueError):
+    """Raised when a formula would make a cell depend on itself."""
+
+
+def _check_name(name: object) -> None:
+    """
+    Validate a cell name.
+
+    Raises:
+        ValueError: If the name is not an identifier
+    """
+    if not isinstance(name, str) or not name.isidentifier():
+        raise ValueError(f"Invalid cell name {name!r}")
+
+
+class Sheet:
+    """Named cells holding numbers or formulas, recalculated incrementally."""
+
+    def __init__(self, cells: Mapping[str, Any] | None = None) -> None:
+        """
+        Create a sheet.
+
+        Args:
+            cells: Initial cells, as for update()
+        """
+        self._sources: dict[str, Any] = {}
+        self._formulas: dict[str, CompiledExpression] = {}
+        self._dependents: dict[str, set[str]] = {}
+        self._values: dict[str, Any] = {}
+        self._errors: dict[str, Exception] = {}
+        self.last_recalculated: tuple[str, ...] = ()
+        if cells:
+            self.update(cells)
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sources)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._sources
+
+    def __getitem__(self, name: str) -> float | int:
+        return self.get(name)
+
+    def __setitem__(self, name: str, content: Any) -> None:
+        self.set(name, content)
+
+    def __delitem__(self, name: str) -> None:
+        self.remove(name)
+
+    def get(self, name: str) -> float | int:
+        """
+        Return the current value of a cell.
+
+        Raises:
+            KeyError: If the cell does not exist
+            ExpressionError, TypeError, ZeroDivisionError, OverflowError:
+                The error of the cell's formula, or of a cell it depends on
+        """
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        error = self._errors.get(name)
+        if error is not None:
+            raise error.with_traceback(None)
+        raise KeyError(f"Undefined cell '{name}'")
+
+    def values(self, names: Sequence[str]) -> list[float | int]:
+        """
+        Return the values of many cells with one C-level lookup pass.
+
+        Raises:
+            KeyError, ExpressionError, TypeError, ZeroDivisionError,
+            OverflowError: As for get(), for the first cell without a value
+        """
+        try:
+            return list(map(self._values.__getitem__, names))
+        except KeyError:
+            for name in names:
+                self.get(name)
+            raise
+
+    def formula(self, name: str) -> str | None:
+        """Return the formula text of a cell, or None if it holds a number."""
+        source = self._sources[name]
+        return source if isinstance(source, str) else None
+
+    def dependents(self, name: str) -> tuple[str, ...]:
+        """Return the cells whose formulas read a cell directly."""
+        return tuple(sorted(self._dependents.get(name, ())))
+
+    def precedents(self, name: str) -> tuple[str, ...]:
+        """Return the cells a cell's formula reads directly."""
+        formula = self._formulas.get(name)
+        return formula.variables if formula is not None else ()
+
+    def set(self, name: str, content: Any) -> None:
+        """
+        Set one cell to a number or a formula and recalculate its dependents.
+
+        Args:
+            name: Cell name (an identifier)
+            content: An int or float, or formula text such as 'a * (b + 1)'
+
+        Raises:
+            ValueError: If the name is invalid
+            ExpressionError: If the formula is malformed
+            CycleError: If the formula would make the cell depend on itself
+            TypeError: If the content is neither a number nor a string
+        """
+        self.update({name: content})
+
+    def update(self, cells: Mapping[str, Any]) -> None:
+        """
+        Set many cells at once, then recalculate every affected formula once.
+
+        The update is all or nothing: if any cell is invalid, the sheet is
+        left unchanged.
+
+        Args:
+            cells: Mapping of cell names to numbers or formula text
+
+        Raises:
+            ValueError, ExpressionError, CycleError, TypeError: As for set()
+        """
+        saved = [
+            (name, self._sources.get(name, _MISSING), self._values.get(name, _MISSING), self._errors.get(name))
+            for name in cells
+        ]
+        try:
+            for name, content in cells.items():
+                self._install(name, content)
+        except Exception:
+            # Clear every touched cell first so that restoring one cannot
+            # see another's new formula
+            for name, *_ in saved:
+                self._uninstall(name)
+            for name, source, value, error in saved:
+                if source is _MISSING:
+                    continue
+                self._install(name, source)
+                if value is not _MISSING:
+                    self._values[name] = value
+                if error is not None:
+                    self._errors[name] = error
+            raise
+        self._recalculate(cells)
+
+    def remove(self, name: str) -> None:
+        """
+        Delete a cell; formulas that read it fail until it is defined again.
+
+        Raises:
+            KeyError: If the cell does not exist
+        """
+        if name not in self._sources:
+            raise KeyError(f"Undefined cell '{name}'")
+        self._uninstall(name)
+        self._recalculate((name,))
+
+    def _install(self, name: str, content: Any) -> None:
+        """Store a cell's content and dependency edges without recalculating."""
+        _check_name(name)
+        if isinstance(content, str):
+            formula = compile_expression(content)
+            path = self._cycle(name, formula.variables)
+            if path is not None:
+                raise CycleError(f"Cell '{name}' would depend on itself: {' -> '.join(path)}")
+        else:
+            _validate_number(content)
+            formula = None
+        self._unlink(name)
+        self._sources[name] = content
+        if formula is None:
+            self._values[name] = content
+            self._errors.pop(name, None)
+            return
+        self._formulas[name] = formula
+        for precedent in formula.variables:
+            self._dependents.setdefault(precedent, set()).add(name)
+
+    def _uninstall(self, name: str) -> None:
+        """Drop a cell's content, value and outgoing edges."""
+        self._unlink(name)
+        self._sources.pop(name, None)
+        self._values.pop(name, None)
+        self._errors.pop(name, None)
+
+    def _unlink(self, name: str) -> None:
+        """Remove the dependency edges of a cell's current formula."""
+        formula = self._formulas.pop(name, None)
+        if formula is None:
+            return
+        for precedent in formula.variables:
+            dependents = self._dependents.get(precedent)
+            if dependents is not None:
+                dependents.discard(name)
+                if not dependents:
+                    del self._dependents[precedent]
+
+    def _cycle(self, name: str, precedents: Iterable[str]) -> list[str] | None:
+        """Return the path by which name would reach itself through precedents, or None."""
+        stack = [(precedent, [name, precedent]) for precedent in precedents]
+        seen: set[str] = set()
+        while stack:
+            cell, path = stack.pop()
+            if cell == name:
+                return path
+            if cell in seen:
+                continue
+            seen.add(cell)
+            formula = self._formulas.get(cell)
+            if formula is not None:
+                stack.extend((precedent, path + [precedent]) for precedent in formula.variables)
+        return None
+
+    def _recalculate(self, changed: Iterable[str]) -> None:
+        """Recompute the changed formulas and everything downstream, in dependency order."""
+        dirty = {name for name in changed if name in self._formulas}
+        stack = list(changed)
+        while stack:
+            for dependent in self._dependents.get(stack.pop(), ()):
+                if dependent not in dirty:
+                    dirty.add(dependent)
+                    stack.append(dependent)
+        waiting = {name: len(dirty.intersection(self._formulas[name].variables)) for name in dirty}
+        ready = [name for name, count in waiting.items() if not count]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            self._compute(name)
+            for dependent in self._dependents.get(name, ()):
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    ready.append(dependent)
+        self.last_recalculated = tuple(order)
+
+    def _compute(self, name: str) -> None:
+        """Evaluate one formula from the current values of its precedents."""
+        formula = self._formulas[name]
+        errors = self._errors
+        if errors:
+            for precedent in formula.variables:
+                error = errors.get(precedent)
+                if error is not None:
+                    self._values.pop(name, None)
+                    errors[name] = error
+                    return
+        try:
+            value = formula(self._values)
+        except _EVALUATION_ERRORS as e:
+            self._values.pop(name, None)
+            errors[name] = e
+            return
+        self._values[name] = value
+        if errors:
+            errors.pop(name, None)
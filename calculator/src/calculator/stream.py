@@ -0,0 +1,149 @@
+"""Streaming evaluation of '<operation> <num1> <num2>' records."""
+
+from dataclasses import dataclass
+from typing import IO, Iterable, Iterator
+
+from . import registry
+from .masked import status_of
+from .output import OutputFormat, ResultWriter
+
+
+DEFAULT_CHUNK_SIZE = 8192
+
+# Result placeholder of a failed record
+_FAILED = float('nan')
+
+# Bytes read per call by read_lines()
+_READ_BLOCK = 1 << 16
+
+
+@dataclass
+class StreamStats:
+    """Counters collected while processing a stream."""
+
+    records: int = 0
+    errors: int = 0
+
+
+def read_lines(f: IO[bytes], size: int | None = None) -> Iterator[bytes]:
+    """
+    Yield the lines of a binary file as text mode splits them.
+
+    Lines end at '\\n', '\\r\\n' or '\\r' (universal newlines) and keep
+    their line ending, so their lengths add up to the bytes read.
+
+    Args:
+        f: Binary file, read from its current position
+        size: Number of bytes to read (default: to the end of the file)
+
+    Yields:
+        The raw lines, the last one possibly without a line ending
+    """
+    pending = b""
+    remaining = -1 if size is None else size
+    while remaining:
+        block = f.read(_READ_BLOCK if remaining < 0 else min(_READ_BLOCK, remaining))
+        if not block:
+            break
+        if remaining > 0:
+            remaining -= len(block)
+        lines = (pending + block).splitlines(keepends=True)
+        # The last line may continue in the next block, or end in a CR whose LF does
+        pending = lines.pop() if not lines[-1].endswith(b"\n") else b""
+        yield from lines
+    if pending:
+        yield pending
+
+
+def evaluate_record(line: str) -> float | int:
+    """
+    Evaluate a single '<operation> <num1> <num2>' record.
+
+    Numbers are parsed with float(), exactly like the single-shot CLI.
+    The operation may be any name or alias in calculator.registry.
+
+    Args:
+        line: The record text
+
+    Returns:
+        The result of the operation
+
+    Raises:
+        ValueError: If the record is malformed or the operation is unknown
+        ZeroDivisionError: If dividing by zero
+        OverflowError: If the result is too large
+    """
+    fields = line.split()
+    if len(fields) != 3:
+        raise ValueError(f"Expected '<operation> <num1> <num2>', got {len(fields)} fields")
+    op = registry.lookup(fields[0])
+    if op.arity != 2:
+        raise ValueError(f"Operation '{op.name}' takes {op.arity} operands, not 2")
+    try:
+        num1 = float(fields[1])
+        num2 = float(fields[2])
+    except ValueError:
+        raise ValueError("Invalid number format") from None
+    return op.scalar(num1, num2)
+
+
+def process_stream(
+    lines: Iterable[str],
+    output: IO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    first_line: int = 1,
+    status_column: bool = False,
+    output_format: OutputFormat | None = None,
+    header: bool = True,
+) -> StreamStats:
+    """
+    Evaluate records line by line and write one result per line.
+
+    Blank lines are skipped. A bad record produces an 'error: line N: ...'
+    row in place of its result instead of aborting the stream. Output is
+    written in chunks of chunk_size rows, so memory use stays constant.
+
+    With status_column, every row is '<result>\t<status>' using the status
+    codes of calculator.masked, and a bad record produces 'nan\t<status>'.
+
+    Args:
+        lines: Iterable of record lines (e.g. an open file)
+        output: Stream to write results to (binary for binary formats)
+        chunk_size: Number of rows to buffer before each write
+        first_line: Line number of the first line (for error records)
+        status_column: Append a status code column to every row
+        output_format: How to write rows (see calculator.output); overrides
+            status_column
+        header: Write the format's header row, if it has one
+
+    Returns:
+        Counters for the processed records and errors
+    """
+    fmt = output_format if output_format is not None else OutputFormat(status=status_column)
+    writer = ResultWriter(output, fmt, header=header)
+    echo = fmt.echo
+    stats = StreamStats()
+    results: list[float | int] = []
+    inputs: list[str] = []
+    errors: dict[int, tuple[int, str]] = {}
+    for line_number, line in enumerate(lines, start=first_line):
+        if not line or line.isspace():
+            continue
+        stats.records += 1
+        try:
+            results.append(evaluate_record(line))
+        except (ValueError, TypeError, ZeroDivisionError, OverflowError) as e:
+            stats.errors += 1
+            errors[len(results)] = (status_of(e), f"line {line_number}: {e}")
+            results.append(_FAILED)
+        if echo:
+            inputs.append(line.strip())
+        if len(results) >= chunk_size:
+            writer.write_rows(results, inputs, errors)
+            results.clear()
+            inputs.clear()
+            errors.clear()
+    if results:
+        writer.write_rows(results, inputs, errors)
+    writer.flush()
+    return stats
@@ -0,0 +1,442 @@
+"""Rolling-window aggregates over streams, updated in O(1) per value.
+
+    mean = RollingMean(60)                  # the last 60 values
+    for value in values:
+        print(mean.push(value))
+
+    peak = RollingMax(duration=5.0)         # values of the last 5 seconds
+    peak.push(12.5, timestamp=time.monotonic())
+
+    for total in rolling('sum', values, 100):
+        ...
+
+A window holds either the last size values (count-based) or the values
+whose timestamps lie in (t - duration, t] for the timestamp t of the
+newest value (time-based). Timestamps must not decrease. Memory is
+bounded by the number of values in the window.
+
+Every push returns the aggregate of the window including the new value,
+in amortized O(1):
+
+* sum and mean keep the exact sum of the window as an integer over a
+  power of two, as calculator.reduce does, and round it once per result,
+  so they never drift: the sum is what math.fsum() of the window gives,
+  and the mean is the exact mean rounded once. The power of two grows to
+  fit the finest float that enters; it is reduced again once as many
+  floats have left the window as it holds.
+* product counts zeros and NaNs instead of multiplying them in (and
+  the values with a sign bit, so a zero product keeps its sign), keeps
+  the exact product of the nonzero int values, and keeps the product of
+  the nonzero float values as a mantissa and binary exponent, so leaving
+  values can be divided out even after an intermediate product would
+  have overflowed or underflowed. The float product is recomputed on the
+  same schedule as the sum.
+* min and max keep a monotonic deque: values that can never again be the
+  extreme are dropped as soon as a larger (smaller) value arrives.
+
+A NaN in the window makes every aggregate NaN until it leaves. Values
+are validated like the operations' operands; infinities are rejected
+with OverflowError, as out-of-range results are, and leave the window
+unchanged. A result out of range raises OverflowError; its value still
+enters the window.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Iterable, Iterator
+
+from . import _check_result_range, _validate_number
+
+
+class _Window(ABC):
+    """Eviction and validation shared by the rolling aggregates."""
+
+    def __init__(self, size: int | None = None, *, duration: float | None = None) -> None:
+        """
+        Create an empty window.
+
+        Args:
+            size: Number of values in a count-based window
+            duration: Length of a time-based window, in the units of the
+                timestamps passed to push()
+
+        Raises:
+            ValueError: Unless exactly one of size (a positive int) and
+                duration (a positive number) is given
+        """
+        if (size is None) == (duration is None):
+            raise ValueError("Give either a window size or a duration")
+        if size is not None and (not isinstance(size, int) or isinstance(size, bool) or size < 1):
+            raise ValueError(f"Window size must be a positive integer, got {size!r}")
+        if duration is not None and not (isinstance(duration, (int, float)) and duration > 0):
+            raise ValueError(f"Window duration must be a positive number, got {duration!r}")
+        self.size = size
+        self.duration = duration
+        self._count = 0
+        self._last: float | None = None
+
+    def push(self, value: float | int, timestamp: float | None = None) -> float | int:
+        """
+        Add a value and return the aggregate of the window.
+
+        Args:
+            value: The new value (int or float)
+            timestamp: Its time (time-based windows only)
+
+        Returns:
+            The aggregate of the values now in the window
+
+        Raises:
+            TypeError: If value is not a number
+            ValueError: If a timestamp is missing, given to a count-based
+                window, or earlier than the previous one
+            OverflowError: If value is infinite or the result is too large
+        """
+        _validate_number(value)
+        if value.__class__ is float and math.isinf(value):
+            _check_result_range(value)
+        if self.duration is None:
+            if timestamp is not None:
+                raise ValueError("Count-based windows take no timestamps")
+            position = self._count
+            expired = position - self.size
+        else:
+            if timestamp is None:
+                raise ValueError("Time-based windows need a timestamp for every value")
+            if self._last is not None and timestamp < self._last:
+                raise ValueError(f"Timestamps must not decrease: {timestamp} after {self._last}")
+            self._last = position = timestamp
+            expired = timestamp - self.duration
+        self._count += 1
+        self._evict(expired)
+        self._insert(position, value)
+        result = self._result()
+        _check_result_range(result)
+        return result
+
+    @abstractmethod
+    def _evict(self, expired: float) -> None:
+        """Take the values at or before position expired out of the window."""
+
+    @abstractmethod
+    def _insert(self, position: float, value: float | int) -> None:
+        """Put a validated value into the window."""
+
+    @abstractmethod
+    def _result(self) -> float | int:
+        """Return the aggregate of the window."""
+
+
+class _BufferedWindow(_Window):
+    """A window that keeps its values, for aggregates that must take leaving values out."""
+
+    def __init__(self, size: int | None = None, *, duration: float | None = None) -> None:
+        super().__init__(size, duration=duration)
+        self._entries: deque[tuple[float, float | int]] = deque()
+        self._nans = 0
+        self._floats = 0
+        # Floats that left since the float state was last recomputed
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, expired: float) -> None:
+        entries = self._entries
+        while entries and entries[0][0] <= expired:
+            value = entries.popleft()[1]
+            if value != value:
+                self._nans -= 1
+            else:
+                self._remove(value)
+        if self._stale > len(entries):
+            self._stale = 0
+            self._resync()
+
+    def _insert(self, position: float, value: float | int) -> None:
+        self._entries.append((position, value))
+        if value != value:
+            self._nans += 1
+        else:
+            self._add(value)
+
+    @abstractmethod
+    def _add(self, value: float | int) -> None:
+        """Account for a value other than NaN entering the window."""
+
+    @abstractmethod
+    def _remove(self, value: float | int) -> None:
+        """Account for a value other than NaN leaving the window."""
+
+    @abstractmethod
+    def _resync(self) -> None:
+        """Recompute the float state from the values in the window."""
+
+
+class RollingSum(_BufferedWindow):
+    """Sum of the values in a window."""
+
+    def __init__(self, size: int | None = None, *, duration: float | None = None) -> None:
+        super().__init__(size, duration=duration)
+        # The exact sum is _num / 2**_shift
+        self._num = 0
+        self._shift = 0
+
+    def _scaled(self, value: float) -> int:
+        """Return a float as a numerator over 2**_shift, growing _shift if needed."""
+        num, den = value.as_integer_ratio()
+        shift = den.bit_length() - 1
+        if shift > self._shift:
+            self._num <<= shift - self._shift
+            self._shift = shift
+        return num << (self._shift - shift)
+
+    def _add(self, value: float | int) -> None:
+        if value.__class__ is not float:
+            self._num += value << self._shift
+            return
+        self._floats += 1
+        scaled = self._scaled(value)
+        self._num += scaled
+
+    def _remove(self, value: float | int) -> None:
+        if value.__class__ is not float:
+            self._num -= value << self._shift
+            return
+        self._floats -= 1
+        self._stale += 1
+        scaled = self._scaled(value)
+        self._num -= scaled
+        if not self._floats:
+            self._num >>= self._shift
+            self._shift = 0
+
+    def _resync(self) -> None:
+        # Drop the binary places that the floats still in the window do not need
+        num = self._num
+        zeros = (num & -num).bit_length() - 1 if num else self._shift
+        drop = min(zeros, self._shift)
+        self._num >>= drop
+        self._shift -= drop
+
+    def _divided(self, count: int) -> float:
+        """Return the exact sum divided by count, rounded once."""
+        try:
+            return self._num / (count << self._shift)
+        except OverflowError:
+            return math.copysign(math.inf, self._num)
+
+    def _result(self) -> float | int:
+        if self._nans:
+            return math.nan
+        return self._divided(1) if self._floats else self._num
+
+
+class RollingMean(RollingSum):
+    """Arithmetic mean of the values in a window."""
+
+    def _result(self) -> float:
+        if self._nans:
+            return math.nan
+        return self._divided(len(self._entries))
+
+
+class RollingProduct(_BufferedWindow):
+    """Product of the values in a window."""
+
+    def __init__(self, size: int | None = None, *, duration: float | None = None) -> None:
+        super().__init__(size, duration=duration)
+        self._zeros = 0
+        # Values with a sign bit (negative, or -0.0), for the sign of a zero product
+        self._signed = 0
+        self._ints = 1
+        # Product of the nonzero floats: _mantissa * 2**_exponent
+        self._mantissa = 1.0
+        self._exponent = 0
+
+    def _multiply(self, value: float) -> None:
+        mantissa, exponent = math.frexp(value)
+        self._mantissa, shift = math.frexp(self._mantissa * mantissa)
+        self._exponent += exponent + shift
+
+    def _divide(self, value: float) -> None:
+        mantissa, exponent = math.frexp(value)
+        self._mantissa, shift = math.frexp(self._mantissa / mantissa)
+        self._exponent += shift - exponent
+
+    def _add(self, value: float | int) -> None:
+        if value.__class__ is float:
+            self._floats += 1
+        if value < 0 or value.__class__ is float and not value and math.copysign(1.0, value) < 0:
+            self._signed += 1
+        if not value:
+            self._zeros += 1
+        elif value.__class__ is float:
+            self._multiply(value)
+        else:
+            self._ints *= value
+
+    def _remove(self, value: float | int) -> None:
+        if value.__class__ is float:
+            self._floats -= 1
+            self._stale += 1
+        if value < 0 or value.__class__ is float and not value and math.copysign(1.0, value) < 0:
+            self._signed -= 1
+        if not value:
+            self._zeros -= 1
+        elif value.__class__ is float:
+            self._divide(value)
+        else:
+            self._ints //= value
+
+    def _resync(self) -> None:
+        self._mantissa, self._exponent = 1.0, 0
+        for _, value in self._entries:
+            if value.__class__ is float and value and value == value:
+                self._multiply(value)
+
+    def _result(self) -> float | int:
+        if self._nans:
+            return math.nan
+        if self._zeros:
+            if not self._floats:
+                return 0
+            # Signed as the product taken in floats: odd sign bits make it -0.0
+            return -0.0 if self._signed & 1 else 0.0
+        if not self._floats:
+            return self._ints
+        # The int product as mantissa and exponent, so that it need not fit a float
+        shift = self._ints.bit_length()
+        mantissa = self._mantissa * (self._ints / (1 << shift))
+        try:
+            return math.ldexp(mantissa, self._exponent + shift)
+        except OverflowError:
+            return math.copysign(math.inf, mantissa)
+
+
+class _ExtremeWindow(_Window):
+    """Minimum or maximum of a window, from a monotonic deque."""
+
+    def __init__(self, size: int | None = None, *, duration: float | None = None) -> None:
+        super().__init__(size, duration=duration)
+        # (position, value) candidates, in window order; values never
+        # increasing for max, never decreasing for min, so that ties resolve
+        # to the oldest value as with min() and max()
+        self._candidates: deque[tuple[float, float | int]] = deque()
+        self._nans: deque[float] = deque()
+        self._positions: deque[float] = deque()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _evict(self, expired: float) -> None:
+        candidates = self._candidates
+        while candidates and candidates[0][0] <= expired:
+            candidates.popleft()
+        for positions in (self._positions, self._nans):
+            while positions and positions[0] <= expired:
+                positions.popleft()
+
+    def _insert(self, position: float, value: float | int) -> None:
+        self._positions.append(position)
+        if value != value:
+            self._nans.append(position)
+            return
+        candidates = self._candidates
+        while candidates and self._dominates(value, candidates[-1][1]):
+            candidates.pop()
+        candidates.append((position, value))
+
+    @staticmethod
+    @abstractmethod
+    def _dominates(value: float | int, other: float | int) -> bool:
+        """Return True if other can never again be the extreme once value arrived."""
+
+    def _result(self) -> float | int:
+        if self._nans:
+            return math.nan
+        return self._candidates[0][1]
+
+
+class RollingMin(_ExtremeWindow):
+    """Minimum of the values in a window."""
+
+    @staticmethod
+    def _dominates(value: float | int, other: float | int) -> bool:
+        return value < other
+
+
+class RollingMax(_ExtremeWindow):
+    """Maximum of the values in a window."""
+
+    @staticmethod
+    def _dominates(value: float | int, other: float | int) -> bool:
+        return value > other
+
+
+WINDOWS: dict[str, type[_Window]] = {
+    'sum': RollingSum,
+    'mean': RollingMean,
+    'product': RollingProduct,
+    'min': RollingMin,
+    'max': RollingMax,
+}
+
+
+def rolling(
+    operation: str,
+    values: Iterable[float | int],
+    size: int | None = None,
+    *,
+    duration: float | None = None,
+    timestamps: Iterable[float] | None = None,
+) -> Iterator[float | int]:
+    """
+    Yield the rolling aggregate after each value.
+
+    Args:
+        operation: One of WINDOWS
+        values: The input values
+        size: Number of values in a count-based window
+        duration: Length of a time-based window
+        timestamps: The time of each value (time-based windows only)
+
+    Returns:
+        An iterator of one aggregate per value
+
+    Raises:
+        ValueError: If the operation is unknown or the window is invalid
+        TypeError, OverflowError: As for push()
+    """
+    window_type = WINDOWS.get(operation)
+    if window_type is None:
+        raise ValueError(f"Unknown rolling operation '{operation}'. Supported operations: {', '.join(WINDOWS)}")
+    window = window_type(size, duration=duration)
+    if (duration is None) != (timestamps is None):
+        raise ValueError("Timestamps go with time-based windows, and only with them")
+    if timestamps is None:
+        return map(window.push, values)
+    return map(window.push, values, timestamps)
+
+
+def timed_values(lines: Iterable[str]) -> Iterator[tuple[float, float]]:
+    """
+    Parse '<timestamp> <value>' lines with float(), skipping blank lines.
+
+    Returns:
+        An iterator of (value, timestamp) pairs, the argument order of push()
+
+    Raises:
+        ValueError: If a line does not hold two numbers
+    """
+    for line_number, line in enumerate(lines, start=1):
+        fields = line.split()
+        if not fields:
+            continue
+        if len(fields) != 2:
+            raise ValueError(f"line {line_number}: Expected '<timestamp> <value>', got {len(fields)} fields")
+        try:
+            yield float(fields[1]), float(fields[0])
+        except ValueError:
+            raise ValueError(f"line {line_number}: Invalid number format") from None
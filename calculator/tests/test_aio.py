@@ -0,0 +1,142 @@
+import asyncio
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+from src.calculator import add, aio, divide, multiply
+from src.calculator.policy import DeferredRangeError, validation
+
+
+def test_awaitable_operations() -> None:
+    """Test the awaitable operations return and raise like the plain ones."""
+    async def scenario() -> list:
+        results = [await aio.add(2, 3), await aio.subtract(2.5, 1), await aio.multiply(4, 5)]
+        with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+            await aio.divide(1, 0)
+        return results
+
+    assert asyncio.run(scenario()) == [5, 1.5, 20]
+
+
+def test_large_batches_run_in_executor() -> None:
+    """Test batches above the inline size match calculator.batch from threads and processes."""
+    xs = array('d', (i * 0.5 for i in range(5000)))
+    ys = array('d', (i + 1.0 for i in range(5000)))
+
+    async def scenario() -> None:
+        expected = [divide(x, y) for x, y in zip(xs, ys)]
+        assert list(await aio.batch_divide(xs, ys)) == expected
+        with ThreadPoolExecutor(1) as pool:
+            assert list(await aio.batch_divide(xs, ys, executor=pool, inline_size=10)) == expected
+        with ProcessPoolExecutor(1) as pool:
+            result = await aio.batch_multiply(memoryview(xs), ys, executor=pool, inline_size=10)
+            assert list(result) == [multiply(x, y) for x, y in zip(xs, ys)]
+            with validation("deferred"):
+                with pytest.raises(ValueError, match="deferred"):
+                    await aio.batch_add(xs, ys, executor=pool, inline_size=10)
+        with pytest.raises(ZeroDivisionError):
+            await aio.batch_divide([1.0] * 10, [0.0] * 10, inline_size=1)
+
+    asyncio.run(scenario())
+
+
+def test_thread_batches_keep_the_deferred_policy() -> None:
+    """Test violations of a batch run in a thread are recorded in the caller's block."""
+    async def scenario() -> None:
+        with pytest.raises(DeferredRangeError) as error:
+            with validation("deferred"):
+                await aio.batch_multiply([1e60, 2.0], [1e60, 3.0], inline_size=1)
+        assert len(error.value.violations) == 1
+
+    asyncio.run(scenario())
+
+
+def test_batcher_merges_requests() -> None:
+    """Test concurrent requests are merged into batches and each caller gets its own outcome."""
+    async def scenario() -> None:
+        async with aio.Batcher(max_size=100, max_delay=0.01) as batcher:
+            calls = [batcher.submit('add', i, 0.5) for i in range(250)]
+            calls += [batcher.submit('div', 1, 0), batcher.submit('mul', 1e60, 1e60), batcher.submit('*', 2, 3)]
+            results = await asyncio.gather(*calls, return_exceptions=True)
+            assert batcher.batches == 5
+        assert results[:250] == [add(i, 0.5) for i in range(250)]
+        assert isinstance(results[250], ZeroDivisionError) and str(results[250]) == "Cannot divide by zero"
+        assert isinstance(results[251], OverflowError) and "is too large" in str(results[251])
+        assert results[252] == 6 and isinstance(results[252], int)
+        with pytest.raises(RuntimeError, match="closed"):
+            await batcher.submit('add', 1, 2)
+        with pytest.raises(ValueError, match="Unknown operation"):
+            await aio.Batcher().submit('power', 1, 2)
+
+    asyncio.run(scenario())
+
+
+def test_batcher_delay_executor_and_cancellation() -> None:
+    """Test the delay timer flushes, large merges use the executor and cancelled requests are dropped."""
+    async def scenario() -> None:
+        with ThreadPoolExecutor(1) as pool:
+            batcher = aio.Batcher(max_size=1000, max_delay=0.001, executor=pool, inline_size=50)
+            assert await batcher.submit('subtract', 5, 3) == 2
+            tasks = [asyncio.create_task(batcher.submit('multiply', i, 2)) for i in range(60)]
+            await asyncio.sleep(0)
+            tasks[0].cancel()
+            done = await asyncio.gather(*tasks, return_exceptions=True)
+            assert isinstance(done[0], asyncio.CancelledError)
+            assert done[1:] == [i * 2 for i in range(1, 60)]
+            assert batcher.batches == 2
+            await batcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_batcher_keeps_each_callers_policy() -> None:
+    """Test concurrent strict, trusted and deferred callers are batched apart and keep their own outcome."""
+    async def deferred(batcher: aio.Batcher) -> tuple:
+        with pytest.raises(DeferredRangeError) as error:
+            with validation("deferred"):
+                result = await batcher.submit('mul', 1e60, 1e60)
+        return result, error.value.violations
+
+    async def trusted(batcher: aio.Batcher) -> float:
+        with validation("trusted"):
+            return await batcher.submit('mul', 2.0, 3)
+
+    async def scenario() -> None:
+        async with aio.Batcher(max_size=100, max_delay=0.01) as batcher:
+            results = await asyncio.gather(
+                trusted(batcher), batcher.submit('mul', 1e60, 1e60), deferred(batcher), return_exceptions=True,
+            )
+            assert batcher.batches == 3
+        assert results[0] == 6.0
+        assert isinstance(results[1], OverflowError) and "is too large" in str(results[1])
+        result, violations = results[2]
+        assert result == 1e60 * 1e60 and len(violations) == 1
+
+    asyncio.run(scenario())
+
+
+def test_batcher_calls_instrumented_kernels() -> None:
+    """Test batched requests are counted by metrics like direct calls, inline and in an executor."""
+    from src.calculator import metrics
+
+    async def scenario() -> list:
+        with ThreadPoolExecutor(1) as pool:
+            async with aio.Batcher(max_size=100, max_delay=0.001, executor=pool, inline_size=8) as batcher:
+                return await asyncio.gather(
+                    *(batcher.submit('div', i, 2) for i in range(10)),
+                    *(batcher.submit('add', i, 1) for i in range(3)),
+                    batcher.submit('div', 1, 0), return_exceptions=True,
+                )
+
+    metrics.reset()
+    metrics.enable()
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        metrics.disable()
+    figures = metrics.snapshot()['operations']
+    metrics.reset()
+    assert results[:13] == [i / 2 for i in range(10)] + [1, 2, 3]
+    assert isinstance(results[13], ZeroDivisionError)
+    assert figures['divide']['scalar']['calls'] == 11
+    assert figures['divide']['scalar']['errors'] == {'ZeroDivisionError': 1}
+    assert figures['add']['scalar']['calls'] == 3
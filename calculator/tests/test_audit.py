@@ -0,0 +1,215 @@
+from io import StringIO
+import json
+import math
+import threading
+import pytest
+from unittest.mock import patch
+from src.calculator import audit, registry
+from src.calculator.masked import STATUS_OVERFLOW, STATUS_ZERO_DIVISION
+
+
+def test_audit_records_scalar_and_batch_calls(tmp_path) -> None:
+    """Test every call through the registry is recorded with its operands, result and status."""
+    original = registry.get('divide')
+    audit.enable(str(tmp_path))
+    try:
+        assert audit.is_enabled()
+        assert registry.get('add').scalar(1, 2.5) == 3.5
+        with pytest.raises(ZeroDivisionError):
+            registry.lookup('div').scalar(1.0, 0)
+        registry.get('multiply').batch([2, 3], [4, 5])
+        with pytest.raises(ZeroDivisionError):
+            registry.get('divide').batch([6.0, 1.0], [3.0, 0.0])
+        with pytest.raises(OverflowError):
+            registry.get('multiply').scalar(1e308, 10.0)
+        registry.get('add').scalar(2**70, 1)
+    finally:
+        audit.disable()
+    assert not audit.is_enabled()
+    assert registry.get('divide') == original
+    records = list(audit.read(str(tmp_path)))
+    assert [r.sequence for r in records] == list(range(8))
+    assert [(r.operation, r.a, r.b, r.status) for r in records[:6]] == [
+        ('add', 1, 2.5, 0), ('divide', 1.0, 0, STATUS_ZERO_DIVISION), ('multiply', 2, 4, 0),
+        ('multiply', 3, 5, 0), ('divide', 6.0, 3.0, 0), ('divide', 1.0, 0.0, STATUS_ZERO_DIVISION),
+    ]
+    assert [r.result for r in records[:6] if r.error is None] == [3.5, 8, 15, 2.0]
+    assert isinstance(records[2].result, int) and isinstance(records[0].b, float)
+    assert (records[6].a, records[6].error, records[6].status) == (1e308, 'overflow', STATUS_OVERFLOW)
+    assert math.isnan(records[6].result)
+    # Integers beyond int64 are kept approximately, as floats
+    assert (records[7].a, records[7].b, records[7].result) == (float(2**70), 1.0, float(2**70 + 1))
+    assert records[0].time_ns <= records[-1].time_ns
+
+
+def test_audit_records_packed_files_with_a_status_file(tmp_path) -> None:
+    """Test a packed file processed with a status file is recorded pair by pair, failures included."""
+    from array import array
+    from src.calculator.packed import process_file
+    source = tmp_path / "pairs.f64"
+    source.write_bytes(array('d', [6.0, 3.0, 1.0, 0.0, 5.0, 2.0]).tobytes())
+    audit.enable(str(tmp_path / "audit"))
+    try:
+        process_file('divide', str(source), str(tmp_path / "out.f64"), status_path=str(tmp_path / "status.u8"))
+    finally:
+        audit.disable()
+    assert (tmp_path / "status.u8").read_bytes() == bytes([0, STATUS_ZERO_DIVISION, 0])
+    records = list(audit.read(str(tmp_path / "audit")))
+    assert [(r.operation, r.a, r.b, r.result, r.status) for r in records if r.error is None] == [
+        ('divide', 6.0, 3.0, 2.0, 0), ('divide', 5.0, 2.0, 2.5, 0),
+    ]
+    assert [(r.a, r.b, r.error) for r in records if r.error is not None] == [(1.0, 0.0, 'zero_division')]
+
+
+def test_audit_failed_batch_records_each_status(tmp_path) -> None:
+    """Test a failing batch is recorded with the status of each pair."""
+    audit.enable(str(tmp_path))
+    try:
+        with pytest.raises(TypeError):
+            registry.get('multiply').batch([6.0, 1e308, 2.0, None], [3.0, 10.0, 0.5, 1.0])
+    finally:
+        audit.disable()
+    records = list(audit.read(str(tmp_path)))
+    assert [r.error for r in records] == [None, 'overflow', None, 'type']
+    assert [r.result for r in records if r.error is None] == [18.0, 1.0]
+    assert all(math.isnan(r.result) for r in records if r.error is not None)
+
+
+def test_audit_records_direct_expression_and_fixed_calls(tmp_path) -> None:
+    """Test package functions, batches, compiled expressions and fixed-point calls are all recorded."""
+    import src.calculator as calculator
+    from src.calculator import batch, fixed
+    from src.calculator.expr import compile_expression
+    fixed_add = fixed.add
+    audit.enable(str(tmp_path))
+    try:
+        assert calculator.add(1, 2) == 3
+        batch.multiply([2.0], [3.0])
+        assert compile_expression('x / 4')(x=2.0) == 0.5
+        assert fixed.add(150, 250, scale=2) == 400
+        with pytest.raises(ZeroDivisionError):
+            fixed.batch_divide([100, 200], [0, 100], scale=2)
+    finally:
+        audit.disable()
+    assert fixed.add is fixed_add and calculator.add is registry.get('add').scalar
+    records = list(audit.read(str(tmp_path)))
+    assert [(r.operation, r.a, r.b, r.status) for r in records] == [
+        ('add', 1, 2, 0), ('multiply', 2.0, 3.0, 0), ('divide', 2.0, 4, 0), ('fixed.add', 150, 250, 0),
+        ('fixed.divide', 100, 0, STATUS_ZERO_DIVISION), ('fixed.divide', 200, 100, 0),
+    ]
+    assert records[5].result == 200
+    assert [r.a for r in audit.read(str(tmp_path), operations=['fixed.divide'])] == [100, 200]
+    with pytest.raises(ValueError):
+        list(audit.read(str(tmp_path), operations=['fixed.modulo']))
+
+
+def test_audit_full_ring_never_drops_records(tmp_path) -> None:
+    """Test producers wait for a flush when the ring is full, across threads."""
+    log = audit.enable(str(tmp_path), ring_records=8, flush_interval=60)
+    add = registry.get('add').scalar
+
+    def produce(base: int) -> None:
+        for i in range(500):
+            add(base + i, 1)
+
+    try:
+        threads = [threading.Thread(target=produce, args=(n * 1000,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        audit.disable()
+    assert log.operations == [op.name for op in registry.operations()] + [
+        'fixed.add', 'fixed.subtract', 'fixed.multiply', 'fixed.divide']
+    records = list(audit.read(str(tmp_path)))
+    assert sorted(r.sequence for r in records) == list(range(2000))
+    assert sorted(r.a for r in records) == sorted(n * 1000 + i for n in range(4) for i in range(500))
+    assert all(r.result == r.a + 1 for r in records)
+
+
+def test_audit_rotation_index_and_filters(tmp_path) -> None:
+    """Test segments rotate by size, are indexed, and filters match a full scan with or without indexes."""
+    audit.enable(str(tmp_path), segment_bytes=300 * audit.RECORD_SIZE, ring_records=64)
+    try:
+        for i in range(2 * audit.INDEX_BLOCK):
+            registry.get('subtract' if i % 3 else 'divide').scalar(float(i), 2.0)
+    finally:
+        audit.disable()
+    paths = audit.segments(str(tmp_path))
+    assert len(paths) == math.ceil(2 * audit.INDEX_BLOCK / 299)
+    assert all((tmp_path / p.replace('.audit', '.index')).exists() for p in paths)
+    everything = list(audit.read(str(tmp_path)))
+    assert len(everything) == 2 * audit.INDEX_BLOCK
+    since, until = everything[1000].time_ns, everything[5000].time_ns
+
+    def expected(operation: str) -> list[audit.AuditRecord]:
+        return [r for r in everything if r.operation == operation and since <= r.time_ns < until]
+
+    assert list(audit.read(str(tmp_path), ['div'], since, until)) == expected('divide')
+    for index in tmp_path.glob('*.index'):
+        index.unlink()
+    assert list(audit.read(str(tmp_path), ['subtract'], since, until)) == expected('subtract')
+    # A new log continues after the existing segments
+    audit.enable(str(tmp_path))
+    try:
+        registry.get('add').scalar(1, 1)
+    finally:
+        audit.disable()
+    assert audit.segments(str(tmp_path))[-1].endswith(f"segment-{len(paths) + 1:06d}.audit")
+    assert [r.operation for r in audit.read(str(tmp_path), ['add'])] == ['add']
+    with pytest.raises(ValueError, match="Unknown operation"):
+        list(audit.read(str(tmp_path), ['power']))
+
+
+def test_audit_time_parsing() -> None:
+    """Test epoch seconds and ISO 8601 times, which default to UTC."""
+    assert audit.parse_time("1760000000.5") == 1_760_000_000_500_000_000
+    assert audit.parse_time("2026-10-18T09:30:00") == audit.parse_time("2026-10-18T11:30:00+02:00")
+    assert audit.format_time(audit.parse_time("2026-10-18T09:30:00.25")) == "2026-10-18T09:30:00.250000000Z"
+    for bad in ("yesterday", "nan"):
+        with pytest.raises(ValueError, match="Invalid time"):
+            audit.parse_time(bad)
+
+
+def test_cli_stream_audit_and_dump(tmp_path) -> None:
+    """Test --stream --audit records a run and audit dump prints it as text and jsonl."""
+    from src.calculator.__main__ import main
+    source = tmp_path / "records.txt"
+    source.write_text("add 1 2\ndiv 1 0\nmul 3 4\n")
+    log = str(tmp_path / "audit")
+    with patch('sys.argv', ['calculator', '--stream', str(source), '--audit', log]), patch('sys.stdout', StringIO()):
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    assert not audit.is_enabled()
+    captured_output = StringIO()
+    with patch('sys.argv', ['calculator', 'audit', 'dump', log]), patch('sys.stdout', captured_output):
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    lines = captured_output.getvalue().splitlines()
+    assert [line.split(' ', 1)[1] for line in lines] == [
+        "0 add 1.0 2.0 3.0", "1 divide 1.0 0.0 error=zero_division", "2 multiply 3.0 4.0 12.0",
+    ]
+    assert lines[0].endswith("Z 0 add 1.0 2.0 3.0") and lines[0][:4].isdigit()
+    captured_output = StringIO()
+    argv = ['calculator', 'audit', 'dump', log, '--op', 'div', '--op', 'mul', '--format', 'jsonl', '--since', '0']
+    with patch('sys.argv', argv), patch('sys.stdout', captured_output):
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    rows = [json.loads(line) for line in captured_output.getvalue().splitlines()]
+    assert [(row["op"], row["result"], row["error"]) for row in rows] == [
+        ('divide', None, 'zero_division'), ('multiply', 12.0, None),
+    ]
+    for argv, code, message in (
+        (['audit', 'dump', log, '--until', 'soon'], 2, "Invalid time 'soon'"),
+        (['audit', 'dump', str(tmp_path / "missing")], 1, "Error: "),
+        (['--stream', str(source), '--workers', '2', '--audit', log], 2, "--audit requires --workers 1"),
+    ):
+        captured_error = StringIO()
+        with patch('sys.argv', ['calculator', *argv]), patch('sys.stderr', captured_error):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+        assert exit_info.value.code == code
+        assert message in captured_error.getvalue()
@@ -0,0 +1,102 @@
+from array import array
+import pytest
+from src.calculator import add, subtract, multiply, divide
+from src.calculator import batch
+
+
+def test_batch_add_lists() -> None:
+    """Test batch addition of plain lists matches the scalar function."""
+    xs = [1, 2.5, -3, 0.1]
+    ys = [2, 3.5, 3, 0.2]
+    result = batch.add(xs, ys)
+    assert list(result) == [add(x, y) for x, y in zip(xs, ys)]
+
+
+def test_batch_operations_match_scalar() -> None:
+    """Test every batch operation against its scalar counterpart."""
+    xs = array('d', [5.5, -2.0, 1e50, 0.3])
+    ys = array('d', [2.0, 4.0, 1e40, 0.1])
+    pairs = [
+        (batch.add, add),
+        (batch.subtract, subtract),
+        (batch.multiply, multiply),
+        (batch.divide, divide),
+    ]
+    for batch_func, scalar_func in pairs:
+        result = batch_func(xs, ys)
+        assert isinstance(result, array)
+        assert result.typecode == 'd'
+        assert list(result) == [scalar_func(x, y) for x, y in zip(xs, ys)]
+
+
+def test_batch_integer_results_are_exact() -> None:
+    """Test integer batches return int64 buffers, or exact lists for big ints."""
+    result = batch.multiply([2, 3], [4, 5])
+    assert isinstance(result, array)
+    assert result.typecode == 'q'
+    assert list(result) == [8, 15]
+
+    big = batch.multiply([10**30], [10**30])
+    assert big == [10**60]
+
+
+def test_batch_memoryview_input() -> None:
+    """Test memoryview operands are accepted."""
+    xs = memoryview(array('q', [1, 2, 3]))
+    ys = memoryview(array('d', [0.5, 0.5, 0.5]))
+    assert list(batch.add(xs, ys)) == [1.5, 2.5, 3.5]
+
+
+def test_batch_empty_input() -> None:
+    """Test empty batches produce empty buffers."""
+    assert len(batch.add([], [])) == 0
+
+
+def test_batch_overflow_matches_scalar_message() -> None:
+    """Test batch overflow raises the same error as the scalar function."""
+    with pytest.raises(OverflowError) as scalar_error:
+        multiply(1e-100, 1e200)
+    with pytest.raises(OverflowError) as batch_error:
+        batch.multiply([1.0, 1e-100], [1.0, 1e200])
+    assert str(batch_error.value) == str(scalar_error.value)
+
+    with pytest.raises(OverflowError):
+        batch.add([float('inf')], [1.0])
+    with pytest.raises(OverflowError):
+        batch.add([10**100], [1])
+
+
+def test_batch_divide_by_zero() -> None:
+    """Test batch division raises when any divisor is zero."""
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+        batch.divide([1.0, 2.0], [1.0, 0.0])
+    with pytest.raises(ZeroDivisionError):
+        batch.divide(array('d', [1.0]), array('d', [-0.0]))
+
+
+def test_batch_type_errors() -> None:
+    """Test non-numeric batches raise TypeError."""
+    with pytest.raises(TypeError, match="Expected int or float, got str"):
+        batch.add([1, "2"], [1, 2])
+    with pytest.raises(TypeError):
+        batch.add(array('u', 'ab'), [1, 2])
+    with pytest.raises(TypeError):
+        batch.add("12", "34")
+
+
+def test_batch_length_mismatch() -> None:
+    """Test operands of different lengths raise ValueError."""
+    with pytest.raises(ValueError, match="lengths differ"):
+        batch.add([1, 2], [1])
+
+
+def test_batch_numpy_arrays() -> None:
+    """Test NumPy float arrays take the vectorized path."""
+    np = pytest.importorskip("numpy")
+    xs = np.array([1.0, 2.0, 3.0])
+    ys = np.array([4.0, 5.0, 6.0])
+    assert batch.multiply(xs, ys).tolist() == [4.0, 10.0, 18.0]
+    with pytest.raises(ZeroDivisionError):
+        batch.divide(xs, np.zeros(3))
+    with pytest.raises(OverflowError):
+        batch.multiply(np.array([1e60]), np.array([1e60]))
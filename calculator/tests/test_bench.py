@@ -0,0 +1,63 @@
+import json
+import subprocess
+from src.calculator.bench import BENCHMARKS, compare, run, save_results
+from src.calculator.bench.__main__ import main as bench_main
+from src.calculator.bench.cases import _module_command
+
+
+def _results(**timings: float) -> dict:
+    return {"meta": {}, "results": {name.replace("_", "."): {"ns_per_op": ns, "ops_per_sec": 1e9 / ns}
+                                    for name, ns in timings.items()}}
+
+
+def test_run_filtered_benchmarks() -> None:
+    """Test running a subset of the registered benchmarks."""
+    results = run("validate.number", repeat=1)
+    assert list(results["results"]) == ["validate.number"]
+    assert results["results"]["validate.number"]["ns_per_op"] > 0
+    assert "python" in results["meta"]
+
+
+def test_builtin_cases_are_registered() -> None:
+    """Test the suite covers every operation, input kind and mode."""
+    run("validate.number", repeat=1)
+    for name in ["add", "subtract", "multiply", "divide"]:
+        for kind in ["int", "float", "bigint"]:
+            assert f"scalar.{name}.{kind}" in BENCHMARKS
+        assert f"batch.{name}.float" in BENCHMARKS
+    assert "stream.throughput" in BENCHMARKS
+    assert "cli.cold_start" in BENCHMARKS
+
+
+def test_compare_flags_regressions() -> None:
+    """Test only slowdowns beyond the threshold are reported."""
+    baseline = _results(a_fast=100.0, a_slow=100.0, a_faster=100.0)
+    current = _results(a_fast=105.0, a_slow=150.0, a_faster=50.0)
+    regressions = compare(baseline, current, threshold=0.10)
+    assert [name for name, *_ in regressions] == ["a.slow"]
+    assert regressions[0][3] == 0.5
+
+
+def test_compare_command_exit_status(tmp_path, capsys) -> None:
+    """Test 'compare' exits with 1 when regressions are found."""
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    save_results(_results(scalar_add=100.0), str(baseline))
+    save_results(_results(scalar_add=200.0), str(current))
+    assert bench_main(["compare", str(baseline), str(current)]) == 1
+    assert "REGRESSION scalar.add" in capsys.readouterr().out
+    assert bench_main(["compare", str(baseline), str(baseline)]) == 0
+
+
+def test_run_command_writes_json(tmp_path) -> None:
+    """Test 'run --output' stores a results document."""
+    output = tmp_path / "results.json"
+    assert bench_main(["run", "-k", "range_check.float", "--repeat", "1", "-o", str(output)]) == 0
+    assert list(json.loads(output.read_text())["results"]) == ["range_check.float"]
+
+
+def test_module_command_runs_cli() -> None:
+    """Test the cold-start command line runs the calculator CLI."""
+    command, env = _module_command()
+    completed = subprocess.run(command + ["add", "1", "2"], env=env, capture_output=True, text=True)
+    assert completed.stdout.strip() == "3.0"
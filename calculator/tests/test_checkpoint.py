@@ -0,0 +1,165 @@
+from array import array
+from io import StringIO
+import json
+import math
+import random
+import pytest
+from unittest.mock import patch
+from src.calculator import checkpoint, reduce
+from src.calculator.checkpoint import Checkpointer
+from src.calculator.output import OutputFormat
+from src.calculator.packed import process_file
+from src.calculator.stream import process_stream
+
+
+class _Crash(Exception):
+    pass
+
+
+class _CrashingCheckpointer(Checkpointer):
+    """Checkpoint at every chunk and die right after the given checkpoint is saved."""
+
+    def __init__(self, path: str, crash_after: int) -> None:
+        super().__init__(path, interval=0)
+        self.crash_after = crash_after
+
+    def save(self, *args) -> None:
+        super().save(*args)
+        if self.saved == self.crash_after:
+            raise _Crash
+
+
+def _interrupt_and_resume(tmp_path, run, out_path=None, crash_after: int = 2):
+    """Run a job until it crashes, scribble past its checkpoint, then resume it."""
+    path = str(tmp_path / "job.ckpt")
+    with pytest.raises(_Crash):
+        run(_CrashingCheckpointer(path, crash_after))
+    saved = checkpoint.load(path)
+    if out_path is not None:
+        # Whatever the dead run wrote after its checkpoint must not survive
+        with open(out_path, "r+b") as f:
+            f.seek(saved.output_offset)
+            f.write(b"\xff" * 40)
+    resumer = Checkpointer(path, interval=0, resume=True)
+    result = run(resumer)
+    assert not (tmp_path / "job.ckpt").exists()
+    return saved, result
+
+
+def test_checkpoint_files_and_job_identity(tmp_path) -> None:
+    """Test checkpoints round-trip, are refused for other jobs, and resume is a no-op without one."""
+    path = str(tmp_path / "job.ckpt")
+    checkpointer = Checkpointer(path, resume=True)
+    assert checkpointer.start({"command": "sum", "options": ("a", 1)}) is None
+    checkpointer.save(128, 64, {"total": 2**70})
+    assert checkpoint.load(path) == checkpoint.Checkpoint({"command": "sum", "options": ["a", 1]}, 128, 64,
+                                                          {"total": 2**70})
+    assert [p.name for p in tmp_path.iterdir()] == ["job.ckpt"]
+    assert Checkpointer(path, resume=True).start({"command": "sum", "options": ["a", 1]}).input_offset == 128
+    with pytest.raises(ValueError, match="different job"):
+        Checkpointer(path, resume=True).start({"command": "product"})
+    (tmp_path / "job.ckpt").write_text(json.dumps({"version": 99}))
+    with pytest.raises(ValueError, match="not a valid checkpoint"):
+        Checkpointer(path, resume=True).start({})
+    with pytest.raises(ValueError, match="negative"):
+        Checkpointer(path, interval=-1)
+
+
+def test_batch_resume_is_byte_identical(tmp_path) -> None:
+    """Test an interrupted batch job with a status file resumes to the uninterrupted output."""
+    rng = random.Random(24)
+    values = [rng.choice([rng.uniform(-1e3, 1e3), 0.0]) for _ in range(2 * 1000)]
+    source = tmp_path / "pairs.f64"
+    source.write_bytes(array('d', values).tobytes())
+    process_file('divide', str(source), str(tmp_path / "expected.npy"), status_path=str(tmp_path / "expected.u8"))
+    out, status = str(tmp_path / "out.npy"), str(tmp_path / "out.u8")
+    saved, count = _interrupt_and_resume(tmp_path, lambda c: checkpoint.process_file_checkpointed(
+        'divide', str(source), out, c, chunk_size=100, status_path=status), out)
+    assert count == 1000
+    assert saved.input_offset == 200 * 16
+    assert (tmp_path / "out.npy").read_bytes() == (tmp_path / "expected.npy").read_bytes()
+    assert (tmp_path / "out.u8").read_bytes() == (tmp_path / "expected.u8").read_bytes()
+
+
+def test_stream_resume_is_byte_identical(tmp_path) -> None:
+    """Test an interrupted stream keeps line numbers, counters and the csv header when resumed."""
+    lines = [f"{op} {i} {i % 7}\n" for i in range(1, 500) for op in ("add", "div")] + ["bad line\n", "\n"]
+    source = tmp_path / "records.txt"
+    source.write_text("".join(lines))
+    fmt = OutputFormat('csv', echo=True, status=True)
+    expected = StringIO()
+    expected_stats = process_stream(lines, expected, output_format=fmt)
+    out = str(tmp_path / "out.csv")
+    saved, stats = _interrupt_and_resume(tmp_path, lambda c: checkpoint.process_stream_checkpointed(
+        str(source), out, c, chunk_size=64, output_format=fmt), out, crash_after=3)
+    assert saved.state["line"] == 3 * 64 + 1
+    assert stats == expected_stats
+    assert (tmp_path / "out.csv").read_text() == expected.getvalue()
+
+
+def test_stream_resume_splits_universal_newlines(tmp_path) -> None:
+    """Test a resumed stream splits CR and CR LF line endings as an uninterrupted --stream does."""
+    endings = ["\r", "\r\n", "\n"]
+    source = tmp_path / "records.txt"
+    source.write_bytes("".join(f"div {i} {i % 5}{endings[i % 3]}" for i in range(400)).encode())
+    with open(source, encoding="utf-8") as f:
+        expected = StringIO()
+        expected_stats = process_stream(f, expected)
+    out = str(tmp_path / "out.txt")
+    saved, stats = _interrupt_and_resume(tmp_path, lambda c: checkpoint.process_stream_checkpointed(
+        str(source), out, c, chunk_size=64), out)
+    assert saved.state["line"] == 2 * 64 + 1
+    assert stats == expected_stats
+    assert (tmp_path / "out.txt").read_text() == expected.getvalue()
+
+
+@pytest.mark.parametrize("operation", ['sum', 'product', 'cumsum', 'cumprod'])
+def test_reduction_resume_is_byte_identical(tmp_path, operation) -> None:
+    """Test reductions and scans resume from their saved running state to the uninterrupted result."""
+    rng = random.Random(operation)
+    count = 3 * reduce.BLOCK_SIZE + 17
+    if operation.endswith('sum'):
+        values = array('d', (rng.choice([rng.uniform(-1, 1) * 10**rng.randrange(-20, 20), 0.1]) for _ in range(count)))
+    else:
+        values = array('d', (math.exp(rng.uniform(-0.05, 0.05)) for _ in range(count)))
+    source = tmp_path / "values.f64"
+    source.write_bytes(values.tobytes())
+    if operation in reduce.SCANS:
+        reduce.scan_file(operation, str(source), str(tmp_path / "expected.npy"))
+        out = str(tmp_path / "out.npy")
+        saved, _ = _interrupt_and_resume(tmp_path, lambda c: checkpoint.scan_file_checkpointed(
+            operation, str(source), out, c), out)
+        assert (tmp_path / "out.npy").read_bytes() == (tmp_path / "expected.npy").read_bytes()
+    else:
+        saved, result = _interrupt_and_resume(tmp_path, lambda c: checkpoint.reduce_file_checkpointed(
+            operation, str(source), c))
+        assert result == reduce.reduce_file(operation, str(source))
+    assert saved.input_offset == 2 * reduce.BLOCK_SIZE * 8
+
+
+def test_cli_checkpoint_options(tmp_path) -> None:
+    """Test the checkpoint options on the command line and their invalid combinations."""
+    from src.calculator.__main__ import main
+    source = tmp_path / "records.txt"
+    source.write_text("add 1 2\nmul 3 4\n")
+    checkpoint_path = str(tmp_path / "job.ckpt")
+    argv = ['--stream', str(source), '--out', str(tmp_path / "out.txt"), '--checkpoint', checkpoint_path, '--resume']
+    with patch('sys.argv', ['calculator', *argv]):
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    assert (tmp_path / "out.txt").read_text() == "3.0\n12.0\n"
+    assert not (tmp_path / "job.ckpt").exists()
+    for argv, message in (
+        (['--stream', str(source), '--resume'], "--resume requires --checkpoint"),
+        (['--stream', str(source), '--checkpoint', checkpoint_path], "requires an input file and --out"),
+        (['sum', str(source), '--checkpoint', checkpoint_path], "requires a binary input file"),
+        (['batch', '--op', 'add', '--in', 'x', '--out', 'y', '--workers', '2', '--checkpoint', checkpoint_path],
+         "requires --workers 1"),
+    ):
+        captured_error = StringIO()
+        with patch('sys.argv', ['calculator', *argv]), patch('sys.stderr', captured_error):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+        assert exit_info.value.code == 2
+        assert message in captured_error.getvalue()
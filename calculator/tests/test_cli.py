@@ -170,4 +170,23 @@ def test_cli_help_command() -> None:
         assert "add" in output
         assert "subtract" in output
         assert "multiply" in output
-        assert "divide" in output
\ No newline at end of file
+        assert "divide" in output
+
+def test_cli_single_operation_output_options() -> None:
+    """Test single-operation mode writes through --format and --precision."""
+    from src.calculator.__main__ import main
+    for argv, expected in (
+        (['divide', '10', '3', '--precision', '3'], "3.333\n"),
+        (['--format', 'csv', 'add', '-5', '3'], "result\n-2.0\n"),
+        (['multiply', '2', '4', '--format', 'jsonl'], '{"result": 8.0}\n'),
+    ):
+        captured_output = StringIO()
+        with patch('sys.argv', ['calculator', *argv]):
+            with patch('sys.stdout', captured_output):
+                main()
+        assert captured_output.getvalue() == expected
+    with patch('sys.argv', ['calculator', 'add', '1', '2', '--format', 'xml']):
+        with patch('sys.stderr', StringIO()):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 2
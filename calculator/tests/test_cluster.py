@@ -0,0 +1,113 @@
+from array import array
+from io import StringIO
+import socket
+import pytest
+from unittest.mock import patch
+from src.calculator import cluster
+from src.calculator.packed import process_file
+from src.calculator.parallel import ShardError
+
+
+def _write_pairs(path, values, typecode='d') -> str:
+    path.write_bytes(array(typecode, values).tobytes())
+    return str(path)
+
+
+def test_parse_address() -> None:
+    """Test HOST:PORT addresses are split and malformed ones rejected."""
+    assert cluster.parse_address("127.0.0.1:7000") == ("127.0.0.1", 7000)
+    assert cluster.parse_address("[::1]:0") == ("::1", 0)
+    for bad in ("localhost", "host:port", "host:70000"):
+        with pytest.raises(ValueError, match="HOST:PORT"):
+            cluster.parse_address(bad)
+
+
+def test_compute_chunk_matches_batch_output(tmp_path) -> None:
+    """Test a chunk computes the same bytes the local batch job writes."""
+    source = _write_pairs(tmp_path / "pairs.i64", range(-50, 50), 'q')
+    process_file('multiply', source, str(tmp_path / "local.i64"), dtype='i64')
+    payload = (tmp_path / "pairs.i64").read_bytes()
+    assert cluster.compute_chunk('multiply', 'q', 'q', payload) == (tmp_path / "local.i64").read_bytes()
+    with pytest.raises(ZeroDivisionError):
+        cluster.compute_chunk('divide', 'd', 'd', array('d', [1.0, 0.0]).tobytes())
+    with pytest.raises(ValueError, match="16-byte"):
+        cluster.compute_chunk('add', 'd', 'd', b"\0" * 8)
+
+
+def test_coordinator_reassigns_stalled_and_lost_leases(tmp_path) -> None:
+    """Test chunks held by a stalled or disconnected worker are leased again and the output stays ordered."""
+    source = _write_pairs(tmp_path / "pairs.f64", (i * 0.75 - 20.0 for i in range(2 * 3000)))
+    process_file('multiply', source, str(tmp_path / "local.f64"))
+    fakes = []
+
+    def connect_fakes(host: str, port: int) -> None:
+        # Both connect before any real worker starts, so each is leased a chunk
+        for name in (b"stalled", b"dropped"):
+            fake = socket.create_connection((host, port))
+            fake.sendall(cluster._message(cluster.HELLO, payload=name))
+            fakes.append(fake)
+        fakes[1].shutdown(socket.SHUT_WR)
+
+    try:
+        report = cluster.coordinate('multiply', source, str(tmp_path / "out.f64"), chunk_size=100,
+                                    lease_timeout=0.3, local_workers=3, on_listen=connect_fakes)
+    finally:
+        for fake in fakes:
+            fake.close()
+    assert (tmp_path / "out.f64").read_bytes() == (tmp_path / "local.f64").read_bytes()
+    workers = {worker.name: worker for worker in report.workers}
+    assert (workers["stalled"].timeouts, workers["stalled"].chunks) == (1, 0)
+    assert (workers["dropped"].lost, workers["dropped"].chunks) == (1, 0)
+    assert sum(workers[f"local-{i}"].pairs for i in range(3)) == 3000
+    assert sorted(report.retries.values()) == [1, 1]
+    assert "Retries: 2 over 2 chunk(s)" in report.format()
+
+
+def test_coordinator_reports_failed_chunks(tmp_path) -> None:
+    """Test worker errors and chunks that run out of attempts fail the job with their ranges."""
+    values = [1.0, 1.0] * 10
+    values[15] = 0.0
+    source = _write_pairs(tmp_path / "pairs.f64", values)
+    with pytest.raises(ShardError) as error:
+        cluster.coordinate('divide', source, str(tmp_path / "out.f64"), chunk_size=4, local_workers=2)
+    assert [failure.index for failure in error.value.failures] == [1]
+    assert "shard 1 [4, 8): ZeroDivisionError: Cannot divide by zero" in str(error.value)
+
+    stalled = []
+
+    def connect_stalled(host: str, port: int) -> None:
+        stalled.append(socket.create_connection((host, port)))
+        stalled[0].sendall(cluster._message(cluster.HELLO, payload=b"stalled"))
+
+    try:
+        with pytest.raises(ShardError, match=r"shard 0 \[0, 10\): no answer after 1 lease"):
+            cluster.coordinate('add', source, str(tmp_path / "out.f64"), lease_timeout=0.1,
+                               max_attempts=1, on_listen=connect_stalled)
+    finally:
+        stalled[0].close()
+
+
+def test_cli_coordinator_with_local_workers(tmp_path) -> None:
+    """Test the coordinator command runs a job on local workers and reports them."""
+    from src.calculator.__main__ import main
+    source = _write_pairs(tmp_path / "pairs.i64", range(400), 'q')
+    process_file('add', source, str(tmp_path / "local.npy"), dtype='i64')
+    captured_error = StringIO()
+    argv = ['calculator', 'coordinator', '--op', 'add', '--in', source, '--out', str(tmp_path / "out.npy"),
+            '--dtype', 'i64', '--chunk-size', '25', '--local-workers', '2']
+    with patch('sys.argv', argv), patch('sys.stderr', captured_error):
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    assert (tmp_path / "out.npy").read_bytes() == (tmp_path / "local.npy").read_bytes()
+    report = captured_error.getvalue()
+    assert report.startswith("Listening on 127.0.0.1:")
+    assert "Job: 200 pairs in 8 chunks" in report
+    assert "local-0" in report and "local-1" in report
+    captured_error = StringIO()
+    with patch('sys.argv', ['calculator', 'worker', '--connect', '127.0.0.1:1', '--connect-timeout', '0']):
+        with patch('sys.stderr', captured_error):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 1
+    assert captured_error.getvalue().startswith("Error: ")
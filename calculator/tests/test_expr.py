@@ -0,0 +1,109 @@
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from src.calculator import add, subtract, multiply, divide
+from src.calculator.expr import (
+    ExpressionError,
+    compile_expression,
+    evaluate,
+    normalize,
+)
+
+
+def test_evaluate_precedence_and_parentheses() -> None:
+    """Test operator precedence, associativity and grouping."""
+    assert evaluate("1 + 2 * 3") == 7
+    assert evaluate("(1 + 2) * 3") == 9
+    assert evaluate("10 - 4 - 3") == 3
+    assert evaluate("8 / 4 / 2") == 1.0
+    assert evaluate("-2 * -3") == 6
+    assert evaluate("-(1 + 2)") == -3
+
+
+def test_evaluate_matches_eager_functions() -> None:
+    """Test compiled expressions give the same results as chained calls."""
+    values = {"a": 1.5, "b": 2.25, "c": -3, "d": 7}
+    expected = divide(multiply(add(1.5, 2.25), -3), subtract(7, 1.5))
+    assert evaluate("(a + b) * c / (d - a)", values) == expected
+
+
+def test_compiled_expression_variables() -> None:
+    """Test variables are collected in order and bound by mapping or keyword."""
+    compiled = compile_expression("x * y + x")
+    assert compiled.variables == ("x", "y")
+    assert compiled({"x": 2}, y=5) == 12
+    with pytest.raises(ExpressionError, match="Undefined variable 'y'"):
+        compiled(x=1)
+
+
+def test_expression_errors_match_operations() -> None:
+    """Test runtime errors are the same ones the operations raise."""
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+        evaluate("a / (b - b)", a=1, b=2)
+    with pytest.raises(OverflowError):
+        evaluate("x * x", x=1e60)
+    with pytest.raises(TypeError):
+        evaluate("-x", x="1")
+
+
+def test_malformed_expressions() -> None:
+    """Test syntax errors raise ExpressionError."""
+    for source in ["", "1 +", "(1 + 2", "1 $ 2", "2 3", "()"]:
+        with pytest.raises(ExpressionError):
+            compile_expression(source)
+
+
+def test_integer_literals_are_checked() -> None:
+    """Test integer literals are range-checked against the active limit and overlong ones report their position."""
+    from src.calculator import limits
+    with pytest.raises(ExpressionError, match="at position 4 is too large"):
+        compile_expression("1 + " + "9" * 101)
+    with pytest.raises(ExpressionError, match="Integer literal at position 2 has 5000 digits"):
+        compile_expression("x*" + "1" * 5000)
+    assert evaluate("1000 - 1") == 999
+    limits.set_max_value(100)
+    try:
+        with pytest.raises(ExpressionError, match="Number 1000 at position 0 is too large"):
+            evaluate("1000 - 1")
+    finally:
+        limits.set_max_value(limits.DEFAULT_MAX_VALUE)
+    assert evaluate("1000 - 1") == 999
+
+
+def test_long_and_deeply_nested_expressions() -> None:
+    """Test long operator chains compile, and nesting past the recursion limit is an ExpressionError."""
+    assert evaluate("+".join(["1"] * 5000)) == 5000
+    assert evaluate(" - ".join(["x"] * 300) + " * -x", x=2) == 2 - 2 * 298 - 2 * -2
+    assert evaluate("-" * 300 + "x", x=2) == 2
+    with pytest.raises(ExpressionError, match="nested too deeply"):
+        compile_expression("(" * 5000 + "1" + ")" * 5000)
+
+
+def test_cache_is_keyed_by_normalized_text() -> None:
+    """Test different spellings of one formula share a compiled callable."""
+    assert normalize(" (a+b)*c ") == "( a + b ) * c"
+    assert compile_expression("(a+b)*c") is compile_expression("( a + b ) * c")
+
+
+def test_cli_eval_command() -> None:
+    """Test 'python -m calculator eval' with variables."""
+    with patch('sys.argv', ['calculator', 'eval', '(a + b) * c', '--var', 'a=1', '--var', 'b=2', '--var', 'c=3']):
+        from src.calculator.__main__ import main
+        captured_output = StringIO()
+        with patch('sys.stdout', captured_output):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+        assert exit_info.value.code == 0
+        assert captured_output.getvalue().strip() == "9.0"
+
+
+def test_cli_eval_command_error() -> None:
+    """Test evaluation errors are reported on stderr."""
+    with patch('sys.argv', ['calculator', 'eval', '1 / x', '--var', 'x=0']):
+        from src.calculator.__main__ import main
+        captured_output = StringIO()
+        with patch('sys.stderr', captured_output):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+        assert exit_info.value.code == 1
+        assert "Cannot divide by zero" in captured_output.getvalue()
@@ -0,0 +1,154 @@
+from array import array
+from decimal import ROUND_DOWN, ROUND_HALF_EVEN, ROUND_HALF_UP, Decimal, localcontext
+from io import StringIO
+import random
+import pytest
+from unittest.mock import patch
+from src.calculator import fixed
+from src.calculator.policy import DeferredRangeError, validation
+
+
+ROUNDINGS = {fixed.HALF_EVEN: ROUND_HALF_EVEN, fixed.HALF_UP: ROUND_HALF_UP, fixed.DOWN: ROUND_DOWN}
+
+
+def test_conversions() -> None:
+    """Test decimal strings, floats and ints convert exactly and format with the scale's digits."""
+    assert fixed.to_fixed("19.99") == 199900
+    assert fixed.to_fixed(0.1) == 1000
+    assert fixed.to_fixed(-3, 2) == -300
+    assert fixed.to_fixed("1.5e-3", 4) == 15
+    assert fixed.to_fixed("1.23455") == 12346
+    assert fixed.to_fixed("1.23445") == 12344
+    assert fixed.to_fixed("-1.23455", rounding=fixed.HALF_UP) == -12346
+    assert fixed.to_string(-5) == "-0.0005"
+    assert fixed.to_string(199900, 2) == "1999.00"
+    assert fixed.to_string(42, 0) == "42"
+    assert fixed.to_string(199925, 2, 1) == "1999.2" and fixed.to_string(199925, 2, 1, fixed.HALF_UP) == "1999.3"
+    assert fixed.to_string(-125, 2, 4) == "-1.2500" and fixed.to_string(-125, 2, 0, fixed.DOWN) == "-1"
+    for bad in ("", ".", "1.2.3", "abc", "1e", float('nan')):
+        with pytest.raises(ValueError):
+            fixed.to_fixed(bad)
+    with pytest.raises(ValueError, match="Scale"):
+        fixed.to_fixed("1", 19)
+    with pytest.raises(TypeError):
+        fixed.to_fixed(True)
+
+
+def test_conversion_exponents_are_bounded() -> None:
+    """Test huge exponents are refused or rounded to zero without building huge integers."""
+    for huge in ("1e99999999", "-0.5e999999999999", "1e110"):
+        with pytest.raises(OverflowError, match="is too large"):
+            fixed.to_fixed(huge)
+    assert fixed.to_fixed("1e100") == 10**104
+    assert fixed.to_fixed("1e18", 0) == 10**18
+    assert fixed.to_fixed("0e99999999") == 0
+    for rounding in fixed.ROUNDING_MODES:
+        assert fixed.to_fixed("-9.9e-99999999", rounding=rounding) == 0
+    assert fixed.to_fixed("9.9e-5") == 1
+    assert fixed.to_fixed("4.9e-5") == 0
+
+
+def test_scalar_operations_match_decimal() -> None:
+    """Test every operation and rounding mode gives the quantized Decimal result."""
+    rng = random.Random(21)
+    with localcontext() as context:
+        context.prec = 50
+        for scale in (0, 2, 4):
+            quantum = Decimal(1).scaleb(-scale)
+            for _ in range(300):
+                a = rng.randrange(-10**7, 10**7)
+                b = rng.choice([rng.randrange(-10**5, 10**5) or 1, 5 * 10**scale // 10 or 1, -2 * 10**scale])
+                da, db = Decimal(a).scaleb(-scale), Decimal(b).scaleb(-scale)
+                assert fixed.add(a, b, scale=scale) == a + b
+                assert fixed.subtract(a, b, scale=scale) == a - b
+                for rounding, mode in ROUNDINGS.items():
+                    product = fixed.multiply(a, b, scale=scale, rounding=rounding)
+                    quotient = fixed.divide(a, b, scale=scale, rounding=rounding)
+                    assert Decimal(product).scaleb(-scale) == (da * db).quantize(quantum, rounding=mode)
+                    assert Decimal(quotient).scaleb(-scale) == (da / db).quantize(quantum, rounding=mode)
+
+
+def test_scalar_errors_and_range_check() -> None:
+    """Test zero divisors, non-integer operands and out-of-range values are rejected like the float operations."""
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+        fixed.divide(10000, 0)
+    with pytest.raises(TypeError, match="units"):
+        fixed.add(1.5, 2)
+    with pytest.raises(ValueError, match="rounding"):
+        fixed.multiply(1, 2, rounding='up')
+    assert fixed.add(9990000, 10000, max_value=1000) == 10000000
+    with pytest.raises(OverflowError, match=r"Result 1000.0001 is too large \(max: 1000\)"):
+        fixed.add(9990000, 10001, max_value=1000)
+    with pytest.raises(DeferredRangeError) as error:
+        with validation("deferred"):
+            assert fixed.multiply(10**6 * 10000, 10**6 * 10000, max_value=10**11) == 10**12 * 10000
+    assert len(error.value.violations) == 1
+
+
+@pytest.mark.parametrize("rounding", list(ROUNDINGS))
+def test_batches_match_scalar(rounding) -> None:
+    """Test the batch functions match the scalar ones on int64 buffers, ties and negative divisors included."""
+    rng = random.Random(len(rounding))
+    xs = array('q', (rng.randrange(-10**8, 10**8) for _ in range(500)))
+    ys = array('q', (rng.choice([rng.randrange(-10**6, 10**6) or 3, 5000, -20000]) for _ in range(500)))
+    for batch_func, scalar in ((fixed.batch_multiply, fixed.multiply), (fixed.batch_divide, fixed.divide)):
+        result = batch_func(xs, ys, rounding=rounding)
+        assert result.typecode == 'q'
+        assert list(result) == [scalar(x, y, rounding=rounding) for x, y in zip(xs, ys)]
+    assert list(fixed.batch_add(list(xs), ys)) == [x + y for x, y in zip(xs, ys)]
+    assert list(fixed.batch_subtract(xs, ys)) == [x - y for x, y in zip(xs, ys)]
+
+
+def test_batch_errors() -> None:
+    """Test batches reject bad operands, zero divisors and results outside int64 or the range limit."""
+    with pytest.raises(ZeroDivisionError):
+        fixed.batch_divide(array('q', [1, 2]), array('q', [1, 0]))
+    with pytest.raises(TypeError, match="integer array"):
+        fixed.batch_add(array('d', [1.0]), array('q', [1]))
+    with pytest.raises(TypeError, match="units"):
+        fixed.batch_add([1, 2.5], [1, 2])
+    with pytest.raises(ValueError, match="lengths differ"):
+        fixed.batch_add([1], [1, 2])
+    with pytest.raises(OverflowError, match="64-bit"):
+        fixed.batch_add(array('q', [2**62]), array('q', [2**62]))
+    with pytest.raises(OverflowError, match="is too large"):
+        fixed.batch_multiply(array('q', [1, 10**8]), array('q', [1, 10**8]), max_value=10**5)
+    with pytest.raises(DeferredRangeError) as error:
+        with validation("deferred"):
+            fixed.batch_add([10**9 + 1, 1, 10**9], [0, 1, 1], max_value=10**5)
+    assert len(error.value.violations) == 2
+
+
+def test_cli_fixed_mode() -> None:
+    """Test --fixed parses operands exactly and prints the result with the scale's digits."""
+    from src.calculator.__main__ import main
+    for argv, expected in (
+        (['--fixed', '2', 'add', '0.1', '0.2'], "0.30\n"),
+        (['--fixed', '4', 'div', '10', '3'], "3.3333\n"),
+        (['--fixed', '0', 'multiply', '2.5', '1', '--rounding', 'half-up'], "3\n"),
+        (['--fixed', '4', 'div', '10', '3', '--precision', '2'], "3.33\n"),
+        (['--fixed', '2', 'add', '0.1', '0.2', '--precision', '4', '--format', 'jsonl'], '{"result": 0.3000}\n'),
+        (['--fixed', '2', 'sub', '0.05', '0.16', '--format', 'csv', '--precision', '1', '--rounding', 'down'],
+         "result\n-0.1\n"),
+    ):
+        captured_output = StringIO()
+        with patch('sys.argv', ['calculator', *argv]):
+            with patch('sys.stdout', captured_output):
+                with pytest.raises(SystemExit) as exit_info:
+                    main()
+        assert exit_info.value.code == 0
+        assert captured_output.getvalue() == expected
+    captured_error = StringIO()
+    with patch('sys.argv', ['calculator', '--fixed', '2', 'divide', '1', '0']):
+        with patch('sys.stderr', captured_error):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 1
+    assert captured_error.getvalue() == "Error: Cannot divide by zero\n"
+    captured_error = StringIO()
+    with patch('sys.argv', ['calculator', '--fixed', '2', 'add', '1e99999999', '1']):
+        with patch('sys.stderr', captured_error):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 1
+    assert captured_error.getvalue() == "Error: Number '1e99999999' is too large\n"
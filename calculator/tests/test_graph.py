@@ -0,0 +1,128 @@
+from array import array
+import math
+import pytest
+from src.calculator import add, subtract, multiply, divide
+from src.calculator import batch, registry
+from src.calculator.graph import Expr, const, var
+
+
+def test_operators_build_a_lazy_graph() -> None:
+    """Test arithmetic on Expr records nodes instead of computing."""
+    x, y = var("x"), var("y")
+    e = (x + 1) * y - 2 / x
+    assert isinstance(e, Expr)
+    assert repr(e) == "(((x + 1) * y) - (2 / x))"
+    assert e.variables == ("x", "y")
+
+
+def test_evaluate_matches_eager_functions() -> None:
+    """Test scalar evaluation equals the nested eager calls."""
+    a, b, c, d = var("a"), var("b"), var("c"), var("d")
+    e = (a * b) + (c / d) - a
+    expected = subtract(add(multiply(1.5, 4), divide(7, 2)), 1.5)
+    assert e.evaluate(a=1.5, b=4, c=7, d=2) == expected
+    assert e({"a": 1.5, "b": 4}, c=7, d=2) == expected
+
+
+def test_common_subexpressions_are_computed_once() -> None:
+    """Test structurally equal subexpressions share one node and one call."""
+    x, y = var("x"), var("y")
+    e = (x + y) * (x + y) + (x + y)
+    simplified = e.simplify()
+    assert e.node_count() == 7
+    assert simplified.node_count() == 5
+    calls = []
+
+    def counting_add(p, q):
+        calls.append((p, q))
+        return add(p, q)
+
+    registry.replace_kernels('add', counting_add, batch.add)
+    try:
+        assert e.evaluate(x=1, y=2) == 12
+    finally:
+        registry.replace_kernels('add', add, batch.add)
+    assert calls == [(1, 2), (9, 3)]
+
+
+def test_folded_constants_follow_the_policy_and_limit() -> None:
+    """Test a plan built under one policy or limit does not hide range errors under another."""
+    from src.calculator import DeferredRangeError, get_max_value, set_max_value, validation
+    x = var("x")
+    e = x + const(1e60) * 1e60
+    with pytest.raises(DeferredRangeError):
+        with validation("deferred"):
+            e.evaluate(x=1.0)
+    with pytest.raises(OverflowError, match="is too large"):
+        e.evaluate(x=1.0)
+    small = x + const(1000) * 1000
+    assert small.evaluate(x=1) == 1_000_001
+    saved = get_max_value()
+    set_max_value(10**5)
+    try:
+        with pytest.raises(OverflowError, match="is too large"):
+            small.evaluate(x=1)
+    finally:
+        set_max_value(saved)
+    assert small.evaluate(x=1) == 1_000_001
+
+
+def test_signed_zero_and_nan_constants() -> None:
+    """Test 0.0 and -0.0 are not merged, while NaN constants are."""
+    x, y = var("x"), var("y")
+    e = const(0.0) * y + (x - const(-0.0))
+    assert e.simplify().node_count() == 7
+    expected = add(multiply(0.0, -1.0), subtract(-0.0, -0.0))
+    assert math.copysign(1.0, e.evaluate(x=-0.0, y=-1.0)) == math.copysign(1.0, expected) == 1.0
+    nan = float("nan")
+    assert (x * nan + x * nan).simplify().node_count() == 4
+
+
+def test_constant_folding() -> None:
+    """Test constant subexpressions are folded with the eager functions."""
+    x = var("x")
+    e = x * (const(2) + 3) / (const(10) - 6)
+    simplified = e.simplify()
+    assert repr(simplified) == "((x * 5) / 4)"
+    assert e.evaluate(x=2) == divide(multiply(2, 5), 4)
+
+
+def test_errors_match_eager_functions() -> None:
+    """Test evaluation raises the same exceptions, even for constant parts."""
+    x = var("x")
+    e = x + const(1) / 0
+    assert e.simplify().node_count() == 5
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+        e.evaluate(x=1)
+    with pytest.raises(OverflowError):
+        (x * x).evaluate(x=1e60)
+    with pytest.raises(TypeError):
+        (x + 1).evaluate(x="1")
+    with pytest.raises(TypeError):
+        const("1")
+
+
+def test_evaluate_batch() -> None:
+    """Test batch evaluation matches scalar evaluation row by row."""
+    x, y = var("x"), var("y")
+    e = (x + y) * (x + y) / 2 - y
+    xs = array('d', [1.0, 2.5, -3.0])
+    ys = array('d', [0.5, 4.0, 7.0])
+    result = e.evaluate_batch({"x": xs, "y": ys})
+    assert list(result) == [e.evaluate(x=a, y=b) for a, b in zip(xs, ys)]
+
+
+def test_evaluate_batch_constant_graph() -> None:
+    """Test a graph without variables broadcasts its value."""
+    e = const(2) * 3 + var("x") * 0 - var("x") * 0
+    assert list((const(2) * 3).evaluate_batch({"x": [1, 2]})) == [6, 6]
+    assert list(e.evaluate_batch({"x": [1, 2]})) == [6, 6]
+
+
+def test_evaluate_batch_errors() -> None:
+    """Test batch evaluation raises like the batch functions."""
+    x = var("x")
+    with pytest.raises(ZeroDivisionError):
+        (1 / x).evaluate_batch({"x": [1.0, 0.0]})
+    with pytest.raises(ValueError, match="different lengths"):
+        (x + var("y")).evaluate_batch({"x": [1], "y": [1, 2]})
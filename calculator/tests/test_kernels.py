@@ -0,0 +1,118 @@
+from array import array
+import math
+import operator
+import random
+import struct
+import pytest
+from src.calculator import batch, get_max_value, set_max_value
+from src.calculator.policy import DeferredRangeError, validation
+
+
+OPERATIONS = [
+    (batch.add, operator.add),
+    (batch.subtract, operator.sub),
+    (batch.multiply, operator.mul),
+    (batch.divide, operator.truediv),
+]
+
+_FLOATS = [0.0, -0.0, 1.5, -2.25, 1e-320, 5e-324, 1e50, -1e50, 1e100, -1e100, math.nextafter(1e100, math.inf),
+           1e200, float('inf'), float('-inf'), float('nan'), 1e308]
+
+_INTS = [0, 1, -1, 7, 2**31 - 1, -2**31, 2**53 + 1, 2**63 - 1, -2**63, 2**64, 10**50, -10**50, 10**100,
+         10**100 + 1, 3]
+
+
+@pytest.fixture
+def small_limit():
+    """Lower the process-wide limit so that more results are out of range."""
+    saved = get_max_value()
+    set_max_value(10**18)
+    yield
+    set_max_value(saved)
+
+
+def _generic(op, xs, ys, policy=None):
+    """Run the generic kernel, as every batch did before specialization."""
+    xs, ys, _ = batch._prepare(xs, ys, policy or 'strict')
+    if op is operator.truediv and 0 in ys:
+        raise ZeroDivisionError("Cannot divide by zero")
+    return batch._generic_kernel(op, xs, ys, policy or 'strict')
+
+
+def _outcome(func, *args, **kwargs):
+    """Return (type name, typecode, packed bytes) of a result, or the exception raised."""
+    try:
+        result = func(*args, **kwargs)
+    except (OverflowError, ZeroDivisionError, TypeError) as e:
+        return type(e).__name__, str(e)
+    if isinstance(result, array):
+        return 'array', result.typecode, result.tobytes()
+    return type(result).__name__, [struct.pack('<d', v) if isinstance(v, float) else v for v in result]
+
+
+def _cases(rng: random.Random):
+    for _ in range(150):
+        size = rng.randrange(1, 6)
+        kind = rng.choice(['float', 'int', 'int32', 'int64', 'mixed'])
+        if kind == 'float':
+            xs, ys = (array('d', rng.choices(_FLOATS, k=size)) for _ in range(2))
+            if rng.random() < 0.5:
+                xs, ys = list(xs), list(ys)
+        elif kind == 'int':
+            xs, ys = (rng.choices(_INTS, k=size) for _ in range(2))
+        elif kind == 'int32':
+            xs, ys = (array('i', rng.choices(_INTS[:6] + [3], k=size)) for _ in range(2))
+        elif kind == 'int64':
+            xs, ys = (array('q', rng.choices(_INTS[:9] + [3], k=size)) for _ in range(2))
+            if rng.random() < 0.5:
+                ys = memoryview(ys)
+        else:
+            xs, ys = (rng.choices(_INTS[:6] + _FLOATS[:6] + [True], k=size) for _ in range(2))
+        yield xs, ys
+
+
+@pytest.mark.parametrize("limit", [None, 10**18])
+def test_specialized_kernels_match_generic(limit) -> None:
+    """Test every kernel gives bit-identical results and identical errors to the generic path."""
+    saved = get_max_value()
+    if limit is not None:
+        set_max_value(limit)
+    try:
+        for xs, ys in _cases(random.Random(limit or 19)):
+            for batch_func, op in OPERATIONS:
+                assert _outcome(batch_func, xs, ys) == _outcome(_generic, op, xs, ys), (batch_func, xs, ys)
+    finally:
+        set_max_value(saved)
+
+
+def test_profiles() -> None:
+    """Test operand type profiles come from format codes or element types."""
+    assert batch._profile(array('d', [1.0])) == (batch.FLOAT, None)
+    assert batch._profile(memoryview(array('i', [1]))) == (batch.INT, 32)
+    assert batch._profile([1, 2]) == (batch.INT, None)
+    assert batch._profile([1.0, 2.0]) == (batch.FLOAT, None)
+    assert batch._profile([1, 2.0]) == (batch.MIXED, None)
+    assert batch._profile([True, 1]) == (batch.MIXED, None)
+    assert batch._profile(array('u', 'ab'))[0] == batch.MIXED
+
+
+def test_int_bounds_skip_and_catch(small_limit) -> None:
+    """Test typed int batches that may reach the limit are still checked."""
+    assert list(batch.add(array('i', [2**31 - 1]), array('i', [2**31 - 1]))) == [2**32 - 2]
+    with pytest.raises(OverflowError, match="is too large"):
+        batch.multiply(array('i', [2**31 - 1]), array('i', [2**31 - 1]))
+    assert list(batch.multiply(array('q', [2**62]), array('q', [0]))) == [0]
+
+
+def test_deferred_violations_match_generic(small_limit) -> None:
+    """Test the specialized kernels record the same deferred violations."""
+    xs = array('d', [1e20, 2.0, float('nan'), -1e30])
+    ys = array('d', [1.0, 3.0, 1.0, 1.0])
+    for batch_func, op in OPERATIONS:
+        with pytest.raises(DeferredRangeError) as specialized:
+            with validation("deferred"):
+                batch_func(xs, ys)
+        with pytest.raises(DeferredRangeError) as generic:
+            with validation("deferred"):
+                _generic(op, xs, ys, 'deferred')
+        assert [str(e) for e in specialized.value.violations] == [str(e) for e in generic.value.violations]
@@ -0,0 +1,86 @@
+import math
+import pytest
+from src.calculator import (
+    DEFAULT_MAX_VALUE,
+    add,
+    batch,
+    multiply,
+    subtract,
+    _check_result_range,
+    get_max_value,
+    set_max_value,
+)
+from src.calculator.limits import RangeLimit
+
+
+@pytest.fixture
+def restore_limit():
+    """Restore the process-wide limit after the test."""
+    yield
+    set_max_value(DEFAULT_MAX_VALUE)
+
+
+def test_int_boundary_is_exact() -> None:
+    """Test integers at and just past the limit, including same-bit-length values."""
+    _check_result_range(10**100)
+    _check_result_range(-(10**100))
+    with pytest.raises(OverflowError) as error:
+        _check_result_range(10**100 + 1)
+    assert str(error.value) == f"Result {10**100 + 1} is too large (max: {10**100})"
+    with pytest.raises(OverflowError):
+        _check_result_range(-(10**100) - 1)
+    # Same bit length as 10**100 but larger
+    with pytest.raises(OverflowError):
+        _check_result_range(2 ** (10**100).bit_length() - 1)
+
+
+def test_float_boundary_matches_exact_comparison() -> None:
+    """Test floats are out of range exactly when they exceed the limit."""
+    limit = RangeLimit(10**100)
+    below = math.nextafter(1e100, 0.0)
+    assert below < 10**100 < 1e100
+    _check_result_range(below)
+    _check_result_range(math.nan)
+    for value in (1e100, -1e100, math.inf, -math.inf):
+        assert limit.exceeds(value)
+        with pytest.raises(OverflowError) as error:
+            _check_result_range(value)
+        assert str(error.value) == f"Result {value} is too large (max: {10**100})"
+    assert not limit.exceeds(math.nan)
+
+
+def test_float_limit_for_exact_and_huge_limits() -> None:
+    """Test the float bound when the limit is a float itself or exceeds float range."""
+    assert RangeLimit(2**60).float_limit == math.nextafter(2.0**60, math.inf)
+    assert RangeLimit(10**400).float_limit == math.inf
+    RangeLimit(10**400).check(1e308)
+    with pytest.raises(OverflowError):
+        RangeLimit(10**400).check(math.inf)
+
+
+def test_per_call_limit() -> None:
+    """Test max_value applies to a single call."""
+    big = 10**299
+    assert add(big, big, max_value=10**300) == 2 * big
+    with pytest.raises(OverflowError, match=r"\(max: 1000\)"):
+        multiply(40, 40, max_value=1000)
+    assert multiply(40, 40) == 1600
+
+
+def test_process_wide_limit(restore_limit) -> None:
+    """Test set_max_value changes the scalar and batch limit."""
+    set_max_value(10**6)
+    assert get_max_value() == 10**6
+    with pytest.raises(OverflowError, match=r"\(max: 1000000\)"):
+        subtract(0, 10**6 + 1)
+    with pytest.raises(OverflowError, match=r"\(max: 1000000\)"):
+        batch.add([1.0, 1e6], [1.0, 1.0])
+    assert add(10**6, 0, max_value=10**7) == 10**6
+
+
+def test_invalid_limit() -> None:
+    """Test non-positive and non-integer limits are rejected."""
+    for value in (0, -5, 1.5, True):
+        with pytest.raises(ValueError):
+            set_max_value(value)
+    assert get_max_value() == DEFAULT_MAX_VALUE
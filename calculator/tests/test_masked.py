@@ -0,0 +1,136 @@
+from array import array
+import math
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from src.calculator import add, batch, divide, masked, multiply, registry
+from src.calculator.masked import (
+    STATUS_INVALID,
+    STATUS_OK,
+    STATUS_OVERFLOW,
+    STATUS_TYPE,
+    STATUS_ZERO_DIVISION,
+)
+from src.calculator.packed import process_file
+from src.calculator.stream import process_stream
+
+
+def _same(values, expected) -> bool:
+    """Compare results, treating NaN as equal to NaN."""
+    return len(values) == len(expected) and all(a == b or (a != a and b != b) for a, b in zip(values, expected))
+
+
+def test_clean_batch_matches_batch_functions() -> None:
+    """Test a batch without errors returns the calculator.batch results."""
+    xs = array('d', [1.5, -2.0, 1e50])
+    ys = array('d', [2.0, 4.0, 3.0])
+    for name in ('add', 'subtract', 'multiply', 'divide'):
+        outcome = getattr(masked, name)(xs, ys)
+        assert list(outcome.values) == list(getattr(batch, name)(xs, ys))
+        assert list(outcome.status) == [STATUS_OK] * 3
+        assert outcome.ok and outcome.errors == 0
+
+
+def test_errors_are_masked_per_element() -> None:
+    """Test each failing element gets its status code and a NaN result."""
+    outcome = masked.divide([1.0, 2.0, "x", 1e300, 6], [2.0, 0.0, 1.0, 1e-300, 3])
+    assert list(outcome.status) == [STATUS_OK, STATUS_ZERO_DIVISION, STATUS_TYPE, STATUS_OVERFLOW, STATUS_OK]
+    assert _same(list(outcome.values), [0.5, math.nan, math.nan, math.nan, 2.0])
+    assert outcome.errors == 3
+    assert len(outcome) == 5
+
+
+def test_statuses_match_scalar_exceptions() -> None:
+    """Test the status of every element matches what the scalar function raises."""
+    xs = [10**99, 10**400, 3, 5, 1e60]
+    ys = [10, 1.5, None, 0, 1e60]
+    outcome = masked.multiply(xs, ys)
+    for x, y, status, value in zip(xs, ys, outcome.status, outcome.values):
+        try:
+            expected = multiply(x, y)
+        except (TypeError, OverflowError) as e:
+            assert status == masked.status_of(e)
+            assert math.isnan(value)
+        else:
+            assert (status, value) == (STATUS_OK, expected)
+
+
+def test_integer_results_stay_exact() -> None:
+    """Test integer batches keep exact results next to masked slots."""
+    outcome = masked.add([2**53 + 1, 1, "a"], [1, 2, 3])
+    assert list(outcome.status) == [STATUS_OK, STATUS_OK, STATUS_TYPE]
+    assert outcome.values[:2] == [2**53 + 2, 3]
+
+
+def test_raise_mode_keeps_old_behavior() -> None:
+    """Test errors='raise' raises the first error like calculator.batch."""
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+        masked.divide([1.0, 2.0], [1.0, 0.0], errors='raise')
+    outcome = masked.add([1, 2], [3, 4], errors='raise')
+    assert list(outcome.values) == [4, 6] and outcome.ok
+    with pytest.raises(ValueError, match="Unknown errors mode"):
+        masked.add([1], [1], errors='ignore')
+    with pytest.raises(ValueError, match="differ"):
+        masked.add([1], [1, 2])
+
+
+def test_registered_operation_is_masked() -> None:
+    """Test operations without a C kernel are masked through their scalar function."""
+    registry.register('modulo', lambda a, b: a % b, aliases=('mod',))
+    try:
+        outcome = masked.evaluate('mod', [7, 7, 7], [2, 0, "x"])
+    finally:
+        registry.unregister('modulo')
+    assert list(outcome.status) == [STATUS_OK, STATUS_ZERO_DIVISION, STATUS_TYPE]
+    assert outcome.values[0] == 1
+
+
+def test_stream_status_column() -> None:
+    """Test stream rows carry a status code column when requested."""
+    output = StringIO()
+    stats = process_stream(StringIO("add 1 2\ndivide 1 0\nfoo 1 2\nmultiply 1e60 1e60\n"), output,
+                           status_column=True)
+    assert output.getvalue().splitlines() == [
+        f"{add(1.0, 2.0)}\t{STATUS_OK}",
+        f"nan\t{STATUS_ZERO_DIVISION}",
+        f"nan\t{STATUS_INVALID}",
+        f"nan\t{STATUS_OVERFLOW}",
+    ]
+    assert stats.errors == 3
+
+
+def test_packed_status_file(tmp_path) -> None:
+    """Test a status file records failing pairs instead of aborting the job."""
+    source = tmp_path / "pairs.f64"
+    source.write_bytes(array('d', [1.0, 2.0, 1.0, 0.0, 1e300, 1e-300, 9.0, 3.0]).tobytes())
+    target = tmp_path / "results.f64"
+    codes = tmp_path / "status.u8"
+    process_file('divide', str(source), str(target), chunk_size=3, status_path=str(codes))
+    assert list(codes.read_bytes()) == [STATUS_OK, STATUS_ZERO_DIVISION, STATUS_OVERFLOW, STATUS_OK]
+    assert _same(array('d', target.read_bytes()).tolist(), [0.5, math.nan, math.nan, divide(9.0, 3.0)])
+
+
+def test_packed_status_file_int64(tmp_path) -> None:
+    """Test failing int64 results are written as 0 and flagged, including int64 overflow."""
+    source = tmp_path / "pairs.i64"
+    source.write_bytes(array('q', [2**62, 2**62, 5, 6]).tobytes())
+    target = tmp_path / "results.i64"
+    codes = tmp_path / "status.u8"
+    process_file('add', str(source), str(target), dtype='i64', status_path=str(codes))
+    assert list(codes.read_bytes()) == [STATUS_OVERFLOW, STATUS_OK]
+    assert array('q', target.read_bytes()).tolist() == [0, 11]
+
+
+def test_cli_batch_status(tmp_path) -> None:
+    """Test 'batch --status' writes the status file and exits successfully."""
+    source = tmp_path / "pairs.f64"
+    source.write_bytes(array('d', [1.0, 0.0, 4.0, 2.0]).tobytes())
+    target = tmp_path / "results.f64"
+    codes = tmp_path / "status.u8"
+    with patch('sys.argv', ['calculator', 'batch', '--op', 'div', '--in', str(source),
+                            '--out', str(target), '--status', str(codes)]):
+        from src.calculator.__main__ import main
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    assert list(codes.read_bytes()) == [STATUS_ZERO_DIVISION, STATUS_OK]
@@ -0,0 +1,130 @@
+import json
+import pytest
+from io import StringIO
+from src.calculator import add, batch, metrics, registry
+from src.calculator.server import FRAME_HEADER, decode_response, encode_request, handle_binary_payload, handle_json_request
+from src.calculator.stream import process_stream
+
+
+@pytest.fixture
+def collecting():
+    """Collect metrics from zero for the duration of the test."""
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+def test_disabled_leaves_kernels_untouched() -> None:
+    """Test nothing is wrapped unless metrics are enabled, and disable() restores the kernels."""
+    import src.calculator as calculator
+    assert not metrics.is_enabled()
+    assert registry.lookup('add').scalar is add
+    batch_add = batch.add
+    metrics.enable()
+    metrics.enable()
+    try:
+        op = registry.lookup('plus')
+        assert op.scalar is not add and op.scalar.__wrapped__ is add
+        assert op.batch.__wrapped__ is batch_add
+        assert calculator.add is op.scalar and batch.add is op.batch
+        assert [op.name for op in registry.operations()] == ['add', 'subtract', 'multiply', 'divide']
+    finally:
+        metrics.disable()
+    assert registry.lookup('add').scalar is add is calculator.add
+    assert registry.lookup('add').batch is batch_add is batch.add
+
+
+def test_calls_and_errors_are_counted(collecting) -> None:
+    """Test calls from the entry points are counted per kernel, and errors per exception type."""
+    output = StringIO()
+    process_stream(StringIO("add 1 2\nadd 3 4\ndivide 1 0\nmultiply 1e60 1e60\n"), output)
+    registry.lookup('div').batch([1.0, 2.0], [4.0, 8.0])
+    figures = metrics.snapshot()
+    assert figures['enabled']
+    operations = figures['operations']
+    assert operations['add']['scalar']['calls'] == 2
+    assert operations['divide']['scalar']['errors'] == {'ZeroDivisionError': 1}
+    assert operations['multiply']['scalar']['errors'] == {'OverflowError': 1}
+    assert operations['divide']['batch']['calls'] == 1
+    assert figures['range_rejections'] == 1
+    buckets = operations['add']['scalar']['buckets']
+    assert buckets[-1] == (float('inf'), 2)
+    assert [count for _, count in buckets] == sorted(count for _, count in buckets)
+
+
+def test_direct_package_calls_are_counted(collecting) -> None:
+    """Test direct calls to calculator and calculator.batch functions and compiled expressions are counted."""
+    import src.calculator as calculator
+    from src.calculator.expr import compile_expression
+    calculator.add(1, 2)
+    calculator.subtract(5, 3)
+    batch.add([1.0], [2.0])
+    compile_expression('x * 2')(x=3.0)
+    operations = metrics.snapshot()['operations']
+    assert operations['add']['scalar']['calls'] == 1
+    assert operations['subtract']['scalar']['calls'] == 1
+    assert operations['add']['batch']['calls'] == 1
+    assert operations['multiply']['scalar']['calls'] == 1
+
+
+def test_range_rejections_are_not_counted_when_disabled() -> None:
+    """Test the range check only reports rejections while metrics are enabled."""
+    metrics.reset()
+    with pytest.raises(OverflowError):
+        add(1e100, 1e100)
+    assert metrics.snapshot()['range_rejections'] == 0
+
+
+def test_prometheus_text(collecting, tmp_path) -> None:
+    """Test the exposition text has counters, per-type errors and a cumulative histogram."""
+    registry.lookup('add').scalar(1, 2)
+    with pytest.raises(ZeroDivisionError):
+        registry.lookup('divide').scalar(1, 0)
+    text = metrics.render()
+    lines = text.splitlines()
+    assert '# TYPE calculator_operation_duration_seconds histogram' in lines
+    assert 'calculator_operation_calls_total{operation="add",kind="scalar"} 1' in lines
+    assert ('calculator_operation_errors_total{operation="divide",kind="scalar",type="ZeroDivisionError"} 1'
+            in lines)
+    assert 'calculator_range_rejections_total 0' in lines
+    assert 'calculator_operation_duration_seconds_bucket{operation="add",kind="scalar",le="+Inf"} 1' in lines
+    assert 'calculator_operation_duration_seconds_count{operation="add",kind="scalar"} 1' in lines
+    assert 'calculator_operation_duration_seconds_bucket{operation="add",kind="scalar",le="1.28e-07"}' in text
+    target = tmp_path / "calculator.prom"
+    metrics.write(str(target))
+    assert target.read_text() == metrics.render()
+    assert [p.name for p in tmp_path.iterdir()] == ["calculator.prom"]
+
+
+def test_server_requests_are_measured(collecting) -> None:
+    """Test binary frames go through the registry and the metrics command returns the text."""
+    frame = encode_request([(1, 1.0, 2.0), (4, 1.0, 0.0)])
+    payload = handle_binary_payload(frame[FRAME_HEADER.size:])
+    assert [status for status, _ in decode_response(payload[FRAME_HEADER.size:])] == [0, 1]
+    response = json.loads(handle_json_request(b'{"id": 9, "command": "metrics"}'))
+    assert response["id"] == 9
+    assert 'calculator_operation_calls_total{operation="add",kind="scalar"} 1' in response["metrics"]
+
+
+def test_counts_are_exact_across_threads(collecting) -> None:
+    """Test calls from several threads at once are all counted, as are masked batches and graphs."""
+    import threading
+    from src.calculator import masked
+    from src.calculator.graph import var
+
+    def work() -> None:
+        scalar = registry.lookup('add').scalar
+        for i in range(2000):
+            scalar(i, 1)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    masked.evaluate('add', [1, 2, "x"], [3, 4, 5])
+    (var("x") + var("y")).evaluate(x=1, y=2)
+    figures = metrics.snapshot()['operations']['add']['scalar']
+    assert figures['calls'] == 8000 + 2 + 1
@@ -0,0 +1,125 @@
+from array import array
+import csv
+import json
+import pytest
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from src.calculator.masked import STATUS_OK, STATUS_ZERO_DIVISION
+from src.calculator.output import OutputFormat, ResultWriter, format_numbers
+from src.calculator.parallel import process_stream_parallel
+from src.calculator.stream import process_stream
+
+
+RECORDS = "add 1 2\ndivide 1 0\nmultiply 2.5 4\n"
+
+ERROR = "line 2: Cannot divide by zero"
+
+
+def _write(fmt: OutputFormat, results: list, inputs: list | None = None, errors: dict | None = None) -> str:
+    output = StringIO()
+    writer = ResultWriter(output, fmt)
+    writer.write_rows(results, inputs, errors)
+    writer.flush()
+    return output.getvalue()
+
+
+def test_text_rows() -> None:
+    """Test text rows match print() by default and carry echo and status columns on request."""
+    results = [3.0, float('nan'), 10, 2**80]
+    errors = {1: (STATUS_ZERO_DIVISION, ERROR)}
+    assert _write(OutputFormat(), results, errors=errors) == f"3.0\nerror: {ERROR}\n10\n{2**80}\n"
+    assert _write(OutputFormat(status=True), results[:2], errors=errors) == (
+        f"3.0\t{STATUS_OK}\nnan\t{STATUS_ZERO_DIVISION}\n")
+    assert _write(OutputFormat(echo=True), [3.0], ["add 1 2"]) == "add 1 2\t3.0\n"
+    assert _write(OutputFormat(), []) == ""
+
+
+def test_precision_keeps_integers_exact() -> None:
+    """Test fixed precision applies to floats only."""
+    assert format_numbers([1 / 3, 2**70, -0.5], 3) == ["0.333", str(2**70), "-0.500"]
+    assert format_numbers([0.1, 7]) == ["0.1", "7"]
+
+
+def test_jsonl_rows() -> None:
+    """Test JSON lines hold the requested fields, null for non-finite results and error messages."""
+    text = _write(OutputFormat('jsonl', echo=True, status=True), [3.0, float('nan'), float('inf')],
+                  ['add 1 2', 'divide "1" 0', 'multiply inf 1'], {1: (STATUS_ZERO_DIVISION, ERROR)})
+    assert [json.loads(line) for line in text.splitlines()] == [
+        {"input": "add 1 2", "result": 3.0, "status": STATUS_OK},
+        {"input": 'divide "1" 0', "result": None, "error": ERROR, "status": STATUS_ZERO_DIVISION},
+        {"input": "multiply inf 1", "result": None, "status": STATUS_OK},
+    ]
+    assert json.loads(_write(OutputFormat('jsonl', precision=2), [2 / 3])) == {"result": 0.67}
+
+
+def test_csv_rows_are_quoted() -> None:
+    """Test CSV output has a header and quotes fields that need it."""
+    text = _write(OutputFormat('csv', echo=True), [3.0, float('nan')], ['add 1 2', 'add "1,2" 3'],
+                  {1: (STATUS_ZERO_DIVISION, "line 2: Expected '<operation> <num1> <num2>', got 4 fields")})
+    assert list(csv.reader(StringIO(text))) == [
+        ["input", "result"],
+        ["add 1 2", "3.0"],
+        ['add "1,2" 3', "error: line 2: Expected '<operation> <num1> <num2>', got 4 fields"],
+    ]
+    assert _write(OutputFormat('csv', status=True), []) == "result,status\n"
+
+
+def test_f64_rows() -> None:
+    """Test f64 output packs results, NaN for failed rows, and rejects extra columns."""
+    output = BytesIO()
+    ResultWriter(output, OutputFormat('f64')).write_rows([3.0, 0.0, 10], errors={1: (STATUS_ZERO_DIVISION, ERROR)})
+    values = array('d', output.getvalue())
+    assert values[0] == 3.0 and values[1] != values[1] and values[2] == 10.0
+    with pytest.raises(ValueError, match="results only"):
+        OutputFormat('f64', status=True)
+    with pytest.raises(ValueError, match="Unknown output format"):
+        OutputFormat('xml')
+    with pytest.raises(OverflowError, match="f64"):
+        ResultWriter(BytesIO(), OutputFormat('f64')).write_rows([10**400])
+
+
+def test_parallel_stream_formats_match_sequential(tmp_path) -> None:
+    """Test sharded stream output, including the CSV header and f64 rows, matches the sequential run."""
+    source = tmp_path / "records.txt"
+    source.write_text("".join(f"divide {i} {i % 7}\n" for i in range(500)))
+    for fmt in (OutputFormat('csv', echo=True, status=True), OutputFormat('jsonl')):
+        expected = StringIO()
+        process_stream(source.read_text().splitlines(True), expected, output_format=fmt)
+        actual = StringIO()
+        process_stream_parallel(str(source), actual, 3, output_format=fmt)
+        assert actual.getvalue() == expected.getvalue()
+    expected = BytesIO()
+    process_stream(source.read_text().splitlines(True), expected, output_format=OutputFormat('f64'))
+    actual = BytesIO()
+    process_stream_parallel(str(source), actual, 3, output_format=OutputFormat('f64'))
+    assert actual.getvalue() == expected.getvalue()
+    assert len(actual.getvalue()) == 500 * 8
+
+
+def test_cli_output_options(tmp_path) -> None:
+    """Test the stream and scan commands write the requested format to a file."""
+    from src.calculator.__main__ import main
+    source = tmp_path / "records.txt"
+    source.write_text(RECORDS)
+    target = tmp_path / "results.jsonl"
+    with patch('sys.argv', ['calculator', '--stream', str(source), '--format', 'jsonl', '--echo',
+                            '--out', str(target)]):
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    rows = [json.loads(line) for line in target.read_text().splitlines()]
+    assert rows[1] == {"input": "divide 1 0", "result": None, "error": ERROR}
+    column = tmp_path / "column.txt"
+    column.write_text("1\n2\n3\n")
+    scan = tmp_path / "scan.f64"
+    with patch('sys.argv', ['calculator', 'cumsum', str(column), '--format', 'f64', '--out', str(scan)]):
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    assert array('d', scan.read_bytes()).tolist() == [1.0, 3.0, 6.0]
+    captured_output = StringIO()
+    with patch('sys.argv', ['calculator', 'eval', '1 / 3', '--precision', '4']):
+        with patch('sys.stdout', captured_output):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert captured_output.getvalue() == "0.3333\n"
@@ -0,0 +1,126 @@
+from array import array
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from src.calculator import add, divide, multiply
+from src.calculator.packed import npy_header, process_file, read_npy_header
+
+
+def _write(path, typecode: str, values: list) -> None:
+    path.write_bytes(array(typecode, values).tobytes())
+
+
+def _read(path, typecode: str) -> list:
+    return array(typecode, path.read_bytes()).tolist()
+
+
+def test_process_raw_float64_file(tmp_path) -> None:
+    """Test raw float64 pairs are processed in chunks with scalar semantics."""
+    pairs = [(1.5, 2.0), (3.0, -4.0), (0.1, 0.2), (1e50, 1e40), (7.0, 3.0)]
+    source = tmp_path / "pairs.f64"
+    target = tmp_path / "results.f64"
+    _write(source, 'd', [value for pair in pairs for value in pair])
+    assert process_file('multiply', str(source), str(target), chunk_size=2) == len(pairs)
+    assert _read(target, 'd') == [multiply(a, b) for a, b in pairs]
+
+
+def test_process_raw_int64_file_stays_exact(tmp_path) -> None:
+    """Test int64 inputs produce exact int64 results, and float64 for divide."""
+    source = tmp_path / "pairs.i64"
+    _write(source, 'q', [2**53 + 1, 1, -7, 3])
+    target = tmp_path / "sum.i64"
+    process_file('add', str(source), str(target), dtype='i64')
+    assert _read(target, 'q') == [2**53 + 2, -4]
+    quotient = tmp_path / "quotient.f64"
+    process_file('divide', str(source), str(quotient), dtype='i64')
+    assert _read(quotient, 'd') == [divide(2**53 + 1, 1), divide(-7, 3)]
+
+
+def test_process_npy_files(tmp_path) -> None:
+    """Test .npy input and output are handled through their headers."""
+    source = tmp_path / "pairs.npy"
+    values = array('d', [1.0, 2.0, 3.0, 4.0])
+    source.write_bytes(npy_header('d', (2, 2)) + values.tobytes())
+    target = tmp_path / "results.npy"
+    process_file('add', str(source), str(target))
+    data = target.read_bytes()
+    typecode, shape, offset = read_npy_header(data)
+    assert (typecode, shape) == ('d', (2,))
+    assert offset % 64 == 0
+    assert array('d', data[offset:]).tolist() == [add(1.0, 2.0), add(3.0, 4.0)]
+
+
+def test_npy_files_match_numpy(tmp_path) -> None:
+    """Test the .npy reader and writer agree with NumPy when it is installed."""
+    np = pytest.importorskip("numpy")
+    source = tmp_path / "pairs.npy"
+    np.save(source, np.array([[6.0, 7.0], [1.0, 4.0]]))
+    target = tmp_path / "results.npy"
+    process_file('divide', str(source), str(target))
+    assert np.load(target).tolist() == [6.0 / 7.0, 0.25]
+
+
+def test_process_file_errors(tmp_path) -> None:
+    """Test zero division, overflow and layout errors."""
+    source = tmp_path / "pairs.f64"
+    _write(source, 'd', [1.0, 0.0])
+    with pytest.raises(ZeroDivisionError):
+        process_file('divide', str(source), str(tmp_path / "out.f64"))
+    _write(source, 'd', [1e60, 1e60])
+    with pytest.raises(OverflowError):
+        process_file('multiply', str(source), str(tmp_path / "out.f64"))
+    source.write_bytes(b"\x00" * 12)
+    with pytest.raises(ValueError, match="16-byte"):
+        process_file('add', str(source), str(tmp_path / "out.f64"))
+    with pytest.raises(ValueError, match="Unknown operation"):
+        process_file('power', str(source), str(tmp_path / "out.f64"))
+
+
+def test_process_empty_file(tmp_path) -> None:
+    """Test an empty input produces an empty output."""
+    source = tmp_path / "pairs.f64"
+    source.write_bytes(b"")
+    target = tmp_path / "results.f64"
+    assert process_file('add', str(source), str(target)) == 0
+    assert target.read_bytes() == b""
+
+
+def test_cli_batch_command(tmp_path) -> None:
+    """Test 'python -m calculator batch --op ... --in ... --out ...'."""
+    source = tmp_path / "pairs.f64"
+    target = tmp_path / "results.f64"
+    _write(source, 'd', [6.0, 7.0])
+    with patch('sys.argv', ['calculator', 'batch', '--op', 'multiply', '--in', str(source), '--out', str(target)]):
+        from src.calculator.__main__ import main
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    assert _read(target, 'd') == [42.0]
+
+
+def test_cli_batch_command_error(tmp_path) -> None:
+    """Test batch errors are reported on stderr."""
+    source = tmp_path / "pairs.f64"
+    _write(source, 'd', [1.0, 0.0])
+    with patch('sys.argv', ['calculator', 'batch', '--op', 'divide', '--in', str(source), '--out', str(tmp_path / "r")]):
+        from src.calculator.__main__ import main
+        captured_output = StringIO()
+        with patch('sys.stderr', captured_output):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 1
+    assert "Cannot divide by zero" in captured_output.getvalue()
+
+
+def test_cli_chunk_size_must_be_positive(tmp_path) -> None:
+    """Test a --chunk-size below 1 is rejected when the arguments are parsed."""
+    from src.calculator.__main__ import main
+    for command in (['batch', '--op', 'add', '--in', 'p', '--out', 'r'], ['--stream'],
+                    ['coordinator', '--op', 'add', '--in', 'p', '--out', 'r']):
+        captured_output = StringIO()
+        with patch('sys.argv', ['calculator', *command, '--chunk-size', '0']):
+            with patch('sys.stderr', captured_output):
+                with pytest.raises(SystemExit) as exit_info:
+                    main()
+        assert exit_info.value.code == 2
+        assert "--chunk-size must be at least 1" in captured_output.getvalue()
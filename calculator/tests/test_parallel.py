@@ -0,0 +1,120 @@
+from array import array
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from src.calculator.packed import process_file
+from src.calculator.parallel import (
+    ShardError,
+    line_shards,
+    process_file_parallel,
+    process_stream_parallel,
+    split_range,
+)
+from src.calculator.stream import process_stream
+
+
+def test_split_range() -> None:
+    """Test ranges are contiguous, ordered and cover everything."""
+    assert split_range(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert split_range(2, 8) == [(0, 1), (1, 2)]
+    assert split_range(0, 4) == []
+
+
+def test_line_shards_align_to_lines(tmp_path) -> None:
+    """Test byte shards start right after a newline."""
+    path = tmp_path / "records.txt"
+    data = b"".join(f"add {i} {i}\n".encode() for i in range(100))
+    path.write_bytes(data)
+    shards = line_shards(str(path), 4)
+    assert shards[0][0] == 0
+    assert shards[-1][1] == len(data)
+    for (_, stop), (start, _) in zip(shards, shards[1:]):
+        assert stop == start
+        assert data[start - 1:start] == b"\n"
+
+
+def test_process_file_parallel_matches_sequential(tmp_path) -> None:
+    """Test sharded batch output is byte-identical to the sequential run."""
+    source = tmp_path / "pairs.f64"
+    source.write_bytes(array('d', (i * 0.75 - 20.0 for i in range(2001 * 2))).tobytes())
+    sequential = tmp_path / "sequential.f64"
+    sharded = tmp_path / "sharded.f64"
+    process_file('multiply', str(source), str(sequential))
+    shards = process_file_parallel('multiply', str(source), str(sharded), workers=3, chunk_size=100)
+    assert [(s.start, s.stop) for s in shards] == [(0, 667), (667, 1334), (1334, 2001)]
+    assert sharded.read_bytes() == sequential.read_bytes()
+
+
+def test_process_file_parallel_reports_shard_errors(tmp_path) -> None:
+    """Test a failing shard is reported with its range."""
+    values = [1.0, 1.0] * 10
+    values[15] = 0.0
+    source = tmp_path / "pairs.f64"
+    source.write_bytes(array('d', values).tobytes())
+    with pytest.raises(ShardError) as error:
+        process_file_parallel('divide', str(source), str(tmp_path / "out.f64"), workers=2)
+    assert [failure.index for failure in error.value.failures] == [1]
+    assert "ZeroDivisionError: Cannot divide by zero" in str(error.value)
+
+
+def test_process_stream_parallel_matches_sequential(tmp_path) -> None:
+    """Test sharded stream output, including error line numbers, is unchanged."""
+    lines = [f"{'add' if i % 3 else 'divide'} {i} {i % 5}\n" for i in range(300)]
+    lines[42] = "bogus line\n"
+    lines[100] = "\n"
+    path = tmp_path / "records.txt"
+    path.write_text("".join(lines))
+    expected = StringIO()
+    expected_stats = process_stream(lines, expected)
+    actual = StringIO()
+    stats = process_stream_parallel(str(path), actual, workers=3)
+    assert actual.getvalue() == expected.getvalue()
+    assert (stats.records, stats.errors) == (expected_stats.records, expected_stats.errors)
+
+
+def test_process_stream_parallel_splits_universal_newlines(tmp_path) -> None:
+    """Test CR and CR LF line endings split and number lines as --stream does, across shard and block edges."""
+    from src.calculator import parallel, stream
+    endings = ["\r", "\r\n", "\n"]
+    lines = [f"{'add' if i % 4 else 'divide'} {i} {i % 3}{endings[i % 3]}" for i in range(200)]
+    lines[77] = "bogus line\r"
+    path = tmp_path / "records.txt"
+    path.write_bytes("".join(lines).encode())
+    with open(path, encoding="utf-8") as f:
+        expected = StringIO()
+        expected_stats = process_stream(f, expected)
+    for workers in (1, 3, 7):
+        actual = StringIO()
+        stats = process_stream_parallel(str(path), actual, workers=workers)
+        assert actual.getvalue() == expected.getvalue()
+        assert (stats.records, stats.errors) == (expected_stats.records, expected_stats.errors)
+    # A CR LF split across read blocks is one line ending
+    with patch.object(parallel, '_SCAN_BLOCK', 2), patch.object(stream, '_READ_BLOCK', 2):
+        assert parallel._count_lines(str(path), 0, path.stat().st_size) == 200
+        assert list(parallel._iter_lines(str(path), 0, path.stat().st_size)) == "".join(lines).splitlines(True)
+
+
+def test_cli_stream_workers_require_file() -> None:
+    """Test '--stream --workers' refuses to read stdin."""
+    with patch('sys.argv', ['calculator', '--stream', '--workers', '2']):
+        from src.calculator.__main__ import main
+        captured_output = StringIO()
+        with patch('sys.stderr', captured_output):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 2
+    assert "requires an input file" in captured_output.getvalue()
+
+
+def test_cli_batch_workers(tmp_path) -> None:
+    """Test 'batch --workers N' produces the same results file."""
+    source = tmp_path / "pairs.f64"
+    target = tmp_path / "results.f64"
+    source.write_bytes(array('d', [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]).tobytes())
+    with patch('sys.argv', ['calculator', 'batch', '--op', 'add', '--in', str(source),
+                            '--out', str(target), '--workers', '2']):
+        from src.calculator.__main__ import main
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    assert array('d', target.read_bytes()).tolist() == [3.0, 7.0, 11.0]
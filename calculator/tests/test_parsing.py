@@ -0,0 +1,69 @@
+from array import array
+import io
+import pytest
+from unittest.mock import patch
+from src.calculator import parsing
+
+
+def test_float_column() -> None:
+    """Test a float column becomes array('d'), skipping blank lines."""
+    values = parsing.parse_column(b"1.5\n-2e3\n\n0.1\r\n")
+    assert values == array('d', [1.5, -2000.0, 0.1])
+
+
+def test_integer_column_stays_exact() -> None:
+    """Test integer columns become array('q'), or a list of ints beyond 64 bits."""
+    assert parsing.parse_column(b"1\n-2\n+3\n") == array('q', [1, -2, 3])
+    big = 2**70 + 1
+    assert parsing.parse_column(f"{big}\n1\n".encode()) == [big, 1]
+    assert parsing.parse_column(b"1\n2\n", exact_ints=False) == array('d', [1.0, 2.0])
+    assert parsing.parse_column(b"1\n2.5\n") == array('d', [1.0, 2.5])
+
+
+def test_line_by_line_fallback_matches() -> None:
+    """Test blocks with inline whitespace give the same values as the fast path."""
+    assert parsing.parse_column(b"  1.5 \n\t2\n") == array('d', [1.5, 2.0])
+    assert parsing.parse_column(b" 7\n 8\n") == array('q', [7, 8])
+
+
+def test_errors_name_the_line() -> None:
+    """Test malformed values are reported with their line number."""
+    with pytest.raises(ValueError, match="line 3: Invalid number format"):
+        parsing.parse_column(b"1\n2\nx\n4\n")
+    with pytest.raises(ValueError, match="line 12: Invalid number format"):
+        parsing.parse_column(b"1\n\n1 2\n", first_line=10)
+    with pytest.raises(ValueError, match="line 2: Invalid number format"):
+        parsing.parse_column(b"1\n1-2\n")
+
+
+def test_read_column_blocks_keep_line_numbers() -> None:
+    """Test blocks are cut at line boundaries and errors keep file line numbers."""
+    data = b"".join(f"{i}.25\n".encode() for i in range(1000))
+    blocks = list(parsing.read_column(io.BytesIO(data), block_size=100))
+    assert len(blocks) > 1
+    assert [v for block in blocks for v in block] == [i + 0.25 for i in range(1000)]
+    assert [v for block in parsing.read_column(io.BytesIO(b"1\n2")) for v in block] == [1, 2]
+    with pytest.raises(ValueError, match="line 998: Invalid number format"):
+        list(parsing.read_column(io.BytesIO(data[:-20] + b"bad\n1\n2\n"), block_size=64))
+
+
+def test_cli_sum_file_keeps_integers_exact(tmp_path) -> None:
+    """Test the reduction commands parse text files in bulk, keeping integers exact."""
+    source = tmp_path / "values.txt"
+    source.write_text(f"{2**53}\n1\n1\n")
+    with patch('sys.argv', ['calculator', 'sum', str(source)]):
+        from src.calculator.__main__ import main
+        captured_output = io.StringIO()
+        with patch('sys.stdout', captured_output):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 0
+    assert captured_output.getvalue().strip() == str(2**53 + 2)
+    source.write_text("1.5\noops\n")
+    with patch('sys.argv', ['calculator', 'sum', str(source)]):
+        captured_error = io.StringIO()
+        with patch('sys.stderr', captured_error):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 1
+    assert "line 2: Invalid number format" in captured_error.getvalue()
@@ -0,0 +1,113 @@
+import threading
+import pytest
+from src.calculator import (
+    DeferredRangeError,
+    add,
+    check_deferred,
+    divide,
+    get_policy,
+    multiply,
+    set_policy,
+    validation,
+)
+from src.calculator import batch
+
+
+def test_default_policy_is_strict() -> None:
+    """Test the process starts with today's strict behavior."""
+    assert get_policy() == "strict"
+    with pytest.raises(TypeError):
+        add("1", 2)
+
+
+def test_trusted_policy_skips_type_checks() -> None:
+    """Test the trusted policy skips isinstance checks but keeps range checks."""
+    assert add([1], [2], policy="trusted") == [1, 2]
+    with validation("trusted"):
+        assert get_policy() == "trusted"
+        assert add("a", "b") == "ab"
+        with pytest.raises(OverflowError):
+            multiply(1e60, 1e60)
+    assert get_policy() == "strict"
+
+
+def test_deferred_policy_reports_at_block_exit() -> None:
+    """Test range violations are collected and raised once at the end."""
+    with pytest.raises(DeferredRangeError) as error:
+        with validation("deferred") as log:
+            assert multiply(1e60, 1e60) == 1e60 * 1e60
+            assert add(1, 2) == 3
+            assert add(float('inf'), 1) == float('inf')
+            assert len(log) == 2
+    assert isinstance(error.value, OverflowError)
+    assert len(error.value.violations) == 2
+    assert "2 result(s) out of range" in str(error.value)
+
+
+def test_deferred_policy_keeps_other_errors() -> None:
+    """Test type and zero-division errors are still raised immediately."""
+    with validation("deferred"):
+        with pytest.raises(ZeroDivisionError):
+            divide(1, 0)
+        with pytest.raises(TypeError):
+            add("1", 2)
+
+
+def test_process_wide_deferred_policy() -> None:
+    """Test set_policy() changes the default and check_deferred() reports."""
+    set_policy("deferred")
+    try:
+        assert multiply(1e60, 1e60) == 1e60 * 1e60
+        with pytest.raises(DeferredRangeError):
+            check_deferred()
+        check_deferred()
+    finally:
+        set_policy("strict")
+
+
+def test_unknown_policy() -> None:
+    """Test unknown policy names are rejected."""
+    with pytest.raises(ValueError, match="Unknown validation policy"):
+        set_policy("lenient")
+    with pytest.raises(ValueError):
+        with validation("lenient"):
+            pass
+    from src.calculator import fixed, subtract
+    for call in (add, subtract, multiply, divide, fixed.add, fixed.subtract, fixed.multiply, fixed.divide):
+        with pytest.raises(ValueError, match="Unknown validation policy 'trustd'"):
+            call(1, "2", policy="trustd")
+    for call in (batch.add, fixed.batch_add):
+        with pytest.raises(ValueError, match="Unknown validation policy"):
+            call([1], [2], policy="trustd")
+
+
+def test_policies_are_context_local() -> None:
+    """Test a block in one thread does not affect another thread."""
+    entered = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def worker() -> None:
+        with validation("trusted"):
+            entered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    entered.wait(5)
+    seen.append(get_policy())
+    release.set()
+    thread.join()
+    assert seen == ["strict"]
+
+
+def test_batch_policies() -> None:
+    """Test the batch functions honor the same policies."""
+    with pytest.raises(TypeError):
+        batch.add([1, "2"], [1, 2])
+    assert list(batch.add([1, 2], [3, 4], policy="trusted")) == [4, 6]
+    with pytest.raises(DeferredRangeError) as error:
+        with validation("deferred"):
+            result = batch.multiply([1e60, 2.0, 1e70], [1e60, 3.0, 1e70])
+            assert list(result) == [1e60 * 1e60, 6.0, 1e70 * 1e70]
+    assert len(error.value.violations) == 2
@@ -0,0 +1,65 @@
+import pstats
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from src.calculator import profiling
+from src.calculator.__main__ import main
+
+
+def test_phase_of() -> None:
+    """Test functions are assigned to pipeline phases by module and name."""
+    package = profiling._PACKAGE_DIR
+    assert profiling.phase_of(f"{package}/stream.py", "evaluate_record") == 'parse'
+    assert profiling.phase_of(f"{package}/__init__.py", "_validate_number") == 'validate'
+    assert profiling.phase_of(f"{package}/__init__.py", "divide") == 'compute'
+    assert profiling.phase_of(f"{package}/limits.py", "check") == 'range-check'
+    assert profiling.phase_of(f"{package}/stream.py", "process_stream") == 'format'
+    assert profiling.phase_of("~", "<method 'write' of '_io.TextIOWrapper' objects>") == 'write'
+    assert profiling.phase_of("~", "<built-in method builtins.isinstance>") == 'validate'
+    assert profiling.phase_of("/usr/lib/python3.12/argparse.py", "parse_args") == 'parse'
+    assert profiling.phase_of(f"{package}/__main__.py", "main") == 'other'
+
+
+def test_run_reports_phases_and_allocations(tmp_path) -> None:
+    """Test a stream run is profiled in-process with its output intact."""
+    source = tmp_path / "records.txt"
+    source.write_text("".join(f"add {i} 0.5\n" for i in range(500)))
+    captured_output = StringIO()
+    with patch('sys.stdout', captured_output):
+        report = profiling.run(main, ['--stream', str(source)], stats_path=str(tmp_path / "run.pstats"),
+                               top=5, allocations=3)
+    assert captured_output.getvalue().splitlines()[:2] == ["0.5", "1.5"]
+    assert report.exit_code == 0
+    assert report.phases['parse'] > 0 and report.phases['compute'] > 0 and report.phases['format'] > 0
+    assert report.peak_bytes > 0 and len(report.allocations) == 3
+    assert "evaluate_record" in report.hotspots
+    assert pstats.Stats(str(tmp_path / "run.pstats")).total_calls > 0
+    text = report.format()
+    assert "Time by phase (self time)" in text and "range-check" in text
+    assert "Top allocation sites:" in text
+
+
+def test_cli_profile_single_operation(tmp_path) -> None:
+    """Test 'profile' writes a report and returns the exit status of the profiled command."""
+    report = tmp_path / "report.txt"
+    with patch('sys.argv', ['calculator', 'profile', '--report', str(report), '--allocations', '0',
+                            'divide', '1', '0']):
+        captured_error = StringIO()
+        with patch('sys.stderr', captured_error):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 1
+    assert "Cannot divide by zero" in captured_error.getvalue()
+    text = report.read_text()
+    assert text.startswith("Profile of: calculator divide 1 0\nExit status: 1")
+    assert "Peak traced memory" not in text
+
+
+def test_cli_profile_requires_a_command() -> None:
+    """Test 'profile' refuses to run without a command or on itself."""
+    for argv in (['calculator', 'profile'], ['calculator', 'profile', '--', 'profile', 'add', '1', '2']):
+        captured_error = StringIO()
+        with patch('sys.argv', argv), patch('sys.stderr', captured_error):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+        assert exit_info.value.code == 2
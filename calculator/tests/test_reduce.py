@@ -0,0 +1,183 @@
+from array import array
+import math
+import random
+import pytest
+from fractions import Fraction
+from io import StringIO
+from unittest.mock import patch
+from src.calculator import reduce
+from src.calculator.packed import read_npy_header
+
+
+def _values(count: int, seed: int = 7) -> list[float]:
+    rng = random.Random(seed)
+    return [rng.uniform(-1.0, 1.0) * 10.0 ** rng.randint(-12, 12) for _ in range(count)]
+
+
+def test_sum_is_correctly_rounded() -> None:
+    """Test the sum equals the exact sum rounded once."""
+    values = _values(3 * reduce.BLOCK_SIZE + 17)
+    assert reduce.sum(values) == float(sum(map(Fraction, values))) == math.fsum(values)
+    assert reduce.sum([0.1] * 10) == 1.0
+    assert reduce.sum([1e16, 1.0, -1e16]) == 1.0
+
+
+def test_sum_of_ints_is_exact() -> None:
+    """Test integer inputs give an exact integer sum; mixing in a float gives a float."""
+    assert reduce.sum([2**60, 1, -(2**60)]) == 1
+    assert isinstance(reduce.sum(range(10)), int)
+    assert reduce.sum([1, 2, 0.5]) == 3.5
+    assert reduce.sum([]) == 0
+
+
+def test_sum_accepts_buffers() -> None:
+    """Test array.array and memoryview inputs."""
+    values = array('d', _values(20000))
+    assert reduce.sum(values) == math.fsum(values)
+    assert reduce.sum(memoryview(values)) == math.fsum(values)
+    assert reduce.sum(array('q', [1, 2, 3])) == 6
+
+
+def test_product() -> None:
+    """Test products of floats and exact products of ints."""
+    assert reduce.product([1.5] * 10) == 1.5 ** 10
+    assert reduce.product(range(1, 21)) == math.factorial(20)
+    assert reduce.product([]) == 1
+
+
+def test_scans_match_reductions() -> None:
+    """Test each running value equals the reduction of the prefix."""
+    values = _values(reduce.BLOCK_SIZE + 5)
+    sums = list(reduce.cumsum(values))
+    assert len(sums) == len(values)
+    for i in (0, 1, reduce.BLOCK_SIZE - 1, reduce.BLOCK_SIZE, len(values) - 1):
+        assert sums[i] == math.fsum(values[:i + 1])
+    assert list(reduce.cumsum([1, 2, 0.5, 1])) == [1, 3, 3.5, 4.5]
+    assert list(reduce.cumprod([2, 3, 0.5])) == [2, 6, 3.0]
+    products = list(reduce.cumprod([1.0001] * (reduce.BLOCK_SIZE + 3)))
+    assert products[-1] == reduce.product([1.0001] * (reduce.BLOCK_SIZE + 3))
+
+
+def test_non_finite_values() -> None:
+    """Test NaN propagates and infinities overflow, as when folding add."""
+    assert math.isnan(reduce.sum([1.0, math.nan, math.inf]))
+    assert [str(v) for v in reduce.cumsum([1.0, math.nan, 2.0])] == ["1.0", "nan", "nan"]
+    with pytest.raises(OverflowError, match="Result inf is too large"):
+        reduce.sum([1.0, math.inf])
+    with pytest.raises(OverflowError, match="Result -inf is too large"):
+        list(reduce.cumsum([1.0, 2.0, -math.inf]))
+
+
+def test_overflow_checked_per_block() -> None:
+    """Test the running total is range-checked at block boundaries and scans check every value."""
+    with pytest.raises(OverflowError, match="is too large"):
+        reduce.sum([1e99] * (2 * reduce.BLOCK_SIZE))
+    with pytest.raises(OverflowError, match="is too large"):
+        list(reduce.cumsum([6e99, 6e99]))
+    with pytest.raises(OverflowError, match="is too large"):
+        reduce.product([1e60, 1e60])
+
+
+def test_products_crossing_the_float_range_between_blocks(tmp_path) -> None:
+    """Test products whose blocks underflow or overflow on their own still give the finite result."""
+    filler = [1.0] * (reduce.BLOCK_SIZE - 2)
+    cases = [
+        ([1e-200] * 2 + filler + [1e200] * 2, 1.0),
+        ([1e-300] + filler + [1.0, 1e200, 1e199], 1e99),
+        ([1e-300] * 2 + [1e300] * 2 + filler, 1.0),
+    ]
+    for values, expected in cases:
+        assert reduce.product(values) == pytest.approx(expected, rel=1e-15)
+        running = list(reduce.cumprod(values))
+        assert running[-1] == reduce.product(values)
+        assert running[1] == reduce.product(values[:2])
+        source = tmp_path / "values.f64"
+        source.write_bytes(array('d', values).tobytes())
+        assert {reduce.reduce_file('product', str(source), workers=w) for w in (1, 2)} == {reduce.product(values)}
+        for workers in (1, 2):
+            reduce.scan_file('cumprod', str(source), str(tmp_path / f"scan-{workers}.f64"), workers=workers)
+            assert array('d', (tmp_path / f"scan-{workers}.f64").read_bytes()).tolist() == running
+    with pytest.raises(OverflowError, match="is too large"):
+        reduce.product([1e60] + filler + [1.0, 1e60])
+
+
+def test_type_errors() -> None:
+    """Test non-numbers are rejected."""
+    with pytest.raises(TypeError):
+        reduce.sum([1, "2"])
+    with pytest.raises(TypeError):
+        reduce.sum("123")
+    with pytest.raises(ValueError, match="line 2: Invalid number format"):
+        reduce.sum(reduce.text_values(["1\n", "x\n"]))
+
+
+def test_file_results_do_not_depend_on_workers(tmp_path) -> None:
+    """Test file reductions and scans give identical results for any shard count."""
+    values = _values(5 * reduce.BLOCK_SIZE + 123, seed=3)
+    source = tmp_path / "values.f64"
+    source.write_bytes(array('d', values).tobytes())
+    totals = {reduce.reduce_file('sum', str(source), workers=workers) for workers in (1, 2, 3)}
+    assert totals == {math.fsum(values)}
+    factors = tmp_path / "factors.f64"
+    factors.write_bytes(array('d', [1.0 + v * 1e-13 for v in values]).tobytes())
+    products = {reduce.reduce_file('product', str(factors), workers=workers) for workers in (1, 2, 3)}
+    assert len(products) == 1
+    for operation in ('cumsum', 'cumprod'):
+        outputs = set()
+        for workers in (1, 3):
+            target = tmp_path / f"{operation}-{workers}.f64"
+            assert reduce.scan_file(operation, str(factors), str(target), workers=workers) == len(values)
+            outputs.add(target.read_bytes())
+        assert len(outputs) == 1
+    expected = list(reduce.cumsum(array('d', factors.read_bytes())))
+    assert array('d', (tmp_path / "cumsum-3.f64").read_bytes()).tolist() == expected
+
+
+def test_int64_and_npy_files(tmp_path) -> None:
+    """Test int64 columns stay exact and .npy files are read and written."""
+    source = tmp_path / "values.i64"
+    source.write_bytes(array('q', [2**53, 1, 1]).tobytes())
+    assert reduce.reduce_file('sum', str(source), 'i64') == 2**53 + 2
+    target = tmp_path / "running.npy"
+    reduce.scan_file('cumsum', str(source), str(target), 'i64')
+    typecode, shape, offset = read_npy_header(target.read_bytes())
+    assert (typecode, shape) == ('q', (3,))
+    assert array('q', target.read_bytes()[offset:]).tolist() == [2**53, 2**53 + 1, 2**53 + 2]
+
+
+def test_cli_sum_text() -> None:
+    """Test 'sum' reads one number per line from stdin."""
+    with patch('sys.argv', ['calculator', 'sum']), patch('sys.stdin', StringIO("0.1\n0.2\n\n0.3\n")):
+        from src.calculator.__main__ import main
+        captured_output = StringIO()
+        with patch('sys.stdout', captured_output):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 0
+    assert captured_output.getvalue().strip() == "0.6"
+
+
+def test_cli_cumsum_binary(tmp_path) -> None:
+    """Test 'cumsum' on a packed file with workers writes the running sums."""
+    source = tmp_path / "values.f64"
+    source.write_bytes(array('d', [0.1, 0.2, 0.3]).tobytes())
+    target = tmp_path / "running.f64"
+    with patch('sys.argv', ['calculator', 'cumsum', str(source), '--dtype', 'f64',
+                            '--out', str(target), '--workers', '2']):
+        from src.calculator.__main__ import main
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    assert exit_info.value.code == 0
+    assert array('d', target.read_bytes()).tolist() == [0.1, 0.30000000000000004, 0.6]
+
+
+def test_cli_workers_require_binary_input() -> None:
+    """Test '--workers' is refused for text input."""
+    with patch('sys.argv', ['calculator', 'sum', '--workers', '2']):
+        from src.calculator.__main__ import main
+        captured_output = StringIO()
+        with patch('sys.stderr', captured_output):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 2
+    assert "requires a binary input file" in captured_output.getvalue()
@@ -0,0 +1,93 @@
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from src.calculator import add, batch, divide, multiply
+from src.calculator import registry
+from src.calculator.server import handle_json_request
+from src.calculator.stream import evaluate_record
+
+
+@pytest.fixture
+def power():
+    """Register a 'power' operation for the duration of the test."""
+    op = registry.register('power', lambda a, b: a ** b, aliases=('pow', '**'),
+                           description="Exponentiation (num1 ** num2)")
+    yield op
+    registry.unregister('power')
+
+
+def test_builtin_operations() -> None:
+    """Test the built-in operations, their kernels and metadata."""
+    assert [op.name for op in registry.operations()] == ['add', 'subtract', 'multiply', 'divide']
+    op = registry.lookup('add')
+    assert (op.scalar, op.batch, op.arity, op.symbol) == (add, batch.add, 2, '+')
+    assert registry.lookup('divide').float_result
+
+
+def test_aliases_and_case() -> None:
+    """Test names and aliases resolve case-insensitively to the same kernel."""
+    assert registry.lookup('mul') is registry.lookup('MULTIPLY') is registry.lookup('*')
+    assert registry.lookup('div').scalar is divide
+    assert registry.lookup('+').scalar(2, 3) == 5
+    assert registry.get('pow') is None
+
+
+def test_unknown_operation() -> None:
+    """Test unknown names raise ValueError listing the supported operations."""
+    with pytest.raises(ValueError) as error:
+        registry.lookup('Foo')
+    assert str(error.value) == "Unknown operation 'foo'. Supported operations: add, subtract, multiply, divide"
+
+
+def test_register_runtime_operation(power) -> None:
+    """Test a registered operation gets a batch kernel and is found by every entry point."""
+    assert registry.lookup('**') is power
+    assert list(power.batch([2, 3], [3, 2])) == [8, 9]
+    assert evaluate_record("pow 2 10") == 1024.0
+    assert b'"result": 8.0' in handle_json_request(b'{"op": "power", "a": 2.0, "b": 3.0}')
+    with pytest.raises(ValueError, match="differ"):
+        power.batch([1], [1, 2])
+
+
+def test_mapped_batch_passes_the_policy_on() -> None:
+    """Test the batch kernel built for an operation without one hands its policy to the scalar kernel."""
+    policies = []
+
+    def scaled(a, b, *, policy=None):
+        policies.append(policy)
+        return multiply(a, b, policy=policy)
+
+    op = registry.register('scaled', scaled)
+    try:
+        assert list(op.batch([1e60, 2.0], [1e60, 3.0], policy='deferred')) == [1e60 * 1e60, 6.0]
+        assert list(op.batch([2.0], [3.0])) == [6.0]
+    finally:
+        registry.unregister('scaled')
+    assert policies == ['deferred', 'deferred', None]
+
+
+def test_register_conflicts(power) -> None:
+    """Test names and aliases cannot be taken twice unless replacing."""
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register('power', multiply)
+    with pytest.raises(ValueError, match="'mul' is already registered"):
+        registry.register('product', multiply, aliases=('mul',))
+    replaced = registry.register('power', multiply, aliases=('pow',), replace=True)
+    assert registry.lookup('pow') is replaced
+    assert registry.get('**') is None
+
+
+def test_cli_dispatches_through_registry(power) -> None:
+    """Test the CLI accepts aliases, runtime operations and lists them in the help."""
+    from src.calculator.__main__ import main
+    for argv, expected in ((['calculator', 'mul', '3', '4'], "12.0"),
+                           (['calculator', 'pow', '2', '5'], "32.0")):
+        captured_output = StringIO()
+        with patch('sys.argv', argv), patch('sys.stdout', captured_output):
+            main()
+        assert captured_output.getvalue().strip() == expected
+    captured_output = StringIO()
+    with patch('sys.argv', ['calculator', '--help']), patch('sys.stdout', captured_output):
+        with pytest.raises(SystemExit):
+            main()
+    assert "power     - Exponentiation (num1 ** num2) (aliases: pow, **)" in captured_output.getvalue()
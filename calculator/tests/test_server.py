@@ -0,0 +1,200 @@
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from unittest.mock import patch
+from src.calculator import add, divide, registry
+from src.calculator.server import (
+    FRAME_HEADER,
+    STATUS_OK,
+    STATUS_OVERFLOW,
+    STATUS_ZERO_DIVISION,
+    CalculatorServer,
+    decode_response,
+    encode_request,
+    handle_json_request,
+)
+
+
+def test_handle_json_request() -> None:
+    """Test JSON requests are answered with results or error objects."""
+    assert json.loads(handle_json_request(b'{"id": 1, "op": "add", "a": 2, "b": 3}')) == {"id": 1, "result": 5}
+    error = json.loads(handle_json_request(b'{"id": 2, "op": "divide", "a": 1, "b": 0}'))
+    assert error == {"id": 2, "error": {"type": "ZeroDivisionError", "message": "Cannot divide by zero"}}
+    unknown = json.loads(handle_json_request(b'{"id": 3, "op": "pow", "a": 1, "b": 0}'))
+    assert unknown["error"]["type"] == "ValueError"
+    batch = json.loads(handle_json_request(b'{"id": 4, "op": "multiply", "a": [1, 2], "b": [3, 4]}'))
+    assert batch == {"id": 4, "results": [3, 8]}
+
+
+def test_json_never_carries_non_finite_numbers() -> None:
+    """Test NaN and Infinity operands are refused and non-finite results answered with an error."""
+    for line in (b'{"id": 1, "op": "add", "a": NaN, "b": 1}', b'{"id": 1, "op": "add", "a": [1], "b": [-Infinity]}'):
+        error = json.loads(handle_json_request(line))["error"]
+        assert error["type"] == "ValueError" and "is not a valid JSON number" in error["message"]
+    registry.register('nan_of', lambda a, b: math.nan, arity=2)
+    try:
+        response = handle_json_request(b'{"id": 2, "op": "nan_of", "a": 1, "b": 2}')
+    finally:
+        registry.unregister('nan_of')
+    assert json.loads(response) == {"id": 2, "error": {
+        "type": "ValueError", "message": "Result is not a finite number, which JSON cannot represent",
+    }}
+
+
+def test_server_json_lines_pipelined(tmp_path) -> None:
+    """Test pipelined JSON-lines requests are answered in order."""
+    path = str(tmp_path / "calc.sock")
+
+    async def scenario() -> list[dict]:
+        server = CalculatorServer(path)
+        await server.start()
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(
+            b'{"id": 1, "op": "add", "a": 1, "b": 2}\n'
+            b'{"id": 2, "op": "divide", "a": 1, "b": 0}\n'
+            b'{"id": 3, "op": "subtract", "a": 5, "b": 7}\n'
+        )
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in range(3)]
+        writer.close()
+        await server.close()
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert [r["id"] for r in responses] == [1, 2, 3]
+    assert responses[0]["result"] == 3
+    assert responses[1]["error"]["type"] == "ZeroDivisionError"
+    assert responses[2]["result"] == -2
+
+
+def test_server_closes_connections_sending_overlong_lines(tmp_path) -> None:
+    """Test a line longer than the limit is answered with an error and the connection is closed."""
+    path = str(tmp_path / "calc.sock")
+
+    async def scenario() -> list[bytes]:
+        server = CalculatorServer(path)
+        await server.start()
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b'{"id": 1, "op": "add", "a": 1, "b": 2}\n{"id": 2, "op": "add", "a": ' + b"1" * 2000)
+        await writer.drain()
+        lines = [await reader.readline() for _ in range(3)]
+        writer.close()
+        await server.close()
+        return lines
+
+    with patch('src.calculator.server.MAX_LINE_SIZE', 1000):
+        first, error, end = asyncio.run(scenario())
+    assert json.loads(first) == {"id": 1, "result": 3}
+    assert json.loads(error)["error"]["message"] == "Request line is longer than 1000 bytes"
+    assert end == b""
+
+
+def test_server_binary_frames(tmp_path) -> None:
+    """Test binary frames carry batched records with status codes."""
+    path = str(tmp_path / "calc.sock")
+
+    async def scenario() -> list[list[tuple[int, float]]]:
+        server = CalculatorServer(path)
+        await server.start()
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(encode_request([(1, 1.5, 2.0), (4, 1.0, 0.0)]))
+        writer.write(encode_request([(3, 1e60, 1e60), (4, 7.0, 2.0)]))
+        await writer.drain()
+        frames = []
+        for _ in range(2):
+            (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+            frames.append(decode_response(await reader.readexactly(length)))
+        writer.close()
+        await server.close()
+        return frames
+
+    first, second = asyncio.run(scenario())
+    assert first == [(STATUS_OK, 3.5), (STATUS_ZERO_DIVISION, 0.0)]
+    assert second == [(STATUS_OVERFLOW, 0.0), (STATUS_OK, divide(7.0, 2.0))]
+
+
+def test_server_bounded_connections(tmp_path) -> None:
+    """Test connections beyond the limit are refused."""
+    path = str(tmp_path / "calc.sock")
+
+    async def scenario() -> bytes:
+        server = CalculatorServer(path, max_connections=1)
+        await server.start()
+        _, first_writer = await asyncio.open_unix_connection(path)
+        first_writer.write(b'{"id": 1, "op": "add", "a": 1, "b": 1}\n')
+        await first_writer.drain()
+        await asyncio.sleep(0.05)
+        reader, writer = await asyncio.open_unix_connection(path)
+        data = await reader.read()
+        first_writer.close()
+        writer.close()
+        await server.close()
+        return data
+
+    assert asyncio.run(scenario()) == b""
+
+
+def test_server_graceful_shutdown_closes_idle_connections(tmp_path) -> None:
+    """Test close() returns promptly and refuses new connections."""
+    path = str(tmp_path / "calc.sock")
+
+    async def scenario() -> float:
+        server = CalculatorServer(path, shutdown_timeout=10)
+        await server.start()
+        reader, _ = await asyncio.open_unix_connection(path)
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await server.close()
+        assert await reader.read() == b""
+        assert server.connection_count == 0
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 5
+
+
+def test_cli_serve_command(tmp_path) -> None:
+    """Test 'python -m calculator serve' answers requests and exits on SIGTERM."""
+    path = str(tmp_path / "calc.sock")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.calculator", "serve", "--socket", path],
+        cwd=root,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(path)
+            client.sendall(b'{"id": 1, "op": "multiply", "a": 6, "b": 7}\n')
+            assert json.loads(client.makefile("rb").readline()) == {"id": 1, "result": 42}
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+
+
+def test_serve_cleans_up_when_startup_fails(tmp_path) -> None:
+    """Test a failing audit directory leaves no server, metrics writer or wrapped kernel behind."""
+    from src.calculator import audit, metrics
+    from src.calculator.server import serve
+    path = tmp_path / "calc.sock"
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+
+    async def scenario() -> set:
+        with pytest.raises(OSError):
+            await serve(str(path), metrics_path=str(tmp_path / "calc.prom"), audit_directory=str(blocker / "audit"))
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(scenario()) == set()
+    assert not path.exists()
+    assert not metrics.is_enabled() and not audit.is_enabled()
+    assert registry.lookup('add').scalar is add
+    metrics.reset()
@@ -0,0 +1,127 @@
+import pytest
+from src.calculator import add, divide, multiply
+from src.calculator.expr import ExpressionError
+from src.calculator.sheet import CycleError, Sheet
+
+
+def _chain_sheet() -> Sheet:
+    return Sheet({
+        "price": 9.5,
+        "qty": 3,
+        "rate": 0.2,
+        "net": "price * qty",
+        "tax": "net * rate",
+        "total": "net + tax",
+        "label": "qty + 1",
+    })
+
+
+def test_formulas_match_eager_functions() -> None:
+    """Test formula cells hold what the nested eager calls return."""
+    sheet = _chain_sheet()
+    net = multiply(9.5, 3)
+    assert sheet["net"] == net
+    assert sheet["total"] == add(net, multiply(net, 0.2))
+    assert sheet.formula("total") == "net + tax"
+    assert sheet.formula("price") is None
+    assert sheet.precedents("total") == ("net", "tax")
+    assert sheet.dependents("net") == ("tax", "total")
+
+
+def test_long_formulas() -> None:
+    """Test formulas with hundreds of operators evaluate."""
+    sheet = Sheet({"x": 0.5, "total": " + ".join(["x"] * 250)})
+    assert sheet["total"] == 125.0
+
+
+def test_update_recomputes_only_dirty_dependents() -> None:
+    """Test an input change recomputes its dependents once each, in dependency order."""
+    sheet = _chain_sheet()
+    sheet["rate"] = 0.25
+    assert sheet.last_recalculated == ("tax", "total")
+    assert sheet["total"] == add(sheet["net"], multiply(sheet["net"], 0.25))
+    sheet["price"] = 10
+    order = sheet.last_recalculated
+    assert set(order) == {"net", "tax", "total"}
+    assert order.index("net") < order.index("tax") < order.index("total")
+    assert sheet["label"] == 4
+
+
+def test_bulk_update_and_read_many() -> None:
+    """Test a bulk update recalculates shared dependents once and values() reads many cells."""
+    sheet = _chain_sheet()
+    sheet.update({"price": 2, "qty": 5, "rate": 0.5})
+    assert sorted(sheet.last_recalculated) == ["label", "net", "tax", "total"]
+    assert sheet.values(["net", "tax", "total", "label"]) == [10, 5.0, 15.0, 6]
+
+
+def test_replacing_a_formula_rewires_dependencies() -> None:
+    """Test changing a formula drops its old edges and adds the new ones."""
+    sheet = _chain_sheet()
+    sheet["tax"] = "price * 2"
+    assert sheet.dependents("rate") == ()
+    assert sheet["total"] == add(multiply(9.5, 3), multiply(9.5, 2))
+    sheet["rate"] = 1
+    assert sheet.last_recalculated == ()
+    sheet["tax"] = 0
+    assert sheet["total"] == multiply(9.5, 3)
+
+
+def test_cycles_are_rejected() -> None:
+    """Test a formula that would depend on itself is refused and the sheet is unchanged."""
+    sheet = _chain_sheet()
+    with pytest.raises(CycleError, match="net -> tax -> net"):
+        sheet["net"] = "tax + 1"
+    with pytest.raises(CycleError, match="x -> x"):
+        sheet["x"] = "x * 2"
+    with pytest.raises(CycleError):
+        sheet.update({"qty": 4, "a": "b", "b": "a"})
+    assert sheet["qty"] == 3 and "a" not in sheet and "x" not in sheet
+    assert sheet.formula("net") == "price * qty"
+    assert sheet["total"] == add(multiply(9.5, 3), multiply(multiply(9.5, 3), 0.2))
+
+
+def test_invalid_cells_leave_the_sheet_unchanged() -> None:
+    """Test bad names, contents and formulas make the whole update fail."""
+    sheet = _chain_sheet()
+    with pytest.raises(ValueError, match="Invalid cell name"):
+        sheet.update({"qty": 7, "2x": 1})
+    with pytest.raises(TypeError):
+        sheet.update({"qty": 7, "price": None})
+    with pytest.raises(ExpressionError):
+        sheet["net"] = "price *"
+    assert sheet["qty"] == 3
+    assert sheet["net"] == multiply(9.5, 3)
+
+
+def test_errors_are_stored_and_propagate() -> None:
+    """Test overflow and division by zero surface on read, for the cell and its dependents."""
+    sheet = Sheet({"a": 1, "b": 0, "ratio": "a / b", "scaled": "ratio * 2", "other": "a + 1"})
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+        sheet["ratio"]
+    with pytest.raises(ZeroDivisionError):
+        sheet.values(["other", "scaled"])
+    assert sheet["other"] == 2
+    sheet["b"] = 4
+    assert sheet.values(["ratio", "scaled"]) == [divide(1, 4), multiply(divide(1, 4), 2)]
+    sheet["a"] = 1e60
+    sheet["b"] = 1e-60
+    with pytest.raises(OverflowError):
+        sheet["scaled"]
+
+
+def test_missing_and_removed_cells() -> None:
+    """Test formulas over undefined cells fail until the cell exists."""
+    sheet = Sheet({"y": "x + 1"})
+    with pytest.raises(ExpressionError, match="Undefined variable 'x'"):
+        sheet["y"]
+    sheet["x"] = 41
+    assert sheet["y"] == 42
+    del sheet["x"]
+    with pytest.raises(ExpressionError):
+        sheet["y"]
+    with pytest.raises(KeyError, match="Undefined cell 'x'"):
+        sheet["x"]
+    with pytest.raises(KeyError):
+        del sheet["x"]
+    assert list(sheet) == ["y"] and len(sheet) == 1
@@ -0,0 +1,67 @@
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from src.calculator import add, divide
+from src.calculator.stream import evaluate_record, process_stream
+
+
+def test_evaluate_record() -> None:
+    """Test a single record is parsed like the CLI arguments."""
+    assert evaluate_record("add 5 3") == add(5.0, 3.0)
+    assert evaluate_record("DIVIDE 10 4\n") == divide(10.0, 4.0)
+
+
+def test_evaluate_record_errors() -> None:
+    """Test malformed records raise instead of exiting."""
+    with pytest.raises(ValueError, match="Unknown operation"):
+        evaluate_record("power 2 3")
+    with pytest.raises(ValueError, match="Invalid number format"):
+        evaluate_record("add abc 3")
+    with pytest.raises(ValueError, match="Expected"):
+        evaluate_record("add 1")
+    with pytest.raises(ZeroDivisionError):
+        evaluate_record("divide 1 0")
+
+
+def test_process_stream_writes_one_row_per_record() -> None:
+    """Test results and per-line error records keep input order."""
+    source = StringIO("add 1 2\n\nfoo 1 2\ndivide 1 0\nmultiply 2 2.5\n")
+    output = StringIO()
+    stats = process_stream(source, output, chunk_size=2)
+    assert output.getvalue().splitlines() == [
+        "3.0",
+        "error: line 3: Unknown operation 'foo'. Supported operations: add, subtract, multiply, divide",
+        "error: line 4: Cannot divide by zero",
+        "5.0",
+    ]
+    assert stats.records == 4
+    assert stats.errors == 2
+
+
+def test_cli_stream_mode_from_stdin() -> None:
+    """Test 'python -m calculator --stream' reads records from stdin."""
+    with patch('sys.argv', ['calculator', '--stream']):
+        from src.calculator.__main__ import main
+        captured_output = StringIO()
+        with patch('sys.stdin', StringIO("subtract 10 4\nadd 1 x\n")):
+            with patch('sys.stdout', captured_output):
+                with pytest.raises(SystemExit) as exit_info:
+                    main()
+        assert exit_info.value.code == 0
+        assert captured_output.getvalue().splitlines() == [
+            "6.0",
+            "error: line 2: Invalid number format",
+        ]
+
+
+def test_cli_stream_mode_from_file(tmp_path) -> None:
+    """Test streaming records from a file path."""
+    path = tmp_path / "records.txt"
+    path.write_text("multiply 6 7\n")
+    with patch('sys.argv', ['calculator', '--stream', str(path)]):
+        from src.calculator.__main__ import main
+        captured_output = StringIO()
+        with patch('sys.stdout', captured_output):
+            with pytest.raises(SystemExit):
+                main()
+        assert captured_output.getvalue() == "42.0\n"
@@ -0,0 +1,129 @@
+from fractions import Fraction
+from io import StringIO
+import math
+import random
+import pytest
+from unittest.mock import patch
+from src.calculator import window
+from src.calculator.window import RollingMax, RollingMean, RollingMin, RollingProduct, RollingSum, rolling
+
+
+def _exact_product(values: list) -> float | int:
+    product = math.prod(map(Fraction, values))
+    return float(product) if any(isinstance(v, float) for v in values) else int(product)
+
+
+REFERENCES = {
+    'sum': lambda values: math.fsum(values) if any(isinstance(v, float) for v in values) else sum(values),
+    'mean': lambda values: float(sum(map(Fraction, values)) / len(values)),
+    'product': _exact_product,
+    'min': min,
+    'max': max,
+}
+
+
+@pytest.mark.parametrize("operation", list(window.WINDOWS))
+def test_count_windows_match_recomputing(operation) -> None:
+    """Test every aggregate equals recomputing the whole window, bit for bit, across ints, floats and zeros."""
+    rng = random.Random(operation)
+    big = 1e40 if operation != 'product' else 1e25
+    values = [rng.choice([rng.uniform(-1e3, 1e3), rng.randrange(-50, 50), 0, 0.0, 0.5, big, -big, 5e-324])
+              for _ in range(1500)]
+    for size in (1, 4, 25):
+        results = []
+        aggregate = window.WINDOWS[operation](size)
+        for i, value in enumerate(values):
+            try:
+                results.append(aggregate.push(value))
+            except OverflowError:
+                results.append(None)
+            assert len(aggregate) == min(i + 1, size)
+        for i, result in enumerate(results):
+            if result is None:
+                continue
+            expected = REFERENCES[operation](values[max(0, i - size + 1):i + 1])
+            assert type(result) is type(expected)
+            if operation == 'product':
+                assert result == expected or math.isclose(result, expected, rel_tol=1e-12)
+            else:
+                assert result == expected
+
+
+def test_sum_does_not_drift() -> None:
+    """Test large values leaving the window do not wipe out the small ones."""
+    total = RollingSum(3)
+    for value in (0.1, 1e20, 0.2, -1e20):
+        total.push(value)
+    assert total.push(0.3) == math.fsum([0.2, -1e20, 0.3])
+    assert total.push(0.0) == math.fsum([-1e20, 0.3, 0.0])
+    assert total.push(0.4) == math.fsum([0.3, 0.0, 0.4])
+    assert RollingMean(2).push(3) == 3.0
+
+
+def test_time_windows() -> None:
+    """Test time-based windows keep the values of (t - duration, t] and need ordered timestamps."""
+    timestamps = [0, 0.5, 1, 1.5, 2, 4]
+    assert list(rolling('sum', [1, 2, 3, 4, 5, 6], duration=1, timestamps=timestamps)) == [1, 3, 5, 7, 9, 6]
+    assert list(rolling('max', [3, 1, 2, 0, 0, 0], duration=1, timestamps=timestamps)) == [3, 3, 2, 2, 0, 0]
+    peak = RollingMin(duration=10.0)
+    peak.push(5, timestamp=1.0)
+    with pytest.raises(ValueError, match="must not decrease"):
+        peak.push(1, timestamp=0.5)
+    with pytest.raises(ValueError, match="need a timestamp"):
+        peak.push(1)
+    with pytest.raises(ValueError, match="no timestamps"):
+        RollingMax(3).push(1, timestamp=1.0)
+
+
+def test_special_values_and_errors() -> None:
+    """Test NaN poisons a window only while it is inside, and invalid input is rejected."""
+    assert [math.isnan(r) for r in rolling('min', [1.0, math.nan, 2.0, 3.0], 2)] == [False, True, True, False]
+    assert list(rolling('product', [2, 0, 3, 4], 2)) == [2, 0, 0, 12]
+    # A zero product carries the sign of the product taken in floats
+    signs = [math.copysign(1.0, r) for r in rolling('product', [-0.0, 2.0, -3, 0, 1.5, -0.0], 3)]
+    assert signs == [-1.0, -1.0, 1.0, -1.0, -1.0, -1.0]
+    assert signs == [math.copysign(1.0, math.prod(map(float, w))) for w in ([-0.0], [-0.0, 2.0], [-0.0, 2.0, -3],
+                                                               [2.0, -3, 0], [-3, 0, 1.5], [0, 1.5, -0.0])]
+    with pytest.raises(TypeError, match="abstract"):
+        window._BufferedWindow(2)
+    total = RollingSum(2)
+    with pytest.raises(OverflowError):
+        total.push(math.inf)
+    assert len(total) == 0
+    with pytest.raises(OverflowError, match="is too large"):
+        RollingProduct(2).push(10**101)
+    with pytest.raises(TypeError):
+        total.push("1")
+    for args, kwargs in (((), {}), ((0,), {}), ((2,), {'duration': 1.0}), ((None,), {'duration': -1})):
+        with pytest.raises(ValueError):
+            RollingSum(*args, **kwargs)
+    with pytest.raises(ValueError, match="Unknown rolling operation"):
+        rolling('median', [1], 1)
+
+
+def test_cli_rolling(tmp_path) -> None:
+    """Test the rolling command over count- and time-based windows."""
+    from src.calculator.__main__ import main
+    source = tmp_path / "values.txt"
+    source.write_text("1\n2\n3\n4\n")
+    timed = tmp_path / "timed.txt"
+    timed.write_text("0 1\n0.5 2\n2 3\n")
+    for argv, stdin, expected in (
+        (['rolling', '--op', 'sum', '--window', '2', str(source)], "", "1\n3\n5\n7\n"),
+        (['rolling', '--op', 'mean', '--window', '3', '--flush'], "1\n2\n6\n", "1.0\n1.5\n3.0\n"),
+        (['rolling', '--op', 'max', '--duration', '1', str(timed), '--format', 'csv'], "", "result\n1.0\n2.0\n3.0\n"),
+    ):
+        captured_output = StringIO()
+        with patch('sys.argv', ['calculator', *argv]), patch('sys.stdin', StringIO(stdin)):
+            with patch('sys.stdout', captured_output):
+                with pytest.raises(SystemExit) as exit_info:
+                    main()
+        assert exit_info.value.code == 0
+        assert captured_output.getvalue() == expected
+    captured_error = StringIO()
+    with patch('sys.argv', ['calculator', 'rolling', '--op', 'sum', '--duration', '1', str(source)]):
+        with patch('sys.stderr', captured_error):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+    assert exit_info.value.code == 1
+    assert captured_error.getvalue() == "Error: line 1: Expected '<timestamp> <value>', got 1 fields\n"